@@ -0,0 +1,27 @@
+"""Add indexes for unfiltered keyset pagination of trades and signals
+
+Revision ID: 7d2f4b8c1e60
+Revises: a3c9e1f7b2d4
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2f4b8c1e60'
+down_revision = 'a3c9e1f7b2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # /trades and /signals without filters walk (sort column, id) DESC;
+    # filtered lists are covered by the status/symbol indexes
+    op.create_index('ix_trades_open_time_id', 'trades', ['open_time', 'id'])
+    op.create_index('ix_signals_created_at_id', 'signals', ['created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_signals_created_at_id', table_name='signals')
+    op.drop_index('ix_trades_open_time_id', table_name='trades')
@@ -0,0 +1,56 @@
+"""Add latest_quotes holding the newest tick per symbol
+
+Revision ID: a3c9e1f7b2d4
+Revises: f1a6d8e40b93
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c9e1f7b2d4'
+down_revision = 'f1a6d8e40b93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'latest_quotes',
+        sa.Column('symbol', sa.String(), primary_key=True),
+        sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('bid_price', sa.Numeric(30, 8), nullable=False),
+        sa.Column('ask_price', sa.Numeric(30, 8), nullable=False),
+        sa.Column('mid_price', sa.Numeric(30, 8), nullable=False),
+        sa.Column('spread', sa.Numeric(30, 8), nullable=False),
+        sa.Column('spread_pct', sa.Numeric(10, 4), nullable=False),
+        sa.Column('volume_bid', sa.Numeric(40, 8), nullable=True),
+        sa.Column('volume_ask', sa.Numeric(40, 8), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now())
+    )
+    # Seed from the newest stored tick of every symbol
+    op.execute(
+        """
+        INSERT INTO latest_quotes (symbol, timestamp, bid_price, ask_price, mid_price,
+                                   spread, spread_pct, volume_bid, volume_ask)
+        SELECT symbol, timestamp, bid_price, ask_price, mid_price,
+               spread, spread_pct, volume_bid, volume_ask
+        FROM historical_prices
+        WHERE id IN (
+            SELECT MAX(hp.id)
+            FROM historical_prices hp
+            JOIN (
+                SELECT symbol, MAX(timestamp) AS timestamp
+                FROM historical_prices
+                GROUP BY symbol
+            ) newest ON newest.symbol = hp.symbol AND newest.timestamp = hp.timestamp
+            GROUP BY hp.symbol
+        )
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('latest_quotes')
@@ -0,0 +1,43 @@
+"""Add unique index on price_history candles
+
+Revision ID: b7c2e4a91d03
+Revises: 662677949e7f
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c2e4a91d03'
+down_revision = '662677949e7f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Remove duplicate candles left by concurrent backfills (keep the oldest row)
+    op.execute(sa.text(
+        """
+        DELETE FROM price_history
+        WHERE id NOT IN (
+            SELECT keep_id FROM (
+                SELECT MIN(id) AS keep_id
+                FROM price_history
+                GROUP BY symbol, timeframe, timestamp
+            ) AS keepers
+        )
+        """
+    ))
+
+    op.create_index(
+        'uq_price_history_symbol_timeframe_ts',
+        'price_history',
+        ['symbol', 'timeframe', 'timestamp'],
+        unique=True
+    )
+
+
+def downgrade():
+    op.drop_index('uq_price_history_symbol_timeframe_ts', table_name='price_history')
@@ -0,0 +1,67 @@
+"""Add composite indexes for hot query shapes
+
+Revision ID: c4d81f2a6b57
+Revises: b7c2e4a91d03
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d81f2a6b57'
+down_revision = 'b7c2e4a91d03'
+branch_labels = None
+depends_on = None
+
+
+def _has_index(table, name):
+    return any(index['name'] == name for index in sa.inspect(op.get_bind()).get_indexes(table))
+
+
+def upgrade():
+    # Open trades (trade monitor tick, open positions); partial where supported
+    op.create_index(
+        'ix_trades_open_symbol_open_time',
+        'trades',
+        ['symbol', 'open_time'],
+        postgresql_where=sa.text("status = 'OPEN'"),
+        sqlite_where=sa.text("status = 'OPEN'")
+    )
+    # /trades list: status and/or symbol filter ordered by open_time
+    op.create_index('ix_trades_status_open_time', 'trades', ['status', 'open_time'])
+    op.create_index(
+        'ix_trades_symbol_status_open_time', 'trades', ['symbol', 'status', 'open_time']
+    )
+    # Trade history: closed trades ordered by close_time
+    op.create_index('ix_trades_status_close_time', 'trades', ['status', 'close_time'])
+
+    # Signal lists and queued-signal recovery
+    op.create_index('ix_signals_status_created_at', 'signals', ['status', 'created_at'])
+    op.create_index('ix_signals_symbol_created_at', 'signals', ['symbol', 'created_at'])
+
+    # Tick queries: symbol filter ordered by timestamp DESC. Its leading
+    # symbol column also serves symbol-only lookups, so the single-column
+    # index create_all made is dropped
+    op.create_index(
+        'ix_historical_prices_symbol_timestamp',
+        'historical_prices',
+        ['symbol', 'timestamp']
+    )
+    if _has_index('historical_prices', 'ix_historical_prices_symbol'):
+        op.drop_index('ix_historical_prices_symbol', table_name='historical_prices')
+
+    # price_history (symbol, timeframe, timestamp) is covered by
+    # uq_price_history_symbol_timeframe_ts from the previous revision
+
+
+def downgrade():
+    op.create_index('ix_historical_prices_symbol', 'historical_prices', ['symbol'])
+    op.drop_index('ix_historical_prices_symbol_timestamp', table_name='historical_prices')
+    op.drop_index('ix_signals_symbol_created_at', table_name='signals')
+    op.drop_index('ix_signals_status_created_at', table_name='signals')
+    op.drop_index('ix_trades_status_close_time', table_name='trades')
+    op.drop_index('ix_trades_symbol_status_open_time', table_name='trades')
+    op.drop_index('ix_trades_status_open_time', table_name='trades')
+    op.drop_index('ix_trades_open_symbol_open_time', table_name='trades')
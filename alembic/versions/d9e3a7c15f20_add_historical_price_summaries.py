@@ -0,0 +1,49 @@
+"""Add historical_price_summaries for downsampled ticks
+
+Revision ID: d9e3a7c15f20
+Revises: c4d81f2a6b57
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9e3a7c15f20'
+down_revision = 'c4d81f2a6b57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'historical_price_summaries',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('symbol', sa.String(), nullable=False),
+        sa.Column('resolution', sa.String(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('open_mid', sa.Numeric(30, 8), nullable=False),
+        sa.Column('high_mid', sa.Numeric(30, 8), nullable=False),
+        sa.Column('low_mid', sa.Numeric(30, 8), nullable=False),
+        sa.Column('close_mid', sa.Numeric(30, 8), nullable=False),
+        sa.Column('avg_mid', sa.Numeric(30, 8), nullable=False),
+        sa.Column('avg_spread_pct', sa.Numeric(10, 4), nullable=False),
+        sa.Column('min_spread_pct', sa.Numeric(10, 4), nullable=False),
+        sa.Column('max_spread_pct', sa.Numeric(10, 4), nullable=False),
+        sa.Column('tick_count', sa.Integer(), nullable=False)
+    )
+    op.create_index(
+        'uq_historical_price_summaries_symbol_resolution_ts',
+        'historical_price_summaries',
+        ['symbol', 'resolution', 'timestamp'],
+        unique=True
+    )
+
+
+def downgrade():
+    op.drop_index(
+        'uq_historical_price_summaries_symbol_resolution_ts',
+        table_name='historical_price_summaries'
+    )
+    op.drop_table('historical_price_summaries')
@@ -0,0 +1,46 @@
+"""Add performance_ledger for per-symbol daily trade rollups
+
+Revision ID: e5b9c3d27a41
+Revises: d9e3a7c15f20
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b9c3d27a41'
+down_revision = 'd9e3a7c15f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'performance_ledger',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('symbol', sa.String(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('closed_trades', sa.Integer(), nullable=False),
+        sa.Column('winning_trades', sa.Integer(), nullable=False),
+        sa.Column('losing_trades', sa.Integer(), nullable=False),
+        sa.Column('total_pnl', sa.Numeric(40, 8), nullable=False),
+        sa.Column('gross_profit', sa.Numeric(40, 8), nullable=False),
+        sa.Column('gross_loss', sa.Numeric(40, 8), nullable=False),
+        sa.Column('hold_seconds', sa.Float(), nullable=False),
+        sa.Column('timed_trades', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now())
+    )
+    op.create_index(
+        'uq_performance_ledger_symbol_day',
+        'performance_ledger',
+        ['symbol', 'day'],
+        unique=True
+    )
+    # Populate from existing closed trades with scripts/rebuild_performance_ledger.py
+
+
+def downgrade():
+    op.drop_index('uq_performance_ledger_symbol_day', table_name='performance_ledger')
+    op.drop_table('performance_ledger')
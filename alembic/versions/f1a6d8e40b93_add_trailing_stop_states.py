@@ -0,0 +1,30 @@
+"""Add trailing_stop_states for persisted trailing-stop water marks
+
+Revision ID: f1a6d8e40b93
+Revises: e5b9c3d27a41
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a6d8e40b93'
+down_revision = 'e5b9c3d27a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'trailing_stop_states',
+        sa.Column('trade_id', sa.Integer(), sa.ForeignKey('trades.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('side', sa.String(), nullable=False),
+        sa.Column('mark', sa.Numeric(30, 8), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now())
+    )
+
+
+def downgrade():
+    op.drop_table('trailing_stop_states')
@@ -50,6 +50,8 @@ from src.api.historical import historical_bp
 from src.api.symbol_sync import symbol_sync_bp
 from src.api.performance import performance_bp
 from src.api.risk import risk_bp
+from src.api.export import export_bp
+from src.api.stream import stream_bp
 from src.ui import ui_bp
 
 
@@ -77,6 +79,13 @@ def create_app(config_name=None):
     # Initialize database
     init_db()
     
+    # Keep the per-symbol performance ledger current from trade events
+    from src.services.performance_ledger_service import get_performance_ledger
+    get_performance_ledger()
+    
+    # Seed latest_quotes from stored ticks if the table is empty
+    _ensure_latest_quotes(app)
+    
     # Configure CORS
     CORS(app, origins=settings.get_cors_origins())
     
@@ -106,6 +115,19 @@ def create_app(config_name=None):
     return app
 
 
+def _ensure_latest_quotes(app):
+    """Rebuild latest_quotes on startup when it has never been filled"""
+    from src.database.session import SessionLocal
+    from src.services.latest_quote_service import ensure_latest_quotes
+    session = SessionLocal()
+    try:
+        ensure_latest_quotes(session)
+    except Exception as e:
+        app.logger.warning(f'[LATEST QUOTES] Startup rebuild skipped: {e}')
+    finally:
+        session.close()
+
+
 def register_blueprints(app):
     """Register all API blueprints and UI routes"""
     # API blueprints
@@ -118,6 +140,8 @@ def register_blueprints(app):
     app.register_blueprint(symbol_sync_bp)
     app.register_blueprint(performance_bp)
     app.register_blueprint(risk_bp)
+    app.register_blueprint(export_bp)
+    app.register_blueprint(stream_bp)
     
     # UI blueprint
     app.register_blueprint(ui_bp)
@@ -190,6 +214,14 @@ if __name__ == '__main__':
     app = create_app()
     settings = get_settings()
     
+    # Persist trailing-stop marks so a restarted monitor resumes them
+    try:
+        from src.services.trailing_state_service import get_trailing_state_store
+        get_trailing_state_store().start()
+        app.logger.info("[OK] Trailing stop state store started")
+    except Exception as e:
+        app.logger.error(f"Failed to start trailing stop state store: {e}")
+    
     # Start trade monitor in background
     try:
         from src.services.trade_monitor_service import get_trade_monitor
@@ -199,6 +231,33 @@ if __name__ == '__main__':
     except Exception as e:
         app.logger.error(f"Failed to start trade monitor: {e}")
     
+    # Start idempotency key purge job
+    try:
+        from src.services.idempotency_service import get_idempotency_purger
+        get_idempotency_purger().start()
+        app.logger.info("[OK] Idempotency key purge job started")
+    except Exception as e:
+        app.logger.error(f"Failed to start idempotency key purge job: {e}")
+    
+    # Start webhook ingestion workers (async ingest mode only)
+    try:
+        from src.services.signal_queue_service import is_async_ingest_enabled
+        if is_async_ingest_enabled():
+            from src.api.webhook import start_ingest_workers
+            start_ingest_workers()
+            app.logger.info("[OK] Webhook ingestion workers started")
+    except Exception as e:
+        app.logger.error(f"Failed to start webhook ingestion workers: {e}")
+    
+    # Stream market data into the shared quote cache
+    try:
+        from src.services.market_feed_service import get_market_feed, is_market_feed_enabled
+        if is_market_feed_enabled():
+            get_market_feed().start()
+            app.logger.info("[OK] Market data feed started")
+    except Exception as e:
+        app.logger.error(f"Failed to start market data feed: {e}")
+    
     # Start price collector in background
     try:
         from src.services.price_collector_service import get_price_collector
@@ -209,6 +268,22 @@ if __name__ == '__main__':
     except Exception as e:
         app.logger.error(f"Failed to start price collector: {e}")
     
+    # Roll collected ticks up into OHLCV candles
+    try:
+        from src.services.ohlcv_aggregator_service import get_ohlcv_aggregator
+        get_ohlcv_aggregator().start()
+        app.logger.info("[OK] OHLCV aggregator started")
+    except Exception as e:
+        app.logger.error(f"Failed to start OHLCV aggregator: {e}")
+    
+    # Downsample and expire old tick data
+    try:
+        from src.services.tick_retention_service import get_tick_retention
+        get_tick_retention().start()
+        app.logger.info("[OK] Tick retention job started")
+    except Exception as e:
+        app.logger.error(f"Failed to start tick retention job: {e}")
+    
     app.run(
         host='0.0.0.0',
         port=5000,
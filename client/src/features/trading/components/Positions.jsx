@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react';
 import axios from 'axios';
 import './Positions.css';
-import { apiClient } from '../../../services/api'
+import { apiClient, apiUrl } from '../../../services/api'
 
 const Positions = () => {
   const [positions, setPositions] = useState([]);
@@ -14,11 +14,32 @@ const Positions = () => {
     fetchPositions();
     
     let interval;
-    if (autoRefresh) {
+    let source;
+    if (autoRefresh && window.EventSource) {
+      // Server-pushed deltas; the browser resumes with Last-Event-ID on reconnect
+      source = new EventSource(apiUrl('/api/stream/live?channels=positions'));
+      source.addEventListener('snapshot', (e) => {
+        setPositions(JSON.parse(e.data).positions || []);
+        setLoading(false);
+        setError(null);
+      });
+      source.addEventListener('position', (e) => {
+        const delta = JSON.parse(e.data);
+        setPositions((current) => {
+          if (delta.op === 'remove') {
+            return current.filter(p => p.id !== delta.id);
+          }
+          const others = current.filter(p => p.id !== delta.position.id);
+          return [...others, delta.position]
+            .sort((a, b) => new Date(b.open_time) - new Date(a.open_time));
+        });
+      });
+    } else if (autoRefresh) {
       interval = setInterval(fetchPositions, 5000); // Refresh every 5 seconds
     }
     
     return () => {
+      if (source) source.close();
       if (interval) clearInterval(interval);
     };
   }, [autoRefresh]);
@@ -0,0 +1,146 @@
+"""
+Benchmark /api/metrics dashboard computation at 10k/100k/1M trades
+
+Reports p50/p99 latency for the old per-row implementation, the
+aggregated queries, and a cached read. Each size is seeded into its own
+throwaway SQLite database unless DATABASE_URL is already set.
+
+Usage:
+    python scripts/benchmark_dashboard_metrics.py [--sizes 10000,100000,1000000]
+        [--repeat 20] [--legacy-max 100000]
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run_size(size: int, repeat: int, legacy: bool):
+    """Seed one database and time the three paths (runs in a subprocess)"""
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import insert, and_
+
+    from src.database.session import SessionLocal, engine
+    from src.models.base import Base, Signal, Trade
+    from src.services.dashboard_metrics_service import (
+        DashboardMetricsCache,
+        compute_dashboard_metrics,
+    )
+
+    Base.metadata.create_all(bind=engine)
+    now = datetime.now()
+    rng = random.Random(size)
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        batch = []
+        for i in range(size):
+            open_price = 100 + rng.random() * 10
+            closed = rng.random() < 0.9
+            batch.append({
+                'action': 'BUY' if i % 2 else 'SELL',
+                'symbol': f"SYM{i % 20}",
+                'quantity': 1,
+                'open_price': open_price,
+                'open_time': now - timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+                'close_price': open_price + rng.uniform(-2, 2) if closed else None,
+                'status': 'CLOSED' if closed else 'OPEN',
+            })
+            if len(batch) == 50000:
+                conn.execute(insert(Trade), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Trade), batch)
+        conn.execute(insert(Signal), [{'status': 'PENDING'}] * 100)
+    seed_seconds = time.perf_counter() - started
+
+    def legacy_metrics(session):
+        # Previous implementation: per-row loads and Python sums
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        today = session.query(Trade).filter(Trade.open_time >= today_start).all()
+        sum((t.close_price or t.open_price) - t.open_price for t in today if t.open_price)
+        weekly = session.query(Trade).filter(Trade.open_time >= today_start - timedelta(days=7)).all()
+        for i in range(7):
+            day_start = today_start - timedelta(days=i)
+            sum((t.close_price or t.open_price) - t.open_price for t in weekly
+                if t.open_time and day_start <= t.open_time < day_start + timedelta(days=1))
+        for i in range(4):
+            start = today_start - timedelta(days=i * 7)
+            trades = session.query(Trade).filter(and_(
+                Trade.open_time >= start - timedelta(days=30),
+                Trade.open_time < start + timedelta(days=7) - timedelta(days=30)
+            )).all()
+            sum((t.close_price or t.open_price) - t.open_price for t in trades if t.open_price)
+        session.query(Signal).count()
+        session.query(Trade).count()
+        session.query(Trade).filter(Trade.status == 'OPEN').count()
+        sum((t.close_price or t.open_price) - t.open_price
+            for t in session.query(Trade).all() if t.open_price)
+
+    def timed(fn, runs):
+        samples = []
+        for _ in range(runs):
+            session = SessionLocal()
+            try:
+                begin = time.perf_counter()
+                fn(session)
+                samples.append((time.perf_counter() - begin) * 1000)
+            finally:
+                session.close()
+        return percentile(samples, 0.5), percentile(samples, 0.99)
+
+    cache = DashboardMetricsCache(ttl_seconds=60)
+    results = {
+        'aggregated': timed(compute_dashboard_metrics, repeat),
+        'cached': timed(lambda s: cache.get(lambda: compute_dashboard_metrics(s)), repeat),
+    }
+    if legacy:
+        results['legacy'] = timed(legacy_metrics, max(3, repeat // 5))
+
+    print(f"{size:>9,} trades (seeded in {seed_seconds:.1f}s)")
+    for name in ('legacy', 'aggregated', 'cached'):
+        if name in results:
+            p50, p99 = results[name]
+            print(f"    {name:<11} p50 {p50:>10.3f}ms   p99 {p99:>10.3f}ms")
+        else:
+            print(f"    {name:<11} skipped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--legacy-max', type=int, default=100000,
+                        help='Skip the legacy path above this many trades')
+    parser.add_argument('--run-size', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_size:
+        run_size(args.run_size, args.repeat, args.run_size <= args.legacy_max)
+        return
+
+    for size in (int(s) for s in args.sizes.split(',')):
+        env = dict(os.environ)
+        if not os.getenv('DATABASE_URL'):
+            db_dir = tempfile.mkdtemp(prefix='metrics-bench-')
+            env['DATABASE_URL'] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--run-size', str(size),
+             '--repeat', str(args.repeat), '--legacy-max', str(args.legacy_max)],
+            env=env, check=True
+        )
+
+
+if __name__ == '__main__':
+    main()
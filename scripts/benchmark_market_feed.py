@@ -0,0 +1,80 @@
+"""
+Benchmark the streaming market feed offline against the replay feed
+
+Streams synthetic orderbook events through MarketFeedClient into the
+market data cache and the event bus, and reports throughput plus two
+latencies:
+- feed lag: how late the client read each event versus the replay
+  schedule (only with a fixed --rate)
+- publish latency: message receipt to a price.updated subscriber
+
+Usage:
+    python scripts/benchmark_market_feed.py [--symbols 5] [--rate 0] [--seconds 5]
+        [--channels l2_updates,v2/ticker]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.event_bus import PRICE_UPDATED, get_event_bus
+from src.services.feed_replay_service import ReplayFeed
+from src.services.market_data_service import MarketDataCache
+from src.services.market_feed_service import L2_CHANNEL, TICKER_CHANNEL, MarketFeedClient
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    if not samples:
+        return 'n/a'
+    pick = lambda p: samples[min(len(samples) - 1, int(p * len(samples)))] * 1000
+    return f"p50 {pick(0.50):.3f}ms  p99 {pick(0.99):.3f}ms  max {samples[-1] * 1000:.3f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--symbols', type=int, default=5)
+    parser.add_argument('--rate', type=float, default=0,
+                        help='orderbook events per second (0 = as fast as possible)')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--channels', default=f"{L2_CHANNEL},{TICKER_CHANNEL}")
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}USD" for i in range(args.symbols)]
+    feed = ReplayFeed(symbols=symbols, rate=args.rate)
+    client = MarketFeedClient(
+        symbols, channels=args.channels.split(','), connect=feed.connect,
+        market_data=MarketDataCache(fetcher=lambda symbol: {'success': False}),
+    )
+
+    latencies = []
+    bus = get_event_bus()
+    on_price = lambda topic, payload: latencies.append(time.perf_counter() - payload['received_at'])
+    bus.subscribe(PRICE_UPDATED, on_price)
+
+    client.start()
+    time.sleep(args.seconds)
+    client.stop()
+    bus.unsubscribe(PRICE_UPDATED, on_price)
+
+    stats = client.get_stats()
+    feed_stats = feed.get_stats()
+    print(f"{args.symbols} symbols, channels {client.channels}, "
+          f"rate {'max' if not args.rate else f'{args.rate:,.0f}/s'}, {args.seconds}s")
+    print(f"    orderbook events       {feed_stats['events']:>10,}  "
+          f"{feed_stats['events'] / args.seconds:>10,.0f}/s")
+    print(f"    messages applied       {stats['messages']:>10,}  "
+          f"{stats['messages'] / args.seconds:>10,.0f}/s")
+    print(f"    quotes published       {stats['quotes_published']:>10,}  "
+          f"{stats['quotes_published'] / args.seconds:>10,.0f}/s")
+    print(f"    gaps / resyncs         {stats['gaps']:>10,} / {stats['resyncs']:,}")
+    if args.rate:
+        lag = feed_stats['send_lag_ms']
+        print(f"    feed lag               p50 {lag['p50']}ms  p99 {lag['p99']}ms  max {lag['max']}ms")
+    print(f"    publish latency        {percentiles(latencies)}")
+
+
+if __name__ == '__main__':
+    main()
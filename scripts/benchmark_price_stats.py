@@ -0,0 +1,113 @@
+"""
+Benchmark /api/historical/stats/<symbol> computations at 1h/24h/7d windows
+
+Compares the old ORM load + Python aggregation with the SQL aggregate over
+raw ticks and the tiered path used by the endpoint. Seeds a throwaway
+SQLite database unless DATABASE_URL is already set.
+
+Usage:
+    python scripts/benchmark_price_stats.py [--tick-seconds 1] [--repeat 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+if not os.getenv('DATABASE_URL'):
+    _db_dir = tempfile.mkdtemp(prefix='stats-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'bench.db')}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+
+from src.database.session import SessionLocal, engine
+from src.models.base import Base, HistoricalPrice
+from src.services.price_stats_service import get_price_stats, raw_price_stats
+from src.services.tick_retention_service import TickRetention
+
+SYMBOL = 'BENCHUSD'
+WINDOWS = [1, 24, 168]
+
+
+def seed(now: datetime, tick_seconds: int):
+    """Insert 7 days of ticks ending at now"""
+    total = 168 * 3600 // tick_seconds
+    start = now - timedelta(hours=168)
+    batch = []
+    with engine.begin() as conn:
+        for i in range(total):
+            mid = 50000 + (i * 37) % 500
+            batch.append({
+                'symbol': SYMBOL,
+                'timestamp': start + timedelta(seconds=i * tick_seconds),
+                'bid_price': mid - 1,
+                'ask_price': mid + 1,
+                'mid_price': mid,
+                'spread': 2,
+                'spread_pct': 2 / mid * 100,
+            })
+            if len(batch) == 50000:
+                conn.execute(insert(HistoricalPrice), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(HistoricalPrice), batch)
+    return total
+
+
+def legacy_stats(session, cutoff):
+    """The previous implementation: load every row and aggregate in Python"""
+    prices = session.query(HistoricalPrice).filter(
+        HistoricalPrice.symbol == SYMBOL,
+        HistoricalPrice.timestamp >= cutoff
+    ).all()
+    mids = [float(p.mid_price) for p in prices]
+    spreads = [float(p.spread_pct) for p in prices]
+    return max(mids), min(mids), sum(mids) / len(mids), sum(spreads) / len(spreads)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tick-seconds', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+
+    started = time.perf_counter()
+    rows = seed(now, args.tick_seconds)
+    print(f"Seeded {rows:,} ticks in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    TickRetention().downsample_symbol(SYMBOL, now=now)
+    print(f"Downsampled in {time.perf_counter() - started:.1f}s\n")
+
+    session = SessionLocal()
+    try:
+        print(f"{'window':>8} {'legacy ORM':>12} {'SQL raw':>12} {'tiered':>12}  tier")
+        for hours in WINDOWS:
+            cutoff = now - timedelta(hours=hours)
+            legacy = timed(lambda: legacy_stats(session, cutoff), args.repeat)
+            raw = timed(lambda: raw_price_stats(session, SYMBOL, cutoff), args.repeat)
+            tiered = timed(lambda: get_price_stats(session, SYMBOL, hours), args.repeat)
+            tier = get_price_stats(session, SYMBOL, hours)['resolution']
+            print(f"{hours:>7}h {legacy:>10.1f}ms {raw:>10.1f}ms {tiered:>10.1f}ms  {tier}")
+    finally:
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
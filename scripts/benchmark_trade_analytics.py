@@ -0,0 +1,103 @@
+"""
+Benchmark trade-flow analytics on a synthetic trade history
+
+Compares the previous per-trade Python loops with the NumPy engine
+behind /api/performance/flows. Trades are generated in memory, so this
+measures the analytics alone, not the database fetch.
+
+Usage:
+    python scripts/benchmark_trade_analytics.py [--trades 1000000] [--repeat 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.trade_analytics_service import TradeFrame, trading_flows
+
+SYMBOLS = np.array([f"SYM{i}USD" for i in range(50)], dtype=object)
+
+
+def synthetic_columns(n: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow().timestamp()
+    open_ts = now - rng.uniform(0, 365 * 86400, n)
+    closed = rng.random(n) < 0.9
+    close_ts = np.where(closed, open_ts + rng.exponential(3 * 3600, n), np.nan)
+    pnl = np.where(closed, rng.normal(2, 40, n), np.nan)
+    return (
+        SYMBOLS[rng.integers(0, len(SYMBOLS), n)],
+        np.where(rng.random(n) < 0.5, 'BUY', 'SELL').astype(object),
+        np.where(closed, 'CLOSED', 'OPEN').astype(object),
+        open_ts,
+        close_ts,
+        pnl,
+    )
+
+
+def legacy_flows(trades):
+    """The previous implementation's loops (hour, weekday, side)"""
+    def breakdown(key):
+        groups = {}
+        for t in trades:
+            k = key(t)
+            g = groups.setdefault(k, {'count': 0, 'wins': 0, 'total_pnl': 0})
+            g['count'] += 1
+            if t[5]:
+                g['total_pnl'] += float(t[5])
+                if t[5] > 0:
+                    g['wins'] += 1
+        for g in groups.values():
+            g['win_rate'] = g['wins'] / g['count'] * 100
+        return groups
+
+    return (
+        breakdown(lambda t: t[3].hour),
+        breakdown(lambda t: t[3].strftime('%A')),
+        breakdown(lambda t: t[1]),
+    )
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--trades', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    columns = synthetic_columns(args.trades)
+    epoch = datetime(1970, 1, 1)
+    rows = [
+        (s, a, st, epoch + timedelta(seconds=o), c, None if np.isnan(p) else p)
+        for s, a, st, o, c, p in zip(*columns)
+    ]
+
+    frame_seconds = timed(lambda: TradeFrame(*columns), args.repeat)
+    frame = TradeFrame(*columns)
+    engine_seconds = timed(lambda: trading_flows(frame), args.repeat)
+    legacy_seconds = timed(lambda: legacy_flows(rows), 1)
+
+    print(f"{args.trades:,} trades")
+    print(f"    legacy loops (hour/day/side)  {legacy_seconds * 1000:>9.1f}ms  "
+          f"{args.trades / legacy_seconds:>13,.0f} trades/s")
+    print(f"    build TradeFrame              {frame_seconds * 1000:>9.1f}ms")
+    print(f"    NumPy flows (all breakdowns)  {engine_seconds * 1000:>9.1f}ms  "
+          f"{args.trades / engine_seconds:>13,.0f} trades/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark the trigger book against a full open-trade scan
+
+Opens N synthetic positions on one symbol in a throwaway SQLite database
+and replays a random walk of price ticks through:
+- RiskManager.check_all_open_trades (query and evaluate every open trade)
+- TriggerBook.triggered + RiskManager.check_positions (range query, then
+  check only the candidates), as the event-driven monitor does
+
+Nothing is closed, so both paths see the same positions on every tick.
+
+Usage:
+    python scripts/benchmark_trigger_book.py [--positions 10000] [--ticks 500]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_DB_DIR = tempfile.mkdtemp(prefix='trigger-book-bench-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+
+from src.database.session import SessionLocal, engine
+from src.models.base import Base, Trade
+from src.services.risk_management_service import RiskManager
+from src.services.trailing_state_service import TrailingStateStore
+from src.services.trigger_book_service import TriggerBook
+
+SYMBOL = 'BENCHUSD'
+
+
+def open_positions(n: int, rng: random.Random):
+    session = SessionLocal()
+    try:
+        for _ in range(n):
+            entry = Decimal(str(round(rng.uniform(99.5, 100.5), 2)))
+            sign = 1 if rng.random() < 0.5 else -1
+            session.add(Trade(
+                action='BUY' if sign > 0 else 'SELL', symbol=SYMBOL,
+                quantity=Decimal('1'), open_price=entry, status='OPEN',
+                stop_loss=entry * (1 - sign * Decimal(rng.randint(2, 40)) / 1000),
+                take_profit=entry * (1 + sign * Decimal(rng.randint(2, 60)) / 1000),
+            ))
+        session.commit()
+    finally:
+        session.close()
+
+
+def random_walk(ticks: int, rng: random.Random):
+    price = 100.0
+    prices = []
+    for _ in range(ticks):
+        price *= 1 + rng.gauss(0, 0.0002)
+        prices.append(Decimal(str(round(price, 2))))
+    return prices
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--positions', type=int, default=10000)
+    parser.add_argument('--ticks', type=int, default=500)
+    args = parser.parse_args()
+    # Per-trade exit warnings would dominate the timings
+    logging.disable(logging.WARNING)
+
+    rng = random.Random(42)
+    Base.metadata.create_all(bind=engine)
+    open_positions(args.positions, rng)
+    prices = random_walk(args.ticks, rng)
+
+    manager = RiskManager(trailing_state=TrailingStateStore())
+    book = TriggerBook(manager)
+    started = time.perf_counter()
+    book.load()
+    load_seconds = time.perf_counter() - started
+
+    scan_hits = 0
+    started = time.perf_counter()
+    for price in prices:
+        scan_hits += len(manager.check_all_open_trades({SYMBOL: price}))
+    scan_seconds = time.perf_counter() - started
+
+    query_seconds = 0.0
+    book_hits = 0
+    candidates = 0
+    started = time.perf_counter()
+    for price in prices:
+        queried = time.perf_counter()
+        triggered = book.triggered(SYMBOL, price)
+        query_seconds += time.perf_counter() - queried
+        candidates += len(triggered)
+        if triggered:
+            with SessionLocal() as db:
+                book_hits += len(manager.check_positions(db, triggered, {SYMBOL: price}))
+    book_seconds = time.perf_counter() - started
+
+    assert book_hits == scan_hits, (book_hits, scan_hits)
+    ticks = len(prices)
+    print(f"{args.positions:,} open positions on {SYMBOL}, {ticks:,} ticks, "
+          f"{scan_hits:,} exit decisions")
+    print(f"    build trigger book            {load_seconds * 1000:>9.1f}ms")
+    print(f"    check_all_open_trades         {scan_seconds / ticks * 1000:>9.3f}ms/tick  "
+          f"{ticks / scan_seconds:>9,.0f} ticks/s")
+    print(f"    trigger book + check          {book_seconds / ticks * 1000:>9.3f}ms/tick  "
+          f"{ticks / book_seconds:>9,.0f} ticks/s  "
+          f"({candidates / ticks:,.1f} candidates/tick)")
+    print(f"    range query alone             {query_seconds / ticks * 1000:>9.3f}ms/tick")
+
+
+if __name__ == '__main__':
+    main()
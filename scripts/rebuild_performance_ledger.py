@@ -0,0 +1,34 @@
+"""
+Rebuild the per-symbol performance ledger from the trades table
+
+Run after deploying the performance_ledger migration, or whenever the
+ledger may have drifted (e.g. trades edited directly in the database).
+
+Usage:
+    python scripts/rebuild_performance_ledger.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.session import SessionLocal
+from src.services.performance_ledger_service import rebuild_ledger
+
+
+def main():
+    session = SessionLocal()
+    try:
+        result = rebuild_ledger(session)
+        session.commit()
+        print(f"[OK] Rebuilt {result['rows']} ledger rows from {result['trades']} closed trades")
+    except Exception as e:
+        session.rollback()
+        print(f"[ERROR] Ledger rebuild failed: {e}")
+        sys.exit(1)
+    finally:
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,12 +3,15 @@ Chart and Market Data API
 Provides OHLCV data, instrument info, and real-time price feeds
 """
 from flask import Blueprint, jsonify, request
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 import logging
-from sqlalchemy import desc, and_
+from sqlalchemy import desc, and_, func, or_, select
 from src.database.session import SessionLocal
-from src.models.base import PriceHistory, AllowedInstrument
+from src.models.base import HistoricalPrice, PriceHistory, AllowedInstrument
+from src.services.latest_quote_service import get_latest_quotes
+from src.services.ohlcv_aggregator_service import tick_timeframe
+from src.services.rolling_stats_service import get_rolling_stats
 
 chart_bp = Blueprint('chart', __name__)
 LOG = logging.getLogger(__name__)
@@ -16,6 +19,9 @@ LOG = logging.getLogger(__name__)
 # Supported timeframes
 VALID_TIMEFRAMES = ['1m', '5m', '15m', '30m', '1h', '4h', '1d', '1w']
 
+# Candle sources: imported (Binance/mock) or aggregated from our own ticks
+CANDLE_SOURCES = ['external', 'tick']
+
 
 @chart_bp.route('/api/chart/instruments', methods=['GET'])
 def get_instruments():
@@ -81,11 +87,14 @@ def get_ohlcv_data():
         - from: Start timestamp (optional) ISO format or Unix timestamp
         - to: End timestamp (optional) ISO format or Unix timestamp
         - limit: Max number of candles (optional, default 500, max 1000)
+        - source: external (default) or tick for candles aggregated from
+          collected ticks (volume 0)
     
     Returns:
         {
             "symbol": "BTCUSDT",
             "timeframe": "1h",
+            "source": "external",
             "data": [
                 {
                     "timestamp": "2025-10-16T10:00:00Z",
@@ -113,6 +122,14 @@ def get_ohlcv_data():
                          f'{", ".join(VALID_TIMEFRAMES)}'
             }), 400
         
+        source = request.args.get('source', 'external')
+        if source not in CANDLE_SOURCES:
+            return jsonify({
+                'error': f'Invalid source. Must be one of: '
+                         f'{", ".join(CANDLE_SOURCES)}'
+            }), 400
+        stored_timeframe = tick_timeframe(timeframe) if source == 'tick' else timeframe
+        
         # Parse optional date range
         from_date = request.args.get('from')
         to_date = request.args.get('to')
@@ -128,7 +145,7 @@ def get_ohlcv_data():
         query = session.query(PriceHistory).filter(
             and_(
                 PriceHistory.symbol == symbol.upper(),
-                PriceHistory.timeframe == timeframe
+                PriceHistory.timeframe == stored_timeframe
             )
         )
         
@@ -184,6 +201,7 @@ def get_ohlcv_data():
         return jsonify({
             'symbol': symbol.upper(),
             'timeframe': timeframe,
+            'source': source,
             'count': len(data),
             'data': data
         }), 200
@@ -220,67 +238,33 @@ def get_latest_price():
         if not symbol:
             return jsonify({'error': 'symbol parameter is required'}), 400
         
-        session = SessionLocal()
-        
-        # Get latest candle
-        latest = session.query(PriceHistory).filter(
-            and_(
-                PriceHistory.symbol == symbol.upper(),
-                PriceHistory.timeframe == timeframe
-            )
-        ).order_by(desc(PriceHistory.timestamp)).first()
+        # 24h window maintained incrementally as candles are written
+        window = get_rolling_stats().candle_stats(symbol.upper(), timeframe)
         
-        if not latest:
+        if not window:
             return jsonify({
                 'error': f'No price data found for {symbol}'
             }), 404
         
-        # Get 24h ago price for change calculation
-        time_24h_ago = latest.timestamp - timedelta(hours=24)
-        price_24h_ago = session.query(PriceHistory).filter(
-            and_(
-                PriceHistory.symbol == symbol.upper(),
-                PriceHistory.timeframe == timeframe,
-                PriceHistory.timestamp >= time_24h_ago
-            )
-        ).order_by(PriceHistory.timestamp).first()
-        
-        # Calculate 24h change percentage
+        # Calculate 24h change percentage from the window's first close
         change_24h = 0
-        if price_24h_ago:
-            old_price = float(price_24h_ago.close_price)
-            new_price = float(latest.close_price)
-            if old_price > 0:
-                change_24h = ((new_price - old_price) / old_price) * 100
-        
-        # Calculate 24h volume (sum of all candles in last 24h)
-        volume_24h_data = session.query(PriceHistory).filter(
-            and_(
-                PriceHistory.symbol == symbol.upper(),
-                PriceHistory.timeframe == timeframe,
-                PriceHistory.timestamp >= time_24h_ago
-            )
-        ).all()
-        
-        volume_24h = sum(float(c.volume) for c in volume_24h_data)
+        old_price = float(window['open'])
+        if old_price > 0:
+            change_24h = ((float(window['close']) - old_price) / old_price) * 100
         
         return jsonify({
             'symbol': symbol.upper(),
-            'price': float(latest.close_price),
-            'timestamp': latest.timestamp.isoformat(),
+            'price': float(window['close']),
+            'timestamp': window['last_ts'].isoformat(),
             'change_24h': round(change_24h, 2),
-            'volume_24h': round(volume_24h, 2),
-            'high_24h': float(max(c.high_price for c in volume_24h_data))
-            if volume_24h_data else float(latest.high_price),
-            'low_24h': float(min(c.low_price for c in volume_24h_data))
-            if volume_24h_data else float(latest.low_price)
+            'volume_24h': round(float(window['volume']), 2),
+            'high_24h': float(window['high']),
+            'low_24h': float(window['low'])
         }), 200
         
     except Exception as e:
         LOG.exception('Error fetching latest price: %s', e)
         return jsonify({'error': str(e)}), 500
-    finally:
-        session.close()
 
 
 @chart_bp.route('/api/chart/multi-symbol-prices', methods=['POST'])
@@ -314,52 +298,51 @@ def get_multi_symbol_prices():
         if not symbols:
             return jsonify({'error': 'symbols array is required'}), 400
         
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
         session = SessionLocal()
-        prices = {}
         
+        # Newest of the tick quote (latest_quotes) and the newest candle, so a
+        # stalled collector doesn't hide fresher candles
+        quotes = get_latest_quotes(session, symbols)
+        candles = {candle.symbol: candle for candle in _latest_candles(session, symbols, timeframe)}
+        latest = {}
         for symbol in symbols:
-            try:
-                # Get latest candle
-                latest = session.query(PriceHistory).filter(
-                    and_(
-                        PriceHistory.symbol == symbol.upper(),
-                        PriceHistory.timeframe == timeframe
-                    )
-                ).order_by(desc(PriceHistory.timestamp)).first()
-                
-                if latest:
-                    # Get 24h ago price
-                    time_24h_ago = latest.timestamp - timedelta(hours=24)
-                    price_24h_ago = session.query(PriceHistory).filter(
-                        and_(
-                            PriceHistory.symbol == symbol.upper(),
-                            PriceHistory.timeframe == timeframe,
-                            PriceHistory.timestamp >= time_24h_ago
-                        )
-                    ).order_by(PriceHistory.timestamp).first()
-                    
-                    change_24h = 0
-                    if price_24h_ago:
-                        old_price = float(price_24h_ago.close_price)
-                        new_price = float(latest.close_price)
-                        if old_price > 0:
-                            change_24h = (
-                                (new_price - old_price) / old_price
-                            ) * 100
-                    
-                    prices[symbol.upper()] = {
-                        'price': float(latest.close_price),
-                        'change_24h': round(change_24h, 2),
-                        'timestamp': latest.timestamp.isoformat()
-                    }
-            except Exception as e:
-                LOG.warning(
-                    'Error fetching price for %s: %s',
-                    symbol, e
-                )
-                prices[symbol.upper()] = {
-                    'error': str(e)
-                }
+            quote, candle = quotes.get(symbol), candles.get(symbol)
+            if quote and (candle is None or _utc(quote.timestamp) >= _utc(candle.timestamp)):
+                latest[symbol] = ('tick', quote.mid_price, quote.timestamp)
+            elif candle:
+                latest[symbol] = ('candle', candle.close_price, candle.timestamp)
+        
+        # 24h reference from the same source as the price, all symbols in one
+        # query per source; ticks already expired by retention fall back to candles
+        cutoffs = {
+            source: {
+                symbol: timestamp - timedelta(hours=24)
+                for symbol, (kind, _, timestamp) in latest.items() if kind == source
+            }
+            for source in ('tick', 'candle')
+        }
+        reference = _first_closes_since(session, timeframe, cutoffs['candle'])
+        tick_reference = _first_ticks_since(session, cutoffs['tick'])
+        untracked = {s: c for s, c in cutoffs['tick'].items() if s not in tick_reference}
+        reference.update(_first_closes_since(session, timeframe, untracked))
+        reference.update(tick_reference)
+        
+        prices = {}
+        for symbol in symbols:
+            if symbol not in latest:
+                continue
+            _, price, timestamp = latest[symbol]
+            change_24h = 0
+            old_price = float(reference.get(symbol) or 0)
+            if old_price > 0:
+                change_24h = ((float(price) - old_price) / old_price) * 100
+            
+            prices[symbol] = {
+                'price': float(price),
+                'change_24h': round(change_24h, 2),
+                'timestamp': timestamp.isoformat()
+            }
         
         return jsonify({'prices': prices}), 200
         
@@ -368,3 +351,75 @@ def get_multi_symbol_prices():
         return jsonify({'error': str(e)}), 500
     finally:
         session.close()
+
+
+def _utc(timestamp):
+    """Naive UTC datetime, so tick and candle timestamps compare on any backend"""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def _latest_candles(session, symbols, timeframe):
+    """Newest candle of each symbol in one grouped query"""
+    newest = select(
+        PriceHistory.symbol, func.max(PriceHistory.timestamp).label('timestamp')
+    ).where(
+        PriceHistory.symbol.in_(symbols),
+        PriceHistory.timeframe == timeframe
+    ).group_by(PriceHistory.symbol).subquery()
+    
+    return session.query(PriceHistory).join(
+        newest,
+        and_(
+            PriceHistory.symbol == newest.c.symbol,
+            PriceHistory.timestamp == newest.c.timestamp
+        )
+    ).filter(PriceHistory.timeframe == timeframe).all()
+
+
+def _first_closes_since(session, timeframe, cutoffs):
+    """Close of the first candle at or after each symbol's cutoff, in one query"""
+    if not cutoffs:
+        return {}
+    first = select(
+        PriceHistory.symbol, func.min(PriceHistory.timestamp).label('timestamp')
+    ).where(
+        PriceHistory.timeframe == timeframe,
+        or_(*(
+            and_(PriceHistory.symbol == symbol, PriceHistory.timestamp >= cutoff)
+            for symbol, cutoff in cutoffs.items()
+        ))
+    ).group_by(PriceHistory.symbol).subquery()
+    
+    rows = session.query(PriceHistory.symbol, PriceHistory.close_price).join(
+        first,
+        and_(
+            PriceHistory.symbol == first.c.symbol,
+            PriceHistory.timestamp == first.c.timestamp
+        )
+    ).filter(PriceHistory.timeframe == timeframe)
+    return dict(rows)
+
+
+def _first_ticks_since(session, cutoffs):
+    """Mid of the first tick at or after each symbol's cutoff, in one query"""
+    if not cutoffs:
+        return {}
+    first = select(
+        HistoricalPrice.symbol, func.min(HistoricalPrice.timestamp).label('timestamp')
+    ).where(
+        or_(*(
+            and_(HistoricalPrice.symbol == symbol, HistoricalPrice.timestamp >= cutoff)
+            for symbol, cutoff in cutoffs.items()
+        ))
+    ).group_by(HistoricalPrice.symbol).subquery()
+    
+    rows = session.query(HistoricalPrice.symbol, HistoricalPrice.mid_price).join(
+        first,
+        and_(
+            HistoricalPrice.symbol == first.c.symbol,
+            HistoricalPrice.timestamp == first.c.timestamp
+        )
+    )
+    return dict(rows)
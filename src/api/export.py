@@ -0,0 +1,86 @@
+"""
+Export API
+Streams trades, signals and tick history as NDJSON or CSV
+"""
+from flask import Blueprint, Response, jsonify, request
+import logging
+from datetime import datetime, timedelta
+from src.services.export_service import DATASETS, FORMATS, export_stream
+
+export_bp = Blueprint('export', __name__, url_prefix='/api/export')
+LOG = logging.getLogger(__name__)
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None
+
+
+def _export(dataset):
+    """
+    Stream a dataset export
+
+    Query params:
+        - format: ndjson (default) or csv
+        - gzip: 1/true to gzip the stream
+        - symbol: Filter by symbol (optional)
+        - from / to: Time range on the dataset's time column, ISO format (optional)
+        - hours: Only the last N hours (optional, overridden by from)
+        - status: Filter by status, trades and signals only (optional)
+
+    The body is sent with chunked transfer encoding as rows are read, so
+    it has no Content-Length.
+    """
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in FORMATS:
+        return jsonify({'error': f'Invalid format. Must be one of: {", ".join(FORMATS)}'}), 400
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+    try:
+        start = _parse_time(request.args.get('from'))
+        end = _parse_time(request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid time range: {e}'}), 400
+    try:
+        hours = int(request.args.get('hours') or 0)
+    except ValueError:
+        return jsonify({'error': 'hours must be an integer'}), 400
+    if hours and not start:
+        start = datetime.utcnow() - timedelta(hours=hours)
+
+    status = request.args.get('status')
+    if status and not DATASETS[dataset].status_column:
+        return jsonify({'error': f'{dataset} has no status to filter on'}), 400
+
+    LOG.info(f"[EXPORT] Starting {dataset} export ({request.query_string.decode() or 'no filters'})")
+    filename = f"{dataset}_{datetime.utcnow():%Y%m%d_%H%M%S}.{fmt}{'.gz' if compress else ''}"
+    stream = export_stream(
+        dataset, fmt, compress,
+        symbol=request.args.get('symbol'), start=start, end=end, status=status
+    )
+    return Response(
+        stream,
+        mimetype='application/gzip' if compress else FORMATS[fmt],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            # Let reverse proxies pass chunks through instead of buffering the export
+            'X-Accel-Buffering': 'no',
+        }
+    )
+
+
+@export_bp.route('/trades', methods=['GET'])
+def export_trades():
+    """Stream trades ordered by open_time"""
+    return _export('trades')
+
+
+@export_bp.route('/signals', methods=['GET'])
+def export_signals():
+    """Stream signals ordered by created_at"""
+    return _export('signals')
+
+
+@export_bp.route('/historical-prices', methods=['GET'])
+def export_historical_prices():
+    """Stream raw ticks ordered by timestamp"""
+    return _export('historical_prices')
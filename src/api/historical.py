@@ -4,14 +4,29 @@ Endpoints for managing price data collection and viewing historical prices
 """
 from flask import Blueprint, jsonify, request
 import logging
-from datetime import datetime, timedelta
-from sqlalchemy import desc, and_
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import desc
 from src.database.session import SessionLocal
-from src.models.base import HistoricalPrice, AllowedInstrument
+from src.models.base import HistoricalPrice, HistoricalPriceSummary, AllowedInstrument
+from src.services.latest_quote_service import get_enabled_latest_quotes, rebuild_latest_quotes
+from src.services.market_data_service import get_market_data_cache
+from src.services.market_feed_service import get_market_feed
+from src.services.ohlcv_aggregator_service import get_ohlcv_aggregator
+from src.services.price_collector_service import get_price_collector
+from src.services.price_stats_service import get_price_stats as compute_price_stats
+from src.services.rolling_stats_service import get_rolling_stats
+from src.services.tick_retention_service import (
+    HOUR_TIER,
+    MINUTE_TIER,
+    RAW_TIER,
+    get_tick_retention,
+)
 
 historical_bp = Blueprint('historical', __name__, url_prefix='/api/historical')
 LOG = logging.getLogger(__name__)
 
+TIERS = [RAW_TIER, MINUTE_TIER, HOUR_TIER]
+
 
 @historical_bp.route('/symbols', methods=['GET'])
 def get_symbols():
@@ -109,6 +124,49 @@ def disable_symbol(symbol):
         session.close()
 
 
+def _parse_time(value):
+    """Parse an ISO timestamp to naive UTC, the way ticks are stored"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_range(hours, from_time, to_time):
+    """
+    Resolve the hours/from_time/to_time query params to (start, end)
+
+    When both hours and from_time are given, both filters apply and the
+    later of the two starts wins.
+    """
+    start = end = None
+    if hours:
+        start = datetime.utcnow() - timedelta(hours=int(hours))
+    if from_time:
+        from_dt = _parse_time(from_time)
+        start = max(start, from_dt) if start else from_dt
+    if to_time:
+        end = _parse_time(to_time)
+    return start, end
+
+
+def _summary_to_dict(summary):
+    """Format a downsampled tick summary row"""
+    return {
+        'timestamp': summary.timestamp.isoformat(),
+        'mid': float(summary.close_mid),
+        'open': float(summary.open_mid),
+        'high': float(summary.high_mid),
+        'low': float(summary.low_mid),
+        'close': float(summary.close_mid),
+        'avg_mid': float(summary.avg_mid),
+        'spread_pct': float(summary.avg_spread_pct),
+        'min_spread_pct': float(summary.min_spread_pct),
+        'max_spread_pct': float(summary.max_spread_pct),
+        'ticks': summary.tick_count
+    }
+
+
 @historical_bp.route('/prices/<symbol>', methods=['GET'])
 def get_historical_prices(symbol):
     """
@@ -119,6 +177,10 @@ def get_historical_prices(symbol):
         - hours: Only get data from last N hours
         - from_time: Start timestamp (ISO format)
         - to_time: End timestamp (ISO format)
+        - resolution: raw, 1m or 1h (default: picked from the range)
+    
+    Recent short ranges are served from raw ticks; longer or older ranges
+    from the per-minute or per-hour summaries.
     """
     session = SessionLocal()
     try:
@@ -126,36 +188,46 @@ def get_historical_prices(symbol):
         limit = int(request.args.get('limit', 100))
         limit = min(limit, 10000)  # Max 10000 records
         
-        hours = request.args.get('hours')
-        from_time = request.args.get('from_time')
-        to_time = request.args.get('to_time')
-        
-        # Build query
-        query = session.query(HistoricalPrice).filter(
-            HistoricalPrice.symbol == symbol
+        start, end = _parse_range(
+            request.args.get('hours'),
+            request.args.get('from_time'),
+            request.args.get('to_time')
         )
+        resolution = request.args.get('resolution') or get_tick_retention().select_tier(start, end)
+        if resolution not in TIERS:
+            return jsonify({
+                'error': f'Invalid resolution. Must be one of: {", ".join(TIERS)}'
+            }), 400
         
-        # Apply time filters
-        if hours:
-            cutoff = datetime.utcnow() - timedelta(hours=int(hours))
-            query = query.filter(HistoricalPrice.timestamp >= cutoff)
-        
-        if from_time:
-            from_dt = datetime.fromisoformat(from_time.replace('Z', '+00:00'))
-            query = query.filter(HistoricalPrice.timestamp >= from_dt)
+        if resolution == RAW_TIER:
+            model = HistoricalPrice
+            query = session.query(HistoricalPrice).filter(
+                HistoricalPrice.symbol == symbol
+            )
+        else:
+            model = HistoricalPriceSummary
+            query = session.query(HistoricalPriceSummary).filter(
+                HistoricalPriceSummary.symbol == symbol,
+                HistoricalPriceSummary.resolution == resolution
+            )
         
-        if to_time:
-            to_dt = datetime.fromisoformat(to_time.replace('Z', '+00:00'))
-            query = query.filter(HistoricalPrice.timestamp <= to_dt)
+        # Apply time filters
+        if start:
+            query = query.filter(model.timestamp >= start)
+        if end:
+            query = query.filter(model.timestamp <= end)
         
         # Order by timestamp descending and limit
-        query = query.order_by(desc(HistoricalPrice.timestamp)).limit(limit)
+        query = query.order_by(desc(model.timestamp)).limit(limit)
         
-        prices = query.all()
+        rows = query.all()
         
         # Format results
         result = []
-        for price in prices:
+        for price in rows:
+            if resolution != RAW_TIER:
+                result.append(_summary_to_dict(price))
+                continue
             result.append({
                 'timestamp': price.timestamp.isoformat(),
                 'bid': float(price.bid_price),
@@ -173,6 +245,7 @@ def get_historical_prices(symbol):
         return jsonify({
             'success': True,
             'symbol': symbol,
+            'resolution': resolution,
             'count': len(result),
             'prices': result
         }), 200
@@ -186,32 +259,10 @@ def get_historical_prices(symbol):
 
 @historical_bp.route('/latest', methods=['GET'])
 def get_latest_prices():
-    """Get latest price for all enabled symbols"""
+    """Get latest price for all enabled symbols (one read of latest_quotes)"""
     session = SessionLocal()
     try:
-        # Get enabled symbols
-        enabled_symbols = session.query(AllowedInstrument).filter(
-            AllowedInstrument.enabled.is_(True)
-        ).all()
-        
-        result = []
-        for inst in enabled_symbols:
-            # Get latest price
-            latest = session.query(HistoricalPrice).filter(
-                HistoricalPrice.symbol == inst.symbol
-            ).order_by(desc(HistoricalPrice.timestamp)).first()
-            
-            if latest:
-                result.append({
-                    'symbol': inst.symbol,
-                    'name': inst.name,
-                    'timestamp': latest.timestamp.isoformat(),
-                    'bid': float(latest.bid_price),
-                    'ask': float(latest.ask_price),
-                    'mid': float(latest.mid_price),
-                    'spread': float(latest.spread),
-                    'spread_pct': float(latest.spread_pct)
-                })
+        result = get_enabled_latest_quotes(session)
         
         return jsonify({
             'success': True,
@@ -226,6 +277,21 @@ def get_latest_prices():
         session.close()
 
 
+@historical_bp.route('/latest/rebuild', methods=['POST'])
+def rebuild_latest():
+    """Repopulate latest_quotes from the newest stored tick of every symbol"""
+    session = SessionLocal()
+    try:
+        count = rebuild_latest_quotes(session)
+        return jsonify({'success': True, 'symbols': count}), 200
+    except Exception as e:
+        session.rollback()
+        LOG.exception(f"Error rebuilding latest quotes: {e}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        session.close()
+
+
 @historical_bp.route('/stats/<symbol>', methods=['GET'])
 def get_price_stats(symbol):
     """
@@ -233,51 +299,23 @@ def get_price_stats(symbol):
     
     Query params:
         - hours: Calculate stats for last N hours (default: 24)
+    
+    The default 24h window is read from the rolling stats; other windows
+    are computed in the database with a single aggregate query. Windows
+    beyond the raw tick retention are answered from the per-minute or
+    per-hour summaries.
     """
     session = SessionLocal()
     try:
         hours = int(request.args.get('hours', 24))
-        cutoff = datetime.utcnow() - timedelta(hours=hours)
         
-        prices = session.query(HistoricalPrice).filter(
-            and_(
-                HistoricalPrice.symbol == symbol,
-                HistoricalPrice.timestamp >= cutoff
-            )
-        ).all()
+        stats = compute_price_stats(session, symbol, hours)
         
-        if not prices:
+        if stats is None:
             return jsonify({
                 'error': f'No data found for {symbol} in last {hours} hours'
             }), 404
         
-        # Calculate stats
-        mid_prices = [float(p.mid_price) for p in prices]
-        spreads = [float(p.spread_pct) for p in prices]
-        
-        stats = {
-            'symbol': symbol,
-            'period_hours': hours,
-            'data_points': len(prices),
-            'first_timestamp': prices[0].timestamp.isoformat(),
-            'last_timestamp': prices[-1].timestamp.isoformat(),
-            'price': {
-                'current': mid_prices[-1],
-                'high': max(mid_prices),
-                'low': min(mid_prices),
-                'avg': sum(mid_prices) / len(mid_prices),
-                'change': mid_prices[-1] - mid_prices[0],
-                'change_pct': ((mid_prices[-1] - mid_prices[0]) / mid_prices[0] * 100)
-                              if mid_prices[0] > 0 else 0
-            },
-            'spread': {
-                'current': spreads[-1],
-                'avg': sum(spreads) / len(spreads),
-                'min': min(spreads),
-                'max': max(spreads)
-            }
-        }
-        
         return jsonify({
             'success': True,
             'stats': stats
@@ -288,3 +326,57 @@ def get_price_stats(symbol):
         return jsonify({'error': str(e)}), 500
     finally:
         session.close()
+
+
+@historical_bp.route('/market-data/stats', methods=['GET'])
+def get_market_data_stats():
+    """Hit/miss/staleness statistics for the shared market data cache"""
+    return jsonify({
+        'success': True,
+        'stats': get_market_data_cache().get_stats()
+    }), 200
+
+
+@historical_bp.route('/feed/stats', methods=['GET'])
+def get_market_feed_stats():
+    """Streaming feed connection state, message counters, gaps and resyncs"""
+    return jsonify({
+        'success': True,
+        'stats': get_market_feed().get_stats()
+    }), 200
+
+
+@historical_bp.route('/rolling/stats', methods=['GET'])
+def get_rolling_stats_info():
+    """Series, buckets and cold-start loads of the rolling 24h statistics"""
+    return jsonify({
+        'success': True,
+        'stats': get_rolling_stats().get_stats()
+    }), 200
+
+
+@historical_bp.route('/collector/stats', methods=['GET'])
+def get_collector_stats():
+    """Collection cycle duration, skipped ticks and per-symbol fetch latency"""
+    return jsonify({
+        'success': True,
+        'stats': get_price_collector().get_stats()
+    }), 200
+
+
+@historical_bp.route('/aggregator/stats', methods=['GET'])
+def get_aggregator_stats():
+    """Tick-to-candle aggregation runs, ticks read and candles written"""
+    return jsonify({
+        'success': True,
+        'stats': get_ohlcv_aggregator().get_stats()
+    }), 200
+
+
+@historical_bp.route('/retention/stats', methods=['GET'])
+def get_retention_stats():
+    """Tick retention windows and downsample/delete counters"""
+    return jsonify({
+        'success': True,
+        'stats': get_tick_retention().get_stats()
+    }), 200
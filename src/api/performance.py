@@ -5,9 +5,14 @@ Track performance, identify patterns, and get improvement suggestions
 import logging
 from flask import Blueprint, jsonify, request
 
+from src.database.session import SessionLocal
 from src.services.performance_analytics_service import (
     get_performance_analytics
 )
+from src.services.performance_ledger_service import (
+    get_performance_ledger,
+    rebuild_ledger,
+)
 
 
 LOG = logging.getLogger(__name__)
@@ -112,9 +117,16 @@ def get_trading_flows():
                 "Monday": {"count": 20, "win_rate": 55, "total_pnl": 200}
             },
             "by_action": {
-                "long": {"count": 60, "win_rate": 65, "total_pnl": 800},
-                "short": {"count": 40, "win_rate": 50, "total_pnl": 200}
-            }
+                "BUY": {"count": 60, "win_rate": 65, "total_pnl": 800},
+                "SELL": {"count": 40, "win_rate": 50, "total_pnl": 200}
+            },
+            "by_symbol": {
+                "BTCUSD": {"count": 30, "win_rate": 60, "total_pnl": 700}
+            },
+            "by_hold_time": {
+                "15m-1h": {"count": 45, "win_rate": 58, "total_pnl": 350}
+            },
+            "streaks": {"longest_win": 7, "longest_loss": 4, "current": 2, "current_type": "win"}
         }
     """
     try:
@@ -209,7 +221,7 @@ def get_performance_dashboard():
         # Get all data
         all_perf = analytics.get_all_symbols_performance(days)
         flows = analytics.identify_trading_flows(days)
-        suggestions = analytics.get_improvement_suggestions(days)
+        suggestions = analytics.get_improvement_suggestions(days, all_perf=all_perf, flows=flows)
         
         # Calculate summary
         total_pnl = sum(p['total_pnl'] for p in all_perf) if all_perf else 0
@@ -243,3 +255,33 @@ def get_performance_dashboard():
     except Exception as e:
         LOG.error(f"[API] Error getting dashboard: {e}")
         return jsonify({'error': str(e)}), 500
+
+
+@performance_bp.route('/ledger/rebuild', methods=['POST'])
+def rebuild_performance_ledger():
+    """
+    Regenerate the per-symbol performance ledger from the trades table
+    
+    Example: POST /api/performance/ledger/rebuild
+    
+    Returns:
+        {"trades": 1200, "rows": 85}
+    """
+    session = SessionLocal()
+    try:
+        result = rebuild_ledger(session)
+        session.commit()
+        return jsonify(result), 200
+        
+    except Exception as e:
+        session.rollback()
+        LOG.error(f"[API] Error rebuilding performance ledger: {e}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        session.close()
+
+
+@performance_bp.route('/ledger/stats', methods=['GET'])
+def get_ledger_stats():
+    """Counters for incremental ledger updates"""
+    return jsonify(get_performance_ledger().get_stats()), 200
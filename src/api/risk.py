@@ -9,6 +9,7 @@ from decimal import Decimal
 from sqlalchemy import select, func
 from src.database.session import SessionLocal
 from src.models.base import Trade, SystemSettings
+from src.services.trailing_state_service import get_trailing_state_store
 
 risk_bp = Blueprint('risk', __name__, url_prefix='/api/risk')
 
@@ -365,3 +366,16 @@ def check_risk_limits():
         }), 500
     finally:
         session.close()
+
+
+@risk_bp.route('/trailing/stats', methods=['GET'])
+def get_trailing_state_stats():
+    """Tracked trailing-stop marks and write-through counters"""
+    return jsonify(get_trailing_state_store().get_stats())
+
+
+@risk_bp.route('/monitor/stats', methods=['GET'])
+def get_trade_monitor_stats():
+    """Trade monitor mode, price-update counters and tick-to-close latency"""
+    from src.services.trade_monitor_service import get_trade_monitor
+    return jsonify(get_trade_monitor().get_stats())
@@ -0,0 +1,115 @@
+"""
+Live Stream API
+Server-Sent Events push of open-position and price deltas
+"""
+from flask import Blueprint, Response, jsonify, request
+import os
+import json
+import logging
+from sqlalchemy import select
+from src.database.session import SessionLocal
+from src.models.base import Trade
+from src.services.event_bus import trade_snapshot
+from src.services.latest_quote_service import get_latest_quotes, quote_to_dict
+from src.services.live_stream_service import CHANNELS, get_live_stream, position_to_dict
+
+stream_bp = Blueprint('stream', __name__, url_prefix='/api/stream')
+LOG = logging.getLogger(__name__)
+
+# Seconds between keep-alive comments on an idle stream
+KEEPALIVE_SECONDS = float(os.getenv('LIVE_STREAM_KEEPALIVE', '15'))
+# Browser reconnect delay sent to EventSource clients (ms)
+RETRY_MS = 3000
+
+
+def _sse(event: str, data, event_id: str = None) -> str:
+    lines = []
+    if event_id:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def _snapshot(kinds, symbols):
+    """Current open positions and latest quotes for a (re)starting client"""
+    session = SessionLocal()
+    try:
+        snapshot = {}
+        if 'position' in kinds:
+            query = select(Trade).where(Trade.status == 'OPEN').order_by(Trade.open_time.desc())
+            if symbols:
+                query = query.where(Trade.symbol.in_(symbols))
+            snapshot['positions'] = [
+                position_to_dict(trade_snapshot(t)) for t in session.execute(query).scalars()
+            ]
+        if 'price' in kinds:
+            quotes = get_latest_quotes(session, symbols or None)
+            snapshot['prices'] = [quote_to_dict(q) for q in quotes.values()]
+        return snapshot
+    finally:
+        session.close()
+
+
+@stream_bp.route('/live', methods=['GET'])
+def live():
+    """
+    Stream position and price deltas as Server-Sent Events
+
+    Query params:
+        - channels: positions, prices or both comma separated (default: both)
+        - symbols: Only deltas for these symbols, comma separated (optional)
+        - last_event_id: Resume token, for clients that can't send the
+          Last-Event-ID header (optional)
+
+    A new client, or one whose resume token is no longer buffered, first
+    gets a `snapshot` event; after that only `position` and `price`
+    deltas. A client that falls so far behind that deltas leave the buffer
+    before it reads them gets a fresh `snapshot` instead. Every event
+    carries an id that resumes the stream on reconnect.
+    """
+    channels = [c.strip() for c in request.args.get('channels', 'positions,prices').split(',') if c.strip()]
+    unknown = [c for c in channels if c not in CHANNELS]
+    if unknown or not channels:
+        return jsonify({'error': f'Invalid channels. Must be any of: {", ".join(CHANNELS)}'}), 400
+    kinds = {CHANNELS[c] for c in channels}
+    symbols = [s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()]
+    token = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+
+    hub = get_live_stream()
+    after = hub.resume(token)
+
+    def generate():
+        nonlocal after
+        hub.client_connected()
+        try:
+            yield f'retry: {RETRY_MS}\n\n'
+            if after is None:
+                # Read the position before the snapshot so nothing in between is missed
+                after = hub.last_seq
+                yield _sse('snapshot', _snapshot(kinds, symbols), hub.event_id(after))
+            while True:
+                last, events = hub.wait(after, KEEPALIVE_SECONDS, kinds, symbols)
+                if events is None:
+                    # Lagged past the buffer: resync, replaying anything newer than `last`
+                    after = last
+                    yield _sse('snapshot', _snapshot(kinds, symbols), hub.event_id(after))
+                    continue
+                if last == after:
+                    yield ': keepalive\n\n'
+                after = last
+                for seq, kind, data in events:
+                    yield _sse(kind, data, hub.event_id(seq))
+        finally:
+            hub.client_disconnected()
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+@stream_bp.route('/stats', methods=['GET'])
+def stream_stats():
+    """Connected clients, buffered deltas and throttling counters"""
+    return jsonify(get_live_stream().get_stats())
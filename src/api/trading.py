@@ -11,6 +11,9 @@ from src.database.session import SessionLocal
 from src.models.base import (
     Trade, AllowedInstrument, SystemSettings, FundAllocation, Signal
 )
+from src.services.pagination_service import (
+    COUNT_MODES, InvalidCursor, count_rows, cursor_after, keyset_page
+)
 
 trading_bp = Blueprint('trading', __name__, url_prefix='/api/trading')
 
@@ -21,13 +24,24 @@ trading_bp = Blueprint('trading', __name__, url_prefix='/api/trading')
 
 @trading_bp.route('/trades', methods=['GET'])
 def get_trades():
-    """Get all trades with optional filters."""
+    """
+    Get all trades with optional filters.
+
+    `page`/`offset` pages return page totals as before, plus a
+    `next_cursor`; passing it back as `cursor` walks the following pages
+    without scanning the skipped rows. On cursor pages
+    `count=exact|approx` adds the filtered total to the pagination block.
+    """
     session = SessionLocal()
     try:
         # Get query parameters
         status = request.args.get('status')  # OPEN, CLOSED, or None for all
         symbol = request.args.get('symbol')
         limit = int(request.args.get('limit', 100))
+        cursor = request.args.get('cursor')
+        count_mode = request.args.get('count')
+        if limit < 1:
+            return jsonify({'error': 'limit must be at least 1'}), 400
         
         # Support both 'page' and 'offset' parameters
         page = request.args.get('page')
@@ -36,6 +50,7 @@ def get_trades():
             offset = (int(page) - 1) * limit
         else:
             offset = int(request.args.get('offset', 0))
+        use_offset = not cursor
         
         # Build query
         query = select(Trade)
@@ -45,11 +60,21 @@ def get_trades():
         if symbol:
             query = query.where(Trade.symbol == symbol)
         
-        # Order by most recent first
-        query = query.order_by(Trade.open_time.desc())
-        query = query.limit(limit).offset(offset)
-        
-        trades = session.execute(query).scalars().all()
+        if use_offset:
+            # Slow path: order by most recent first and skip `offset` rows
+            trades = session.execute(
+                query.order_by(Trade.open_time.desc(), Trade.id.desc()).limit(limit + 1).offset(offset)
+            ).scalars().all()
+            next_cursor = cursor_after(trades[limit - 1], Trade.open_time, Trade.id, 'open_time') \
+                if len(trades) > limit else None
+            trades = trades[:limit]
+        else:
+            try:
+                trades, next_cursor = keyset_page(
+                    session, query, Trade.open_time, Trade.id, 'open_time', limit, cursor
+                )
+            except InvalidCursor as e:
+                return jsonify({'error': str(e)}), 400
         
         # Calculate current P&L for open trades (would need live price)
         trade_list = []
@@ -92,18 +117,31 @@ def get_trades():
             select(func.sum(Trade.profit_loss)).where(Trade.status == 'CLOSED')
         ).scalar() or 0
         
+        summary = {
+            'total': total_count,
+            'open': open_count,
+            'closed': closed_count,
+            'total_pnl': float(total_pnl),
+        }
+        
+        if not use_offset:
+            pagination = {
+                'limit': limit,
+                'cursor': cursor,
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None,
+            }
+            if count_mode in COUNT_MODES:
+                pagination.update(count_rows(session, query, count_mode))
+            return jsonify({'trades': trade_list, 'summary': summary, 'pagination': pagination})
+        
         # Calculate pagination info
         current_page = (offset // limit) + 1 if limit > 0 else 1
         total_pages = (total_count + limit - 1) // limit if limit > 0 else 1
         
         return jsonify({
             'trades': trade_list,
-            'summary': {
-                'total': total_count,
-                'open': open_count,
-                'closed': closed_count,
-                'total_pnl': float(total_pnl),
-            },
+            'summary': summary,
             'pagination': {
                 'page': current_page,
                 'limit': limit,
@@ -112,6 +150,7 @@ def get_trades():
                 'total_pages': total_pages,
                 'has_next': offset + limit < total_count,
                 'has_prev': offset > 0,
+                'next_cursor': next_cursor,
             }
         })
     finally:
@@ -583,7 +622,13 @@ def get_live_price(symbol):
 
 @trading_bp.route('/signals', methods=['GET'])
 def get_signals():
-    """Get trading signals with optional filters."""
+    """
+    Get trading signals with optional filters.
+
+    `offset` pages return the total as before, plus a `next_cursor`;
+    passing it back as `cursor` walks the following pages without scanning
+    the skipped rows. On cursor pages `count=exact|approx` adds the total.
+    """
     session = SessionLocal()
     try:
         # Get query parameters
@@ -592,6 +637,11 @@ def get_signals():
         source = request.args.get('source')
         limit = int(request.args.get('limit', 100))
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
+        count_mode = request.args.get('count')
+        if limit < 1:
+            return jsonify({'error': 'limit must be at least 1'}), 400
+        use_offset = not cursor
         
         # Build query
         query = select(Signal)
@@ -603,11 +653,21 @@ def get_signals():
         if source:
             query = query.where(Signal.source == source)
         
-        # Order by most recent first
-        query = query.order_by(Signal.created_at.desc())
-        query = query.limit(limit).offset(offset)
-        
-        signals = session.execute(query).scalars().all()
+        if use_offset:
+            # Slow path: order by most recent first and skip `offset` rows
+            signals = session.execute(
+                query.order_by(Signal.created_at.desc(), Signal.id.desc()).limit(limit + 1).offset(offset)
+            ).scalars().all()
+            next_cursor = cursor_after(signals[limit - 1], Signal.created_at, Signal.id, 'created_at') \
+                if len(signals) > limit else None
+            signals = signals[:limit]
+        else:
+            try:
+                signals, next_cursor = keyset_page(
+                    session, query, Signal.created_at, Signal.id, 'created_at', limit, cursor
+                )
+            except InvalidCursor as e:
+                return jsonify({'error': str(e)}), 400
         
         # Convert to list of dicts
         signal_list = []
@@ -623,6 +683,21 @@ def get_signals():
             }
             signal_list.append(signal_dict)
         
+        if not use_offset:
+            pagination = {
+                'limit': limit,
+                'cursor': cursor,
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None,
+            }
+            response = {'signals': signal_list, 'count': len(signal_list), 'pagination': pagination}
+            # The total is only counted on request, and can be an estimate
+            if count_mode in COUNT_MODES:
+                counted = count_rows(session, query, count_mode)
+                pagination.update(counted)
+                response['total'] = counted['total']
+            return jsonify(response)
+        
         # Get total count
         total_count = session.execute(
             select(func.count(Signal.id))
@@ -635,6 +710,7 @@ def get_signals():
             'pagination': {
                 'limit': limit,
                 'offset': offset,
+                'next_cursor': next_cursor,
             }
         })
     except Exception as e:
@@ -7,9 +7,12 @@ from flask import Blueprint, jsonify, request
 from decimal import Decimal
 from datetime import datetime
 import logging
-from sqlalchemy import desc, and_
+from sqlalchemy import desc, and_, select
 from src.database.session import SessionLocal
 from src.models.base import Trade, AllowedInstrument, PriceHistory
+from src.services.pagination_service import (
+    COUNT_MODES, InvalidCursor, count_rows, cursor_after, keyset_page
+)
 
 trading_enhanced_bp = Blueprint('trading_enhanced', __name__)
 LOG = logging.getLogger(__name__)
@@ -602,13 +605,16 @@ def get_trade_history():
         - from: Start date ISO format (optional)
         - to: End date ISO format (optional)
         - limit: Max results (default 50, max 500)
-        - offset: Pagination offset (default 0)
+        - cursor: next_cursor of the previous page (optional)
+        - offset: Pagination offset, slow path (optional)
+        - count: 'exact' or 'approx' to include the total (optional)
     
     Returns:
         {
             "trades": [...],
             "count": 50,
-            "total_profit_loss": 1250.50
+            "total_profit_loss": 1250.50,
+            "next_cursor": "eyJrIjoi..."
         }
     """
     try:
@@ -620,27 +626,43 @@ def get_trade_history():
         to_date = request.args.get('to')
         limit = min(int(request.args.get('limit', 50)), 500)
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
+        count_mode = request.args.get('count')
+        if limit < 1:
+            return jsonify({'error': 'limit must be at least 1'}), 400
         
         # Build query
-        query = session.query(Trade).filter(Trade.status == 'CLOSED')
+        query = select(Trade).where(Trade.status == 'CLOSED')
         
         if symbol:
-            query = query.filter(Trade.symbol == symbol.upper())
+            query = query.where(Trade.symbol == symbol.upper())
         
         if from_date:
             from_dt = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-            query = query.filter(Trade.close_time >= from_dt)
+            query = query.where(Trade.close_time >= from_dt)
         
         if to_date:
             to_dt = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-            query = query.filter(Trade.close_time <= to_dt)
+            query = query.where(Trade.close_time <= to_dt)
         
         # Order and paginate
-        query = query.order_by(desc(Trade.close_time)).limit(limit).offset(
-            offset
-        )
-        
-        trades = query.all()
+        if offset and not cursor:
+            trades = session.execute(
+                query.order_by(desc(Trade.close_time), desc(Trade.id))
+                .limit(limit + 1).offset(offset)
+            ).scalars().all()
+            next_cursor = cursor_after(
+                trades[limit - 1], Trade.close_time, Trade.id, 'close_time'
+            ) if len(trades) > limit else None
+            trades = trades[:limit]
+        else:
+            try:
+                trades, next_cursor = keyset_page(
+                    session, query, Trade.close_time, Trade.id, 'close_time',
+                    limit, cursor
+                )
+            except InvalidCursor as e:
+                return jsonify({'error': str(e)}), 400
         
         # Format response
         history = []
@@ -668,11 +690,16 @@ def get_trade_history():
                 )
             })
         
-        return jsonify({
+        result = {
             'trades': history,
             'count': len(history),
-            'total_profit_loss': float(total_pnl)
-        }), 200
+            'total_profit_loss': float(total_pnl),
+            'next_cursor': next_cursor
+        }
+        if count_mode in COUNT_MODES:
+            result.update(count_rows(session, query, count_mode))
+        
+        return jsonify(result), 200
         
     except Exception as e:
         LOG.exception('Error fetching trade history: %s', e)
@@ -8,9 +8,14 @@ import json
 import hashlib
 import re
 import logging
-from sqlalchemy.exc import IntegrityError
 from src.database.session import SessionLocal
-from src.models.base import Signal, IdempotencyKey
+from src.models.base import Signal
+from src.services.idempotency_service import get_idempotency_cache
+from src.services.signal_queue_service import (
+    QUEUED_STATUS,
+    get_signal_queue,
+    is_async_ingest_enabled,
+)
 
 webhook_bp = Blueprint('webhook', __name__)
 LOG = logging.getLogger(__name__)
@@ -96,6 +101,10 @@ def tradingview_webhook():
     
     LOG.info('[OK] New event (not duplicate)')
 
+    # Async ingestion: durable enqueue only, workers do the rest
+    if is_async_ingest_enabled():
+        return enqueue_signal(event_key, signal_data, text)
+
     # Persist signal to database
     try:
         LOG.debug('Persisting signal to database...')
@@ -118,7 +127,7 @@ def tradingview_webhook():
     try:
         LOG.debug('Forwarding to Telegram...')
         forward_to_telegram(text, signal_data)
-        LOG.info('[OK] Forwarded to Telegram')
+        LOG.info('[OK] Telegram notification queued')
     except Exception as e:
         LOG.exception('[X] Failed to forward to Telegram: %s', e)
 
@@ -227,26 +236,28 @@ def compute_event_key(request, text):
 
 
 def is_duplicate_event(event_key):
-    """Check if event was already processed (idempotency)"""
+    """Check if event was already processed (idempotency)
+
+    Recently seen keys are answered from memory; first-seen keys are
+    claimed through the idempotency_keys unique constraint.
+    """
     try:
-        session = SessionLocal()
-        try:
-            k = IdempotencyKey(key=event_key)
-            session.add(k)
-            session.commit()
-            return False  # Successfully claimed, not a duplicate
-        except IntegrityError:
-            session.rollback()
-            return True  # Already exists, is a duplicate
-        finally:
-            session.close()
+        return get_idempotency_cache().claim(event_key)
     except Exception as e:
         LOG.exception('Idempotency check failed: %s', e)
         return False  # On error, allow processing
 
 
-def persist_signal(signal_data, raw_text):
-    """Persist signal to database"""
+def release_event_key(event_key):
+    """Release a claimed idempotency key so the sender's retry is processed"""
+    try:
+        get_idempotency_cache().release(event_key)
+    except Exception as e:
+        LOG.exception('Failed to release idempotency key: %s', e)
+
+
+def persist_signal(signal_data, raw_text, status=None):
+    """Persist signal to database and return its id"""
     session = SessionLocal()
     try:
         sig = Signal(
@@ -256,16 +267,135 @@ def persist_signal(signal_data, raw_text):
             price=signal_data.get('price'),
             raw=raw_text
         )
+        if status:
+            sig.status = status
         session.add(sig)
         session.commit()
         LOG.info('Signal persisted: %s %s @ %s', 
                  signal_data.get('action'), 
                  signal_data.get('symbol'), 
                  signal_data.get('price'))
+        return sig.id
+    finally:
+        session.close()
+
+
+def discard_signal(signal_id):
+    """Delete a QUEUED signal that could not be handed to the workers"""
+    session = SessionLocal()
+    try:
+        session.query(Signal).filter(
+            Signal.id == signal_id,
+            Signal.status == QUEUED_STATUS
+        ).delete(synchronize_session=False)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        LOG.exception('Failed to discard queued signal %s: %s', signal_id, e)
     finally:
         session.close()
 
 
+def run_queued_signal(job):
+    """Worker handler: execute a queued signal and forward the result to Telegram"""
+    from src.tasks.signal_tasks import process_signal_task
+
+    signal_data = dict(job.get('signal') or {
+        'action': job.get('action'),
+        'symbol': job.get('symbol'),
+        'price': job.get('price'),
+    })
+    trade_result = process_signal_task(
+        job.get('event_key'),
+        job.get('text'),
+        job.get('action'),
+        job.get('symbol'),
+        job.get('price'),
+        None,
+        signal_id=job.get('signal_id'),
+        execute_on_exchange=True,
+    )
+    if trade_result:
+        signal_data['trade_result'] = trade_result
+
+    try:
+        forward_to_telegram(job.get('text') or '', signal_data)
+    except Exception as e:
+        LOG.exception('[X] Failed to forward queued signal to Telegram: %s', e)
+
+
+def start_ingest_workers():
+    """Start the webhook worker pool and re-enqueue signals left QUEUED"""
+    signal_queue = get_signal_queue(handler=run_queued_signal)
+    signal_queue.recover_pending()
+    return signal_queue
+
+
+def enqueue_signal(event_key, signal_data, text):
+    """Durably accept a signal and hand it to the worker pool (202 Accepted)"""
+    try:
+        signal_id = persist_signal(signal_data, text, status=QUEUED_STATUS)
+    except Exception as e:
+        LOG.exception('[X] Failed to persist queued signal: %s', e)
+        release_event_key(event_key)
+        return jsonify({'error': 'Failed to persist signal'}), 500
+
+    signal_queue = get_signal_queue(handler=run_queued_signal)
+    accepted = signal_queue.enqueue({
+        'signal_id': signal_id,
+        'event_key': event_key,
+        'text': text,
+        'action': signal_data.get('action'),
+        'symbol': signal_data.get('symbol'),
+        'price': signal_data.get('price'),
+        'signal': dict(signal_data),
+    })
+
+    if not accepted:
+        # Backpressure: undo the claim so the sender's retry is not
+        # swallowed as a duplicate
+        discard_signal(signal_id)
+        release_event_key(event_key)
+        return jsonify({
+            'status': 'error',
+            'message': 'Ingest queue is full, retry later',
+            'queue_depth': signal_queue.depth()
+        }), 503, {'Retry-After': '1'}
+
+    LOG.info(f'[OK] Signal {signal_id} queued (depth={signal_queue.depth()})')
+    return jsonify({
+        'status': 'accepted',
+        'message': 'Webhook received and queued for processing',
+        'signal_id': signal_id,
+        'signal': signal_data
+    }), 202
+
+
+@webhook_bp.route('/webhook/queue', methods=['GET'])
+def webhook_queue_stats():
+    """Queue depth, backpressure and enqueue-to-execute latency for async ingestion"""
+    if not is_async_ingest_enabled():
+        return jsonify({'enabled': False}), 200
+
+    stats = get_signal_queue(handler=run_queued_signal).get_stats()
+    stats['enabled'] = True
+    return jsonify(stats), 200
+
+
+@webhook_bp.route('/webhook/idempotency', methods=['GET'])
+def webhook_idempotency_stats():
+    """Hit/miss counters for the in-process idempotency key cache"""
+    return jsonify(get_idempotency_cache().get_stats()), 200
+
+
+@webhook_bp.route('/webhook/telegram', methods=['GET'])
+def webhook_telegram_stats():
+    """Queue depth, coalescing, rate limiting and drops of the Telegram notifier"""
+    from src.services.notification_service import get_telegram_notifier
+
+    return jsonify(get_telegram_notifier().get_stats()), 200
+
+
 def forward_to_telegram(text, signal_data):
     """Forward signal to Telegram if configured"""
     tg_token = os.getenv('TELEGRAM_BOT_TOKEN')
@@ -275,7 +405,7 @@ def forward_to_telegram(text, signal_data):
         return
     
     try:
-        import requests
+        from src.services.notification_service import get_telegram_notifier
         
         # Get trade processing result if available
         trade_result = signal_data.get('trade_result')
@@ -347,15 +477,9 @@ def forward_to_telegram(text, signal_data):
         
         message = '\n'.join(message_parts)
         
-        send_url = f'https://api.telegram.org/bot{tg_token}/sendMessage'
-        payload = {
-            'chat_id': tg_chat,
-            'text': message,
-            'parse_mode': 'Markdown'
-        }
-        
-        r = requests.post(send_url, json=payload, timeout=5)
-        LOG.info('Telegram forward status: %s', r.status_code)
+        # Queued for the notifier thread; a slow Telegram never holds the request
+        queued = get_telegram_notifier().notify(message, chat_id=tg_chat, parse_mode='Markdown')
+        LOG.info('Telegram forward queued: %s', queued)
         
     except Exception as e:
         LOG.exception('Failed to forward to Telegram: %s', e)
@@ -0,0 +1,130 @@
+"""
+Dialect-aware bulk upsert
+
+PostgreSQL and SQLite get a single INSERT ... ON CONFLICT DO UPDATE per
+chunk. Other backends fall back to a portable path: select the keys that
+already exist, bulk insert the rest and update the existing rows one by
+one. The fallback is not atomic against a concurrent writer inserting the
+same key (that surfaces as an IntegrityError for the caller to retry).
+
+`set_` and `where` are callables taking the incoming row values
+(`excluded`), so the same expressions serve both paths:
+
+    upsert_rows(session, LatestQuote, rows, ['symbol'],
+                set_=lambda excluded: {'mid_price': excluded.mid_price},
+                where=lambda excluded: LatestQuote.timestamp <= excluded.timestamp)
+"""
+import logging
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, insert, literal, literal_column, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+LOG = logging.getLogger(__name__)
+
+ON_CONFLICT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+class _Values:
+    """Stand-in for `stmt.excluded` on the portable path: one row as typed literals"""
+
+    def __init__(self, model, row: Dict):
+        self._table = model.__table__
+        self._row = row
+
+    def __getitem__(self, column: str):
+        return literal(self._row.get(column), type_=self._table.c[column].type)
+
+    def __getattr__(self, column: str):
+        if column.startswith('_'):
+            raise AttributeError(column)
+        return self[column]
+
+
+def upsert_rows(session, model, rows: List[Dict], index_elements: Sequence[str],
+                set_: Callable[[object], Dict], where: Optional[Callable] = None,
+                chunk_size: int = 500, count_updates: bool = False) -> int:
+    """
+    Insert rows, updating the ones whose key already exists
+
+    Runs on the caller's session and does not commit. Keys must be unique
+    within `rows`.
+
+    Args:
+        index_elements: Columns of the unique key the conflict is detected on
+        set_: excluded -> {column: expression} applied to existing rows
+        where: excluded -> condition an existing row must meet to be updated
+        count_updates: Work out how many rows already existed
+
+    Returns:
+        Rows that already existed when count_updates is set (exact on
+        PostgreSQL; elsewhere read just before the write, so a concurrent
+        writer can skew it), otherwise 0
+    """
+    if not rows:
+        return 0
+
+    dialect = session.get_bind().dialect.name
+    on_conflict_insert = ON_CONFLICT_INSERTS.get(dialect)
+    updated = 0
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        if on_conflict_insert is None:
+            updated += _portable_upsert(session, model, chunk, index_elements, set_, where)
+            continue
+
+        stmt = on_conflict_insert(model).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(index_elements),
+            set_=set_(stmt.excluded),
+            where=where(stmt.excluded) if where is not None else None
+        )
+        if count_updates and dialect == 'postgresql':
+            # xmax is 0 only for freshly inserted tuples
+            stmt = stmt.returning(literal_column('xmax = 0'))
+            updated += sum(1 for (inserted,) in session.execute(stmt) if not inserted)
+            continue
+        if count_updates:
+            updated += len(_existing_keys(session, model, chunk, index_elements))
+        session.execute(stmt)
+
+    return updated
+
+
+def _key(row: Dict, index_elements: Sequence[str]) -> tuple:
+    return tuple(row[column] for column in index_elements)
+
+
+def _key_match(model, key: tuple, index_elements: Sequence[str]):
+    return and_(*[getattr(model, column) == value for column, value in zip(index_elements, key)])
+
+
+def _existing_keys(session, model, rows: List[Dict], index_elements: Sequence[str]) -> set:
+    """Keys of `rows` already present in the table"""
+    columns = [getattr(model, column) for column in index_elements]
+    matches = or_(*[_key_match(model, _key(row, index_elements), index_elements) for row in rows])
+    return {tuple(found) for found in session.execute(select(*columns).where(matches))}
+
+
+def _portable_upsert(session, model, rows: List[Dict], index_elements: Sequence[str],
+                     set_: Callable, where: Optional[Callable]) -> int:
+    """Select existing keys, bulk insert the new rows, update the rest"""
+    existing = _existing_keys(session, model, rows, index_elements)
+    new_rows = [row for row in rows if _key(row, index_elements) not in existing]
+    if new_rows:
+        session.execute(insert(model), new_rows)
+
+    for row in rows:
+        key = _key(row, index_elements)
+        if key not in existing:
+            continue
+        excluded = _Values(model, row)
+        condition = _key_match(model, key, index_elements)
+        if where is not None:
+            condition = and_(condition, where(excluded))
+        session.execute(update(model).where(condition).values(set_(excluded)))
+    return len(existing)
@@ -4,12 +4,15 @@ from sqlalchemy import (
     String,
     Numeric,
     DateTime,
+    Date,
     ForeignKey,
     Boolean,
     Float,
+    Index,
 )
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.sql import func
+from sqlalchemy.orm import column_property
+from sqlalchemy.sql import func, text
 
 Base = declarative_base()
 
@@ -25,13 +28,15 @@ class Trade(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=True)
     action = Column(String, nullable=False)  # BUY or SELL
-    symbol = Column(String, nullable=False)
+    # active_history: trade events need the prior value even when the
+    # attribute was expired by a commit before being reassigned
+    symbol = column_property(Column(String, nullable=False), active_history=True)
     quantity = Column(Numeric(20, 8), nullable=False)
     open_price = Column(Numeric(30, 8), nullable=False)
     open_time = Column(DateTime(timezone=True), server_default=func.now())
     close_price = Column(Numeric(30, 8), nullable=True)
-    close_time = Column(DateTime(timezone=True), nullable=True)
-    status = Column(String, default='OPEN')  # OPEN or CLOSED
+    close_time = column_property(Column(DateTime(timezone=True), nullable=True), active_history=True)
+    status = column_property(Column(String, default='OPEN'), active_history=True)  # OPEN or CLOSED
     total_cost = Column(Numeric(40, 8), nullable=True)
     profit_loss = Column(Numeric(40, 8), nullable=True)
     # Stop Loss and Take Profit
@@ -45,6 +50,20 @@ class Trade(Base):
     # Order details
     order_type = Column(String, default='MARKET')  # MARKET or LIMIT
     limit_price = Column(Numeric(30, 8), nullable=True)  # For limit orders
+    
+    # Indexes for the hot query shapes (monitor ticks, trade lists, history)
+    __table_args__ = (
+        Index(
+            'ix_trades_open_symbol_open_time', 'symbol', 'open_time',
+            postgresql_where=text("status = 'OPEN'"),
+            sqlite_where=text("status = 'OPEN'")
+        ),
+        Index('ix_trades_status_open_time', 'status', 'open_time'),
+        Index('ix_trades_symbol_status_open_time', 'symbol', 'status', 'open_time'),
+        Index('ix_trades_status_close_time', 'status', 'close_time'),
+        # Unfiltered keyset pages: (open_time, id) DESC
+        Index('ix_trades_open_time_id', 'open_time', 'id'),
+    )
 
 
 class Signal(Base):
@@ -64,6 +83,12 @@ class Signal(Base):
     trade_id = Column(Integer, ForeignKey('trades.id'), nullable=True)  # Linked trade
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        Index('ix_signals_status_created_at', 'status', 'created_at'),
+        Index('ix_signals_symbol_created_at', 'symbol', 'created_at'),
+        Index('ix_signals_created_at_id', 'created_at', 'id'),
+    )
 
 
 class IdempotencyKey(Base):
@@ -132,6 +157,11 @@ class PriceHistory(Base):
     
     # Composite unique constraint to prevent duplicates
     __table_args__ = (
+        Index(
+            'uq_price_history_symbol_timeframe_ts',
+            'symbol', 'timeframe', 'timestamp',
+            unique=True
+        ),
         {'schema': None, 'extend_existing': True},
     )
 
@@ -140,7 +170,7 @@ class HistoricalPrice(Base):
     """Store real-time tick data (every second) for enabled symbols."""
     __tablename__ = 'historical_prices'
     id = Column(Integer, primary_key=True)
-    symbol = Column(String, nullable=False, index=True)  # e.g., BTCUSD, ETHUSD
+    symbol = Column(String, nullable=False)  # e.g., BTCUSD, ETHUSD
     timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
     bid_price = Column(Numeric(30, 8), nullable=False)  # Best bid
     ask_price = Column(Numeric(30, 8), nullable=False)  # Best ask
@@ -153,6 +183,77 @@ class HistoricalPrice(Base):
     
     # Composite unique constraint to prevent duplicates
     __table_args__ = (
+        Index('ix_historical_prices_symbol_timestamp', 'symbol', 'timestamp'),
         {'schema': None, 'extend_existing': True},
     )
 
+
+class HistoricalPriceSummary(Base):
+    """Downsampled tick data (per-minute / per-hour) kept after raw ticks expire."""
+    __tablename__ = 'historical_price_summaries'
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String, nullable=False)
+    resolution = Column(String, nullable=False)  # 1m or 1h
+    timestamp = Column(DateTime(timezone=True), nullable=False)  # Bucket start
+    open_mid = Column(Numeric(30, 8), nullable=False)
+    high_mid = Column(Numeric(30, 8), nullable=False)
+    low_mid = Column(Numeric(30, 8), nullable=False)
+    close_mid = Column(Numeric(30, 8), nullable=False)
+    avg_mid = Column(Numeric(30, 8), nullable=False)
+    avg_spread_pct = Column(Numeric(10, 4), nullable=False)
+    min_spread_pct = Column(Numeric(10, 4), nullable=False)
+    max_spread_pct = Column(Numeric(10, 4), nullable=False)
+    tick_count = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        Index(
+            'uq_historical_price_summaries_symbol_resolution_ts',
+            'symbol', 'resolution', 'timestamp',
+            unique=True
+        ),
+    )
+
+
+class LatestQuote(Base):
+    """Newest tick per symbol, upserted whenever ticks are written."""
+    __tablename__ = 'latest_quotes'
+    symbol = Column(String, primary_key=True)
+    timestamp = Column(DateTime(timezone=True), nullable=False)
+    bid_price = Column(Numeric(30, 8), nullable=False)
+    ask_price = Column(Numeric(30, 8), nullable=False)
+    mid_price = Column(Numeric(30, 8), nullable=False)
+    spread = Column(Numeric(30, 8), nullable=False)
+    spread_pct = Column(Numeric(10, 4), nullable=False)
+    volume_bid = Column(Numeric(40, 8), nullable=True)
+    volume_ask = Column(Numeric(40, 8), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class PerformanceLedger(Base):
+    """Per-symbol, per-day rollup of closed trades (keyed by close day, UTC)."""
+    __tablename__ = 'performance_ledger'
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String, nullable=False)
+    day = Column(Date, nullable=False)
+    closed_trades = Column(Integer, nullable=False, default=0)
+    winning_trades = Column(Integer, nullable=False, default=0)
+    losing_trades = Column(Integer, nullable=False, default=0)
+    total_pnl = Column(Numeric(40, 8), nullable=False, default=0)
+    gross_profit = Column(Numeric(40, 8), nullable=False, default=0)  # Sum of winning P&L
+    gross_loss = Column(Numeric(40, 8), nullable=False, default=0)  # Sum of losing P&L (negative)
+    hold_seconds = Column(Float, nullable=False, default=0)  # Total hold time of timed trades
+    timed_trades = Column(Integer, nullable=False, default=0)  # Trades with open and close time
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index('uq_performance_ledger_symbol_day', 'symbol', 'day', unique=True),
+    )
+
+
+class TrailingStopState(Base):
+    """Trailing-stop water mark of an open trade (highest for BUY, lowest for SELL)."""
+    __tablename__ = 'trailing_stop_states'
+    trade_id = Column(Integer, ForeignKey('trades.id', ondelete='CASCADE'), primary_key=True)
+    side = Column(String, nullable=False)  # BUY or SELL
+    mark = Column(Numeric(30, 8), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
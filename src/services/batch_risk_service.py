@@ -0,0 +1,120 @@
+"""
+Batch Risk Service
+Evaluates the RiskManager exit rules (stop loss, take profit, trailing
+stop, emergency spike) for every open position in one vectorized pass
+"""
+import logging
+from typing import Dict
+
+import numpy as np
+
+LOG = logging.getLogger(__name__)
+
+# Exit types in rule priority order (first matching rule wins)
+EXIT_TYPES = ('stop_loss', 'take_profit', 'trailing_stop', 'emergency_spike')
+NO_EXIT = -1
+
+# Margins closer to a threshold than this (relative to the price compared,
+# absolute for P&L fractions) are re-checked with exact Decimal arithmetic,
+# so float rounding can never flip a decision
+TOLERANCE = 1e-9
+
+
+def _near(margin: np.ndarray, scale=1.0) -> np.ndarray:
+    """True where a margin is within tolerance of zero (NaN is never near)"""
+    with np.errstate(invalid='ignore'):
+        return np.abs(margin) <= TOLERANCE * np.abs(scale)
+
+
+def evaluate_positions(
+    entry: np.ndarray,
+    is_buy: np.ndarray,
+    current: np.ndarray,
+    stop_loss: np.ndarray,
+    take_profit: np.ndarray,
+    marks: np.ndarray,
+    stop_loss_pct: float,
+    take_profit_pct: float,
+    trailing_enabled: bool = False,
+    trailing_type: str = 'percent',
+    trailing_percent: float = 0.005,
+    trailing_amount: float = 50.0,
+    emergency_spike_pct: float = 0.10
+) -> Dict[str, np.ndarray]:
+    """
+    Apply the exit rules to arrays of positions
+
+    Args:
+        entry: Entry prices
+        is_buy: True for BUY positions (anything else is treated as SELL)
+        current: Current prices
+        stop_loss / take_profit: Per-trade levels, NaN when not set
+        marks: Trailing high (BUY) / low (SELL) water marks, NaN when none
+        remaining args: RiskManager settings as floats
+
+    Returns:
+        {
+            'indices': positions that trigger an exit,
+            'exit_codes': index into EXIT_TYPES for each of those,
+            'uncertain': positions too close to a threshold to decide in
+                floating point (re-check them with the per-trade path),
+            'moved': positions whose water mark is now the current price,
+        }
+    """
+    entry = np.asarray(entry, dtype=np.float64)
+    current = np.asarray(current, dtype=np.float64)
+    is_buy = np.asarray(is_buy, dtype=bool)
+    stop_loss = np.asarray(stop_loss, dtype=np.float64)
+    take_profit = np.asarray(take_profit, dtype=np.float64)
+    marks = np.asarray(marks, dtype=np.float64)
+
+    direction = np.where(is_buy, 1.0, -1.0)
+    pnl_value = direction * (current - entry)
+    pnl_pct = pnl_value / entry
+    uncertain = _near(current - entry, entry)
+
+    # 1. Stop loss: the trade's level, else the percentage fallback
+    has_sl = ~np.isnan(stop_loss)
+    sl_margin = direction * (current - stop_loss)  # <= 0 hits
+    sl_hit = np.where(has_sl, sl_margin <= 0, pnl_pct <= -stop_loss_pct)
+    uncertain |= np.where(has_sl, _near(sl_margin, stop_loss),
+                          _near(pnl_pct + stop_loss_pct))
+
+    # 2. Take profit: the trade's level, else the percentage fallback
+    has_tp = ~np.isnan(take_profit)
+    tp_margin = direction * (current - take_profit)  # >= 0 hits
+    tp_hit = np.where(has_tp, tp_margin >= 0, pnl_pct >= take_profit_pct)
+    uncertain |= np.where(has_tp, _near(tp_margin, take_profit),
+                          _near(pnl_pct - take_profit_pct))
+
+    # 3. Trailing stop, only while in profit; the mark starts at the first
+    # price seen in profit and only moves when the price beats it
+    trailing = trailing_enabled & (pnl_value > 0) & ~sl_hit & ~tp_hit
+    mark = np.where(np.isnan(marks), current, marks)
+    improved = trailing & (np.isnan(marks) | (direction * (current - mark) > 0))
+    mark = np.where(improved, current, mark)
+    if trailing_type == 'percent':
+        trail_level = mark * (1 - direction * trailing_percent)
+    else:
+        trail_level = mark - direction * trailing_amount
+    trail_margin = direction * (current - trail_level)  # <= 0 hits
+    trail_hit = trailing & (trail_margin <= 0)
+    if trailing_enabled:
+        uncertain |= _near(trail_margin, mark) | _near(current - marks, marks)
+
+    # 4. Emergency spike
+    spike_hit = np.abs(pnl_pct) >= emergency_spike_pct
+    uncertain |= _near(np.abs(pnl_pct) - emergency_spike_pct)
+
+    exit_codes = np.select(
+        [sl_hit, tp_hit, trail_hit, spike_hit],
+        list(range(len(EXIT_TYPES))),
+        default=NO_EXIT
+    )
+    triggered = (exit_codes != NO_EXIT) & ~uncertain
+    return {
+        'indices': np.flatnonzero(triggered),
+        'exit_codes': exit_codes[triggered],
+        'uncertain': np.flatnonzero(uncertain),
+        'moved': np.flatnonzero(improved),
+    }
@@ -0,0 +1,220 @@
+"""
+Dashboard Metrics Service
+Dashboard rollups computed with two aggregate queries and served from a
+short-TTL cache that is dropped whenever a trade opens, closes or is
+deleted
+"""
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import case, func, select
+
+from src.models.base import Signal, Trade
+from src.services.event_bus import (
+    TRADE_CLOSED,
+    TRADE_DELETED,
+    TRADE_OPENED,
+    get_event_bus,
+)
+
+LOG = logging.getLogger(__name__)
+
+# Oldest day the month chart looks at (its weeks are offset by 30 days)
+_MONTH_LOOKBACK_DAYS = 51
+
+
+def _trade_pnl():
+    """Per-trade P&L as the dashboard has always shown it"""
+    return func.coalesce(Trade.close_price, Trade.open_price) - Trade.open_price
+
+
+def _hour_bucket(dialect: str, column):
+    """Truncate a timestamp column to the hour in SQL"""
+    if dialect == 'postgresql':
+        return func.date_trunc('hour', column)
+    return func.strftime('%Y-%m-%d %H:00:00', column)
+
+
+def _as_datetime(value) -> datetime:
+    """Normalize a bucket value (datetime or ISO string) to a naive datetime"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(tzinfo=None)
+
+
+def compute_dashboard_metrics(session, now: Optional[datetime] = None) -> Dict:
+    """
+    Build the /api/metrics payload
+
+    One GROUP BY hour query covers today's hourly counts and the week and
+    month charts; one summary query covers totals and signal counts.
+    """
+    now = now or datetime.now()
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    window_start = today_start - timedelta(days=_MONTH_LOOKBACK_DAYS)
+
+    pnl = _trade_pnl()
+    bucket = _hour_bucket(session.get_bind().dialect.name, Trade.open_time).label('bucket')
+    hourly = session.execute(
+        select(bucket, func.count(Trade.id), func.coalesce(func.sum(pnl), 0))
+        .where(Trade.open_time >= window_start)
+        .group_by(bucket)
+    ).all()
+
+    today_count = 0
+    today_pnl = 0.0
+    hour_counts = [0] * 24
+    day_pnl: Dict[datetime, float] = {}
+    for value, count, bucket_pnl in hourly:
+        ts = _as_datetime(value)
+        bucket_pnl = float(bucket_pnl)
+        day = ts.replace(hour=0)
+        day_pnl[day] = day_pnl.get(day, 0.0) + bucket_pnl
+        if ts >= today_start:
+            today_count += count
+            today_pnl += bucket_pnl
+            hour_counts[ts.hour] += count
+
+    # Week chart: one bar per day, oldest first
+    week_labels = []
+    week_values = []
+    for i in range(6, -1, -1):
+        day_start = today_start - timedelta(days=i)
+        week_labels.append(day_start.strftime('%m/%d'))
+        week_values.append(day_pnl.get(day_start, 0.0))
+
+    # Month chart: four 7-day windows, offset by 30 days
+    month_labels = []
+    month_values = []
+    for i in range(3, -1, -1):
+        week_start = today_start - timedelta(days=i * 7 + 30)
+        month_labels.append(f"W{4-i}")
+        month_values.append(sum(
+            day_pnl.get(week_start + timedelta(days=d), 0.0) for d in range(7)
+        ))
+
+    total_signals = select(func.count(Signal.id)).scalar_subquery()
+    pending_signals = select(func.count(Signal.id)).where(
+        Signal.status == 'PENDING'
+    ).scalar_subquery()
+    total_trades, open_trades, total_pnl, signals, pending = session.execute(
+        select(
+            func.count(Trade.id),
+            func.coalesce(func.sum(case((Trade.status == 'OPEN', 1), else_=0)), 0),
+            func.coalesce(func.sum(pnl), 0),
+            total_signals,
+            pending_signals,
+        )
+    ).one()
+
+    return {
+        'today': {
+            'count': today_count,
+            'pnl': today_pnl,
+            'hours': [f"{i:02d}:00" for i in range(24)],
+            'hour_counts': hour_counts
+        },
+        'week': {
+            'labels': week_labels,
+            'values': week_values
+        },
+        'month': {
+            'labels': month_labels,
+            'values': month_values
+        },
+        'signals': {
+            'total': signals,
+            'pending': pending
+        },
+        'summary': {
+            'total_trades': total_trades,
+            'open_trades': int(open_trades),
+            'total_pnl': float(total_pnl)
+        }
+    }
+
+
+class DashboardMetricsCache:
+    """Caches the dashboard payload for a few seconds.
+
+    Trade open/close/delete events drop the cached payload immediately, so
+    the TTL only bounds staleness for changes that are not trade events
+    (e.g. new signals).
+    """
+
+    def __init__(self, ttl_seconds: float = 5.0):
+        self.ttl_seconds = ttl_seconds
+        self._value: Optional[Dict] = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._compute_lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+        }
+
+    def get(self, compute: Callable[[], Dict]) -> Dict:
+        """Return the cached payload or compute it (one computation at a time)"""
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires_at:
+                self._stats['hits'] += 1
+                return self._value
+
+        with self._compute_lock:
+            # Another request may have refreshed it while we waited
+            with self._lock:
+                if self._value is not None and time.monotonic() < self._expires_at:
+                    self._stats['hits'] += 1
+                    return self._value
+                self._stats['misses'] += 1
+                generation = self._generation
+
+            value = compute()
+
+            with self._lock:
+                # Don't cache a result computed before an invalidation
+                if generation == self._generation:
+                    self._value = value
+                    self._expires_at = time.monotonic() + self.ttl_seconds
+            return value
+
+    def invalidate(self, topic: str = None, payload: Dict = None):
+        """Drop the cached payload (event bus handler signature)"""
+        with self._lock:
+            self._value = None
+            self._generation += 1
+            self._stats['invalidations'] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cached'] = self._value is not None
+        stats['ttl_seconds'] = self.ttl_seconds
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups * 100, 2) if lookups else 0
+        return stats
+
+
+# Global instance
+_metrics_cache: Optional[DashboardMetricsCache] = None
+_metrics_cache_lock = threading.Lock()
+
+
+def get_dashboard_metrics_cache() -> DashboardMetricsCache:
+    """Get or create the dashboard metrics cache (subscribed to trade events)"""
+    global _metrics_cache
+    with _metrics_cache_lock:
+        if _metrics_cache is None:
+            _metrics_cache = DashboardMetricsCache(
+                ttl_seconds=float(os.getenv('DASHBOARD_METRICS_TTL', '5'))
+            )
+            bus = get_event_bus()
+            for topic in (TRADE_OPENED, TRADE_CLOSED, TRADE_DELETED):
+                bus.subscribe(topic, _metrics_cache.invalidate)
+    return _metrics_cache
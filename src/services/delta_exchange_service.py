@@ -11,6 +11,8 @@ from datetime import datetime
 from dotenv import load_dotenv
 import requests
 
+from src.services.http_client import get_http_client
+
 # Load environment variables
 load_dotenv()
 
@@ -43,7 +45,7 @@ class DeltaExchangeTrader:
             self.client = None
         else:
             LOG.info("[OK] Creating Delta Exchange client with provided credentials")
-            self.client = DeltaExchangeClient(self.api_key, self.api_secret)
+            self.client = DeltaExchangeClient(self.api_key, self.api_secret, session=get_http_client())
             LOG.info("[OK] Delta Exchange client initialized successfully")
     
     def verify_price(self, symbol: str, expected_price: float, tolerance: float = 0.02) -> Tuple[bool, float, str]:
@@ -64,28 +66,22 @@ class DeltaExchangeTrader:
             return False, 0.0, "Delta Exchange client not initialized"
         
         try:
-            LOG.debug(f"Fetching orderbook for {symbol}...")
-            # Get current orderbook
-            orderbook = self.client.get_orderbook(symbol)
+            from src.services.market_data_service import get_market_data_cache
+            
+            # Shared cache: reuses a quote fetched within the staleness budget
+            market_data = get_market_data_cache()
+            quote = market_data.get_quote(symbol)
             
-            if not orderbook.get('success'):
-                error = orderbook.get('error', {})
+            if quote is None:
+                error = market_data.last_error(symbol)
                 LOG.error(f"[X] Failed to get orderbook for {symbol}: {error}")
+                if error == 'No market data available':
+                    return False, 0.0, "No market data available"
                 return False, 0.0, f"Failed to get orderbook: {error}"
             
-            result = orderbook.get('result', {})
-            buy_orders = result.get('buy', [])
-            sell_orders = result.get('sell', [])
-            
-            LOG.debug(f"Orderbook retrieved: {len(buy_orders)} buy orders, {len(sell_orders)} sell orders")
-            
-            if not buy_orders or not sell_orders:
-                LOG.error(f"[X] No market data available for {symbol}")
-                return False, 0.0, "No market data available"
-            
             # Get best bid and ask
-            best_bid = float(buy_orders[0].get('price', 0))
-            best_ask = float(sell_orders[0].get('price', 0))
+            best_bid = float(quote['bid'])
+            best_ask = float(quote['ask'])
             mid_price = (best_bid + best_ask) / 2
             
             print(f"[MARKET] {symbol}: Bid=${best_bid:.2f}, Ask=${best_ask:.2f}, Mid=${mid_price:.2f}")
@@ -298,7 +294,7 @@ class DeltaExchangeTrader:
                 LOG.info(f"[PAGE {page}] Fetching from: {url}")
                 
                 # Make API request
-                response = requests.get(url, timeout=10)
+                response = get_http_client().get(url, timeout=10)
                 response.raise_for_status()
                 
                 data = response.json()
@@ -0,0 +1,194 @@
+"""
+Event Bus Service
+In-process publish/subscribe for domain events, plus session hooks that
+publish trade lifecycle events after the transaction that caused them
+commits
+"""
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from src.models.base import Trade
+
+LOG = logging.getLogger(__name__)
+
+# Trade lifecycle topics
+TRADE_OPENED = 'trade.opened'
+TRADE_CLOSED = 'trade.closed'
+TRADE_MODIFIED = 'trade.modified'
+TRADE_DELETED = 'trade.deleted'
+TRADE_TOPICS = (TRADE_OPENED, TRADE_CLOSED, TRADE_MODIFIED, TRADE_DELETED)
+
+# Market data topics (payload: a quote dict plus a perf_counter 'received_at')
+PRICE_UPDATED = 'price.updated'
+# Streaming feed topics: top-of-book depth and raw ticker fields
+ORDERBOOK_UPDATED = 'market.orderbook'
+TICKER_UPDATED = 'market.ticker'
+
+# Subscribe to this topic to receive every event
+ALL_TOPICS = '*'
+
+_PENDING_KEY = 'pending_trade_events'
+
+
+class EventBus:
+    """Synchronous topic-based pub/sub.
+
+    Handlers run on the publishing thread, in subscription order, and must
+    be quick; a failing handler is logged and does not affect the others.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Callable]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._published = defaultdict(int)
+
+    def subscribe(self, topic: str, handler: Callable[[str, Dict], None]):
+        """Call handler(topic, payload) for each event on topic (or '*')"""
+        with self._lock:
+            if handler not in self._handlers[topic]:
+                self._handlers[topic].append(handler)
+
+    def unsubscribe(self, topic: str, handler: Callable[[str, Dict], None]):
+        """Remove a handler"""
+        with self._lock:
+            if handler in self._handlers[topic]:
+                self._handlers[topic].remove(handler)
+
+    def has_subscribers(self, topic: str) -> bool:
+        """True when publishing on topic would reach a handler"""
+        with self._lock:
+            return bool(self._handlers[topic] or self._handlers[ALL_TOPICS])
+
+    def publish(self, topic: str, payload: Dict):
+        """Deliver an event to topic and wildcard subscribers"""
+        with self._lock:
+            handlers = list(self._handlers[topic]) + list(self._handlers[ALL_TOPICS])
+            self._published[topic] += 1
+
+        for handler in handlers:
+            try:
+                handler(topic, payload)
+            except Exception as e:
+                LOG.exception(f"[EVENT BUS] Handler {handler} failed for {topic}: {e}")
+
+    def get_stats(self) -> Dict:
+        """Published event counts and subscriber counts per topic"""
+        with self._lock:
+            return {
+                'published': dict(self._published),
+                'subscribers': {
+                    topic: len(handlers)
+                    for topic, handlers in self._handlers.items()
+                    if handlers
+                },
+            }
+
+
+def trade_snapshot(trade: Trade) -> Dict:
+    """Plain-dict copy of a trade, safe to hand to other threads"""
+    return {
+        'id': trade.id,
+        'user_id': trade.user_id,
+        'symbol': trade.symbol,
+        'action': trade.action,
+        'status': trade.status,
+        'quantity': trade.quantity,
+        'open_price': trade.open_price,
+        'open_time': trade.open_time,
+        'close_price': trade.close_price,
+        'close_time': trade.close_time,
+        'profit_loss': trade.profit_loss,
+        'stop_loss': trade.stop_loss,
+        'take_profit': trade.take_profit,
+        'total_cost': trade.total_cost,
+        'allocated_fund': trade.allocated_fund,
+        'risk_amount': trade.risk_amount,
+        'stop_loss_triggered': trade.stop_loss_triggered,
+        'closed_by_user': trade.closed_by_user,
+    }
+
+
+def _collect_trade_events(session, flush_context):
+    """after_flush: remember what happened to trades in this flush"""
+    pending = session.info.setdefault(_PENDING_KEY, [])
+
+    for obj in session.new:
+        if isinstance(obj, Trade):
+            topic = TRADE_CLOSED if obj.status == 'CLOSED' else TRADE_OPENED
+            pending.append((topic, trade_snapshot(obj)))
+
+    for obj in session.dirty:
+        if not isinstance(obj, Trade) or not session.is_modified(obj):
+            continue
+        state = inspect(obj)
+        changed = []
+        previous = {}
+        for attr in state.attrs:
+            history = attr.history
+            if history.has_changes():
+                changed.append(attr.key)
+                if history.deleted:
+                    previous[attr.key] = history.deleted[0]
+        if not changed:
+            continue
+        payload = trade_snapshot(obj)
+        payload['changed'] = changed
+        payload['previous'] = previous
+        # Re-assigning CLOSED to a closed trade is not a second close
+        if 'status' in changed and obj.status == 'CLOSED' and previous.get('status') != 'CLOSED':
+            pending.append((TRADE_CLOSED, payload))
+        else:
+            pending.append((TRADE_MODIFIED, payload))
+
+    for obj in session.deleted:
+        if isinstance(obj, Trade):
+            pending.append((TRADE_DELETED, trade_snapshot(obj)))
+
+
+def _publish_trade_events(session):
+    """after_commit: publish the events collected since the last commit"""
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    bus = get_event_bus()
+    for topic, payload in pending:
+        bus.publish(topic, payload)
+
+
+def _discard_trade_events(session):
+    """after_rollback: nothing was committed, so nothing is published"""
+    session.info.pop(_PENDING_KEY, None)
+
+
+_hooks_installed = False
+
+
+def install_trade_events():
+    """Register the session hooks (idempotent)"""
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    event.listen(Session, 'after_flush', _collect_trade_events)
+    event.listen(Session, 'after_commit', _publish_trade_events)
+    event.listen(Session, 'after_rollback', _discard_trade_events)
+    _hooks_installed = True
+
+
+# Global instance
+_event_bus = None
+_event_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    """Get or create the event bus (installs the trade session hooks)"""
+    global _event_bus
+    with _event_bus_lock:
+        if _event_bus is None:
+            _event_bus = EventBus()
+            install_trade_events()
+    return _event_bus
@@ -0,0 +1,196 @@
+"""
+Export Service
+Bulk NDJSON/CSV export of trades, signals and tick history. Rows are read
+as plain column tuples through a server-side cursor in fixed-size batches
+and encoded into bounded chunks, so memory stays flat however many rows
+an export covers
+"""
+import io
+import os
+import csv
+import json
+import zlib
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy import select
+
+from src.database.session import SessionLocal
+from src.models.base import HistoricalPrice, Signal, Trade
+
+LOG = logging.getLogger(__name__)
+
+# Rows fetched from the database per round trip
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '2000'))
+# Encoded bytes buffered before a chunk is written to the response
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class ExportDataset:
+    """A table that can be exported: its columns, time column and filters"""
+
+    def __init__(self, name: str, table, columns: Tuple[str, ...], time_column: str,
+                 status_column: Optional[str] = None):
+        self.name = name
+        self.table = table
+        self.columns = columns
+        self.time_column = time_column
+        self.status_column = status_column
+
+    def query(self, symbol: Optional[str] = None, start: Optional[datetime] = None,
+              end: Optional[datetime] = None, status: Optional[str] = None):
+        """Filtered select of the export columns, oldest first"""
+        c = self.table.c
+        stmt = select(*[c[name] for name in self.columns])
+        if symbol:
+            stmt = stmt.where(c.symbol == symbol.upper())
+        if start:
+            stmt = stmt.where(c[self.time_column] >= start)
+        if end:
+            stmt = stmt.where(c[self.time_column] <= end)
+        if status and self.status_column:
+            stmt = stmt.where(c[self.status_column] == status.upper())
+        return stmt.order_by(c[self.time_column], c.id)
+
+
+DATASETS: Dict[str, ExportDataset] = {
+    'trades': ExportDataset(
+        'trades', Trade.__table__,
+        ('id', 'symbol', 'action', 'status', 'quantity', 'open_price', 'open_time',
+         'close_price', 'close_time', 'profit_loss', 'total_cost', 'stop_loss',
+         'take_profit', 'allocated_fund', 'risk_amount', 'stop_loss_triggered',
+         'closed_by_user', 'order_type', 'limit_price'),
+        time_column='open_time', status_column='status'
+    ),
+    'signals': ExportDataset(
+        'signals', Signal.__table__,
+        ('id', 'source', 'symbol', 'action', 'price', 'status', 'confidence_score',
+         'validated_by', 'validation_notes', 'trade_id', 'created_at', 'executed_at', 'raw'),
+        time_column='created_at', status_column='status'
+    ),
+    'historical_prices': ExportDataset(
+        'historical_prices', HistoricalPrice.__table__,
+        ('id', 'symbol', 'timestamp', 'bid_price', 'ask_price', 'mid_price',
+         'spread', 'spread_pct', 'volume_bid', 'volume_ask'),
+        time_column='timestamp'
+    ),
+}
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_rows(stmt, batch_size: int = None) -> Iterator[tuple]:
+    """
+    Rows of `stmt` streamed through a server-side cursor
+
+    The session is owned by the generator and closed when it is exhausted
+    or closed early (client disconnect).
+    """
+    session = SessionLocal()
+    try:
+        result = session.execute(stmt.execution_options(
+            stream_results=True, yield_per=batch_size or EXPORT_BATCH_SIZE
+        ))
+        for row in result:
+            yield tuple(row)
+    finally:
+        session.close()
+
+
+def encode_ndjson(columns: Iterable[str], rows: Iterable[tuple]) -> Iterator[str]:
+    """One JSON object per line"""
+    columns = tuple(columns)
+    for row in rows:
+        yield json.dumps(
+            {column: _json_value(value) for column, value in zip(columns, row)},
+            separators=(',', ':')
+        ) + '\n'
+
+
+def encode_csv(columns: Iterable[str], rows: Iterable[tuple]) -> Iterator[str]:
+    """Header line, then one CSV line per row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only when there were no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def chunked(lines: Iterable[str], chunk_bytes: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    """Group encoded lines into chunks of roughly `chunk_bytes`"""
+    parts, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        parts.append(data)
+        size += len(data)
+        if size >= chunk_bytes:
+            yield b''.join(parts)
+            parts, size = [], 0
+    if parts:
+        yield b''.join(parts)
+
+
+def gzipped(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a chunk stream into a single gzip member as it goes"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(dataset: str, fmt: str = 'ndjson', compress: bool = False,
+                  **filters) -> Iterator[bytes]:
+    """
+    Encoded export of a dataset as a stream of byte chunks
+
+    Args:
+        dataset: 'trades', 'signals' or 'historical_prices'
+        fmt: 'ndjson' or 'csv'
+        compress: gzip the stream
+        **filters: symbol, start, end, status (see ExportDataset.query)
+    """
+    spec = DATASETS[dataset]
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'")
+
+    encode = encode_ndjson if fmt == 'ndjson' else encode_csv
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    chunks = chunked(encode(spec.columns, counted(iter_rows(spec.query(**filters)))))
+    if compress:
+        chunks = gzipped(chunks)
+    yield from chunks
+    LOG.info(f"[EXPORT] Streamed {count} {dataset} row(s) as {fmt}{' (gzip)' if compress else ''}")
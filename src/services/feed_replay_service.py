@@ -0,0 +1,333 @@
+"""
+Feed Replay Service
+Offline stand-in for the Delta Exchange market data socket. It speaks the
+protocol MarketFeedClient uses (subscribe / snapshot / l2_updates /
+l1_orderbook / v2/ticker / heartbeat) and emits synthetic or recorded
+orderbook events at a configurable rate. Dropped updates, disconnects and
+refused connects can be injected to exercise the client's recovery paths,
+and send lag is recorded so latency and throughput can be benchmarked
+without a network
+"""
+import json
+import math
+import time
+import random
+import threading
+from collections import deque
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from src.services.market_feed_service import L1_CHANNEL, L2_CHANNEL, TICKER_CHANNEL
+
+
+class ReplayFeed:
+    """A simulated market shared by every connection made to it.
+
+    Each orderbook event moves one symbol's book (round-robin over the
+    symbols) and is delivered to a connection as an l2_updates diff, an
+    l1_orderbook quote and/or a v2/ticker message, depending on what that
+    connection subscribed to. Subscribing sends a snapshot of the current
+    book first, like the exchange does.
+    """
+
+    def __init__(
+        self,
+        symbols: Iterable[str] = ('BTCUSD',),
+        rate: float = 100.0,
+        messages: Optional[Iterable] = None,
+        start_price: float = 100.0,
+        tick_size: str = '0.5',
+        volatility: float = 0.0005,
+        depth: int = 10,
+        seed: int = 42,
+        drop_every: int = 0,
+        disconnect_after: int = 0,
+        refuse_connects: int = 0,
+        heartbeat_interval: float = 30.0
+    ):
+        """
+        Initialize replay feed
+
+        Args:
+            symbols: Symbols of the synthetic market
+            rate: Orderbook events per second across all symbols (0 = as
+                fast as the client reads)
+            messages: Recorded feed messages (dicts or JSON lines) to replay
+                instead of synthetic ones; the feed goes quiet at the end
+            start_price / tick_size / volatility / depth: Synthetic book
+                shape (per-event relative move of the mid price)
+            seed: Random seed of the synthetic market
+            drop_every: Withhold every Nth l2 update (a sequence gap)
+            disconnect_after: Drop each connection after this many messages
+            refuse_connects: Refuse this many initial connect attempts
+            heartbeat_interval: Seconds of silence before a heartbeat
+        """
+        self.symbols = list(symbols)
+        self.rate = rate
+        self.tick_size = Decimal(tick_size)
+        self.volatility = volatility
+        self.depth = depth
+        self.drop_every = drop_every
+        self.disconnect_after = disconnect_after
+        self.refuse_connects = refuse_connects
+        self.heartbeat_interval = heartbeat_interval
+        self._rng = random.Random(seed)
+        self._recorded = deque(
+            json.loads(m) if isinstance(m, str) else m for m in messages
+        ) if messages is not None else None
+        self._mids = {symbol: start_price for symbol in self.symbols}
+        self._books: Dict[str, Dict] = {
+            symbol: {'bids': {}, 'asks': {}, 'sequence': 0} for symbol in self.symbols
+        }
+        self._turn = 0
+        self._updates = 0
+        self._lock = threading.Lock()
+        self._lag = deque(maxlen=100000)
+        self.stats = {
+            'connections': 0,
+            'refused': 0,
+            'events': 0,
+            'sent': 0,
+            'withheld': 0,
+            'snapshots': 0,
+            'disconnects': 0,
+        }
+        if self._recorded is None:
+            for symbol in self.symbols:
+                self._apply(symbol, self._synthetic_levels(symbol))
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'ReplayFeed':
+        """Replay messages recorded by MarketFeedClient(record_to=path)"""
+        with open(path) as f:
+            return cls(messages=[line for line in f if line.strip()], **kwargs)
+
+    def connect(self, url: str, timeout: float) -> 'ReplayConnection':
+        """MarketFeedClient connect hook"""
+        with self._lock:
+            if self.stats['refused'] < self.refuse_connects:
+                self.stats['refused'] += 1
+                raise ConnectionRefusedError(f"replay feed refused connection to {url}")
+            self.stats['connections'] += 1
+        return ReplayConnection(self, timeout)
+
+    def _synthetic_levels(self, symbol: str) -> Dict[str, Dict[Decimal, Decimal]]:
+        mid = self._mids[symbol] * (1 + self._rng.gauss(0, self.volatility))
+        self._mids[symbol] = mid
+        tick = self.tick_size
+        best_bid = Decimal(math.floor(mid / float(tick))) * tick
+        return {
+            'bids': {
+                best_bid - k * tick: Decimal(self._rng.randint(1, 500))
+                for k in range(self.depth)
+            },
+            'asks': {
+                best_bid + (k + 1) * tick: Decimal(self._rng.randint(1, 500))
+                for k in range(self.depth)
+            },
+        }
+
+    def _apply(self, symbol: str, levels: Dict) -> Dict[str, List]:
+        """Replace a book's levels; returns the diff as feed level lists"""
+        book = self._books[symbol]
+        diff = {}
+        for side in ('bids', 'asks'):
+            old, new = book[side], levels[side]
+            changed = [[str(p), str(s)] for p, s in new.items() if old.get(p) != s]
+            changed += [[str(p), '0'] for p in old if p not in new]
+            book[side] = dict(new)
+            diff[side] = changed
+        book['sequence'] += 1
+        return diff
+
+    def next_event(self) -> Optional[Dict]:
+        """Advance the market by one event (None when a recording is done)"""
+        with self._lock:
+            if self._recorded is not None:
+                if not self._recorded:
+                    return None
+                message = self._recorded.popleft()
+                if message.get('type') == L2_CHANNEL and message.get('symbol') in self._books:
+                    book = self._books[message['symbol']]
+                    if message.get('action') == 'snapshot':
+                        book['bids'], book['asks'] = {}, {}
+                    for side in ('bids', 'asks'):
+                        for price, size in message.get(side) or []:
+                            if Decimal(size) > 0:
+                                book[side][Decimal(price)] = Decimal(size)
+                            else:
+                                book[side].pop(Decimal(price), None)
+                    book['sequence'] = message.get('sequence_no', book['sequence'] + 1)
+                event = {'symbol': message.get('symbol'), 'recorded': message}
+            else:
+                symbol = self.symbols[self._turn % len(self.symbols)]
+                self._turn += 1
+                previous = self._books[symbol]['sequence']
+                diff = self._apply(symbol, self._synthetic_levels(symbol))
+                event = {'symbol': symbol, 'diff': diff, 'prev_sequence_no': previous}
+            self.stats['events'] += 1
+            return event
+
+    def snapshot(self, symbol: str) -> Dict:
+        with self._lock:
+            book = self._books[symbol]
+            self.stats['snapshots'] += 1
+            return {
+                'type': L2_CHANNEL, 'action': 'snapshot', 'symbol': symbol,
+                'bids': [[str(p), str(s)] for p, s in sorted(book['bids'].items(), reverse=True)],
+                'asks': [[str(p), str(s)] for p, s in sorted(book['asks'].items())],
+                'sequence_no': book['sequence'],
+                'timestamp': int(time.time() * 1e6),
+            }
+
+    def messages_for(self, event: Dict, channels: set) -> List[Dict]:
+        """Feed messages an event produces for a connection's subscriptions"""
+        symbol = event['symbol']
+        if 'recorded' in event:
+            message = event['recorded']
+            return [message] if (message.get('type'), symbol) in channels else []
+
+        with self._lock:
+            book = self._books[symbol]
+            sequence = book['sequence']
+            bid = max(book['bids'])
+            ask = min(book['asks'])
+            bid_size, ask_size = book['bids'][bid], book['asks'][ask]
+
+        timestamp = int(time.time() * 1e6)
+        messages = []
+        if (L2_CHANNEL, symbol) in channels:
+            with self._lock:
+                self._updates += 1
+                withhold = self.drop_every and self._updates % self.drop_every == 0
+                if withhold:
+                    self.stats['withheld'] += 1
+            if not withhold:
+                messages.append({
+                    'type': L2_CHANNEL, 'action': 'update', 'symbol': symbol,
+                    'bids': event['diff']['bids'], 'asks': event['diff']['asks'],
+                    'sequence_no': sequence, 'prev_sequence_no': event['prev_sequence_no'],
+                    'timestamp': timestamp,
+                })
+        if (L1_CHANNEL, symbol) in channels:
+            messages.append({
+                'type': L1_CHANNEL, 'symbol': symbol,
+                'best_bid': str(bid), 'best_ask': str(ask),
+                'bid_qty': str(bid_size), 'ask_qty': str(ask_size),
+                'last_sequence_no': sequence, 'timestamp': timestamp,
+            })
+        if (TICKER_CHANNEL, symbol) in channels:
+            messages.append({
+                'type': TICKER_CHANNEL, 'symbol': symbol,
+                'mark_price': str((bid + ask) / 2),
+                'quotes': {
+                    'best_bid': str(bid), 'best_ask': str(ask),
+                    'bid_size': str(bid_size), 'ask_size': str(ask_size),
+                },
+                'timestamp': timestamp,
+            })
+        return messages
+
+    def record_lag(self, seconds: float):
+        with self._lock:
+            self._lag.append(seconds)
+
+    def get_stats(self) -> Dict:
+        """Counters plus how late messages were read versus their schedule"""
+        with self._lock:
+            stats = dict(self.stats)
+            lag = sorted(self._lag)
+
+        def percentile(p):
+            return round(lag[min(len(lag) - 1, int(p * len(lag)))] * 1000, 3)
+
+        stats['send_lag_ms'] = {
+            'samples': len(lag),
+            'p50': percentile(0.50) if lag else None,
+            'p99': percentile(0.99) if lag else None,
+            'max': round(lag[-1] * 1000, 3) if lag else None,
+        }
+        return stats
+
+
+class ReplayConnection:
+    """One client connection to a ReplayFeed (send / recv / close)"""
+
+    def __init__(self, feed: ReplayFeed, timeout: float):
+        self.feed = feed
+        self.timeout = timeout
+        self.channels = set()
+        self.closed = False
+        self.started = time.perf_counter()
+        self.events = 0
+        self.sent = 0
+        self._outbox = deque()
+
+    def send(self, text: str):
+        if self.closed:
+            raise ConnectionError('replay connection closed')
+        message = json.loads(text)
+        kind = message.get('type')
+        channels = (message.get('payload') or {}).get('channels') or []
+        if kind == 'subscribe':
+            for channel in channels:
+                for symbol in channel.get('symbols') or []:
+                    self.channels.add((channel['name'], symbol))
+                    if channel['name'] == L2_CHANNEL and symbol in self.feed._books:
+                        self._outbox.append(self.feed.snapshot(symbol))
+            self._outbox.append({'type': 'subscriptions', 'channels': channels})
+        elif kind == 'unsubscribe':
+            for channel in channels:
+                for symbol in channel.get('symbols') or []:
+                    self.channels.discard((channel['name'], symbol))
+
+    def _deliver(self, message: Dict) -> str:
+        self.sent += 1
+        with self.feed._lock:
+            self.feed.stats['sent'] += 1
+        return json.dumps(message)
+
+    def recv(self) -> str:
+        if self.closed:
+            raise ConnectionError('replay connection closed')
+        if self.feed.disconnect_after and self.sent >= self.feed.disconnect_after:
+            self.closed = True
+            with self.feed._lock:
+                self.feed.stats['disconnects'] += 1
+            raise ConnectionError('replay feed dropped the connection')
+        if self._outbox:
+            return self._deliver(self._outbox.popleft())
+
+        waited = 0.0
+        while True:
+            if self.feed.rate > 0:
+                due = self.started + self.events / self.feed.rate
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    if waited + delay > self.timeout:
+                        time.sleep(max(0.0, self.timeout - waited))
+                        raise TimeoutError('replay feed idle')
+                    time.sleep(delay)
+                    waited += delay
+            if self.closed:
+                raise ConnectionError('replay connection closed')
+
+            event = self.feed.next_event()
+            if event is None:
+                # Recording exhausted: heartbeat if the client asked for it
+                pause = min(self.feed.heartbeat_interval, self.timeout)
+                time.sleep(pause)
+                if pause < self.timeout:
+                    return self._deliver({'type': 'heartbeat'})
+                raise TimeoutError('replay feed idle')
+
+            self.events += 1
+            if self.feed.rate > 0:
+                self.feed.record_lag(time.perf_counter() - due)
+            messages = self.feed.messages_for(event, self.channels)
+            if messages:
+                self._outbox.extend(messages[1:])
+                return self._deliver(messages[0])
+
+    def close(self):
+        self.closed = True
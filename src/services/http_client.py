@@ -0,0 +1,288 @@
+"""
+Shared HTTP Client
+One outbound HTTP layer for every service: a keep-alive connection pool
+per host, retries with jittered exponential backoff for idempotent calls
+and transient failures, and a latency histogram per endpoint
+"""
+import os
+import time
+import random
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+LOG = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; slower calls land in '+Inf'
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+# Past this many distinct endpoints new ones are counted under 'other'
+MAX_ENDPOINTS = 200
+
+
+def _parse_pool_sizes(spec: str) -> Dict[str, int]:
+    """Parse 'host=size,host=size' into a dict"""
+    sizes = {}
+    for item in (spec or '').split(','):
+        host, _, size = item.strip().partition('=')
+        if host and size.strip().isdigit():
+            sizes[host.strip().lower()] = int(size)
+    return sizes
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (not thread-safe; guarded by HttpClient)"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        index = len(LATENCY_BUCKETS_MS)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound of the bucket holding the p-th percentile"""
+        if not self.count:
+            return None
+        rank = p * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else round(self.max_ms, 3)
+        return round(self.max_ms, 3)
+
+    def to_dict(self) -> Dict:
+        buckets = {str(bound): self.counts[i] for i, bound in enumerate(LATENCY_BUCKETS_MS)}
+        buckets['+Inf'] = self.counts[-1]
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'retries': self.retries,
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else None,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 3),
+            'buckets_ms': buckets,
+        }
+
+
+class HttpClient:
+    """Pooled, instrumented requests wrapper shared across services"""
+
+    def __init__(
+        self,
+        pool_maxsize: int = 10,
+        pool_sizes: Optional[Dict[str, int]] = None,
+        retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_max: float = 5.0,
+        timeout: float = 10.0,
+        sleep=time.sleep
+    ):
+        """
+        Initialize HTTP client
+
+        Args:
+            pool_maxsize: Keep-alive connections kept per host
+            pool_sizes: Per-host overrides of pool_maxsize ({'api.telegram.org': 2})
+            retries: Retries after the first attempt for idempotent requests
+            backoff_base: First retry waits up to this many seconds (doubles
+                per attempt, full jitter)
+            backoff_max: Cap on a single backoff and on honoured Retry-After
+            timeout: Default request timeout in seconds
+            sleep: Sleep function (injectable for tests)
+        """
+        self.pool_maxsize = pool_maxsize
+        self.pool_sizes = {host.lower(): size for host, size in (pool_sizes or {}).items()}
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._sleep = sleep
+        self._rng = random.Random()
+        self._sessions: Dict[Tuple[str, str], requests.Session] = {}
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'attempts': 0,
+            'retries': 0,
+            'errors': 0,
+        }
+
+    def session_for(self, url: str) -> requests.Session:
+        """Keep-alive session (with its own connection pool) for a URL's host"""
+        parts = urlsplit(url)
+        key = (parts.scheme.lower(), parts.netloc.lower())
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                size = self.pool_sizes.get(parts.hostname or '', self.pool_maxsize)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=0)
+                session = requests.Session()
+                session.mount(f"{key[0]}://{key[1]}", adapter)
+                self._sessions[key] = session
+                LOG.info(f"[HTTP] Opened connection pool for {key[1]} (size {size})")
+        return session
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Seconds to wait before retry number attempt + 1"""
+        if retry_after:
+            try:
+                return min(self.backoff_max, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        return self._rng.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _histogram(self, endpoint: str) -> LatencyHistogram:
+        histogram = self._histograms.get(endpoint)
+        if histogram is None:
+            if len(self._histograms) >= MAX_ENDPOINTS:
+                endpoint = 'other'
+            histogram = self._histograms.setdefault(endpoint, LatencyHistogram())
+        return histogram
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        endpoint: Optional[str] = None,
+        retries: Optional[int] = None,
+        **kwargs
+    ) -> requests.Response:
+        """
+        Send a request through the host's pool
+
+        Connection errors, timeouts and 429/5xx responses are retried for
+        idempotent methods (or up to `retries` times when given explicitly).
+        The last response is returned as-is; the last exception is raised.
+
+        Args:
+            method: HTTP method
+            url: Full URL
+            endpoint: Histogram label (default 'METHOD host/path'); pass one
+                when the path carries secrets or unbounded ids
+            retries: Override of the retry count for this call
+        """
+        method = method.upper()
+        if retries is None:
+            retries = self.retries if method in IDEMPOTENT_METHODS else 0
+        if endpoint is None:
+            parts = urlsplit(url)
+            endpoint = f"{method} {parts.netloc}{parts.path}"
+        kwargs.setdefault('timeout', self.timeout)
+        session = self.session_for(url)
+
+        with self._lock:
+            self._stats['requests'] += 1
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            error = None
+            response = None
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            failed = error is not None or response.status_code in RETRY_STATUSES
+            retrying = failed and attempt < retries
+            with self._lock:
+                self._stats['attempts'] += 1
+                histogram = self._histogram(endpoint)
+                histogram.observe(elapsed_ms)
+                if failed:
+                    histogram.errors += 1
+                    self._stats['errors'] += 1
+                if retrying:
+                    histogram.retries += 1
+                    self._stats['retries'] += 1
+
+            if not retrying:
+                if error is not None:
+                    raise error
+                return response
+
+            delay = self.backoff(attempt, response.headers.get('Retry-After') if response is not None else None)
+            LOG.warning(
+                f"[HTTP] {endpoint} attempt {attempt + 1} failed "
+                f"({error or response.status_code}); retrying in {delay:.2f}s"
+            )
+            if response is not None:
+                response.close()
+            self._sleep(delay)
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def get_stats(self) -> Dict:
+        """Request counters, pool configuration and per-endpoint latency histograms"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pools'] = {
+                netloc: self.pool_sizes.get(netloc.split(':')[0], self.pool_maxsize)
+                for _, netloc in self._sessions
+            }
+            stats['endpoints'] = {
+                endpoint: histogram.to_dict()
+                for endpoint, histogram in sorted(self._histograms.items())
+            }
+        stats['pool_maxsize'] = self.pool_maxsize
+        stats['max_retries'] = self.retries
+        return stats
+
+    def close(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+# Global instance
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Get or create the shared HTTP client"""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            LOG.info("Creating new HttpClient instance...")
+            _http_client = HttpClient(
+                pool_maxsize=int(os.getenv('HTTP_POOL_MAXSIZE', '10')),
+                pool_sizes=_parse_pool_sizes(os.getenv('HTTP_POOL_SIZES', '')),
+                retries=int(os.getenv('HTTP_MAX_RETRIES', '2')),
+                backoff_base=float(os.getenv('HTTP_BACKOFF_BASE', '0.2')),
+                backoff_max=float(os.getenv('HTTP_BACKOFF_MAX', '5')),
+                timeout=float(os.getenv('HTTP_TIMEOUT', '10')),
+            )
+    return _http_client
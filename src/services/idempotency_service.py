@@ -0,0 +1,239 @@
+"""
+Idempotency Service
+In-process cache of recently seen webhook event keys in front of the
+idempotency_keys table, plus a background purge of old key rows
+"""
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from src.database.session import SessionLocal
+from src.models.base import IdempotencyKey
+
+LOG = logging.getLogger(__name__)
+
+
+class IdempotencyCache:
+    """Bounded LRU of event keys with TTL eviction.
+
+    Only keys that are known to exist in the idempotency_keys table are
+    cached, so a cache hit is always a true duplicate. Misses fall through
+    to the INSERT, and the unique constraint stays the authority for
+    first-seen keys (including concurrent requests racing on the same key).
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: int = 3600):
+        """
+        Initialize idempotency cache
+
+        Args:
+            max_size: Maximum number of keys kept in memory
+            ttl_seconds: Seconds a key is answered from memory
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'claimed': 0,
+            'db_duplicates': 0,
+            'evictions': 0,
+        }
+
+    def _remember(self, key: str):
+        """Cache a key that exists in the database"""
+        with self._lock:
+            self._keys[key] = time.monotonic() + self.ttl_seconds
+            self._keys.move_to_end(key)
+            while len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def contains(self, key: str) -> bool:
+        """Check (and refresh LRU order) whether a live key is cached"""
+        with self._lock:
+            expires_at = self._keys.get(key)
+            if expires_at is None:
+                return False
+            if expires_at < time.monotonic():
+                del self._keys[key]
+                self._stats['evictions'] += 1
+                return False
+            self._keys.move_to_end(key)
+            return True
+
+    def claim(self, key: str) -> bool:
+        """
+        Claim an event key
+
+        Returns:
+            True if the key was already seen (duplicate), False if this
+            call claimed it
+        """
+        if self.contains(key):
+            with self._lock:
+                self._stats['hits'] += 1
+            return True
+
+        with self._lock:
+            self._stats['misses'] += 1
+
+        session = SessionLocal()
+        try:
+            session.add(IdempotencyKey(key=key))
+            session.commit()
+            duplicate = False
+        except IntegrityError:
+            session.rollback()
+            duplicate = True
+        finally:
+            session.close()
+
+        self._remember(key)
+        with self._lock:
+            self._stats['db_duplicates' if duplicate else 'claimed'] += 1
+        return duplicate
+
+    def release(self, key: str):
+        """Forget a key and delete its row so the event can be retried"""
+        with self._lock:
+            self._keys.pop(key, None)
+
+        session = SessionLocal()
+        try:
+            session.query(IdempotencyKey).filter(
+                IdempotencyKey.key == key
+            ).delete(synchronize_session=False)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def get_stats(self) -> Dict:
+        """Cache size and hit/miss counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._keys)
+        stats['max_size'] = self.max_size
+        stats['ttl_seconds'] = self.ttl_seconds
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups * 100, 2) if lookups else 0
+        return stats
+
+
+def purge_idempotency_keys(retention_hours: int = 168, batch_size: int = 1000) -> int:
+    """
+    Delete idempotency key rows older than the retention window in
+    bounded batches (one short transaction per batch)
+
+    Returns:
+        Number of rows deleted
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=retention_hours)
+    total = 0
+    session = SessionLocal()
+    try:
+        while True:
+            ids = [
+                row[0] for row in session.query(IdempotencyKey.id).filter(
+                    IdempotencyKey.created_at < cutoff
+                ).limit(batch_size).all()
+            ]
+            if not ids:
+                break
+
+            session.query(IdempotencyKey).filter(
+                IdempotencyKey.id.in_(ids)
+            ).delete(synchronize_session=False)
+            session.commit()
+            total += len(ids)
+
+            if len(ids) < batch_size:
+                break
+    except Exception as e:
+        session.rollback()
+        LOG.error(f"[IDEMPOTENCY] Purge failed after {total} row(s): {e}")
+    finally:
+        session.close()
+
+    if total:
+        LOG.info(f"[IDEMPOTENCY] Purged {total} key(s) older than {retention_hours}h")
+    return total
+
+
+class IdempotencyKeyPurger:
+    """Background thread that periodically purges old idempotency keys"""
+
+    def __init__(self, interval_seconds: int = 3600, retention_hours: int = 168):
+        self.interval_seconds = interval_seconds
+        self.retention_hours = retention_hours
+        self.running = False
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.last_purged = 0
+
+    def purge_loop(self):
+        """Purge on start, then once per interval"""
+        LOG.info("[IDEMPOTENCY PURGE] Started")
+        while not self.stop_event.is_set():
+            self.last_purged = purge_idempotency_keys(self.retention_hours)
+            self.stop_event.wait(self.interval_seconds)
+        LOG.info("[IDEMPOTENCY PURGE] Stopped")
+
+    def start(self):
+        """Start purge thread"""
+        if self.running:
+            LOG.warning("[IDEMPOTENCY PURGE] Already running")
+            return
+        self.running = True
+        self.stop_event.clear()
+        self.thread = threading.Thread(
+            target=self.purge_loop, daemon=True, name="IdempotencyPurger"
+        )
+        self.thread.start()
+
+    def stop(self):
+        """Stop purge thread"""
+        if not self.running:
+            return
+        self.running = False
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+
+# Global instances
+_idempotency_cache: Optional[IdempotencyCache] = None
+_idempotency_purger: Optional[IdempotencyKeyPurger] = None
+
+
+def get_idempotency_cache() -> IdempotencyCache:
+    """Get or create the idempotency key cache"""
+    global _idempotency_cache
+    if _idempotency_cache is None:
+        _idempotency_cache = IdempotencyCache(
+            max_size=int(os.getenv('IDEMPOTENCY_CACHE_SIZE', '10000')),
+            ttl_seconds=int(os.getenv('IDEMPOTENCY_CACHE_TTL', '3600'))
+        )
+    return _idempotency_cache
+
+
+def get_idempotency_purger() -> IdempotencyKeyPurger:
+    """Get or create the idempotency key purge job"""
+    global _idempotency_purger
+    if _idempotency_purger is None:
+        _idempotency_purger = IdempotencyKeyPurger(
+            interval_seconds=int(os.getenv('IDEMPOTENCY_PURGE_INTERVAL', '3600')),
+            retention_hours=int(os.getenv('IDEMPOTENCY_KEY_RETENTION_HOURS', '168'))
+        )
+    return _idempotency_purger
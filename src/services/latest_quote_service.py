@@ -0,0 +1,139 @@
+"""
+Latest Quote Service
+One latest_quotes row per symbol, upserted in the same transaction that
+writes ticks, so "latest price" endpoints read a single small table
+instead of searching historical_prices once per symbol
+"""
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, delete, func, insert, select
+
+from src.database.upsert import upsert_rows
+from src.models.base import AllowedInstrument, HistoricalPrice, LatestQuote
+
+LOG = logging.getLogger(__name__)
+
+QUOTE_COLUMNS = (
+    'symbol', 'timestamp', 'bid_price', 'ask_price', 'mid_price',
+    'spread', 'spread_pct', 'volume_bid', 'volume_ask'
+)
+
+
+def newest_per_symbol(rows: Iterable[Dict]) -> List[Dict]:
+    """Newest row of each symbol in a batch of ticks (later rows win ties)"""
+    newest = {}
+    for row in rows:
+        current = newest.get(row['symbol'])
+        if current is None or row['timestamp'] >= current['timestamp']:
+            newest[row['symbol']] = row
+    return [{column: row.get(column) for column in QUOTE_COLUMNS} for row in newest.values()]
+
+
+def upsert_latest_quotes(session, rows: Iterable[Dict]) -> int:
+    """
+    Move each symbol's latest quote forward to the newest of `rows`
+
+    Runs on the caller's session and does not commit, so it lands in the
+    same transaction as the tick insert. A quote is never moved backwards
+    by an older tick arriving late.
+
+    Returns:
+        Number of symbols upserted
+    """
+    rows = newest_per_symbol(rows)
+    if not rows:
+        return 0
+
+    upsert_rows(
+        session, LatestQuote, rows, ['symbol'],
+        set_=lambda excluded: {
+            **{column: excluded[column] for column in QUOTE_COLUMNS if column != 'symbol'},
+            'updated_at': func.now(),
+        },
+        where=lambda excluded: LatestQuote.timestamp <= excluded.timestamp
+    )
+    return len(rows)
+
+
+def rebuild_latest_quotes(session) -> int:
+    """
+    Repopulate latest_quotes from the newest stored tick of every symbol
+    (cold start, or after ticks were written without the buffer)
+
+    Returns:
+        Number of symbols with a quote
+    """
+    newest_ts = select(
+        HistoricalPrice.symbol, func.max(HistoricalPrice.timestamp).label('timestamp')
+    ).group_by(HistoricalPrice.symbol).subquery()
+    # Newest tick by timestamp; max(id) only breaks ties between equal timestamps
+    newest = select(func.max(HistoricalPrice.id)).join(
+        newest_ts,
+        and_(
+            HistoricalPrice.symbol == newest_ts.c.symbol,
+            HistoricalPrice.timestamp == newest_ts.c.timestamp
+        )
+    ).group_by(HistoricalPrice.symbol)
+    columns = [getattr(HistoricalPrice, column) for column in QUOTE_COLUMNS]
+    session.execute(delete(LatestQuote))
+    session.execute(
+        insert(LatestQuote).from_select(
+            list(QUOTE_COLUMNS), select(*columns).where(HistoricalPrice.id.in_(newest))
+        )
+    )
+    session.commit()
+    count = session.query(LatestQuote).count()
+    LOG.info(f"[LATEST QUOTES] Rebuilt {count} symbol quote(s) from historical_prices")
+    return count
+
+
+def ensure_latest_quotes(session) -> int:
+    """
+    Rebuild latest_quotes at startup when it is empty but ticks exist
+    (databases created with create_all, or ticks imported without the buffer)
+
+    Returns:
+        Number of symbols rebuilt (0 when nothing had to be done)
+    """
+    if session.query(LatestQuote.symbol).first() is not None:
+        return 0
+    if session.query(HistoricalPrice.id).first() is None:
+        return 0
+    return rebuild_latest_quotes(session)
+
+
+def quote_to_dict(quote: LatestQuote) -> Dict:
+    return {
+        'symbol': quote.symbol,
+        'timestamp': quote.timestamp.isoformat(),
+        'bid': float(quote.bid_price),
+        'ask': float(quote.ask_price),
+        'mid': float(quote.mid_price),
+        'spread': float(quote.spread),
+        'spread_pct': float(quote.spread_pct),
+    }
+
+
+def get_enabled_latest_quotes(session) -> List[Dict]:
+    """Latest quote and instrument name of every enabled symbol, in one query"""
+    rows = session.query(LatestQuote, AllowedInstrument.name).join(
+        AllowedInstrument, AllowedInstrument.symbol == LatestQuote.symbol
+    ).filter(
+        AllowedInstrument.enabled.is_(True)
+    ).order_by(LatestQuote.symbol).all()
+
+    result = []
+    for quote, name in rows:
+        item = quote_to_dict(quote)
+        item['name'] = name
+        result.append(item)
+    return result
+
+
+def get_latest_quotes(session, symbols: Optional[Iterable[str]] = None) -> Dict[str, LatestQuote]:
+    """Latest quotes by symbol (all symbols, or just the given ones)"""
+    query = session.query(LatestQuote)
+    if symbols is not None:
+        query = query.filter(LatestQuote.symbol.in_(list(symbols)))
+    return {quote.symbol: quote for quote in query}
@@ -0,0 +1,271 @@
+"""
+Live Stream Service
+Turns trade lifecycle and price events from the event bus into a numbered
+stream of position and price deltas for push clients (Server-Sent Events).
+Recent deltas are kept in a ring buffer so a reconnecting client resumes
+from its last event id instead of refetching everything; price updates
+are throttled per symbol, keeping only the newest quote in each interval
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.services.event_bus import (
+    PRICE_UPDATED,
+    TRADE_CLOSED,
+    TRADE_DELETED,
+    TRADE_TOPICS,
+    get_event_bus,
+)
+
+LOG = logging.getLogger(__name__)
+
+# Delta kinds, also the SSE event names
+POSITION_EVENT = 'position'
+PRICE_EVENT = 'price'
+CHANNELS = {'positions': POSITION_EVENT, 'prices': PRICE_EVENT}
+
+
+def _plain(value):
+    """JSON-safe copy of an event payload value"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def position_to_dict(trade: Dict) -> Dict:
+    """Open position in the /api/trading/positions format, from a trade snapshot"""
+    return {
+        'id': trade['id'],
+        'symbol': trade['symbol'],
+        'action': trade['action'],
+        'quantity': _plain(trade['quantity']),
+        'open_price': _plain(trade['open_price']),
+        'open_time': _plain(trade.get('open_time')),
+        'allocated_fund': _plain(trade.get('allocated_fund')),
+        'risk_amount': _plain(trade.get('risk_amount')),
+        'stop_loss': _plain(trade.get('stop_loss')),
+        'take_profit': _plain(trade.get('take_profit')),
+        'current_pnl': None,
+    }
+
+
+class LiveStream:
+    """
+    Ring buffer of numbered deltas fed by the event bus
+
+    Event ids are '<epoch>-<seq>'; the epoch changes on restart so a
+    client resuming against a different process is told to reset.
+    """
+
+    def __init__(self, buffer_size: int = 1000, price_interval: float = 1.0,
+                 clock=time.monotonic):
+        self.price_interval = price_interval
+        self._clock = clock
+        self._epoch = uuid.uuid4().hex[:8]
+        self._events = deque(maxlen=buffer_size)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._price_sent_at: Dict[str, float] = {}
+        self._price_pending: Dict[str, Dict] = {}
+        self._clients = 0
+        self._stats = {
+            'position_events': 0,
+            'price_events': 0,
+            'prices_throttled': 0,
+            'resumes': 0,
+            'resets': 0,
+        }
+        self._bus = None
+
+    # -- event bus --------------------------------------------------------
+
+    def subscribe(self, bus=None):
+        """Start receiving trade and price events"""
+        self._bus = bus or get_event_bus()
+        for topic in TRADE_TOPICS:
+            self._bus.subscribe(topic, self.on_trade_event)
+        self._bus.subscribe(PRICE_UPDATED, self.on_price_update)
+
+    def unsubscribe(self):
+        if self._bus is None:
+            return
+        self._bus.unsubscribe(PRICE_UPDATED, self.on_price_update)
+        for topic in TRADE_TOPICS:
+            self._bus.unsubscribe(topic, self.on_trade_event)
+        self._bus = None
+
+    def on_trade_event(self, topic: str, payload: Dict):
+        """Bus handler: upsert or remove the position"""
+        if topic in (TRADE_CLOSED, TRADE_DELETED) or payload.get('status') != 'OPEN':
+            delta = {'op': 'remove', 'id': payload['id'], 'symbol': payload['symbol'],
+                     'status': payload.get('status'), 'topic': topic}
+        else:
+            delta = {'op': 'upsert', 'position': position_to_dict(payload), 'topic': topic}
+            if payload.get('changed'):
+                delta['changed'] = list(payload['changed'])
+        with self._cond:
+            self._append(POSITION_EVENT, payload['symbol'], delta)
+            self._stats['position_events'] += 1
+
+    def on_price_update(self, topic: str, payload: Dict):
+        """Bus handler: at most one price delta per symbol per interval"""
+        symbol = payload['symbol']
+        delta = {key: _plain(payload.get(key)) for key in ('symbol', 'bid', 'ask', 'mid', 'timestamp')}
+        with self._cond:
+            now = self._clock()
+            if now - self._price_sent_at.get(symbol, float('-inf')) >= self.price_interval:
+                self._price_pending.pop(symbol, None)
+                self._send_price(symbol, delta, now)
+            else:
+                self._price_pending[symbol] = delta
+                self._stats['prices_throttled'] += 1
+
+    # -- buffer -----------------------------------------------------------
+
+    def _append(self, kind: str, symbol: str, data: Dict):
+        """Number and buffer a delta, waking waiting clients (holds _cond)"""
+        self._seq += 1
+        self._events.append((self._seq, kind, symbol, data))
+        self._cond.notify_all()
+
+    def _send_price(self, symbol: str, delta: Dict, now: float):
+        self._price_sent_at[symbol] = now
+        self._append(PRICE_EVENT, symbol, delta)
+        self._stats['price_events'] += 1
+
+    def _flush_due_prices(self) -> Optional[float]:
+        """
+        Send throttled quotes whose interval has passed (holds _cond)
+
+        Returns:
+            Seconds until the next held-back quote is due, or None
+        """
+        now = self._clock()
+        next_due = None
+        for symbol in list(self._price_pending):
+            due = self._price_sent_at[symbol] + self.price_interval
+            if now >= due:
+                self._send_price(symbol, self._price_pending.pop(symbol), now)
+            else:
+                wait = due - now
+                next_due = wait if next_due is None else min(next_due, wait)
+        return next_due
+
+    def event_id(self, seq: int) -> str:
+        return f"{self._epoch}-{seq}"
+
+    def parse_event_id(self, token: Optional[str]) -> Optional[int]:
+        """Sequence number of a resume token from this process, else None"""
+        if not token:
+            return None
+        epoch, _, seq = token.partition('-')
+        if epoch != self._epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    @property
+    def last_seq(self) -> int:
+        with self._cond:
+            return self._seq
+
+    def resume(self, token: Optional[str]) -> Optional[int]:
+        """
+        Sequence to continue after for a client's Last-Event-ID
+
+        Returns:
+            The sequence, or None when the client must take a fresh
+            snapshot (no token, another process, or fell out of the buffer)
+        """
+        seq = self.parse_event_id(token)
+        with self._cond:
+            oldest = self._events[0][0] if self._events else self._seq + 1
+            if seq is None or seq > self._seq or seq < oldest - 1:
+                if token:
+                    self._stats['resets'] += 1
+                return None
+            self._stats['resumes'] += 1
+            return seq
+
+    def wait(self, after: int, timeout: float, kinds: Optional[Iterable[str]] = None,
+             symbols: Optional[Iterable[str]] = None) -> Tuple[int, Optional[List[Tuple[int, str, Dict]]]]:
+        """
+        Deltas numbered after `after`, blocking up to `timeout` for new ones
+
+        Returns:
+            (last seq examined, [(seq, kind, data), ...] matching the filters).
+            The list is None when deltas after `after` have already left the
+            buffer: the client lost some and must take a fresh snapshot, then
+            continue after the returned seq.
+        """
+        kinds = set(kinds) if kinds else None
+        symbols = set(symbols) if symbols else None
+        deadline = self._clock() + timeout
+        with self._cond:
+            while True:
+                next_due = self._flush_due_prices()
+                if self._events and after < self._events[0][0] - 1:
+                    self._stats['resets'] += 1
+                    return self._seq, None
+                if self._seq > after:
+                    break
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    return after, []
+                self._cond.wait(remaining if next_due is None else min(remaining, next_due))
+
+            events = [
+                (seq, kind, data) for seq, kind, symbol, data in self._events
+                if seq > after
+                and (kinds is None or kind in kinds)
+                and (symbols is None or symbol in symbols)
+            ]
+            return self._seq, events
+
+    def client_connected(self):
+        with self._cond:
+            self._clients += 1
+
+    def client_disconnected(self):
+        with self._cond:
+            self._clients -= 1
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'clients': self._clients,
+                'last_event_id': self.event_id(self._seq),
+                'buffered': len(self._events),
+                'buffer_size': self._events.maxlen,
+                'prices_pending': len(self._price_pending),
+                'price_interval': self.price_interval,
+            })
+        return stats
+
+
+# Global instance
+_live_stream: Optional[LiveStream] = None
+_live_stream_lock = threading.Lock()
+
+
+def get_live_stream() -> LiveStream:
+    """Get or create the live stream (subscribed to the event bus)"""
+    global _live_stream
+    with _live_stream_lock:
+        if _live_stream is None:
+            _live_stream = LiveStream(
+                buffer_size=int(os.getenv('LIVE_STREAM_BUFFER', '1000')),
+                price_interval=float(os.getenv('LIVE_PRICE_INTERVAL', '1'))
+            )
+            _live_stream.subscribe()
+            LOG.info("[LIVE STREAM] Subscribed to trade and price events")
+    return _live_stream
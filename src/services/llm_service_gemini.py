@@ -17,7 +17,7 @@ from pathlib import Path
 from typing import Dict, Any
 
 from dotenv import load_dotenv
-import requests
+from src.services.http_client import get_http_client
 
 # load environment from .env if present
 load_dotenv()
@@ -60,7 +60,7 @@ def ocr_with_vision_api(image_path: str) -> str:
             }
         ]
     }
-    resp = requests.post(url, json=payload, timeout=30)
+    resp = get_http_client().post(url, json=payload, timeout=30, endpoint='vision.annotate')
     if not resp.ok:
         raise RuntimeError(f"Vision API error: {resp.status_code} {resp.text}")
     data = resp.json()
@@ -107,7 +107,7 @@ def parse_trade_with_gemini(text: str) -> Dict[str, Any]:
     )
 
     payload = {"prompt": {"text": prompt}, "candidate_count": 1}
-    resp = requests.post(url, json=payload, timeout=30)
+    resp = get_http_client().post(url, json=payload, timeout=30, endpoint='gemini.generateText')
     if not resp.ok:
         raise RuntimeError(
             "Generative API error: %s %s" % (resp.status_code, resp.text)
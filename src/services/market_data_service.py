@@ -0,0 +1,275 @@
+"""
+Market Data Cache Service
+Shared latest bid/ask/mid per symbol with a staleness budget, so the
+trade monitor, price collector and webhook price verification reuse one
+orderbook fetch instead of each hitting the exchange. Every fresh quote
+is published on the event bus as a price update
+"""
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Dict, Optional
+
+from src.services.event_bus import PRICE_UPDATED, get_event_bus
+
+LOG = logging.getLogger(__name__)
+
+
+def parse_orderbook(symbol: str, orderbook: Dict) -> Optional[Dict]:
+    """
+    Extract best bid/ask from a Delta Exchange orderbook response
+
+    Returns:
+        Quote dict or None if the book is empty or invalid
+    """
+    result = orderbook.get('result', {}) or {}
+    buy_orders = result.get('buy', [])
+    sell_orders = result.get('sell', [])
+
+    if not buy_orders or not sell_orders:
+        LOG.warning(f"[{symbol}] No orderbook data available")
+        return None
+
+    bid = Decimal(str(buy_orders[0].get('price', 0)))
+    ask = Decimal(str(sell_orders[0].get('price', 0)))
+
+    if bid <= 0 or ask <= 0:
+        LOG.error(f"[{symbol}] Invalid price data: bid=${bid}, ask=${ask}")
+        return None
+
+    return {
+        'symbol': symbol,
+        'bid': bid,
+        'ask': ask,
+        'mid': (bid + ask) / 2,
+        'bid_size': Decimal(str(buy_orders[0].get('size', 0))),
+        'ask_size': Decimal(str(sell_orders[0].get('size', 0))),
+        'timestamp': datetime.utcnow(),
+    }
+
+
+def _default_fetcher(symbol: str) -> Dict:
+    """Fetch an orderbook through the shared Delta Exchange client"""
+    from src.services.delta_exchange_service import get_delta_trader
+
+    client = get_delta_trader().client
+    if not client:
+        return {
+            'success': False,
+            'error': {'code': 'client_not_initialized'}
+        }
+    return client.get_orderbook(symbol)
+
+
+class MarketDataCache:
+    """Latest quote per symbol, refreshed through single-flight fetches.
+
+    A quote younger than the staleness budget is served from memory. When
+    it is stale, the first caller fetches it from the exchange and any
+    concurrent callers for the same symbol wait for that fetch instead of
+    issuing their own.
+    """
+
+    def __init__(
+        self,
+        max_age_seconds: float = 1.0,
+        fetcher: Optional[Callable[[str], Dict]] = None
+    ):
+        """
+        Initialize market data cache
+
+        Args:
+            max_age_seconds: Staleness budget for cached quotes
+            fetcher: Callable returning an orderbook response for a symbol
+        """
+        self.max_age_seconds = max_age_seconds
+        self.fetcher = fetcher or _default_fetcher
+        self._quotes: Dict[str, Dict] = {}
+        self._fetched_at: Dict[str, float] = {}
+        self._inflight: Dict[str, threading.Event] = {}
+        self._errors: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'stale': 0,
+            'coalesced': 0,
+            'fetches': 0,
+            'fetch_errors': 0,
+            'pushed': 0,
+        }
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def get_quote(self, symbol: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """
+        Get the latest quote for a symbol
+
+        Args:
+            symbol: Trading symbol
+            max_age: Override the staleness budget for this read
+
+        Returns:
+            Quote dict (bid, ask, mid, sizes, timestamp) or None if the
+            exchange could not provide one
+        """
+        budget = self.max_age_seconds if max_age is None else max_age
+
+        with self._lock:
+            quote = self._quotes.get(symbol)
+            age = time.monotonic() - self._fetched_at.get(symbol, 0)
+            if quote is not None and age <= budget:
+                self._stats['hits'] += 1
+                return quote
+
+            if quote is None:
+                self._stats['misses'] += 1
+            else:
+                self._stats['stale'] += 1
+
+            inflight = self._inflight.get(symbol)
+            if inflight is None:
+                inflight = threading.Event()
+                self._inflight[symbol] = inflight
+                leader = True
+            else:
+                self._stats['coalesced'] += 1
+                leader = False
+
+        if not leader:
+            inflight.wait(timeout=30)
+            with self._lock:
+                # The leader's fetch may have failed or timed out: don't
+                # hand back the quote that was already too old
+                quote = self._quotes.get(symbol)
+                age = time.monotonic() - self._fetched_at.get(symbol, 0)
+                return quote if quote is not None and age <= budget else None
+
+        try:
+            return self._refresh(symbol)
+        finally:
+            with self._lock:
+                self._inflight.pop(symbol, None)
+            inflight.set()
+
+    def _refresh(self, symbol: str) -> Optional[Dict]:
+        """Fetch a fresh orderbook and store the parsed quote"""
+        self._count('fetches')
+        try:
+            orderbook = self.fetcher(symbol)
+        except Exception as e:
+            self._count('fetch_errors')
+            with self._lock:
+                self._errors[symbol] = str(e)
+            LOG.error(f"[{symbol}] Error fetching orderbook: {e}")
+            return None
+
+        if not orderbook.get('success'):
+            error = orderbook.get('error', {})
+            self._count('fetch_errors')
+            with self._lock:
+                self._errors[symbol] = error
+            if isinstance(error, dict) and error.get('code') == 'ip_not_whitelisted_for_api_key':
+                LOG.error(
+                    f"[{symbol}] IP NOT WHITELISTED - "
+                    f"Add your IP to Delta Exchange API key settings"
+                )
+            else:
+                LOG.warning(f"[{symbol}] Failed to get orderbook: {error}")
+            return None
+
+        quote = parse_orderbook(symbol, orderbook)
+        if quote is None:
+            self._count('fetch_errors')
+            with self._lock:
+                self._errors[symbol] = 'No market data available'
+            return None
+
+        with self._lock:
+            self._quotes[symbol] = quote
+            self._fetched_at[symbol] = time.monotonic()
+            self._errors.pop(symbol, None)
+        self._publish(quote)
+        return quote
+
+    def update(self, symbol: str, bid, ask, bid_size=None, ask_size=None, received_at=None):
+        """
+        Store a quote pushed by another source (e.g. the streaming feed)
+        
+        Args:
+            received_at: time.perf_counter() when the source received the
+                quote (defaults to now)
+        """
+        bid = Decimal(str(bid))
+        ask = Decimal(str(ask))
+        if bid <= 0 or ask <= 0:
+            return
+
+        quote = {
+            'symbol': symbol,
+            'bid': bid,
+            'ask': ask,
+            'mid': (bid + ask) / 2,
+            'bid_size': Decimal(str(bid_size or 0)),
+            'ask_size': Decimal(str(ask_size or 0)),
+            'timestamp': datetime.utcnow(),
+        }
+        with self._lock:
+            self._quotes[symbol] = quote
+            self._fetched_at[symbol] = time.monotonic()
+            self._errors.pop(symbol, None)
+            self._stats['pushed'] += 1
+        self._publish(quote, received_at)
+
+    def _publish(self, quote: Dict, received_at: Optional[float] = None):
+        """Announce a fresh quote to price subscribers (e.g. the trade monitor)"""
+        payload = dict(quote)
+        payload['received_at'] = received_at or time.perf_counter()
+        get_event_bus().publish(PRICE_UPDATED, payload)
+
+    def last_error(self, symbol: str):
+        """Error from the most recent failed fetch for a symbol, if any"""
+        with self._lock:
+            return self._errors.get(symbol)
+
+    def get_stats(self) -> Dict:
+        """Hit/miss/staleness counters and per-symbol quote age"""
+        now = time.monotonic()
+        with self._lock:
+            stats = dict(self._stats)
+            ages = {
+                symbol: round(now - fetched_at, 3)
+                for symbol, fetched_at in self._fetched_at.items()
+            }
+
+        reads = stats['hits'] + stats['misses'] + stats['stale']
+        stats['reads'] = reads
+        stats['hit_rate'] = round(stats['hits'] / reads * 100, 2) if reads else 0
+        # Every read that did not trigger its own fetch is an exchange call saved
+        stats['exchange_calls_saved'] = reads - stats['fetches']
+        stats['max_age_seconds'] = self.max_age_seconds
+        stats['symbols'] = len(ages)
+        stats['quote_age_seconds'] = ages
+        return stats
+
+
+# Global instance
+_market_data_cache = None
+_market_data_lock = threading.Lock()
+
+
+def get_market_data_cache() -> MarketDataCache:
+    """Get or create the shared market data cache"""
+    global _market_data_cache
+    with _market_data_lock:
+        if _market_data_cache is None:
+            LOG.info("Creating new MarketDataCache instance...")
+            _market_data_cache = MarketDataCache(
+                max_age_seconds=float(os.getenv('MARKET_DATA_MAX_AGE', '1.0'))
+            )
+    return _market_data_cache
@@ -0,0 +1,460 @@
+"""
+Market Feed Service
+Streaming Delta Exchange market data over one persistent socket: L2
+orderbook, L1 and ticker updates are applied to local books and pushed
+into the shared market data cache, which publishes them on the event bus
+for the trade monitor, price collector and webhook price verification
+
+The connection reconnects with exponential backoff, re-requests a
+snapshot whenever an orderbook sequence gap is detected, and treats a
+silent socket (no message or heartbeat within idle_timeout) as dead.
+"""
+import os
+import json
+import time
+import random
+import logging
+import threading
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.services.event_bus import ORDERBOOK_UPDATED, TICKER_UPDATED, get_event_bus
+from src.services.market_data_service import get_market_data_cache
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_FEED_URL = 'wss://socket.india.delta.exchange'
+
+L2_CHANNEL = 'l2_updates'
+L1_CHANNEL = 'l1_orderbook'
+TICKER_CHANNEL = 'v2/ticker'
+# Quotes for a symbol come from the most detailed channel subscribed
+QUOTE_SOURCES = (L2_CHANNEL, L1_CHANNEL, TICKER_CHANNEL)
+
+
+class FeedConnection:
+    """websocket-client connection with the feed's error contract:
+    recv() raises TimeoutError when idle and ConnectionError when closed"""
+
+    def __init__(self, url: str, timeout: float):
+        import websocket  # websocket-client; only needed for the live feed
+
+        self._errors = websocket
+        self._ws = websocket.create_connection(url, timeout=timeout)
+
+    def send(self, text: str):
+        try:
+            self._ws.send(text)
+        except self._errors.WebSocketException as e:
+            raise ConnectionError(str(e)) from e
+
+    def recv(self) -> str:
+        try:
+            return self._ws.recv()
+        except self._errors.WebSocketTimeoutException as e:
+            raise TimeoutError(str(e)) from e
+        except self._errors.WebSocketException as e:
+            raise ConnectionError(str(e)) from e
+
+    def close(self):
+        self._ws.close()
+
+
+class OrderBook:
+    """L2 book of one symbol, rebuilt from a snapshot plus incremental updates"""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids: Dict[Decimal, Decimal] = {}
+        self.asks: Dict[Decimal, Decimal] = {}
+        self.sequence: Optional[int] = None
+
+    @property
+    def synced(self) -> bool:
+        """True once a snapshot has been applied (and no gap seen since)"""
+        return self.sequence is not None
+
+    def reset(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.sequence = None
+
+    def apply_snapshot(self, bids, asks, sequence: int):
+        self.bids = {Decimal(p): Decimal(s) for p, s in bids if Decimal(s) > 0}
+        self.asks = {Decimal(p): Decimal(s) for p, s in asks if Decimal(s) > 0}
+        self.sequence = sequence
+
+    def apply_update(self, bids, asks, sequence: int):
+        for side, levels in ((self.bids, bids), (self.asks, asks)):
+            for price, size in levels:
+                price, size = Decimal(price), Decimal(size)
+                if size > 0:
+                    side[price] = size
+                else:
+                    side.pop(price, None)
+        self.sequence = sequence
+
+    def best(self) -> Optional[tuple]:
+        """(bid, bid_size, ask, ask_size) or None while either side is empty"""
+        if not self.bids or not self.asks:
+            return None
+        bid = max(self.bids)
+        ask = min(self.asks)
+        return bid, self.bids[bid], ask, self.asks[ask]
+
+    def top(self, depth: int) -> Dict[str, List]:
+        return {
+            'bids': sorted(self.bids.items(), reverse=True)[:depth],
+            'asks': sorted(self.asks.items())[:depth],
+        }
+
+
+class MarketFeedClient:
+    """Persistent market data subscription for a set of symbols.
+
+    A background thread owns the connection: it subscribes, applies every
+    message, and on any failure closes the socket and reconnects after an
+    exponential, jittered backoff. Books are dropped on disconnect, so no
+    quote is published from a book that may have missed updates; the
+    server sends fresh snapshots on (re)subscribe.
+    """
+
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        url: str = DEFAULT_FEED_URL,
+        channels: Iterable[str] = (L2_CHANNEL, TICKER_CHANNEL),
+        connect: Optional[Callable] = None,
+        market_data=None,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        idle_timeout: float = 35.0,
+        depth: int = 10,
+        record_to: Optional[str] = None
+    ):
+        """
+        Initialize market feed client
+
+        Args:
+            symbols: Symbols to subscribe to
+            url: Socket URL
+            channels: Channels to subscribe each symbol to
+            connect: connect(url, timeout) returning an object with send(),
+                recv() and close() (a websocket-client connection by
+                default; a ReplayFeed's connect offline)
+            market_data: Cache quotes are pushed into (the shared one by
+                default)
+            backoff_base / backoff_max: Reconnect delay bounds in seconds
+            idle_timeout: Seconds without any message before the
+                connection is considered dead (heartbeats arrive every 30s)
+            depth: Levels per side published on the orderbook topic
+            record_to: Append every raw message to this file (JSON lines,
+                replayable with ReplayFeed.from_file)
+        """
+        self.symbols = sorted(set(symbols))
+        self.url = url
+        self.channels = [c for c in QUOTE_SOURCES if c in set(channels)]
+        self.connect = connect or FeedConnection
+        self.market_data = market_data or get_market_data_cache()
+        self.bus = get_event_bus()
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.idle_timeout = idle_timeout
+        self.depth = depth
+        self.quote_source = self.channels[0] if self.channels else None
+        self.record_to = record_to
+        self._recorder = None
+
+        self.running = False
+        self.thread = None
+        self.stop_event = threading.Event()
+        self._connection = None
+        self._books: Dict[str, OrderBook] = {s: OrderBook(s) for s in self.symbols}
+        self._l1_sequence: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'connects': 0,
+            'connect_failures': 0,
+            'disconnects': 0,
+            'messages': 0,
+            'quotes_published': 0,
+            'gaps': 0,
+            'resyncs': 0,
+            'dropped': 0,
+            'errors': 0,
+        }
+        self._last_message_at = None
+        self._next_backoff = 0.0
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._stats[key] += n
+
+    def _send(self, connection, message_type: str, channels: List[str], symbols: List[str]):
+        connection.send(json.dumps({
+            'type': message_type,
+            'payload': {
+                'channels': [{'name': c, 'symbols': symbols} for c in channels]
+            }
+        }))
+
+    def subscribe(self, connection):
+        """Enable heartbeats and subscribe every symbol to every channel"""
+        connection.send(json.dumps({'type': 'enable_heartbeat'}))
+        if self.symbols and self.channels:
+            self._send(connection, 'subscribe', self.channels, self.symbols)
+
+    def resync(self, connection, symbol: str):
+        """Re-subscribe a symbol's L2 channel so the server sends a snapshot"""
+        self._books[symbol].reset()
+        self._send(connection, 'unsubscribe', [L2_CHANNEL], [symbol])
+        self._send(connection, 'subscribe', [L2_CHANNEL], [symbol])
+        self._count('resyncs')
+        LOG.info(f"[FEED] {symbol} orderbook resync requested")
+
+    def handle_message(self, message: Dict, received_at: float, connection=None):
+        """Apply one decoded feed message"""
+        kind = message.get('type')
+        symbol = message.get('symbol')
+
+        if kind == L2_CHANNEL:
+            self._handle_l2(message, symbol, received_at, connection)
+        elif kind == L1_CHANNEL:
+            sequence = message.get('last_sequence_no')
+            if sequence is not None:
+                if sequence <= self._l1_sequence.get(symbol, -1):
+                    self._count('dropped')
+                    return
+                self._l1_sequence[symbol] = sequence
+            if self.quote_source == L1_CHANNEL:
+                self._publish_quote(
+                    symbol, message.get('best_bid'), message.get('best_ask'),
+                    message.get('bid_qty'), message.get('ask_qty'), received_at
+                )
+        elif kind == TICKER_CHANNEL:
+            quotes = message.get('quotes') or {}
+            if self.quote_source == TICKER_CHANNEL:
+                self._publish_quote(
+                    symbol, quotes.get('best_bid'), quotes.get('best_ask'),
+                    quotes.get('bid_size'), quotes.get('ask_size'), received_at
+                )
+            if self.bus.has_subscribers(TICKER_UPDATED):
+                payload = dict(message)
+                payload['received_at'] = received_at
+                self.bus.publish(TICKER_UPDATED, payload)
+        elif kind == 'error':
+            self._count('errors')
+            LOG.error(f"[FEED] Server error: {message}")
+        # heartbeat / subscriptions acknowledgements only prove liveness
+
+    def _handle_l2(self, message: Dict, symbol: str, received_at: float, connection):
+        book = self._books.get(symbol)
+        if book is None:
+            return
+        sequence = message.get('sequence_no')
+        bids, asks = message.get('bids') or [], message.get('asks') or []
+
+        if message.get('action') == 'snapshot':
+            book.apply_snapshot(bids, asks, sequence)
+        elif not book.synced:
+            # Updates before the (re)snapshot cannot be applied
+            self._count('dropped')
+            return
+        else:
+            previous = message.get('prev_sequence_no')
+            if previous is None and sequence is not None:
+                previous = sequence - 1
+            if previous != book.sequence:
+                self._count('gaps')
+                LOG.warning(
+                    f"[FEED] {symbol} sequence gap: expected {book.sequence}, "
+                    f"got {previous}"
+                )
+                if connection is not None:
+                    self.resync(connection, symbol)
+                else:
+                    book.reset()
+                return
+            book.apply_update(bids, asks, sequence)
+
+        best = book.best()
+        if best is not None and self.quote_source == L2_CHANNEL:
+            self._publish_quote(symbol, best[0], best[2], best[1], best[3], received_at)
+        if self.bus.has_subscribers(ORDERBOOK_UPDATED):
+            payload = book.top(self.depth)
+            payload.update({
+                'symbol': symbol,
+                'sequence_no': book.sequence,
+                'received_at': received_at,
+            })
+            self.bus.publish(ORDERBOOK_UPDATED, payload)
+
+    def _publish_quote(self, symbol, bid, ask, bid_size, ask_size, received_at):
+        if not symbol or bid is None or ask is None:
+            return
+        self.market_data.update(symbol, bid, ask, bid_size, ask_size, received_at=received_at)
+        self._count('quotes_published')
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before reconnect attempt n (0-based): doubling, jittered"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def pump(self, connection):
+        """Read and apply messages until stopped or the connection fails"""
+        while not self.stop_event.is_set():
+            try:
+                raw = connection.recv()
+            except TimeoutError:
+                raise ConnectionError(f"No message for {self.idle_timeout}s")
+            received_at = time.perf_counter()
+            with self._lock:
+                self._stats['messages'] += 1
+                self._last_message_at = time.time()
+            if self._recorder is not None:
+                self._recorder.write(raw.rstrip('\n') + '\n')
+            try:
+                message = json.loads(raw)
+            except (TypeError, ValueError):
+                self._count('errors')
+                LOG.warning(f"[FEED] Undecodable message: {raw!r:.200}")
+                continue
+            self.handle_message(message, received_at, connection)
+
+    def run(self):
+        """Connect, stream and reconnect until stopped"""
+        if self.record_to:
+            self._recorder = open(self.record_to, 'a')
+        try:
+            self._reconnect_loop()
+        finally:
+            if self._recorder is not None:
+                self._recorder.close()
+                self._recorder = None
+
+    def _reconnect_loop(self):
+        attempt = 0
+        while not self.stop_event.is_set():
+            try:
+                connection = self.connect(self.url, self.idle_timeout)
+            except Exception as e:
+                self._count('connect_failures')
+                LOG.warning(f"[FEED] Connect to {self.url} failed: {e}")
+            else:
+                self._connection = connection
+                self._count('connects')
+                LOG.info(f"[FEED] Connected to {self.url} ({len(self.symbols)} symbol(s))")
+                messages_before = self._stats['messages']
+                try:
+                    self.subscribe(connection)
+                    self.pump(connection)
+                except Exception as e:
+                    if not self.stop_event.is_set():
+                        self._count('disconnects')
+                        LOG.warning(f"[FEED] Connection lost: {e}")
+                finally:
+                    self._connection = None
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+                    for book in self._books.values():
+                        book.reset()
+                    self._l1_sequence.clear()
+                # A connection that delivered data was healthy
+                if self._stats['messages'] > messages_before:
+                    attempt = 0
+
+            if self.stop_event.is_set():
+                break
+            delay = self.backoff(attempt)
+            attempt += 1
+            with self._lock:
+                self._next_backoff = delay
+            LOG.info(f"[FEED] Reconnecting in {delay:.2f}s (attempt {attempt})")
+            self.stop_event.wait(delay)
+
+    def start(self):
+        """Start streaming in a background thread"""
+        if self.running:
+            return
+        self.running = True
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True, name="MarketFeed")
+        self.thread.start()
+
+    def stop(self):
+        """Stop streaming and close the connection"""
+        if not self.running:
+            return
+        self.running = False
+        self.stop_event.set()
+        connection = self._connection
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            last_message_at = self._last_message_at
+            stats['next_backoff_seconds'] = round(self._next_backoff, 3)
+        stats['url'] = self.url
+        stats['channels'] = self.channels
+        stats['symbols'] = self.symbols
+        stats['connected'] = self._connection is not None
+        stats['seconds_since_message'] = (
+            round(time.time() - last_message_at, 3) if last_message_at else None
+        )
+        stats['books'] = {
+            symbol: {'synced': book.synced, 'sequence_no': book.sequence}
+            for symbol, book in self._books.items()
+        }
+        return stats
+
+
+def _enabled_symbols() -> List[str]:
+    from src.database.session import SessionLocal
+    from src.models.base import AllowedInstrument
+
+    session = SessionLocal()
+    try:
+        return [
+            inst.symbol for inst in session.query(AllowedInstrument).filter(
+                AllowedInstrument.enabled.is_(True)
+            )
+        ]
+    finally:
+        session.close()
+
+
+def is_market_feed_enabled() -> bool:
+    return os.getenv('MARKET_FEED_ENABLED', 'false').lower() == 'true'
+
+
+# Global instance
+_market_feed: Optional[MarketFeedClient] = None
+_market_feed_lock = threading.Lock()
+
+
+def get_market_feed() -> MarketFeedClient:
+    """Get or create the market feed (symbols from MARKET_FEED_SYMBOLS or
+    the enabled instruments)"""
+    global _market_feed
+    with _market_feed_lock:
+        if _market_feed is None:
+            symbols = [s.strip() for s in os.getenv('MARKET_FEED_SYMBOLS', '').split(',') if s.strip()]
+            _market_feed = MarketFeedClient(
+                symbols=symbols or _enabled_symbols(),
+                url=os.getenv('MARKET_FEED_URL', DEFAULT_FEED_URL),
+                channels=[
+                    c.strip() for c in
+                    os.getenv('MARKET_FEED_CHANNELS', f"{L2_CHANNEL},{TICKER_CHANNEL}").split(',')
+                ],
+                idle_timeout=float(os.getenv('MARKET_FEED_IDLE_TIMEOUT', '35')),
+            )
+    return _market_feed
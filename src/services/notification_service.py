@@ -0,0 +1,402 @@
+"""
+Telegram Notification Service
+Fire-and-forget dispatcher for Telegram messages. Callers enqueue and
+return immediately; one background thread coalesces bursts into a single
+message per chat within a short window, paces sends with per-chat and
+global token buckets, backs off on 429s, and summarizes what it had to
+drop when overloaded
+"""
+import os
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from src.services.http_client import get_http_client
+
+LOG = logging.getLogger(__name__)
+
+# Telegram rejects messages longer than this
+MAX_MESSAGE_CHARS = 4096
+SEPARATOR = '\n\n'
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+        self.paused_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, until: float):
+        """Hold the bucket empty until a server-imposed retry time"""
+        self.paused_until = max(self.paused_until, until)
+        self.tokens = 0.0
+        self.updated = max(self.updated, until)
+
+
+class _Batch:
+    """Notifications waiting to be sent to one chat as one message"""
+
+    def __init__(self, now: float):
+        self.first_at = now
+        self.texts: List[str] = []
+        self.enqueued_at: List[float] = []
+        self.overflow = 0
+        self.dropped = 0
+        # Sent without parse_mode after Telegram rejected the formatted text
+        self.plain = False
+        self.throttled = False
+
+
+class TelegramNotifier:
+    """Off-thread, coalescing, rate-limited Telegram sender"""
+
+    def __init__(
+        self,
+        token: Optional[str],
+        default_chat: Optional[str] = None,
+        api_url: str = 'https://api.telegram.org',
+        max_queue: int = 1000,
+        coalesce_window: float = 1.0,
+        max_batch: int = 20,
+        chat_rate: float = 1.0,
+        chat_burst: int = 3,
+        global_rate: float = 25.0,
+        timeout: float = 5.0,
+        http=None
+    ):
+        """
+        Initialize notifier
+
+        Args:
+            token: Bot token (notifications are skipped without one)
+            default_chat: Chat used when notify() is not given one
+            api_url: Telegram Bot API base URL
+            max_queue: Notifications accepted but not yet batched; beyond
+                this notify() drops and the next message says so
+            coalesce_window: Seconds a chat's first notification waits for
+                more to merge into the same message
+            max_batch: Notifications merged into one message; the rest
+                are summarized as a count
+            chat_rate / chat_burst: Messages per second (and burst) per chat
+            global_rate: Messages per second across all chats
+            timeout: Send timeout in seconds
+            http: HTTP client (defaults to the shared HttpClient)
+        """
+        self.token = token
+        self.default_chat = default_chat
+        self.api_url = api_url.rstrip('/')
+        self.coalesce_window = coalesce_window
+        self.max_batch = max(1, max_batch)
+        self.chat_rate = chat_rate
+        self.chat_burst = max(1, chat_burst)
+        self.timeout = timeout
+        self.http = http or get_http_client()
+        self._queue = queue.Queue(maxsize=max(1, max_queue))
+        self._batches: Dict[Tuple[str, Optional[str]], _Batch] = {}
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._global_bucket = TokenBucket(global_rate, max(1.0, global_rate), time.monotonic())
+        self._dropped: Dict[Tuple[str, Optional[str]], int] = {}
+        self._latencies = deque(maxlen=1000)
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {
+            'enqueued': 0,
+            'dropped': 0,
+            'delivered': 0,
+            'messages_sent': 0,
+            'summarized': 0,
+            'rate_limited': 0,
+            'throttled': 0,
+            'plain_retries': 0,
+            'failed': 0,
+        }
+
+    def notify(self, text: str, chat_id: Optional[str] = None, parse_mode: Optional[str] = None) -> bool:
+        """
+        Queue a notification without blocking
+
+        Returns:
+            True if accepted, False if skipped (no token/chat) or dropped
+            because the queue is full
+        """
+        chat = str(chat_id or self.default_chat or '')
+        if not (self.token and chat):
+            LOG.debug('[TELEGRAM] Bot token or chat not configured; skipping notification')
+            return False
+
+        key = (chat, parse_mode)
+        with self._lock:
+            self._idle.clear()
+            try:
+                self._queue.put_nowait((key, text, time.monotonic()))
+            except queue.Full:
+                self._stats['dropped'] += 1
+                self._dropped[key] = self._dropped.get(key, 0) + 1
+                LOG.warning(f"[TELEGRAM] Notification queue full, dropped message for chat {chat}")
+                return False
+            self._stats['enqueued'] += 1
+        return True
+
+    def _add(self, key: Tuple[str, Optional[str]], text: str, enqueued_at: float, now: float):
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch(now)
+        if len(batch.texts) < self.max_batch:
+            batch.texts.append(text)
+            batch.enqueued_at.append(enqueued_at)
+        else:
+            batch.overflow += 1
+
+    def _collect(self, timeout: float):
+        """Move queued notifications into per-chat batches"""
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            item = None
+        now = time.monotonic()
+        while item is not None:
+            self._add(*item, now)
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                item = None
+
+        with self._lock:
+            dropped, self._dropped = self._dropped, {}
+        for key, count in dropped.items():
+            batch = self._batches.get(key)
+            if batch is None:
+                batch = self._batches[key] = _Batch(now)
+            batch.dropped += count
+
+    def compose(self, batch: _Batch) -> Tuple[str, int]:
+        """Join a batch into one message; returns (text, notifications included)"""
+        parts = []
+        length = 0
+        included = 0
+        for text in batch.texts:
+            extra = len(text) + (len(SEPARATOR) if parts else 0)
+            # Leave room for the summary line
+            if parts and length + extra > MAX_MESSAGE_CHARS - 100:
+                break
+            parts.append(text[:MAX_MESSAGE_CHARS - 100])
+            length += extra
+            included += 1
+
+        skipped = batch.overflow + (len(batch.texts) - included)
+        summary = []
+        if skipped:
+            summary.append(f"... and {skipped} more notification(s)")
+        if batch.dropped:
+            summary.append(f"[WARN] {batch.dropped} notification(s) dropped (queue full)")
+        if summary:
+            parts.append('\n'.join(summary))
+        return SEPARATOR.join(parts), included
+
+    def _bucket(self, chat: str, now: float) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat)
+        if bucket is None:
+            bucket = self._chat_buckets[chat] = TokenBucket(self.chat_rate, self.chat_burst, now)
+        return bucket
+
+    def _dispatch(self) -> float:
+        """Send every batch that is due and allowed; returns seconds until the next one may be"""
+        now = time.monotonic()
+        wait = 0.5
+        for key in list(self._batches):
+            batch = self._batches[key]
+            due = batch.first_at + self.coalesce_window - now
+            if due > 0:
+                wait = min(wait, due)
+                continue
+
+            bucket = self._bucket(key[0], now)
+            delay = max(bucket.delay(now), self._global_bucket.delay(now))
+            if delay > 0:
+                if not batch.throttled:
+                    batch.throttled = True
+                    with self._lock:
+                        self._stats['throttled'] += 1
+                wait = min(wait, delay)
+                continue
+
+            bucket.take(now)
+            self._global_bucket.take(now)
+            retry_after = self.send(key, batch)
+            if retry_after is not None:
+                # Keep the batch (it keeps coalescing) until Telegram allows more
+                bucket.pause(time.monotonic() + retry_after)
+                wait = min(wait, retry_after)
+                continue
+            del self._batches[key]
+        return max(0.0, wait)
+
+    def send(self, key: Tuple[str, Optional[str]], batch: _Batch) -> Optional[float]:
+        """
+        POST one batch to Telegram
+
+        A formatted batch Telegram rejects (one bad entity fails the whole
+        message) is kept and retried once as plain text.
+
+        Returns:
+            Seconds to wait before retrying if rate limited or falling back
+            to plain text, else None (the batch is done, delivered or not)
+        """
+        chat, parse_mode = key
+        text, included = self.compose(batch)
+        payload = {'chat_id': chat, 'text': text}
+        if parse_mode and not batch.plain:
+            payload['parse_mode'] = parse_mode
+
+        try:
+            response = self.http.post(
+                f"{self.api_url}/bot{self.token}/sendMessage", json=payload,
+                timeout=self.timeout, endpoint='telegram.sendMessage', retries=0
+            )
+        except Exception as e:
+            with self._lock:
+                self._stats['failed'] += 1
+            LOG.error(f"[TELEGRAM] Failed to send {len(batch.texts)} notification(s) to chat {chat}: {e}")
+            return None
+
+        if response.status_code == 429:
+            try:
+                retry_after = float(response.json().get('parameters', {}).get('retry_after', 1))
+            except ValueError:
+                retry_after = float(response.headers.get('Retry-After', 1))
+            with self._lock:
+                self._stats['rate_limited'] += 1
+            LOG.warning(f"[TELEGRAM] Rate limited for chat {chat}; retrying in {retry_after:.1f}s")
+            return retry_after
+
+        if response.status_code != 200 and 'parse_mode' in payload:
+            batch.plain = True
+            with self._lock:
+                self._stats['plain_retries'] += 1
+            LOG.warning(
+                f"[TELEGRAM] sendMessage to chat {chat} returned {response.status_code} with "
+                f"parse_mode={parse_mode}; retrying as plain text: {response.text[:200]}"
+            )
+            return 0.0
+
+        sent_at = time.monotonic()
+        with self._lock:
+            if response.status_code == 200:
+                self._stats['messages_sent'] += 1
+                self._stats['delivered'] += included
+                if included < len(batch.texts) or batch.overflow or batch.dropped:
+                    self._stats['summarized'] += 1
+                self._latencies.extend(sent_at - t for t in batch.enqueued_at[:included])
+            else:
+                self._stats['failed'] += 1
+        if response.status_code != 200:
+            LOG.error(f"[TELEGRAM] sendMessage to chat {chat} returned {response.status_code}: {response.text[:200]}")
+        return None
+
+    def _run(self):
+        LOG.info("[TELEGRAM] Notification dispatcher started")
+        wait = 0.5
+        while not self._stop_event.is_set():
+            try:
+                self._collect(wait)
+                wait = self._dispatch()
+                with self._lock:
+                    if not (self._batches or self._dropped) and self._queue.empty():
+                        self._idle.set()
+            except Exception as e:
+                LOG.exception(f"[TELEGRAM] Dispatcher error: {e}")
+                wait = 0.5
+        LOG.info("[TELEGRAM] Notification dispatcher stopped")
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until every queued notification has been handled"""
+        return self._idle.wait(timeout)
+
+    def start(self):
+        """Start the dispatcher thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="TelegramNotifier")
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the dispatcher, giving queued notifications up to `timeout` to go out"""
+        if not self._thread:
+            return
+        self.flush(timeout)
+        self._stop_event.set()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def get_stats(self) -> Dict:
+        """Queue depth, send/drop/coalesce counters and enqueue-to-send latency"""
+        with self._lock:
+            stats = dict(self._stats)
+            latencies = sorted(self._latencies)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['pending_batches'] = len(self._batches)
+        stats['coalesced'] = stats['delivered'] - stats['messages_sent']
+        stats['running'] = bool(self._thread and self._thread.is_alive())
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        stats['latency_ms'] = {
+            'p50': percentile(0.50) if latencies else None,
+            'p95': percentile(0.95) if latencies else None,
+            'max': round(latencies[-1] * 1000, 1) if latencies else None,
+        }
+        return stats
+
+
+# Global instance
+_telegram_notifier = None
+_telegram_notifier_lock = threading.Lock()
+
+
+def get_telegram_notifier() -> TelegramNotifier:
+    """Get or create the Telegram notifier (the dispatcher starts on creation)"""
+    global _telegram_notifier
+    with _telegram_notifier_lock:
+        if _telegram_notifier is None:
+            LOG.info("Creating new TelegramNotifier instance...")
+            _telegram_notifier = TelegramNotifier(
+                token=os.getenv('TELEGRAM_BOT_TOKEN'),
+                default_chat=os.getenv('TELEGRAM_CHAT_ID'),
+                api_url=os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org'),
+                max_queue=int(os.getenv('TELEGRAM_QUEUE_SIZE', '1000')),
+                coalesce_window=float(os.getenv('TELEGRAM_COALESCE_WINDOW', '1.0')),
+                max_batch=int(os.getenv('TELEGRAM_MAX_BATCH', '20')),
+                chat_rate=float(os.getenv('TELEGRAM_CHAT_RATE', '1')),
+                global_rate=float(os.getenv('TELEGRAM_GLOBAL_RATE', '25')),
+            )
+            _telegram_notifier.start()
+    return _telegram_notifier
@@ -0,0 +1,293 @@
+"""
+OHLCV Aggregator Service
+Rolls historical_prices ticks up into OHLCV candles in price_history so
+the chart has a low-latency candle source from our own feed. Tick candles
+are stored under their own timeframe labels ('tick:1m', ...) so they never
+mix with the candles imported from Binance
+"""
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from src.database.session import SessionLocal
+from src.models.base import AllowedInstrument, HistoricalPrice, PriceHistory
+from src.services.price_service import PriceHistoryService
+
+LOG = logging.getLogger(__name__)
+
+# Each timeframe is built from the one before it; 1m is built from ticks
+ROLLUP_CHAIN = [
+    ('1m', 1, None),
+    ('5m', 5, '1m'),
+    ('15m', 15, '5m'),
+    ('30m', 30, '15m'),
+    ('1h', 60, '30m'),
+    ('4h', 240, '1h'),
+    ('1d', 1440, '4h'),
+]
+
+# Candles are upserted in batches of this size
+WRITE_BATCH = 1000
+
+# Timeframe label prefix of candles built from our own ticks
+TICK_TIMEFRAME_PREFIX = 'tick:'
+
+
+def tick_timeframe(timeframe: str) -> str:
+    """price_history timeframe label of the tick candles for a timeframe"""
+    return f"{TICK_TIMEFRAME_PREFIX}{timeframe}"
+
+
+def bucket_start(ts: datetime, minutes: int) -> datetime:
+    """Floor a timestamp to the start of its bucket (aligned to the epoch)"""
+    epoch = datetime(1970, 1, 1, tzinfo=ts.tzinfo)
+    seconds = int((ts - epoch).total_seconds())
+    return epoch + timedelta(seconds=seconds - seconds % (minutes * 60))
+
+
+def aggregate_ticks(ticks: Iterable[Tuple[datetime, Decimal]], minutes: int) -> List[Dict]:
+    """
+    Build candles from (timestamp, price) ticks ordered by timestamp
+
+    Orderbook snapshots carry no traded volume, so tick candles have
+    volume 0.
+    """
+    candles: List[Dict] = []
+    current = None
+    for ts, price in ticks:
+        start = bucket_start(ts, minutes)
+        if current is None or current['timestamp'] != start:
+            current = {
+                'timestamp': start,
+                'open': price,
+                'high': price,
+                'low': price,
+                'close': price,
+                'volume': Decimal(0),
+            }
+            candles.append(current)
+        else:
+            current['high'] = max(current['high'], price)
+            current['low'] = min(current['low'], price)
+            current['close'] = price
+    return candles
+
+
+def rollup_candles(candles: Iterable[Dict], minutes: int) -> List[Dict]:
+    """Merge lower-timeframe candles (ordered by timestamp) into larger buckets"""
+    merged: List[Dict] = []
+    current = None
+    for candle in candles:
+        start = bucket_start(candle['timestamp'], minutes)
+        if current is None or current['timestamp'] != start:
+            current = dict(candle, timestamp=start)
+            merged.append(current)
+        else:
+            current['high'] = max(current['high'], candle['high'])
+            current['low'] = min(current['low'], candle['low'])
+            current['close'] = candle['close']
+            current['volume'] += candle['volume']
+    return merged
+
+
+class OHLCVAggregator:
+    """Incrementally materializes tick candles per symbol.
+
+    Each run starts at the last materialized bucket of every timeframe
+    (that bucket may have been partial), so only new ticks are read and
+    higher timeframes are rebuilt from the candles below them instead of
+    rescanning ticks.
+    """
+
+    def __init__(self, interval_seconds: int = 10):
+        """
+        Initialize OHLCV aggregator
+
+        Args:
+            interval_seconds: Seconds between aggregation runs
+        """
+        self.interval_seconds = interval_seconds
+        self.running = False
+        self.thread = None
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {
+            'runs': 0,
+            'failed_runs': 0,
+            'ticks_read': 0,
+            'candles_written': 0,
+            'last_run_ms': 0.0,
+            'last_run_at': None,
+        }
+
+    def _last_bucket(self, session, symbol: str, timeframe: str) -> Optional[datetime]:
+        """Start of the newest materialized tick candle for a timeframe"""
+        return session.query(func.max(PriceHistory.timestamp)).filter(
+            PriceHistory.symbol == symbol,
+            PriceHistory.timeframe == tick_timeframe(timeframe)
+        ).scalar()
+
+    def _write(self, session, symbol: str, timeframe: str, candles: List[Dict]) -> int:
+        """Upsert tick candles in batches"""
+        service = PriceHistoryService(session)
+        for start in range(0, len(candles), WRITE_BATCH):
+            service.upsert_price_data(symbol, tick_timeframe(timeframe), candles[start:start + WRITE_BATCH])
+        return len(candles)
+
+    def _aggregate_ticks(self, session, symbol: str) -> int:
+        """Build 1m candles from ticks newer than the last 1m bucket"""
+        since = self._last_bucket(session, symbol, '1m')
+        query = session.query(HistoricalPrice.timestamp, HistoricalPrice.mid_price).filter(
+            HistoricalPrice.symbol == symbol
+        )
+        if since is not None:
+            query = query.filter(HistoricalPrice.timestamp >= since)
+
+        ticks = query.order_by(HistoricalPrice.timestamp).yield_per(5000)
+        read = 0
+
+        def counted():
+            nonlocal read
+            for row in ticks:
+                read += 1
+                yield row.timestamp, row.mid_price
+
+        written = self._write(session, symbol, '1m', aggregate_ticks(counted(), 1))
+        with self._lock:
+            self._stats['ticks_read'] += read
+        return written
+
+    def _rollup(self, session, symbol: str, timeframe: str, minutes: int, source: str) -> int:
+        """Rebuild candles of one timeframe from the timeframe below it"""
+        since = self._last_bucket(session, symbol, timeframe)
+        query = session.query(PriceHistory).filter(
+            PriceHistory.symbol == symbol,
+            PriceHistory.timeframe == tick_timeframe(source)
+        )
+        if since is not None:
+            query = query.filter(PriceHistory.timestamp >= since)
+
+        source_candles = (
+            {
+                'timestamp': row.timestamp,
+                'open': row.open_price,
+                'high': row.high_price,
+                'low': row.low_price,
+                'close': row.close_price,
+                'volume': row.volume,
+            }
+            for row in query.order_by(PriceHistory.timestamp).yield_per(5000)
+        )
+        return self._write(session, symbol, timeframe, rollup_candles(source_candles, minutes))
+
+    def aggregate_symbol(self, symbol: str) -> Dict[str, int]:
+        """
+        Materialize new candles for one symbol across all timeframes
+
+        Returns:
+            Dict of timeframe -> candles written (including the refreshed
+            partial bucket)
+        """
+        session = SessionLocal()
+        try:
+            written = {}
+            for timeframe, minutes, source in ROLLUP_CHAIN:
+                if source is None:
+                    written[timeframe] = self._aggregate_ticks(session, symbol)
+                else:
+                    written[timeframe] = self._rollup(session, symbol, timeframe, minutes, source)
+            return written
+        finally:
+            session.close()
+
+    def get_symbols(self) -> List[str]:
+        """Enabled instruments (the ones the price collector records)"""
+        session = SessionLocal()
+        try:
+            return [
+                row.symbol for row in session.query(AllowedInstrument.symbol).filter(
+                    AllowedInstrument.enabled.is_(True)
+                )
+            ]
+        finally:
+            session.close()
+
+    def run_once(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
+        """Aggregate every symbol once"""
+        started = time.perf_counter()
+        results = {}
+        failed = False
+        for symbol in symbols if symbols is not None else self.get_symbols():
+            try:
+                results[symbol] = self.aggregate_symbol(symbol)
+            except Exception as e:
+                failed = True
+                LOG.error(f"[OHLCV] Aggregation failed for {symbol}: {e}")
+
+        with self._lock:
+            self._stats['runs'] += 1
+            self._stats['failed_runs'] += int(failed)
+            self._stats['candles_written'] += sum(
+                sum(counts.values()) for counts in results.values()
+            )
+            self._stats['last_run_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            self._stats['last_run_at'] = datetime.utcnow().isoformat()
+        return results
+
+    def aggregation_loop(self):
+        """Aggregate once per interval until stopped"""
+        LOG.info("[OHLCV] Aggregator started")
+        while not self.stop_event.is_set():
+            self.run_once()
+            self.stop_event.wait(self.interval_seconds)
+        LOG.info("[OHLCV] Aggregator stopped")
+
+    def start(self):
+        """Start aggregation thread"""
+        if self.running:
+            LOG.warning("[OHLCV] Aggregator already running")
+            return
+        self.running = True
+        self.stop_event.clear()
+        self.thread = threading.Thread(
+            target=self.aggregation_loop, daemon=True, name="OHLCVAggregator"
+        )
+        self.thread.start()
+
+    def stop(self):
+        """Stop aggregation thread"""
+        if not self.running:
+            return
+        self.running = False
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def get_stats(self) -> Dict:
+        """Run counters and last run duration"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['running'] = self.running
+        stats['interval_seconds'] = self.interval_seconds
+        stats['timeframes'] = [timeframe for timeframe, _, _ in ROLLUP_CHAIN]
+        return stats
+
+
+# Global instance
+_ohlcv_aggregator: Optional[OHLCVAggregator] = None
+
+
+def get_ohlcv_aggregator() -> OHLCVAggregator:
+    """Get or create the OHLCV aggregator"""
+    global _ohlcv_aggregator
+    if _ohlcv_aggregator is None:
+        _ohlcv_aggregator = OHLCVAggregator(
+            interval_seconds=int(os.getenv('OHLCV_AGGREGATION_INTERVAL', '10'))
+        )
+    return _ohlcv_aggregator
@@ -0,0 +1,158 @@
+"""
+Pagination Service
+Keyset (cursor) pagination for the trade and signal lists: each page is
+fetched with a `(sort_column, id) < (last_value, last_id)` predicate
+instead of OFFSET, so deep pages cost the same as the first one and rows
+inserted meanwhile never shift a page. Also provides a total count that
+can be estimated instead of running a full COUNT(*)
+"""
+import os
+import json
+import base64
+import binascii
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select
+
+LOG = logging.getLogger(__name__)
+
+# Approximate counts stop counting after this many rows where the database
+# has no planner estimate to offer (SQLite)
+COUNT_CAP = int(os.getenv('PAGINATION_COUNT_CAP', '10000'))
+
+COUNT_MODES = ('exact', 'approx')
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that is malformed or belongs to another list"""
+
+
+def encode_cursor(key: str, value: Optional[datetime], row_id: int) -> str:
+    """Opaque token for the position after the row (value, row_id) of a list sorted on `key`"""
+    payload = {'k': key, 'v': value.isoformat() if value is not None else None, 'i': row_id}
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str, key: str) -> Tuple[Optional[datetime], int]:
+    """
+    Position encoded by `encode_cursor`
+
+    Raises:
+        InvalidCursor: token is not a cursor for a list sorted on `key`
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        if payload['k'] != key:
+            raise InvalidCursor(f"Cursor is for '{payload['k']}' ordering, not '{key}'")
+        value = datetime.fromisoformat(payload['v']) if payload['v'] is not None else None
+        return value, int(payload['i'])
+    except InvalidCursor:
+        raise
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Malformed cursor: {e}")
+
+
+def _nulls_first(session) -> bool:
+    """
+    Where NULL sort values land in a descending index scan: first on
+    PostgreSQL, last on SQLite. Following the database's own order keeps
+    the page an index walk instead of a sort.
+    """
+    return session.get_bind().dialect.name == 'postgresql'
+
+
+def _after(column, id_column, value, row_id, nulls_first: bool):
+    """Rows strictly after (value, row_id) in (column DESC, id DESC) order"""
+    if value is None:
+        nulls_tail = and_(column.is_(None), id_column < row_id)
+        return or_(nulls_tail, column.isnot(None)) if nulls_first else nulls_tail
+    after = or_(column < value, and_(column == value, id_column < row_id))
+    return after if nulls_first else or_(after, column.is_(None))
+
+
+def keyset_page(session, stmt, column, id_column, key: str, limit: int,
+                cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    """
+    One page of `stmt` in (column DESC, id DESC) order
+
+    Args:
+        stmt: Filtered select() of a single entity, without ORDER BY/LIMIT
+        column: Sort column (open_time, close_time, created_at)
+        id_column: Primary key column used as the tie-breaker
+        key: Name stored in the cursor so it can't be replayed on another ordering
+        cursor: Token from the previous page's next_cursor, or None for the first page
+
+    Returns:
+        (rows, next_cursor) - next_cursor is None on the last page
+
+    Raises:
+        InvalidCursor: cursor could not be decoded
+        ValueError: limit is below 1
+    """
+    if limit < 1:
+        raise ValueError(f"limit must be at least 1, got {limit}")
+    nulls_first = _nulls_first(session)
+    if cursor:
+        value, row_id = decode_cursor(cursor, key)
+        stmt = stmt.where(_after(column, id_column, value, row_id, nulls_first))
+
+    order = column.desc().nulls_first() if nulls_first else column.desc()
+    stmt = stmt.order_by(order, id_column.desc()).limit(limit + 1)
+
+    rows = session.execute(stmt).scalars().all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, cursor_after(rows[-1], column, id_column, key)
+
+
+def cursor_after(row, column, id_column, key: str) -> str:
+    """Cursor continuing after `row` (lets an offset page hand over to keyset paging)"""
+    return encode_cursor(key, getattr(row, column.key), getattr(row, id_column.key))
+
+
+def count_rows(session, stmt, mode: str) -> Dict:
+    """
+    Total rows matched by `stmt`
+
+    'exact' runs COUNT(*). 'approx' asks the PostgreSQL planner for its
+    row estimate, and elsewhere counts at most COUNT_CAP rows.
+
+    Returns:
+        {'total': n, 'total_estimated': bool}
+    """
+    base = stmt.order_by(None).limit(None).offset(None)
+
+    if mode == 'approx':
+        if session.get_bind().dialect.name == 'postgresql':
+            estimate = _planner_estimate(session, base)
+            if estimate is not None:
+                return {'total': estimate, 'total_estimated': True}
+        capped = session.execute(
+            select(func.count()).select_from(base.limit(COUNT_CAP).subquery())
+        ).scalar()
+        return {'total': capped, 'total_estimated': capped >= COUNT_CAP}
+
+    total = session.execute(select(func.count()).select_from(base.subquery())).scalar()
+    return {'total': total, 'total_estimated': False}
+
+
+def _planner_estimate(session, stmt) -> Optional[int]:
+    """Row estimate of the top plan node from EXPLAIN (PostgreSQL only)"""
+    try:
+        compiled = stmt.compile(dialect=session.get_bind().dialect)
+        # Savepoint so a failed EXPLAIN doesn't abort the request's transaction
+        with session.begin_nested():
+            plan = session.connection().exec_driver_sql(
+                f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+            ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    except Exception as e:
+        LOG.warning(f"[PAGINATION] Planner estimate failed, falling back to a capped count: {e}")
+        return None
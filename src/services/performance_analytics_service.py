@@ -5,11 +5,10 @@ Analyzes trading performance, identifies patterns, and suggests improvements
 import logging
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_, or_
-from decimal import Decimal
 
 from src.database.session import SessionLocal
-from src.models.base import Trade, Signal, HistoricalPrice
+from src.services.performance_ledger_service import ledger_performance
+from src.services.trade_analytics_service import load_trade_frame, trading_flows
 
 
 LOG = logging.getLogger(__name__)
@@ -20,7 +19,6 @@ class PerformanceAnalytics:
     
     def __init__(self):
         """Initialize performance analytics"""
-        self.session = SessionLocal()
         LOG.info("[ANALYTICS] Performance Analytics initialized")
     
     def get_symbol_performance(
@@ -31,6 +29,8 @@ class PerformanceAnalytics:
         """
         Get performance metrics for a specific symbol
         
+        Closed-trade figures are read from the performance ledger.
+        
         Args:
             symbol: Trading symbol
             days: Number of days to analyze
@@ -38,236 +38,79 @@ class PerformanceAnalytics:
         Returns:
             Performance metrics dictionary
         """
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
+        session = SessionLocal()
         try:
-            # Get all trades for symbol
-            trades = self.session.query(Trade).filter(
-                and_(
-                    Trade.symbol == symbol,
-                    Trade.entry_time >= cutoff_date
-                )
-            ).all()
-            
-            if not trades:
+            results = ledger_performance(session, days, symbol=symbol)
+            if not results:
                 return {
                     'symbol': symbol,
                     'period_days': days,
                     'total_trades': 0,
                     'message': 'No trades found for this symbol'
                 }
-            
-            # Calculate metrics
-            total_trades = len(trades)
-            closed_trades = [t for t in trades if t.status == 'closed']
-            open_trades = [t for t in trades if t.status == 'open']
-            
-            winning_trades = [
-                t for t in closed_trades
-                if t.profit_loss and t.profit_loss > 0
-            ]
-            losing_trades = [
-                t for t in closed_trades
-                if t.profit_loss and t.profit_loss < 0
-            ]
-            
-            total_pnl = sum(
-                t.profit_loss for t in closed_trades
-                if t.profit_loss
-            ) or Decimal('0')
-            
-            avg_win = (
-                sum(t.profit_loss for t in winning_trades) / len(winning_trades)
-                if winning_trades else Decimal('0')
-            )
-            
-            avg_loss = (
-                sum(t.profit_loss for t in losing_trades) / len(losing_trades)
-                if losing_trades else Decimal('0')
-            )
-            
-            win_rate = (
-                len(winning_trades) / len(closed_trades) * 100
-                if closed_trades else 0
-            )
-            
-            # Calculate average hold time
-            hold_times = []
-            for trade in closed_trades:
-                if trade.exit_time and trade.entry_time:
-                    hold_time = (trade.exit_time - trade.entry_time).total_seconds()
-                    hold_times.append(hold_time)
-            
-            avg_hold_time = (
-                sum(hold_times) / len(hold_times)
-                if hold_times else 0
-            )
-            
-            # Risk/Reward ratio
-            risk_reward_ratio = (
-                abs(float(avg_win) / float(avg_loss))
-                if avg_loss != 0 else 0
-            )
-            
-            return {
-                'symbol': symbol,
-                'period_days': days,
-                'total_trades': total_trades,
-                'open_trades': len(open_trades),
-                'closed_trades': len(closed_trades),
-                'winning_trades': len(winning_trades),
-                'losing_trades': len(losing_trades),
-                'win_rate': round(win_rate, 2),
-                'total_pnl': float(total_pnl),
-                'average_win': float(avg_win),
-                'average_loss': float(avg_loss),
-                'risk_reward_ratio': round(risk_reward_ratio, 2),
-                'avg_hold_time_seconds': round(avg_hold_time, 2),
-                'avg_hold_time_hours': round(avg_hold_time / 3600, 2)
-            }
+            return results[0]
             
         except Exception as e:
             LOG.error(f"[ERROR] Failed to get performance for {symbol}: {e}")
             return {'error': str(e)}
         finally:
-            self.session.close()
+            session.close()
     
     def get_all_symbols_performance(self, days: int = 30) -> List[Dict]:
-        """Get performance for all traded symbols"""
+        """Get performance for all traded symbols, sorted by total P&L"""
+        session = SessionLocal()
         try:
-            cutoff_date = datetime.utcnow() - timedelta(days=days)
-            
-            # Get all symbols that have trades
-            symbols = self.session.query(Trade.symbol).filter(
-                Trade.entry_time >= cutoff_date
-            ).distinct().all()
-            
-            symbols = [s[0] for s in symbols]
-            
-            LOG.info(f"[ANALYTICS] Analyzing {len(symbols)} symbols")
-            
-            results = []
-            for symbol in symbols:
-                perf = self.get_symbol_performance(symbol, days)
-                if 'error' not in perf:
-                    results.append(perf)
-            
-            # Sort by total PnL
-            results.sort(key=lambda x: x.get('total_pnl', 0), reverse=True)
-            
+            results = ledger_performance(session, days)
+            LOG.info(f"[ANALYTICS] Analyzed {len(results)} symbols")
             return results
             
         except Exception as e:
             LOG.error(f"[ERROR] Failed to get all symbols performance: {e}")
             return []
+        finally:
+            session.close()
     
     def identify_trading_flows(self, days: int = 30) -> Dict:
         """
         Identify trading patterns and flows
         
+        Trades opened in the window are fetched once as columns and broken
+        down by hour, weekday, side, symbol, hold time and streaks.
+        
         Returns:
             Dictionary with pattern analysis
         """
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
+        session = SessionLocal()
         try:
-            trades = self.session.query(Trade).filter(
-                Trade.entry_time >= cutoff_date
-            ).all()
+            frame = load_trade_frame(session, cutoff_date)
             
-            if not trades:
+            if not len(frame):
                 return {'message': 'No trades found'}
             
-            # Analyze by time of day
-            hour_performance = {}
-            for trade in trades:
-                if trade.entry_time:
-                    hour = trade.entry_time.hour
-                    if hour not in hour_performance:
-                        hour_performance[hour] = {
-                            'count': 0,
-                            'wins': 0,
-                            'total_pnl': 0
-                        }
-                    
-                    hour_performance[hour]['count'] += 1
-                    if trade.profit_loss:
-                        hour_performance[hour]['total_pnl'] += float(trade.profit_loss)
-                        if trade.profit_loss > 0:
-                            hour_performance[hour]['wins'] += 1
-            
-            # Analyze by day of week
-            day_performance = {}
-            for trade in trades:
-                if trade.entry_time:
-                    day = trade.entry_time.strftime('%A')
-                    if day not in day_performance:
-                        day_performance[day] = {
-                            'count': 0,
-                            'wins': 0,
-                            'total_pnl': 0
-                        }
-                    
-                    day_performance[day]['count'] += 1
-                    if trade.profit_loss:
-                        day_performance[day]['total_pnl'] += float(trade.profit_loss)
-                        if trade.profit_loss > 0:
-                            day_performance[day]['wins'] += 1
-            
-            # Analyze by action (long/short)
-            action_performance = {}
-            for trade in trades:
-                action = trade.action
-                if action not in action_performance:
-                    action_performance[action] = {
-                        'count': 0,
-                        'wins': 0,
-                        'total_pnl': 0
-                    }
-                
-                action_performance[action]['count'] += 1
-                if trade.profit_loss:
-                    action_performance[action]['total_pnl'] += float(trade.profit_loss)
-                    if trade.profit_loss > 0:
-                        action_performance[action]['wins'] += 1
-            
-            # Calculate win rates
-            for hour_data in hour_performance.values():
-                hour_data['win_rate'] = (
-                    hour_data['wins'] / hour_data['count'] * 100
-                    if hour_data['count'] > 0 else 0
-                )
-            
-            for day_data in day_performance.values():
-                day_data['win_rate'] = (
-                    day_data['wins'] / day_data['count'] * 100
-                    if day_data['count'] > 0 else 0
-                )
-            
-            for action_data in action_performance.values():
-                action_data['win_rate'] = (
-                    action_data['wins'] / action_data['count'] * 100
-                    if action_data['count'] > 0 else 0
-                )
-            
-            return {
-                'period_days': days,
-                'total_trades_analyzed': len(trades),
-                'by_hour': hour_performance,
-                'by_day': day_performance,
-                'by_action': action_performance
-            }
+            return trading_flows(frame, days)
             
         except Exception as e:
             LOG.error(f"[ERROR] Failed to identify trading flows: {e}")
             return {'error': str(e)}
         finally:
-            self.session.close()
+            session.close()
     
-    def get_improvement_suggestions(self, days: int = 30) -> List[Dict]:
+    def get_improvement_suggestions(
+        self,
+        days: int = 30,
+        all_perf: Optional[List[Dict]] = None,
+        flows: Optional[Dict] = None
+    ) -> List[Dict]:
         """
         Generate improvement suggestions based on performance data
         
+        Args:
+            days: Number of days to analyze
+            all_perf: Precomputed get_all_symbols_performance(days)
+            flows: Precomputed identify_trading_flows(days)
+        
         Returns:
             List of suggestions with priority and details
         """
@@ -275,8 +118,10 @@ class PerformanceAnalytics:
         
         try:
             # Get overall performance
-            all_perf = self.get_all_symbols_performance(days)
-            flows = self.identify_trading_flows(days)
+            if all_perf is None:
+                all_perf = self.get_all_symbols_performance(days)
+            if flows is None:
+                flows = self.identify_trading_flows(days)
             
             if not all_perf:
                 return [{
@@ -379,9 +224,9 @@ class PerformanceAnalytics:
             # Suggestion 6: Long vs Short bias
             if 'by_action' in flows:
                 action_perf = flows['by_action']
-                if 'long' in action_perf and 'short' in action_perf:
-                    long_pnl = action_perf['long']['total_pnl']
-                    short_pnl = action_perf['short']['total_pnl']
+                if 'BUY' in action_perf and 'SELL' in action_perf:
+                    long_pnl = action_perf['BUY']['total_pnl']
+                    short_pnl = action_perf['SELL']['total_pnl']
                     
                     if abs(long_pnl - short_pnl) > 100:  # Significant difference
                         better_side = 'long' if long_pnl > short_pnl else 'short'
@@ -0,0 +1,323 @@
+"""
+Performance Ledger Service
+Per-symbol, per-day rollup of closed trades, kept current from trade
+events so performance endpoints read O(symbols) aggregates instead of
+loading every trade
+"""
+import logging
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+
+from src.database.session import SessionLocal
+from src.database.upsert import upsert_rows
+from src.models.base import PerformanceLedger, Trade
+from src.services.event_bus import (
+    TRADE_CLOSED,
+    TRADE_DELETED,
+    TRADE_MODIFIED,
+    get_event_bus,
+)
+
+LOG = logging.getLogger(__name__)
+
+# Additive ledger columns
+LEDGER_COLUMNS = (
+    'closed_trades',
+    'winning_trades',
+    'losing_trades',
+    'total_pnl',
+    'gross_profit',
+    'gross_loss',
+    'hold_seconds',
+    'timed_trades',
+)
+
+# Trade fields that feed the ledger; edits to these on a closed trade
+# trigger a recompute of the affected day
+_LEDGER_INPUTS = {'status', 'symbol', 'profit_loss', 'open_time', 'close_time'}
+
+_INSERT_CHUNK_SIZE = 500
+
+LedgerKey = Tuple[str, date]
+
+
+def _utc_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def ledger_key(trade: Dict) -> Optional[LedgerKey]:
+    """(symbol, close day) a closed trade is booked under"""
+    if not trade.get('symbol') or trade.get('close_time') is None:
+        return None
+    return trade['symbol'], _utc_naive(trade['close_time']).date()
+
+
+def _empty_row() -> Dict:
+    return {
+        'closed_trades': 0,
+        'winning_trades': 0,
+        'losing_trades': 0,
+        'total_pnl': Decimal('0'),
+        'gross_profit': Decimal('0'),
+        'gross_loss': Decimal('0'),
+        'hold_seconds': 0.0,
+        'timed_trades': 0,
+    }
+
+
+def trade_contribution(trade: Dict, sign: int = 1) -> Dict:
+    """Ledger increments for one closed trade (sign=-1 to take it back out)"""
+    pnl = Decimal(str(trade.get('profit_loss') or 0))
+    row = _empty_row()
+    row['closed_trades'] = sign
+    row['total_pnl'] = sign * pnl
+    if pnl > 0:
+        row['winning_trades'] = sign
+        row['gross_profit'] = sign * pnl
+    elif pnl < 0:
+        row['losing_trades'] = sign
+        row['gross_loss'] = sign * pnl
+
+    if trade.get('open_time') is not None:
+        held = _utc_naive(trade['close_time']) - _utc_naive(trade['open_time'])
+        row['hold_seconds'] = sign * held.total_seconds()
+        row['timed_trades'] = sign
+    return row
+
+
+def apply_increments(session, increments: Dict[LedgerKey, Dict]):
+    """Add increments to ledger rows with one bulk upsert"""
+    if not increments:
+        return
+    rows = [
+        {'symbol': symbol, 'day': day, **values}
+        for (symbol, day), values in increments.items()
+    ]
+    upsert_rows(
+        session, PerformanceLedger, rows, ['symbol', 'day'],
+        set_=lambda excluded: {
+            **{
+                column: getattr(PerformanceLedger, column) + excluded[column]
+                for column in LEDGER_COLUMNS
+            },
+            'updated_at': func.now(),
+        },
+        chunk_size=_INSERT_CHUNK_SIZE
+    )
+
+
+def _fold(trades: Iterable[Dict], into: Dict[LedgerKey, Dict]):
+    for trade in trades:
+        key = ledger_key(trade)
+        if key is None:
+            continue
+        row = into.setdefault(key, _empty_row())
+        for column, value in trade_contribution(trade).items():
+            row[column] += value
+
+
+def _closed_trade_rows(session, *criteria):
+    """Stream closed trades as plain dicts"""
+    result = session.execute(
+        select(Trade.symbol, Trade.profit_loss, Trade.open_time, Trade.close_time)
+        .where(Trade.status == 'CLOSED', *criteria)
+        .execution_options(yield_per=5000)
+    )
+    for symbol, pnl, opened, closed in result:
+        yield {'symbol': symbol, 'profit_loss': pnl, 'open_time': opened, 'close_time': closed}
+
+
+def recompute_day(session, symbol: str, day: date):
+    """Rebuild one (symbol, day) row from the trades table"""
+    start = datetime.combine(day, datetime.min.time())
+    rows: Dict[LedgerKey, Dict] = {}
+    _fold(
+        (t for t in _closed_trade_rows(
+            session,
+            Trade.symbol == symbol,
+            Trade.close_time >= start,
+            Trade.close_time < start + timedelta(days=1),
+        ) if ledger_key(t) == (symbol, day)),
+        rows
+    )
+    session.execute(delete(PerformanceLedger).where(
+        PerformanceLedger.symbol == symbol,
+        PerformanceLedger.day == day,
+    ))
+    apply_increments(session, rows)
+
+
+def rebuild_ledger(session) -> Dict[str, int]:
+    """Regenerate the whole ledger from closed trades (caller commits)"""
+    rows: Dict[LedgerKey, Dict] = {}
+    trades = 0
+    for trade in _closed_trade_rows(session):
+        trades += 1
+        _fold((trade,), rows)
+
+    session.execute(delete(PerformanceLedger))
+    apply_increments(session, rows)
+    LOG.info(f"[LEDGER] Rebuilt {len(rows)} ledger rows from {trades} closed trades")
+    return {'trades': trades, 'rows': len(rows)}
+
+
+def _summarize(symbol: str, days: int, closed: Dict, open_trades: int) -> Dict:
+    closed_trades = int(closed['closed_trades'])
+    wins = int(closed['winning_trades'])
+    losses = int(closed['losing_trades'])
+    avg_win = float(closed['gross_profit']) / wins if wins else 0.0
+    avg_loss = float(closed['gross_loss']) / losses if losses else 0.0
+    timed = int(closed['timed_trades'])
+    avg_hold = float(closed['hold_seconds']) / timed if timed else 0.0
+    return {
+        'symbol': symbol,
+        'period_days': days,
+        'total_trades': closed_trades + open_trades,
+        'open_trades': open_trades,
+        'closed_trades': closed_trades,
+        'winning_trades': wins,
+        'losing_trades': losses,
+        'win_rate': round(wins / closed_trades * 100, 2) if closed_trades else 0,
+        'total_pnl': float(closed['total_pnl']),
+        'average_win': avg_win,
+        'average_loss': avg_loss,
+        'risk_reward_ratio': round(abs(avg_win / avg_loss), 2) if avg_loss else 0,
+        'avg_hold_time_seconds': round(avg_hold, 2),
+        'avg_hold_time_hours': round(avg_hold / 3600, 2),
+    }
+
+
+def ledger_performance(
+    session,
+    days: int = 30,
+    symbol: Optional[str] = None,
+    now: Optional[datetime] = None
+) -> List[Dict]:
+    """
+    Per-symbol performance over the last `days` days
+
+    Closed-trade figures come from ledger rows whose close day falls in the
+    window (whole UTC days); open trades are those opened in the window.
+    One aggregate query per source, sorted by total P&L.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=days)
+
+    ledger_criteria = [PerformanceLedger.day >= cutoff.date()]
+    open_criteria = [Trade.status == 'OPEN', Trade.open_time >= cutoff]
+    if symbol is not None:
+        ledger_criteria.append(PerformanceLedger.symbol == symbol)
+        open_criteria.append(Trade.symbol == symbol)
+
+    sums = session.execute(
+        select(
+            PerformanceLedger.symbol,
+            *(func.sum(getattr(PerformanceLedger, column)).label(column) for column in LEDGER_COLUMNS)
+        )
+        .where(*ledger_criteria)
+        .group_by(PerformanceLedger.symbol)
+    ).all()
+    closed_by_symbol = {row.symbol: row._mapping for row in sums}
+
+    open_by_symbol = dict(session.execute(
+        select(Trade.symbol, func.count(Trade.id))
+        .where(*open_criteria)
+        .group_by(Trade.symbol)
+    ).all())
+
+    results = [
+        _summarize(
+            sym, days,
+            closed_by_symbol.get(sym) or _empty_row(),
+            open_by_symbol.get(sym, 0)
+        )
+        for sym in set(closed_by_symbol) | set(open_by_symbol)
+    ]
+    results.sort(key=lambda r: r['total_pnl'], reverse=True)
+    return results
+
+
+class PerformanceLedgerUpdater:
+    """Applies trade events to the ledger.
+
+    A close adds the trade's contribution to its (symbol, day) row. Edits
+    to a closed trade's P&L, times or symbol, and deletes of closed trades,
+    recompute the affected days from the trades table instead.
+    """
+
+    def __init__(self, session_factory=None):
+        # A fresh session, not the thread's scoped one: handlers run inside
+        # the publishing session's after_commit hook
+        self.session_factory = session_factory or SessionLocal.session_factory
+        self._lock = threading.Lock()
+        self._stats = defaultdict(int)
+
+    def subscribe(self, bus=None):
+        bus = bus or get_event_bus()
+        for topic in (TRADE_CLOSED, TRADE_MODIFIED, TRADE_DELETED):
+            bus.subscribe(topic, self.handle)
+
+    def handle(self, topic: str, payload: Dict):
+        """Event bus handler"""
+        if topic == TRADE_CLOSED:
+            key = ledger_key(payload)
+            if key is None:
+                return
+            self._run(lambda s: apply_increments(s, {key: trade_contribution(payload)}), 'closes_applied')
+            return
+
+        if payload.get('status') != 'CLOSED' and (payload.get('previous') or {}).get('status') != 'CLOSED':
+            return
+        if topic == TRADE_MODIFIED and not _LEDGER_INPUTS.intersection(payload.get('changed', ())):
+            return
+
+        keys = {ledger_key(payload)}
+        if topic == TRADE_MODIFIED:
+            keys.add(ledger_key({**payload, **payload.get('previous', {})}))
+        keys.discard(None)
+
+        def recompute(session):
+            for symbol, day in keys:
+                recompute_day(session, symbol, day)
+        self._run(recompute, 'days_recomputed', len(keys))
+
+    def _run(self, work, counter: str, count: int = 1):
+        session = self.session_factory()
+        try:
+            work(session)
+            session.commit()
+            with self._lock:
+                self._stats[counter] += count
+        except Exception as e:
+            session.rollback()
+            with self._lock:
+                self._stats['errors'] += 1
+            LOG.error(f"[LEDGER] Failed to update ledger: {e} (run scripts/rebuild_performance_ledger.py)")
+        finally:
+            session.close()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+# Global instance
+_ledger_updater: Optional[PerformanceLedgerUpdater] = None
+_ledger_updater_lock = threading.Lock()
+
+
+def get_performance_ledger() -> PerformanceLedgerUpdater:
+    """Get or create the ledger updater (subscribed to trade events)"""
+    global _ledger_updater
+    with _ledger_updater_lock:
+        if _ledger_updater is None:
+            _ledger_updater = PerformanceLedgerUpdater()
+            _ledger_updater.subscribe()
+    return _ledger_updater
@@ -0,0 +1,151 @@
+"""
+Position Index Service
+Open positions held in memory and keyed by symbol, kept in sync with the
+trades table through trade lifecycle events, so the event-driven trade
+monitor can check a symbol's positions on each price update without
+querying the database
+"""
+import logging
+import threading
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+
+from src.database.session import SessionLocal
+from src.models.base import Trade
+from src.services.event_bus import TRADE_CLOSED, TRADE_DELETED
+
+LOG = logging.getLogger(__name__)
+
+# The columns RiskManager.check_positions needs
+OpenPosition = namedtuple(
+    'OpenPosition', 'id symbol action open_price stop_loss take_profit'
+)
+
+
+class OpenPositionIndex:
+    """Open positions per symbol.
+
+    load() reads every open trade once; after that the index follows the
+    trade events (subscribe on_trade_event to the trade topics). Bulk
+    query updates do not emit events, so callers resync with load() now
+    and then.
+    """
+
+    def __init__(self, session_factory=None):
+        """
+        Initialize position index
+
+        Args:
+            session_factory: Session factory for load() (a fresh,
+                non-scoped session by default)
+        """
+        self.session_factory = session_factory or SessionLocal.session_factory
+        self._by_symbol: Dict[str, Dict[int, OpenPosition]] = {}
+        self._symbol_of: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'loads': 0,
+            'added': 0,
+            'updated': 0,
+            'removed': 0,
+        }
+
+    def load(self) -> int:
+        """
+        Replace the index with the open trades in the database
+
+        Returns:
+            Number of open positions indexed
+        """
+        session = self.session_factory()
+        try:
+            rows = session.execute(
+                select(
+                    Trade.id, Trade.symbol, Trade.action,
+                    Trade.open_price, Trade.stop_loss, Trade.take_profit
+                ).where(Trade.status == 'OPEN')
+            ).all()
+        finally:
+            session.close()
+
+        by_symbol: Dict[str, Dict[int, OpenPosition]] = {}
+        for row in rows:
+            by_symbol.setdefault(row.symbol, {})[row.id] = OpenPosition(*row)
+
+        with self._lock:
+            self._by_symbol = by_symbol
+            self._symbol_of = {row.id: row.symbol for row in rows}
+            self._stats['loads'] += 1
+        return len(rows)
+
+    def add(self, position: OpenPosition):
+        """Index a position, replacing any previous version of it"""
+        with self._lock:
+            self._store(position)
+
+    def _store(self, position: OpenPosition):
+        previous = self._symbol_of.get(position.id)
+        if previous is not None and previous != position.symbol:
+            self._discard(position.id)
+        self._by_symbol.setdefault(position.symbol, {})[position.id] = position
+        self._symbol_of[position.id] = position.symbol
+        self._stats['updated' if previous is not None else 'added'] += 1
+
+    def remove(self, trade_id: int):
+        """Drop a position (no-op if it is not indexed)"""
+        with self._lock:
+            if self._discard(trade_id):
+                self._stats['removed'] += 1
+
+    def _discard(self, trade_id: int) -> Optional[str]:
+        """Drop a position; returns the symbol it was indexed under"""
+        symbol = self._symbol_of.pop(trade_id, None)
+        if symbol is None:
+            return None
+        positions = self._by_symbol.get(symbol, {})
+        positions.pop(trade_id, None)
+        if not positions:
+            self._by_symbol.pop(symbol, None)
+        return symbol
+
+    def on_trade_event(self, topic: str, payload: Dict):
+        """Event bus handler for the trade lifecycle topics"""
+        trade_id = payload.get('id')
+        if trade_id is None:
+            return
+        if topic in (TRADE_CLOSED, TRADE_DELETED) or payload.get('status') != 'OPEN':
+            self.remove(trade_id)
+        else:
+            self.add(OpenPosition(*(payload.get(field) for field in OpenPosition._fields)))
+
+    def has_symbol(self, symbol: str) -> bool:
+        """True when the symbol has open positions"""
+        return symbol in self._by_symbol
+
+    def symbols(self) -> List[str]:
+        """Symbols with open positions"""
+        with self._lock:
+            return list(self._by_symbol)
+
+    def positions(self, symbol: str) -> List[OpenPosition]:
+        """Open positions of a symbol"""
+        with self._lock:
+            return list(self._by_symbol.get(symbol, {}).values())
+
+    def count(self, symbol: str) -> int:
+        """Number of open positions of a symbol"""
+        with self._lock:
+            return len(self._by_symbol.get(symbol, ()))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._symbol_of)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['positions'] = len(self._symbol_of)
+            stats['symbols'] = len(self._by_symbol)
+        return stats
@@ -8,17 +8,18 @@ import sys
 import time
 import logging
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from decimal import Decimal
 from typing import Dict, List, Optional
-from sqlalchemy.exc import IntegrityError
 
 # Add tools directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../tools'))
 
 from src.database.session import SessionLocal
-from src.models.base import HistoricalPrice, AllowedInstrument
-from src.services.delta_exchange_service import get_delta_trader
+from src.models.base import AllowedInstrument
+from src.services.market_data_service import get_market_data_cache
+from src.services.tick_buffer_service import TickWriteBuffer
 
 LOG = logging.getLogger(__name__)
 
@@ -26,12 +27,13 @@ LOG = logging.getLogger(__name__)
 class PriceCollector:
     """Collects and stores real-time price data for enabled symbols"""
     
-    def __init__(self, collection_interval: int = 1):
+    def __init__(self, collection_interval: int = 1, max_concurrency: int = 8):
         """
         Initialize price collector
         
         Args:
             collection_interval: Seconds between collections (default: 1)
+            max_concurrency: Max orderbook fetches in flight (default: 8)
         """
         LOG.info(
             f"Creating new PriceCollector instance "
@@ -40,12 +42,31 @@ class PriceCollector:
         self.collection_interval = collection_interval
         self.running = False
         self.thread = None
-        self.delta_trader = None
+        self.market_data = get_market_data_cache()
+        self._last_quote_ts: Dict[str, datetime] = {}
         self.enabled_symbols = []
+        self.max_concurrency = max(1, max_concurrency)
+        self.executor = None
+        
+        # Ticks are written in batches (one transaction per flush)
+        self.tick_buffer = TickWriteBuffer(
+            max_rows=int(os.getenv('TICK_BUFFER_SIZE', '500')),
+            flush_interval=float(os.getenv('TICK_FLUSH_INTERVAL', '2'))
+        )
+        
+        # Scheduler / fetch statistics
+        self._stats_lock = threading.Lock()
+        self._cycle_count = 0
+        self._skipped_ticks = 0
+        self._last_cycle_seconds = 0.0
+        self._max_cycle_seconds = 0.0
+        self._total_cycle_seconds = 0.0
+        self._fetch_latency_ms: Dict[str, float] = {}
         
         LOG.info("=" * 80)
         LOG.info("[PRICE COLLECTOR] Initialized")
         LOG.info(f"Collection interval: {collection_interval} second(s)")
+        LOG.info(f"Max concurrent fetches: {self.max_concurrency}")
         LOG.info("=" * 80)
     
     def get_enabled_symbols(self) -> List[str]:
@@ -74,69 +95,39 @@ class PriceCollector:
             Dict with bid, ask, mid, spread data or None
         """
         try:
-            if not self.delta_trader:
-                self.delta_trader = get_delta_trader()
-            
-            # Get orderbook
-            orderbook = self.delta_trader.client.get_orderbook(symbol)
-            
-            if not orderbook.get('success'):
-                error = orderbook.get('error', {})
-                error_code = error.get('code', 'unknown')
-                
-                # Log specific errors
-                if error_code == 'ip_not_whitelisted_for_api_key':
-                    LOG.error(
-                        f"[{symbol}] IP NOT WHITELISTED - "
-                        f"Add your IP to Delta Exchange API key settings"
-                    )
-                else:
-                    LOG.warning(
-                        f"[{symbol}] Failed to get orderbook: {error}"
-                    )
+            # Shared cache: a quote fetched by the monitor or webhook
+            # verification within half a cycle is reused
+            quote = self.market_data.get_quote(
+                symbol, max_age=self.collection_interval / 2
+            )
+            if quote is None:
                 return None
             
-            result = orderbook.get('result', {})
-            buy_orders = result.get('buy', [])
-            sell_orders = result.get('sell', [])
-            
-            if not buy_orders or not sell_orders:
-                LOG.warning(f"[{symbol}] No orderbook data available")
+            # Skip quotes that were already collected in a previous cycle
+            if self._last_quote_ts.get(symbol) == quote['timestamp']:
+                LOG.debug(f"[{symbol}] Quote unchanged since last cycle, skipping")
                 return None
+            self._last_quote_ts[symbol] = quote['timestamp']
             
-            # Extract price data
-            bid_price = Decimal(str(buy_orders[0].get('price', 0)))
-            ask_price = Decimal(str(sell_orders[0].get('price', 0)))
-            
-            # Validate prices are not zero
-            if bid_price <= 0 or ask_price <= 0:
-                LOG.error(
-                    f"[{symbol}] Invalid price data: "
-                    f"bid=${bid_price}, ask=${ask_price}"
-                )
-                return None
-            
-            mid_price = (bid_price + ask_price) / 2
+            bid_price = quote['bid']
+            ask_price = quote['ask']
+            mid_price = quote['mid']
             spread = ask_price - bid_price
             if mid_price > 0:
                 spread_pct = spread / mid_price * 100
             else:
                 spread_pct = Decimal(0)
             
-            # Extract volumes
-            volume_bid = Decimal(str(buy_orders[0].get('size', 0)))
-            volume_ask = Decimal(str(sell_orders[0].get('size', 0)))
-            
             return {
                 'symbol': symbol,
-                'timestamp': datetime.utcnow(),
+                'timestamp': quote['timestamp'],
                 'bid_price': bid_price,
                 'ask_price': ask_price,
                 'mid_price': mid_price,
                 'spread': spread,
                 'spread_pct': spread_pct,
-                'volume_bid': volume_bid,
-                'volume_ask': volume_ask
+                'volume_bid': quote['bid_size'],
+                'volume_ask': quote['ask_size']
             }
             
         except Exception as e:
@@ -145,47 +136,87 @@ class PriceCollector:
     
     def save_price_data(self, price_data: Dict) -> bool:
         """
-        Save price data to database
+        Queue price data for a batched write to the database
         
         Returns:
-            True if saved successfully, False otherwise
+            True if buffered successfully, False otherwise
         """
-        session = SessionLocal()
         try:
-            price_record = HistoricalPrice(
-                symbol=price_data['symbol'],
-                timestamp=price_data['timestamp'],
-                bid_price=price_data['bid_price'],
-                ask_price=price_data['ask_price'],
-                mid_price=price_data['mid_price'],
-                spread=price_data['spread'],
-                spread_pct=price_data['spread_pct'],
-                volume_bid=price_data['volume_bid'],
-                volume_ask=price_data['volume_ask']
-            )
-            
-            session.add(price_record)
-            session.commit()
+            self.tick_buffer.add(price_data)
             return True
-            
-        except IntegrityError:
-            session.rollback()
-            LOG.debug(f"[{price_data['symbol']}] Duplicate price record, skipping")
-            return False
         except Exception as e:
-            session.rollback()
-            LOG.error(f"[{price_data['symbol']}] Error saving price data: {e}")
+            LOG.error(f"[{price_data['symbol']}] Error buffering price data: {e}")
             return False
+    
+    def _timed_collect(self, symbol: str) -> Optional[Dict]:
+        """Collect one symbol and record its fetch latency"""
+        started = time.perf_counter()
+        try:
+            return self.collect_price_data(symbol)
         finally:
-            session.close()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._stats_lock:
+                self._fetch_latency_ms[symbol] = round(elapsed_ms, 2)
+    
+    def run_cycle(self) -> Dict[str, int]:
+        """
+        Collect and save one tick for every enabled symbol
+        
+        Orderbooks are fetched concurrently (bounded by max_concurrency),
+        so one slow symbol no longer delays the others.
+        
+        Returns:
+            Dict with collected and saved counts
+        """
+        collected_count = 0
+        saved_count = 0
+        
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix="PriceFetch"
+            )
+        
+        results = self.executor.map(self._timed_collect, self.enabled_symbols)
+        
+        for price_data in results:
+            if not price_data:
+                continue
+            
+            collected_count += 1
+            if self.save_price_data(price_data):
+                saved_count += 1
+                LOG.info(
+                    f"[{price_data['symbol']}] Mid: ${price_data['mid_price']:,.2f} | "
+                    f"Bid: ${price_data['bid_price']:,.2f} | "
+                    f"Ask: ${price_data['ask_price']:,.2f} | "
+                    f"Spread: {price_data['spread_pct']:.4f}%"
+                )
+        
+        return {'collected': collected_count, 'saved': saved_count}
+    
+    def _record_cycle(self, duration: float):
+        """Record cycle duration for stats"""
+        with self._stats_lock:
+            self._cycle_count += 1
+            self._last_cycle_seconds = duration
+            self._max_cycle_seconds = max(self._max_cycle_seconds, duration)
+            self._total_cycle_seconds += duration
     
     def collection_loop(self):
-        """Main collection loop - runs in background thread"""
+        """Main collection loop - runs in background thread
+        
+        Cycles are scheduled at a fixed rate: each cycle starts at
+        start + n * interval. When a cycle overruns, the missed ticks are
+        skipped (and counted) instead of drifting the schedule.
+        """
         LOG.info("[PRICE COLLECTOR] Started")
         iteration = 0
+        next_tick = time.monotonic()
         
         while self.running:
             iteration += 1
+            cycle_start = time.monotonic()
             try:
                 LOG.info("\n" + "=" * 80)
                 LOG.info(f"[COLLECTION] Cycle #{iteration} - {time.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -197,38 +228,59 @@ class PriceCollector:
                 
                 if not self.enabled_symbols:
                     LOG.warning("[COLLECTION] No enabled symbols found")
-                    time.sleep(self.collection_interval)
-                    continue
-                
-                # Collect price data for all enabled symbols
-                collected_count = 0
-                saved_count = 0
-                
-                for symbol in self.enabled_symbols:
-                    price_data = self.collect_price_data(symbol)
-                    
-                    if price_data:
-                        collected_count += 1
-                        if self.save_price_data(price_data):
-                            saved_count += 1
-                            LOG.info(
-                                f"[{symbol}] Mid: ${price_data['mid_price']:,.2f} | "
-                                f"Bid: ${price_data['bid_price']:,.2f} | "
-                                f"Ask: ${price_data['ask_price']:,.2f} | "
-                                f"Spread: {price_data['spread_pct']:.4f}%"
-                            )
-                
-                LOG.info(f"\n[SUMMARY] Collected: {collected_count}/{len(self.enabled_symbols)} | Saved: {saved_count}")
-                LOG.info(f"[NEXT] Collection in {self.collection_interval} second(s)...\n")
+                else:
+                    # Collect price data for all enabled symbols
+                    counts = self.run_cycle()
+                    LOG.info(
+                        f"\n[SUMMARY] Collected: {counts['collected']}/{len(self.enabled_symbols)} | "
+                        f"Buffered: {counts['saved']} | "
+                        f"Pending writes: {self.tick_buffer.pending()}"
+                    )
                 
             except Exception as e:
                 LOG.exception(f"[ERROR] Collection loop error: {e}")
             
-            # Sleep until next collection
-            time.sleep(self.collection_interval)
+            cycle_seconds = time.monotonic() - cycle_start
+            self._record_cycle(cycle_seconds)
+            
+            # Fixed-rate schedule: skip ticks we overran instead of drifting
+            next_tick += self.collection_interval
+            now = time.monotonic()
+            if now > next_tick:
+                missed = int((now - next_tick) // self.collection_interval) + 1
+                next_tick += missed * self.collection_interval
+                with self._stats_lock:
+                    self._skipped_ticks += missed
+                LOG.warning(
+                    f"[COLLECTION] Cycle took {cycle_seconds:.2f}s, "
+                    f"skipped {missed} tick(s)"
+                )
+            
+            LOG.info(f"[NEXT] Collection in {max(0, next_tick - now):.2f} second(s)...\n")
+            time.sleep(max(0, next_tick - time.monotonic()))
         
         LOG.info("[PRICE COLLECTOR] Stopped")
     
+    def get_stats(self) -> Dict:
+        """Cycle duration, skipped ticks and per-symbol fetch latency"""
+        with self._stats_lock:
+            cycles = self._cycle_count
+            return {
+                'running': self.running,
+                'interval_seconds': self.collection_interval,
+                'max_concurrency': self.max_concurrency,
+                'symbols': len(self.enabled_symbols),
+                'cycles': cycles,
+                'skipped_ticks': self._skipped_ticks,
+                'cycle_seconds': {
+                    'last': round(self._last_cycle_seconds, 4),
+                    'avg': round(self._total_cycle_seconds / cycles, 4) if cycles else 0,
+                    'max': round(self._max_cycle_seconds, 4),
+                },
+                'fetch_latency_ms': dict(self._fetch_latency_ms),
+                'write_buffer': self.tick_buffer.get_stats(),
+            }
+    
     def start(self):
         """Start price collection in background thread"""
         if self.running:
@@ -237,6 +289,7 @@ class PriceCollector:
         
         LOG.info("Starting price collector...")
         self.running = True
+        self.tick_buffer.start()
         self.thread = threading.Thread(target=self.collection_loop, daemon=True)
         self.thread.start()
         
@@ -256,6 +309,13 @@ class PriceCollector:
         if self.thread:
             self.thread.join(timeout=5)
         
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        
+        # Write out ticks still waiting in the buffer
+        self.tick_buffer.stop()
+        
         LOG.info("[OK] Price collector stopped")
 
 
@@ -267,7 +327,10 @@ def get_price_collector(collection_interval: int = 1) -> PriceCollector:
     global _price_collector
     if _price_collector is None:
         LOG.info("Creating new PriceCollector instance...")
-        _price_collector = PriceCollector(collection_interval=collection_interval)
+        _price_collector = PriceCollector(
+            collection_interval=collection_interval,
+            max_concurrency=int(os.getenv('PRICE_COLLECTOR_CONCURRENCY', '8'))
+        )
         LOG.info("PriceCollector instance created and cached")
     else:
         LOG.debug("Returning cached PriceCollector instance")
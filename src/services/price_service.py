@@ -2,13 +2,19 @@
 Service for collecting and managing historical price data.
 Supports both real Binance API and mock data generation.
 """
-import requests
 import random
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
-from models.base import PriceHistory, AllowedInstrument
+from src.database.upsert import upsert_rows
+from src.models.base import PriceHistory, AllowedInstrument
+from src.services.http_client import get_http_client
+from src.services.rolling_stats_service import get_rolling_stats
+
+LOG = logging.getLogger(__name__)
 
 
 class PriceHistoryService:
@@ -26,6 +32,10 @@ class PriceHistoryService:
         '1d': 1440,
     }
     
+    # Rows per INSERT ... ON CONFLICT statement (keeps bind params under
+    # SQLite's per-statement limit)
+    UPSERT_CHUNK_SIZE = 500
+    
     def __init__(self, db_session: Session):
         self.db = db_session
     
@@ -49,7 +59,7 @@ class PriceHistoryService:
                 'limit': min(limit, 1000)
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = get_http_client().get(url, params=params, timeout=10)
             response.raise_for_status()
             
             klines = response.json()
@@ -132,32 +142,68 @@ class PriceHistoryService:
         Returns:
             Number of records saved
         """
-        saved_count = 0
+        return self.upsert_price_data(symbol, timeframe, data)['inserted']
+    
+    def upsert_price_data(self, symbol: str, timeframe: str, data: List[Dict]) -> Dict[str, int]:
+        """
+        Bulk insert-or-update candles (INSERT ... ON CONFLICT where the
+        database supports it, see src.database.upsert).
+        
+        Existing candles (same symbol, timeframe, timestamp) are updated in
+        place, so a re-fetched candle that was still forming gets its final
+        OHLCV values.
         
+        Args:
+            symbol: Trading pair
+            timeframe: Candle interval
+            data: List of OHLCV dictionaries
+        
+        Returns:
+            Dictionary with inserted and updated counts (outside PostgreSQL
+            the split is read just before the write, so a concurrent writer
+            of the same candles can skew it)
+        """
+        # Last value wins if the batch itself repeats a timestamp
+        rows_by_ts = {}
         for candle in data:
-            # Check if record already exists
-            existing = self.db.query(PriceHistory).filter(
-                PriceHistory.symbol == symbol,
-                PriceHistory.timeframe == timeframe,
-                PriceHistory.timestamp == candle['timestamp']
-            ).first()
-            
-            if not existing:
-                price_record = PriceHistory(
-                    symbol=symbol,
-                    timeframe=timeframe,
-                    timestamp=candle['timestamp'],
-                    open_price=candle['open'],
-                    high_price=candle['high'],
-                    low_price=candle['low'],
-                    close_price=candle['close'],
-                    volume=candle['volume']
-                )
-                self.db.add(price_record)
-                saved_count += 1
-        
-        self.db.commit()
-        return saved_count
+            rows_by_ts[candle['timestamp']] = {
+                'symbol': symbol,
+                'timeframe': timeframe,
+                'timestamp': candle['timestamp'],
+                'open_price': candle['open'],
+                'high_price': candle['high'],
+                'low_price': candle['low'],
+                'close_price': candle['close'],
+                'volume': candle['volume'],
+            }
+        rows = list(rows_by_ts.values())
+        if not rows:
+            return {'inserted': 0, 'updated': 0}
+        
+        try:
+            updated = upsert_rows(
+                self.db, PriceHistory, rows, ['symbol', 'timeframe', 'timestamp'],
+                set_=lambda excluded: {
+                    'open_price': excluded.open_price,
+                    'high_price': excluded.high_price,
+                    'low_price': excluded.low_price,
+                    'close_price': excluded.close_price,
+                    'volume': excluded.volume,
+                },
+                chunk_size=self.UPSERT_CHUNK_SIZE,
+                count_updates=True
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        try:
+            get_rolling_stats().add_candles(symbol, timeframe, rows)
+        except Exception as e:
+            LOG.warning(f"[ROLLING STATS] Update failed for {symbol} {timeframe}: {e}")
+        
+        return {'inserted': len(rows) - updated, 'updated': updated}
     
     def get_historical_data(self, symbol: str, timeframe: str = '1h', 
                            limit: int = 500) -> List[Dict]:
@@ -225,27 +271,38 @@ class PriceHistoryService:
             if not data:
                 return {'status': 'error', 'message': 'No data retrieved', 'count': 0}
             
-            saved_count = self.save_price_data(symbol, timeframe, data)
-            
-            return {
-                'status': 'success',
-                'symbol': symbol,
-                'timeframe': timeframe,
-                'total_candles': len(data),
-                'saved_count': saved_count,
-                'message': f'Saved {saved_count} new candles for {symbol}'
-            }
+            return self._save_collected(symbol, timeframe, data)
             
         except Exception as e:
             return {'status': 'error', 'message': str(e), 'count': 0}
     
-    def collect_all_instruments(self, timeframe: str = '1h', use_mock: bool = False) -> List[Dict]:
+    def _save_collected(self, symbol: str, timeframe: str, data: List[Dict]) -> Dict:
+        """Upsert fetched candles and build the collection result."""
+        counts = self.upsert_price_data(symbol, timeframe, data)
+        saved_count = counts['inserted']
+        
+        return {
+            'status': 'success',
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'total_candles': len(data),
+            'saved_count': saved_count,
+            'updated_count': counts['updated'],
+            'message': f'Saved {saved_count} new candles for {symbol}'
+        }
+    
+    def collect_all_instruments(self, timeframe: str = '1h', use_mock: bool = False,
+                                max_workers: int = 8) -> List[Dict]:
         """
         Collect data for all enabled instruments.
         
+        Klines are fetched from Binance concurrently; each instrument is
+        then written with one bulk upsert on this service's session.
+        
         Args:
             timeframe: Candle interval
             use_mock: If True, generate mock data
+            max_workers: Maximum concurrent Binance requests
         
         Returns:
             List of collection results for each instrument
@@ -253,11 +310,29 @@ class PriceHistoryService:
         instruments = self.db.query(AllowedInstrument).filter(
             AllowedInstrument.enabled == True
         ).all()
+        symbols = [instrument.symbol for instrument in instruments]
+        
+        if use_mock or not symbols:
+            return [
+                self.collect_data_for_instrument(symbol, timeframe, use_mock)
+                for symbol in symbols
+            ]
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols)))) as pool:
+            fetched = list(pool.map(
+                lambda symbol: self.fetch_binance_klines(symbol, timeframe, limit=500),
+                symbols
+            ))
         
         results = []
-        for instrument in instruments:
-            result = self.collect_data_for_instrument(instrument.symbol, timeframe, use_mock)
-            results.append(result)
+        for symbol, data in zip(symbols, fetched):
+            if not data:
+                results.append({'status': 'error', 'message': 'No data retrieved', 'count': 0})
+                continue
+            try:
+                results.append(self._save_collected(symbol, timeframe, data))
+            except Exception as e:
+                results.append({'status': 'error', 'message': str(e), 'count': 0})
         
         return results
     
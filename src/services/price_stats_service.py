@@ -0,0 +1,190 @@
+"""
+Price Stats Service
+Window price/spread statistics computed by the database in one aggregate
+query per request, so memory stays constant regardless of the window.
+The default 24h window is served from the incrementally maintained
+rolling stats instead
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import and_, func, select
+
+from src.models.base import HistoricalPrice, HistoricalPriceSummary
+from src.services.rolling_stats_service import get_rolling_stats
+from src.services.tick_retention_service import RAW_TIER, get_tick_retention
+
+LOG = logging.getLogger(__name__)
+
+
+def _first(column, order_by, where, descending: bool = False):
+    """Scalar subquery for the first (or last) value of a column in a window"""
+    order = order_by.desc() if descending else order_by.asc()
+    return select(column).where(where).order_by(order).limit(1).correlate(None).scalar_subquery()
+
+
+def _as_float(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _build_stats(symbol, data_points, first_ts, last_ts, first_mid, current_mid,
+                 high, low, avg, spread_current, spread_avg, spread_min, spread_max) -> Dict:
+    """Assemble the stats payload returned by /api/historical/stats/<symbol>"""
+    first_mid = _as_float(first_mid)
+    current_mid = _as_float(current_mid)
+    return {
+        'symbol': symbol,
+        'data_points': int(data_points),
+        'first_timestamp': first_ts.isoformat(),
+        'last_timestamp': last_ts.isoformat(),
+        'price': {
+            'current': current_mid,
+            'high': _as_float(high),
+            'low': _as_float(low),
+            'avg': _as_float(avg),
+            'change': current_mid - first_mid,
+            'change_pct': ((current_mid - first_mid) / first_mid * 100)
+                          if first_mid > 0 else 0
+        },
+        'spread': {
+            'current': _as_float(spread_current),
+            'avg': _as_float(spread_avg),
+            'min': _as_float(spread_min),
+            'max': _as_float(spread_max)
+        }
+    }
+
+
+def raw_price_stats(session, symbol: str, cutoff: datetime) -> Optional[Dict]:
+    """Stats over raw ticks newer than cutoff (None if there are none)"""
+    window = and_(
+        HistoricalPrice.symbol == symbol,
+        HistoricalPrice.timestamp >= cutoff
+    )
+    ts = HistoricalPrice.timestamp
+
+    row = session.execute(
+        select(
+            func.count(HistoricalPrice.id),
+            func.min(ts),
+            func.max(ts),
+            func.max(HistoricalPrice.mid_price),
+            func.min(HistoricalPrice.mid_price),
+            func.avg(HistoricalPrice.mid_price),
+            func.avg(HistoricalPrice.spread_pct),
+            func.min(HistoricalPrice.spread_pct),
+            func.max(HistoricalPrice.spread_pct),
+            _first(HistoricalPrice.mid_price, ts, window),
+            _first(HistoricalPrice.mid_price, ts, window, descending=True),
+            _first(HistoricalPrice.spread_pct, ts, window, descending=True),
+        ).where(window)
+    ).one()
+
+    (count, first_ts, last_ts, high, low, avg, spread_avg, spread_min,
+     spread_max, first_mid, current_mid, spread_current) = row
+    if not count:
+        return None
+
+    return _build_stats(
+        symbol, count, first_ts, last_ts, first_mid, current_mid, high, low,
+        avg, spread_current, spread_avg, spread_min, spread_max
+    )
+
+
+def summary_price_stats(session, symbol: str, resolution: str, cutoff: datetime) -> Optional[Dict]:
+    """
+    Stats from per-minute or per-hour summaries newer than cutoff
+
+    Averages are weighted by tick count. Current values come from the
+    newest raw tick, since summaries lag by up to one bucket.
+    """
+    S = HistoricalPriceSummary
+    window = and_(
+        S.symbol == symbol,
+        S.resolution == resolution,
+        S.timestamp >= cutoff
+    )
+    latest = HistoricalPrice.symbol == symbol
+    ticks = func.sum(S.tick_count)
+
+    row = session.execute(
+        select(
+            ticks,
+            func.min(S.timestamp),
+            func.max(S.timestamp),
+            func.max(S.high_mid),
+            func.min(S.low_mid),
+            func.sum(S.avg_mid * S.tick_count) / ticks,
+            func.sum(S.avg_spread_pct * S.tick_count) / ticks,
+            func.min(S.min_spread_pct),
+            func.max(S.max_spread_pct),
+            _first(S.open_mid, S.timestamp, window),
+            _first(S.close_mid, S.timestamp, window, descending=True),
+            _first(S.avg_spread_pct, S.timestamp, window, descending=True),
+            _first(HistoricalPrice.timestamp, HistoricalPrice.timestamp, latest, descending=True),
+            _first(HistoricalPrice.mid_price, HistoricalPrice.timestamp, latest, descending=True),
+            _first(HistoricalPrice.spread_pct, HistoricalPrice.timestamp, latest, descending=True),
+        ).where(window)
+    ).one()
+
+    (count, first_ts, last_ts, high, low, avg, spread_avg, spread_min, spread_max,
+     first_mid, last_close, last_spread, tick_ts, tick_mid, tick_spread) = row
+    if not count:
+        return None
+
+    if tick_ts is not None:
+        last_ts, current_mid, spread_current = tick_ts, tick_mid, tick_spread
+    else:
+        current_mid, spread_current = last_close, last_spread
+
+    return _build_stats(
+        symbol, count, first_ts, last_ts, first_mid, current_mid, high, low,
+        avg, spread_current, spread_avg, spread_min, spread_max
+    )
+
+
+def rolling_price_stats(symbol: str) -> Optional[Dict]:
+    """Stats over the rolling window's ticks (None if there are none)"""
+    window = get_rolling_stats().tick_stats(symbol)
+    if window is None:
+        return None
+
+    return _build_stats(
+        symbol, window['count'], window['first_ts'], window['last_ts'], window['open'],
+        window['close'], window['high'], window['low'], window['avg'],
+        window['spread_current'], window['spread_avg'], window['spread_min'], window['spread_max']
+    )
+
+
+def get_price_stats(session, symbol: str, hours: int, resolution: Optional[str] = None) -> Optional[Dict]:
+    """
+    Price/spread statistics for the last N hours
+
+    Args:
+        resolution: Force a tier (raw, 1m, 1h); picked from the window
+            by default
+
+    Returns:
+        Stats dict or None if the window holds no data
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(hours=hours)
+    retention = get_tick_retention()
+
+    if (resolution is None and hours == get_rolling_stats().window_hours
+            and cutoff >= now - retention.raw_retention):
+        # Kept up to date from raw ticks, so no span limit applies
+        resolution = RAW_TIER
+        stats = rolling_price_stats(symbol)
+    else:
+        resolution = resolution or retention.select_tier(cutoff)
+        if resolution == RAW_TIER:
+            stats = raw_price_stats(session, symbol, cutoff)
+        else:
+            stats = summary_price_stats(session, symbol, resolution, cutoff)
+
+    if stats is not None:
+        stats['period_hours'] = hours
+        stats['resolution'] = resolution
+    return stats
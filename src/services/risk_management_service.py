@@ -15,9 +15,15 @@ import logging
 from decimal import Decimal
 from typing import List, Dict, Optional
 from datetime import datetime
+import numpy as np
 from sqlalchemy import select
 from src.database.session import SessionLocal
 from src.models.base import Trade, SystemSettings
+from src.services.batch_risk_service import evaluate_positions
+from src.services.trailing_state_service import (
+    TrailingStateStore,
+    get_trailing_state_store,
+)
 
 LOG = logging.getLogger(__name__)
 
@@ -25,7 +31,7 @@ LOG = logging.getLogger(__name__)
 class RiskManager:
     """Manages risk for open trades with SL, TP and trailing stops"""
     
-    def __init__(self):
+    def __init__(self, trailing_state: Optional[TrailingStateStore] = None):
         # Default values (overridden by database settings)
         self.stop_loss_pct = Decimal('0.01')  # 1% stop loss
         self.take_profit_pct = Decimal('0.02')  # 2% take profit
@@ -34,6 +40,10 @@ class RiskManager:
         self.trailing_stop_percent = Decimal('0.005')  # 0.5%
         self.trailing_stop_amount = Decimal('50')  # $50
         self.emergency_spike_pct = Decimal('0.10')  # 10% spike emergency exit
+        # Trailing water marks, persisted and evicted when trades close
+        self.trailing_state = (
+            trailing_state if trailing_state is not None else get_trailing_state_store()
+        )
         
         # Load settings from database
         self._load_settings()
@@ -148,17 +158,16 @@ class RiskManager:
         
         # 3. Trailing Stop Loss (if enabled and in profit)
         if self.trailing_stop_enabled and pnl_value > 0:
-            # Track highest profit achieved
-            highest_price_key = f'highest_price_{trade.id}'
-            if not hasattr(self, '_highest_prices'):
-                self._highest_prices = {}
+            # Track highest profit achieved (starting from the first
+            # price seen in profit)
+            mark = self.trailing_state.get(trade.id)
             
             if side.upper() == 'BUY':
                 # For BUY, track highest price reached
-                highest = self._highest_prices.get(highest_price_key, current_price)
-                if current_price > highest:
+                highest = current_price if mark is None else mark
+                if mark is None or current_price > highest:
                     highest = current_price
-                    self._highest_prices[highest_price_key] = highest
+                    self.trailing_state.set(trade.id, side, highest)
                     LOG.info(f"[NEW HIGH] for trade {trade.id}: ${highest:,.2f}")
                 
                 # Check if price dropped from highest
@@ -177,10 +186,10 @@ class RiskManager:
             
             else:  # SELL
                 # For SELL, track lowest price reached
-                lowest = self._highest_prices.get(highest_price_key, current_price)
-                if current_price < lowest:
+                lowest = current_price if mark is None else mark
+                if mark is None or current_price < lowest:
                     lowest = current_price
-                    self._highest_prices[highest_price_key] = lowest
+                    self.trailing_state.set(trade.id, side, lowest)
                     LOG.info(f"[NEW LOW] Trade {trade.id}: ${lowest:,.2f}")
                 
                 # Check if price rose from lowest
@@ -215,82 +224,137 @@ class RiskManager:
         Returns:
             List of trades to close with reasons
         """
-        LOG.info("=" * 80)
-        LOG.info("[RISK CHECK] CHECKING ALL OPEN TRADES FOR RISK MANAGEMENT")
-        LOG.info("=" * 80)
-        
-        trades_to_close = []
-        
         with SessionLocal() as db:
-            # Get all open trades
-            open_trades = db.execute(
-                select(Trade).where(Trade.status == 'OPEN')
-            ).scalars().all()
+            # Columns only; ORM objects are loaded for triggering trades
+            positions = db.execute(
+                select(
+                    Trade.id, Trade.symbol, Trade.action,
+                    Trade.open_price, Trade.stop_loss, Trade.take_profit
+                ).where(Trade.status == 'OPEN')
+            ).all()
             
-            if not open_trades:
+            if not positions:
                 LOG.info("No open trades to check")
                 return []
             
-            LOG.info(f"Found {len(open_trades)} open trade(s) to check")
+            return self.check_positions(db, positions, price_data)
+    
+    def check_positions(self, db, positions, price_data: Dict[str, Decimal]) -> List[Dict]:
+        """Check open positions against current prices
+        
+        Positions are evaluated in one vectorized pass; only trades that
+        trigger (or sit within float tolerance of a threshold) are loaded
+        as ORM objects in db and confirmed with should_close_trade, so
+        decisions and reasons match the per-trade rules exactly.
+        
+        Args:
+            db: Session the returned trades are loaded in
+            positions: Rows with id, symbol, action, open_price, stop_loss
+                and take_profit
+            price_data: Dict mapping symbol -> current_price
             
-            for trade in open_trades:
-                symbol = trade.symbol
-                current_price = price_data.get(symbol)
-                
-                if not current_price:
-                    LOG.warning(f"[WARN] No price data for {symbol}, skipping")
-                    continue
-                
-                if current_price <= 0:
-                    LOG.warning(f"[WARN] Invalid price ${current_price} for {symbol}, skipping")
-                    continue
-                
-                LOG.info(f"\nChecking: {symbol} {trade.action} @ ${trade.open_price}")
-                LOG.info(f"Current price: ${current_price}")
-                if trade.stop_loss:
-                    LOG.info(f"Stop Loss: ${trade.stop_loss}")
-                if trade.take_profit:
-                    LOG.info(f"Take Profit: ${trade.take_profit}")
-                
-                should_close, reason, exit_type = self.should_close_trade(trade, current_price)
-                
-                if should_close:
-                    # Calculate P&L
-                    if trade.action.upper() == 'BUY':
-                        pnl_value = (current_price - trade.open_price) * trade.quantity
-                        pnl_pct = (current_price - trade.open_price) / trade.open_price
-                    else:
-                        pnl_value = (trade.open_price - current_price) * trade.quantity
-                        pnl_pct = (trade.open_price - current_price) / trade.open_price
-                    
-                    LOG.warning("=" * 80)
-                    LOG.warning(f"[WARN] CLOSING TRADE: {symbol} {trade.action}")
-                    LOG.warning(f"Entry: ${trade.open_price:,.2f}, Current: ${current_price:,.2f}")
-                    LOG.warning(f"P&L: {pnl_pct*100:.2f}% (${pnl_value:,.2f})")
-                    LOG.warning(f"Reason: {reason}")
-                    LOG.warning(f"Exit Type: {exit_type}")
-                    LOG.warning("=" * 80)
-                    
-                    trades_to_close.append({
-                        'trade': trade,
-                        'current_price': current_price,
-                        'reason': reason,
-                        'exit_type': exit_type,
-                        'pnl_pct': float(pnl_pct * 100),
-                        'pnl_value': float(pnl_value)
-                    })
-                else:
-                    # Calculate current P&L for logging
-                    if trade.action.upper() == 'BUY':
-                        pnl_pct = (current_price - trade.open_price) / trade.open_price
-                    else:
-                        pnl_pct = (trade.open_price - current_price) / trade.open_price
-                    LOG.info(f"[OK] Trade OK: {symbol} {trade.action} - P&L: {pnl_pct*100:.2f}%")
+        Returns:
+            List of trades to close with reasons
+        """
+        trades_to_close = []
         
-        if trades_to_close:
-            LOG.info(f"\n[SUMMARY] {len(trades_to_close)} trade(s) need to be closed")
-        else:
-            LOG.info("\n[OK] All trades within risk parameters")
+        priced = []
+        skipped = set()
+        for position in positions:
+            current_price = price_data.get(position.symbol)
+            if not current_price or current_price <= 0:
+                skipped.add(position.symbol)
+                continue
+            priced.append((position, current_price))
+        for symbol in sorted(skipped):
+            LOG.warning(f"[WARN] No valid price for {symbol}, skipping its trades")
+        
+        if not priced:
+            return []
+        
+        if self.trailing_stop_enabled:
+            self.trailing_state.load(p.id for p, _ in priced)
+        result = evaluate_positions(
+            entry=np.array([float(p.open_price) for p, _ in priced]),
+            is_buy=np.array([p.action.upper() == 'BUY' for p, _ in priced]),
+            current=np.array([float(price) for _, price in priced]),
+            stop_loss=np.array([float(p.stop_loss) if p.stop_loss else np.nan for p, _ in priced]),
+            take_profit=np.array([float(p.take_profit) if p.take_profit else np.nan for p, _ in priced]),
+            marks=np.array([
+                float(self.trailing_state.get(p.id) or np.nan) if self.trailing_stop_enabled
+                else np.nan
+                for p, _ in priced
+            ]),
+            stop_loss_pct=float(self.stop_loss_pct),
+            take_profit_pct=float(self.take_profit_pct),
+            trailing_enabled=self.trailing_stop_enabled,
+            trailing_type=self.trailing_stop_type,
+            trailing_percent=float(self.trailing_stop_percent),
+            trailing_amount=float(self.trailing_stop_amount),
+            emergency_spike_pct=float(self.emergency_spike_pct),
+        )
+        
+        recheck = set(result['indices'].tolist()) | set(result['uncertain'].tolist())
+        
+        # should_close_trade moves the marks of re-checked trades itself
+        for i in result['moved'].tolist():
+            if i not in recheck:
+                position, current_price = priced[i]
+                self.trailing_state.set(position.id, position.action, current_price)
+        
+        if recheck:
+            ids = [priced[i][0].id for i in recheck]
+            trades = {
+                trade.id: trade
+                # A position indexed in memory may have closed meanwhile
+                for trade in db.execute(
+                    select(Trade).where(Trade.id.in_(ids), Trade.status == 'OPEN')
+                ).scalars()
+            }
+        
+        for i in sorted(recheck):
+            position, current_price = priced[i]
+            trade = trades.get(position.id)
+            if trade is None:
+                continue
+            
+            should_close, reason, exit_type = self.should_close_trade(trade, current_price)
+            if not should_close:
+                continue
+            
+            symbol = trade.symbol
+            # Calculate P&L
+            if trade.action.upper() == 'BUY':
+                pnl_value = (current_price - trade.open_price) * trade.quantity
+                pnl_pct = (current_price - trade.open_price) / trade.open_price
+            else:
+                pnl_value = (trade.open_price - current_price) * trade.quantity
+                pnl_pct = (trade.open_price - current_price) / trade.open_price
+            
+            LOG.warning("=" * 80)
+            LOG.warning(f"[WARN] CLOSING TRADE: {symbol} {trade.action}")
+            LOG.warning(f"Entry: ${trade.open_price:,.2f}, Current: ${current_price:,.2f}")
+            LOG.warning(f"P&L: {pnl_pct*100:.2f}% (${pnl_value:,.2f})")
+            LOG.warning(f"Reason: {reason}")
+            LOG.warning(f"Exit Type: {exit_type}")
+            LOG.warning("=" * 80)
+            
+            trades_to_close.append({
+                'trade': trade,
+                'current_price': current_price,
+                'reason': reason,
+                'exit_type': exit_type,
+                'pnl_pct': float(pnl_pct * 100),
+                'pnl_value': float(pnl_value)
+            })
+    
+        # Event-driven checks run per tick; only log those that close something
+        LOG.log(
+            logging.INFO if trades_to_close else logging.DEBUG,
+            f"[RISK CHECK] {len(priced)} open trade(s) checked, "
+            f"{len(result['uncertain'])} re-checked exactly, "
+            f"{len(trades_to_close)} to close"
+        )
         
         return trades_to_close
     
@@ -0,0 +1,492 @@
+"""
+Rolling Stats Service
+24h statistics per symbol maintained incrementally as ticks are flushed
+and candles are upserted, so "24h change / high / low / volume / spread"
+reads are O(1) instead of scanning the window on every request.
+
+Ticks are folded into one-minute buckets (so a window holds at most 1440
+entries per symbol and its edge is exact to within a minute); candles are
+one bucket each. High/low and spread extremes come from monotonic deques,
+counts and sums are kept as running totals, and a series is loaded from
+the database the first time it is touched (cold start)
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func
+
+from src.database.session import SessionLocal
+from src.models.base import HistoricalPrice, PriceHistory
+
+LOG = logging.getLogger(__name__)
+
+class _Bucket:
+    __slots__ = (
+        'start', 'first_ts', 'last_ts', 'open', 'close', 'high', 'low', 'count',
+        'price_sum', 'volume', 'spread_last', 'spread_sum', 'spread_count',
+        'spread_min', 'spread_max'
+    )
+
+    def __init__(self, start: datetime):
+        self.start = start
+        self.first_ts = self.last_ts = None
+        self.open = self.close = self.high = self.low = None
+        self.count = 0
+        self.price_sum = Decimal(0)
+        self.volume = Decimal(0)
+        self.spread_last = self.spread_min = self.spread_max = None
+        self.spread_sum = Decimal(0)
+        self.spread_count = 0
+
+    def add(self, ts, price, high, low, volume, spread):
+        if self.first_ts is None or ts < self.first_ts:
+            self.first_ts, self.open = ts, price
+        if self.last_ts is None or ts >= self.last_ts:
+            self.last_ts, self.close = ts, price
+            if spread is not None:
+                self.spread_last = spread
+        self.high = high if self.high is None else max(self.high, high)
+        self.low = low if self.low is None else min(self.low, low)
+        self.count += 1
+        self.price_sum += price
+        self.volume += volume
+        if spread is not None:
+            self.spread_sum += spread
+            self.spread_count += 1
+            self.spread_min = spread if self.spread_min is None else min(self.spread_min, spread)
+            self.spread_max = spread if self.spread_max is None else max(self.spread_max, spread)
+
+
+class _Extreme:
+    """Monotonic deque of (bucket start, value): front is the window's max (or min)"""
+
+    def __init__(self, highest: bool):
+        self.highest = highest
+        self.items = deque()
+
+    def push(self, start, value):
+        if value is None:
+            return
+        items = self.items
+        if self.highest:
+            while items and items[-1][1] <= value:
+                items.pop()
+        else:
+            while items and items[-1][1] >= value:
+                items.pop()
+        items.append((start, value))
+
+    def evict(self, start):
+        """Drop entries of buckets older than `start`"""
+        while self.items and self.items[0][0] < start:
+            self.items.popleft()
+
+    def value(self):
+        return self.items[0][1] if self.items else None
+
+
+class RollingWindow:
+    """Buckets inside a sliding time window with running totals and extremes"""
+
+    def __init__(self, span: timedelta):
+        self.span = span
+        self.buckets = deque()
+        # Newest timestamp read by the cold-start load; ticks up to it are already counted
+        self.loaded_through: Optional[datetime] = None
+        # When the cold-start load ran (monotonic); empty windows are reloaded after a TTL
+        self.loaded_at = time.monotonic()
+        self._highs = _Extreme(highest=True)
+        self._lows = _Extreme(highest=False)
+        self._spread_max = _Extreme(highest=True)
+        self._spread_min = _Extreme(highest=False)
+        self.count = 0
+        self.price_sum = Decimal(0)
+        self.volume = Decimal(0)
+        self.spread_sum = Decimal(0)
+        self.spread_count = 0
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def _totals(self, bucket: _Bucket, sign: int):
+        self.count += sign * bucket.count
+        self.price_sum += sign * bucket.price_sum
+        self.volume += sign * bucket.volume
+        self.spread_sum += sign * bucket.spread_sum
+        self.spread_count += sign * bucket.spread_count
+
+    def _push_extremes(self, bucket: _Bucket):
+        self._highs.push(bucket.start, bucket.high)
+        self._lows.push(bucket.start, bucket.low)
+        self._spread_max.push(bucket.start, bucket.spread_max)
+        self._spread_min.push(bucket.start, bucket.spread_min)
+
+    def _rebuild_extremes(self):
+        """O(window) fallback after an out-of-order or shrinking update"""
+        for extreme in (self._highs, self._lows, self._spread_max, self._spread_min):
+            extreme.items.clear()
+        for bucket in self.buckets:
+            self._push_extremes(bucket)
+
+    def _bucket(self, start: datetime) -> Tuple[_Bucket, bool]:
+        """Find or create the bucket starting at `start`; True if it is the newest"""
+        buckets = self.buckets
+        if not buckets or start > buckets[-1].start:
+            buckets.append(_Bucket(start))
+            return buckets[-1], True
+        if start == buckets[-1].start:
+            return buckets[-1], True
+        for index in range(len(buckets) - 1, -1, -1):
+            if buckets[index].start == start:
+                return buckets[index], False
+            if buckets[index].start < start:
+                buckets.insert(index + 1, _Bucket(start))
+                return buckets[index + 1], False
+        buckets.appendleft(_Bucket(start))
+        return buckets[0], False
+
+    def add(self, start: datetime, ts: datetime, price: Decimal, high: Optional[Decimal] = None,
+            low: Optional[Decimal] = None, volume: Decimal = Decimal(0),
+            spread: Optional[Decimal] = None, replace: bool = False):
+        """
+        Fold one observation into the bucket starting at `start`
+
+        Args:
+            replace: Reset the bucket first (a candle revised in place)
+        """
+        bucket, newest = self._bucket(start)
+        high = price if high is None else high
+        low = price if low is None else low
+        shrinks = False
+        self._totals(bucket, -1)
+        if replace and bucket.count:
+            # Forming candles only widen; anything else needs a rebuild
+            shrinks = high < bucket.high or low > bucket.low
+            bucket.__init__(bucket.start)
+        bucket.add(ts, price, high, low, volume, spread)
+        self._totals(bucket, 1)
+
+        if newest and not shrinks:
+            self._push_extremes(bucket)
+        else:
+            self._rebuild_extremes()
+
+    def evict(self, cutoff: datetime) -> int:
+        """Drop buckets whose newest observation is older than cutoff"""
+        evicted = 0
+        while self.buckets and self.buckets[0].last_ts < cutoff:
+            bucket = self.buckets.popleft()
+            self._totals(bucket, -1)
+            evicted += 1
+        if evicted:
+            oldest = self.buckets[0].start if self.buckets else datetime.max
+            for extreme in (self._highs, self._lows, self._spread_max, self._spread_min):
+                extreme.evict(oldest)
+        return evicted
+
+    def snapshot(self) -> Optional[Dict]:
+        if not self.buckets:
+            return None
+        first, last = self.buckets[0], self.buckets[-1]
+        return {
+            'count': self.count,
+            'first_ts': first.first_ts,
+            'last_ts': last.last_ts,
+            'open': first.open,
+            'close': last.close,
+            'high': self._highs.value(),
+            'low': self._lows.value(),
+            'avg': self.price_sum / self.count if self.count else None,
+            'volume': self.volume,
+            'spread_current': last.spread_last,
+            'spread_avg': self.spread_sum / self.spread_count if self.spread_count else None,
+            'spread_min': self._spread_min.value(),
+            'spread_max': self._spread_max.value(),
+        }
+
+
+def _naive_utc(ts: datetime) -> datetime:
+    """Compare database (possibly tz-aware) and collector (naive UTC) timestamps alike"""
+    if ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def _tick_bucket(ts: datetime) -> datetime:
+    """One-minute bucket of a tick"""
+    return ts.replace(second=0, microsecond=0)
+
+
+def _decimal(value) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+class RollingStats:
+    """Per-symbol tick windows and per-(symbol, timeframe) candle windows"""
+
+    def __init__(self, window_hours: float = 24, session_factory=None, empty_ttl: float = 60):
+        """
+        Initialize rolling stats
+
+        Args:
+            window_hours: Window length
+            session_factory: Session factory for cold-start loads (a fresh,
+                non-scoped session by default: loads run inside callers'
+                transactions, e.g. add_candles from upsert_price_data)
+            empty_ttl: Seconds an empty load (unknown or idle series) is
+                cached before the database is asked again
+        """
+        self.span = timedelta(hours=window_hours)
+        self.window_hours = window_hours
+        self.empty_ttl = empty_ttl
+        self.session_factory = session_factory or SessionLocal.session_factory
+        self._ticks: Dict[str, RollingWindow] = {}
+        self._candles: Dict[Tuple[str, str], RollingWindow] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'ticks_added': 0,
+            'candles_added': 0,
+            'loads': 0,
+            'rows_loaded': 0,
+            'reads': 0,
+            'refreshed_candles': 0,
+            'evicted_buckets': 0,
+        }
+
+    # Cold start
+
+    def _load_ticks(self, symbol: str) -> RollingWindow:
+        window = RollingWindow(self.span)
+        cutoff = datetime.utcnow() - self.span
+        session = self.session_factory()
+        try:
+            rows = session.query(
+                HistoricalPrice.timestamp, HistoricalPrice.mid_price, HistoricalPrice.spread_pct
+            ).filter(
+                HistoricalPrice.symbol == symbol,
+                HistoricalPrice.timestamp >= cutoff
+            ).order_by(HistoricalPrice.timestamp).yield_per(5000)
+            loaded = 0
+            for ts, mid, spread_pct in rows:
+                ts = _naive_utc(ts)
+                window.add(_tick_bucket(ts), ts, _decimal(mid), spread=_decimal(spread_pct))
+                window.loaded_through = ts
+                loaded += 1
+        finally:
+            session.close()
+        with self._lock:
+            self._stats['loads'] += 1
+            self._stats['rows_loaded'] += loaded
+        LOG.debug(f"[ROLLING STATS] Loaded {loaded} tick(s) for {symbol}")
+        return window
+
+    def _load_candles(self, symbol: str, timeframe: str) -> RollingWindow:
+        window = RollingWindow(self.span)
+        session = self.session_factory()
+        try:
+            match = (PriceHistory.symbol == symbol, PriceHistory.timeframe == timeframe)
+            latest = session.query(func.max(PriceHistory.timestamp)).filter(*match).scalar()
+            loaded = 0
+            if latest is not None:
+                rows = session.query(
+                    PriceHistory.timestamp, PriceHistory.high_price, PriceHistory.low_price,
+                    PriceHistory.close_price, PriceHistory.volume
+                ).filter(
+                    *match, PriceHistory.timestamp >= latest - self.span
+                ).order_by(PriceHistory.timestamp)
+                for ts, high, low, close, volume in rows:
+                    ts = _naive_utc(ts)
+                    window.add(ts, ts, _decimal(close), _decimal(high), _decimal(low),
+                               _decimal(volume or 0))
+                    loaded += 1
+        finally:
+            session.close()
+        with self._lock:
+            self._stats['loads'] += 1
+            self._stats['rows_loaded'] += loaded
+        LOG.debug(f"[ROLLING STATS] Loaded {loaded} {timeframe} candle(s) for {symbol}")
+        return window
+
+    def _candle_rows(self, symbol: str, timeframe: str, since: datetime):
+        """(timestamp, high, low, close, volume) of candles from `since` on"""
+        session = self.session_factory()
+        try:
+            return session.query(
+                PriceHistory.timestamp, PriceHistory.high_price, PriceHistory.low_price,
+                PriceHistory.close_price, PriceHistory.volume
+            ).filter(
+                PriceHistory.symbol == symbol,
+                PriceHistory.timeframe == timeframe,
+                PriceHistory.timestamp >= since
+            ).order_by(PriceHistory.timestamp).all()
+        finally:
+            session.close()
+
+    def _refresh_candles(self, symbol: str, timeframe: str, window: RollingWindow):
+        """
+        Fold in candles written since the window was loaded (call without _lock)
+
+        add_candles only sees writes made in this process; the collector
+        task, scripts or another worker write price_history directly. The
+        newest bucket and anything after it are re-read on every read, an
+        index range scan of usually one row.
+        """
+        with self._lock:
+            if not window.buckets:
+                return
+            newest = window.buckets[-1].start
+        rows = self._candle_rows(symbol, timeframe, newest)
+        with self._lock:
+            for ts, high, low, close, volume in rows:
+                ts = _naive_utc(ts)
+                window.add(ts, ts, _decimal(close), _decimal(high), _decimal(low),
+                           _decimal(volume or 0), replace=True)
+            if len(rows) > 1:
+                self._stats['refreshed_candles'] += len(rows) - 1
+                self._stats['evicted_buckets'] += window.evict(window.buckets[-1].start - self.span)
+
+    def _usable(self, window: Optional[RollingWindow], now: float) -> bool:
+        """Cached and not an empty load past its TTL (holds _lock)"""
+        return window is not None and (
+            bool(window.buckets) or now - window.loaded_at < self.empty_ttl
+        )
+
+    def _window(self, cache: Dict, key, load) -> RollingWindow:
+        """
+        Cached window for `key`, loading it on first use (call without _lock)
+
+        The database load runs outside the lock so one cold series doesn't
+        stall every other reader and the tick flusher. If another thread
+        installed a window meanwhile, that one wins and this load is dropped.
+        """
+        with self._lock:
+            window = cache.get(key)
+            if self._usable(window, time.monotonic()):
+                return window
+
+        loaded = load()
+        with self._lock:
+            now = time.monotonic()
+            window = cache.get(key)
+            if self._usable(window, now):
+                return window
+            # Forget other empty loads that have expired, so probes of
+            # unknown symbols don't pile up
+            for stale in [k for k, w in cache.items() if not self._usable(w, now)]:
+                del cache[stale]
+            cache[key] = loaded
+            return loaded
+
+    def _tick_window(self, symbol: str) -> RollingWindow:
+        """Window of a symbol, loading it from the database on first use"""
+        return self._window(self._ticks, symbol, lambda: self._load_ticks(symbol))
+
+    def _candle_window(self, symbol: str, timeframe: str) -> RollingWindow:
+        return self._window(
+            self._candles, (symbol, timeframe), lambda: self._load_candles(symbol, timeframe)
+        )
+
+    # Ingest
+
+    def add_ticks(self, rows: Iterable[Dict]):
+        """
+        Fold committed ticks (historical_prices rows) into their symbols' windows
+
+        A symbol seen for the first time is loaded from the database, which
+        already includes these rows; ticks the load has read are skipped.
+        """
+        by_symbol: Dict[str, list] = {}
+        for row in rows:
+            by_symbol.setdefault(row['symbol'], []).append(row)
+        windows = {symbol: self._tick_window(symbol) for symbol in by_symbol}
+
+        with self._lock:
+            for symbol, ticks in by_symbol.items():
+                window = windows[symbol]
+                for row in ticks:
+                    ts = _naive_utc(row['timestamp'])
+                    if window.loaded_through is not None and ts <= window.loaded_through:
+                        continue
+                    window.add(_tick_bucket(ts), ts, _decimal(row['mid_price']),
+                               spread=_decimal(row['spread_pct']))
+                    self._stats['ticks_added'] += 1
+                self._stats['evicted_buckets'] += window.evict(datetime.utcnow() - self.span)
+
+    def add_candles(self, symbol: str, timeframe: str, rows: Iterable[Dict]):
+        """
+        Fold committed (inserted or revised) price_history candles into the window
+
+        Candles replace their bucket, so re-applying one the cold-start load
+        already read changes nothing.
+        """
+        window = self._candle_window(symbol, timeframe)
+        with self._lock:
+            added = 0
+            for row in rows:
+                ts = _naive_utc(row['timestamp'])
+                window.add(ts, ts, _decimal(row['close_price']), _decimal(row['high_price']),
+                           _decimal(row['low_price']), _decimal(row.get('volume') or 0),
+                           replace=True)
+                added += 1
+            self._stats['candles_added'] += added
+            if window.buckets:
+                self._stats['evicted_buckets'] += window.evict(window.buckets[-1].start - self.span)
+
+    # Reads
+
+    def tick_stats(self, symbol: str) -> Optional[Dict]:
+        """Window snapshot over ticks newer than now - window (None if empty)"""
+        window = self._tick_window(symbol)
+        with self._lock:
+            self._stats['evicted_buckets'] += window.evict(datetime.utcnow() - self.span)
+            self._stats['reads'] += 1
+            return window.snapshot()
+
+    def candle_stats(self, symbol: str, timeframe: str) -> Optional[Dict]:
+        """Window snapshot over candles within the window of the newest candle (None if none)"""
+        window = self._candle_window(symbol, timeframe)
+        self._refresh_candles(symbol, timeframe, window)
+        with self._lock:
+            self._stats['reads'] += 1
+            return window.snapshot()
+
+    def rebuild(self):
+        """Forget every window; each reloads from the database on next use"""
+        with self._lock:
+            self._ticks.clear()
+            self._candles.clear()
+        LOG.info("[ROLLING STATS] Windows cleared; reloading from the database on demand")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['tick_symbols'] = len(self._ticks)
+            stats['candle_series'] = len(self._candles)
+            stats['buckets'] = sum(len(w) for w in self._ticks.values()) + \
+                sum(len(w) for w in self._candles.values())
+        stats['window_hours'] = self.window_hours
+        return stats
+
+
+# Global instance
+_rolling_stats = None
+_rolling_stats_lock = threading.Lock()
+
+
+def get_rolling_stats() -> RollingStats:
+    """Get or create the shared rolling stats"""
+    global _rolling_stats
+    with _rolling_stats_lock:
+        if _rolling_stats is None:
+            LOG.info("Creating new RollingStats instance...")
+            _rolling_stats = RollingStats(
+                window_hours=float(os.getenv('ROLLING_STATS_WINDOW_HOURS', '24')),
+                empty_ttl=float(os.getenv('ROLLING_STATS_EMPTY_TTL', '60'))
+            )
+    return _rolling_stats
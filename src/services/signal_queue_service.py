@@ -0,0 +1,253 @@
+"""
+Signal Ingestion Queue Service
+Bounded in-process queue and worker pool that drains webhook signals
+off the request thread while preserving per-symbol ordering
+"""
+import os
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from src.database.session import SessionLocal
+from src.models.base import Signal
+
+LOG = logging.getLogger(__name__)
+
+# Signal status used for rows that were accepted but not yet processed
+QUEUED_STATUS = 'QUEUED'
+
+
+class SignalQueue:
+    """Worker pool fed by one queue per worker, bounded by a shared depth.
+
+    Jobs are routed to a worker by symbol, so signals for the same
+    instrument are always executed in arrival order while different
+    instruments are processed in parallel. The depth limit is shared by
+    all workers, so a busy symbol can use every free slot.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict], None],
+        workers: int = 4,
+        max_depth: int = 1000
+    ):
+        """
+        Initialize signal queue
+
+        Args:
+            handler: Callable invoked with each job dict
+            workers: Number of worker threads
+            max_depth: Maximum number of queued jobs across all workers
+        """
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_depth = max(self.workers, max_depth)
+        self.queues = [queue.Queue() for _ in range(self.workers)]
+        self.threads: List[threading.Thread] = []
+        self.running = False
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._latencies = deque(maxlen=1000)
+        self._counters = {
+            'enqueued': 0,
+            'processed': 0,
+            'failed': 0,
+            'rejected': 0,
+        }
+
+        LOG.info(
+            f"[SIGNAL QUEUE] Initialized: workers={self.workers}, "
+            f"max_depth={self.max_depth}"
+        )
+
+    def _route(self, symbol: Optional[str]) -> int:
+        """Pick the worker that owns a symbol"""
+        return hash(symbol or '') % self.workers
+
+    def enqueue(self, job: Dict) -> bool:
+        """
+        Enqueue a job without blocking
+
+        Returns:
+            True if accepted, False if max_depth jobs are already waiting
+        """
+        job.setdefault('enqueued_at', time.time())
+        with self._lock:
+            full = self._pending >= self.max_depth
+            if full:
+                self._counters['rejected'] += 1
+            else:
+                self._pending += 1
+                self._counters['enqueued'] += 1
+
+        if full:
+            LOG.warning(
+                f"[SIGNAL QUEUE] Backpressure: queue full, rejected "
+                f"{job.get('symbol')} signal {job.get('signal_id')}"
+            )
+            return False
+
+        self.queues[self._route(job.get('symbol'))].put_nowait(job)
+        return True
+
+    def depth(self) -> int:
+        """Total number of jobs waiting across all workers"""
+        with self._lock:
+            return self._pending
+
+    def _worker_loop(self, index: int):
+        """Drain one worker queue until stopped"""
+        jobs = self.queues[index]
+        while self.running:
+            try:
+                job = jobs.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            latency = time.time() - job.get('enqueued_at', time.time())
+            with self._lock:
+                self._pending -= 1
+                self._latencies.append(latency)
+
+            try:
+                self.handler(job)
+                with self._lock:
+                    self._counters['processed'] += 1
+            except Exception as e:
+                with self._lock:
+                    self._counters['failed'] += 1
+                LOG.exception(
+                    f"[SIGNAL QUEUE] Job failed for signal "
+                    f"{job.get('signal_id')}: {e}"
+                )
+            finally:
+                jobs.task_done()
+
+    def start(self):
+        """Start worker threads"""
+        if self.running:
+            return
+
+        self.running = True
+        self.threads = []
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                args=(index,),
+                daemon=True,
+                name=f"SignalWorker-{index}"
+            )
+            thread.start()
+            self.threads.append(thread)
+        LOG.info(f"[OK] Signal queue started with {self.workers} worker(s)")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop worker threads (pending jobs stay QUEUED in the database)"""
+        if not self.running:
+            return
+
+        self.running = False
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+        LOG.info("[OK] Signal queue stopped")
+
+    def join(self):
+        """Block until every queued job has been processed"""
+        for q in self.queues:
+            q.join()
+
+    def recover_pending(self) -> int:
+        """
+        Re-enqueue signals that were accepted but never processed
+        (e.g. the process restarted with jobs still in memory)
+
+        Returns:
+            Number of signals re-enqueued
+        """
+        session = SessionLocal()
+        try:
+            pending = session.query(Signal).filter(
+                Signal.status == QUEUED_STATUS
+            ).order_by(Signal.id).all()
+
+            recovered = 0
+            for sig in pending:
+                accepted = self.enqueue({
+                    'signal_id': sig.id,
+                    'event_key': None,
+                    'text': sig.raw,
+                    'action': sig.action,
+                    'symbol': sig.symbol,
+                    'price': float(sig.price) if sig.price is not None else None,
+                })
+                if not accepted:
+                    break
+                recovered += 1
+
+            if recovered:
+                LOG.info(f"[SIGNAL QUEUE] Recovered {recovered} queued signal(s)")
+            return recovered
+        except Exception as e:
+            LOG.error(f"[SIGNAL QUEUE] Failed to recover queued signals: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def get_stats(self) -> Dict:
+        """Queue depth, throughput counters and enqueue-to-execute latency"""
+        with self._lock:
+            counters = dict(self._counters)
+            latencies = sorted(self._latencies)
+
+        def percentile(pct: float) -> Optional[float]:
+            if not latencies:
+                return None
+            idx = min(len(latencies) - 1, int(len(latencies) * pct))
+            return round(latencies[idx] * 1000, 2)
+
+        return {
+            'running': self.running,
+            'workers': self.workers,
+            'depth': self.depth(),
+            'max_depth': self.max_depth,
+            'worker_depths': [q.qsize() for q in self.queues],
+            **counters,
+            'latency_ms': {
+                'p50': percentile(0.50),
+                'p95': percentile(0.95),
+                'p99': percentile(0.99),
+                'max': round(latencies[-1] * 1000, 2) if latencies else None,
+                'samples': len(latencies),
+            }
+        }
+
+
+def is_async_ingest_enabled() -> bool:
+    """Check if webhook signals should be queued instead of processed inline"""
+    return os.getenv('WEBHOOK_ASYNC_INGEST', 'false').lower() == 'true'
+
+
+# Global instance
+_signal_queue = None
+_signal_queue_lock = threading.Lock()
+
+
+def get_signal_queue(handler: Optional[Callable[[Dict], None]] = None) -> SignalQueue:
+    """Get or create the signal queue (workers are started on creation)"""
+    global _signal_queue
+    with _signal_queue_lock:
+        if _signal_queue is None:
+            if handler is None:
+                raise ValueError("handler is required to create the signal queue")
+            LOG.info("Creating new SignalQueue instance...")
+            _signal_queue = SignalQueue(
+                handler,
+                workers=int(os.getenv('WEBHOOK_WORKERS', '4')),
+                max_depth=int(os.getenv('WEBHOOK_QUEUE_SIZE', '1000'))
+            )
+            _signal_queue.start()
+    return _signal_queue
@@ -9,6 +9,7 @@ from datetime import datetime
 
 from src.database.session import SessionLocal
 from src.models.base import AllowedInstrument
+from src.services.http_client import get_http_client
 
 
 LOG = logging.getLogger(__name__)
@@ -51,7 +52,7 @@ class SymbolSyncService:
                 LOG.info(f"[PAGE {page}] Fetching from: {url}")
                 
                 # Make API request
-                response = requests.get(url, timeout=10)
+                response = get_http_client().get(url, timeout=10)
                 response.raise_for_status()
                 
                 data = response.json()
@@ -625,9 +625,9 @@ def forward_to_telegram(text: str, chat_id: str | None = None) -> bool:
     try:
         url = f'https://api.telegram.org/bot{token}/sendMessage'
         payload = {'chat_id': chat, 'text': text}
-        import requests
+        from src.services.http_client import get_http_client
 
-        r = requests.post(url, json=payload, timeout=5)
+        r = get_http_client().post(url, json=payload, timeout=5, endpoint='telegram.sendMessage')
         return r.status_code == 200
     except Exception:
         LOG.exception('forward_to_telegram failed')
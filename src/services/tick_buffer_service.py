@@ -0,0 +1,222 @@
+"""
+Tick Write Buffer Service
+Write-behind buffer for historical_prices ticks: rows are accumulated in
+memory and flushed with one multi-row INSERT per batch instead of one
+transaction per tick. Each flush also moves latest_quotes forward in the
+same transaction
+"""
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, List
+
+from sqlalchemy import insert
+
+from src.database.session import SessionLocal
+from src.models.base import HistoricalPrice
+from src.services.latest_quote_service import upsert_latest_quotes
+from src.services.rolling_stats_service import get_rolling_stats
+
+LOG = logging.getLogger(__name__)
+
+# Columns written from a collected price dict
+TICK_COLUMNS = (
+    'symbol', 'timestamp', 'bid_price', 'ask_price', 'mid_price',
+    'spread', 'spread_pct', 'volume_bid', 'volume_ask'
+)
+
+
+class TickWriteBuffer:
+    """Accumulates ticks and flushes them on a size or time threshold.
+
+    A flush swaps the pending rows out under the lock and writes them in a
+    single transaction on the flusher thread; hitting the size threshold
+    only wakes that thread, so collectors never wait on the database. Rows
+    from a failed flush are put back and retried on the next flush; if the
+    database stays down or falls behind, the oldest rows are dropped once
+    the backlog reaches max_pending.
+    """
+
+    def __init__(
+        self,
+        max_rows: int = 500,
+        flush_interval: float = 2.0,
+        max_pending: int = 50000
+    ):
+        """
+        Initialize tick write buffer
+
+        Args:
+            max_rows: Flush as soon as this many rows are pending
+            flush_interval: Seconds between time-based flushes
+            max_pending: Maximum rows kept in memory; beyond it the oldest
+                are dropped (flushes failing or falling behind)
+        """
+        self.max_rows = max(1, max_rows)
+        self.flush_interval = flush_interval
+        self.max_pending = max(self.max_rows, max_pending)
+        self.running = False
+        self.thread = None
+        self.stop_event = threading.Event()
+        self._wake = threading.Event()
+        self._rows = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stats = {
+            'flushes': 0,
+            'rows_written': 0,
+            'failed_flushes': 0,
+            'dropped': 0,
+            'last_rows': 0,
+            'max_rows': 0,
+            'last_ms': 0.0,
+            'max_ms': 0.0,
+            'total_ms': 0.0,
+        }
+
+    def add(self, price_data: Dict):
+        """Queue one tick for writing (wakes the flusher at the size threshold)"""
+        row = {column: price_data.get(column) for column in TICK_COLUMNS}
+        with self._lock:
+            if len(self._rows) >= self.max_pending:
+                self._rows.popleft()
+                self._stats['dropped'] += 1
+                if self._stats['dropped'] % 1000 == 1:
+                    LOG.warning(
+                        f"[TICK BUFFER] Backlog full, dropping oldest rows "
+                        f"({self._stats['dropped']} dropped so far)"
+                    )
+            self._rows.append(row)
+            pending = len(self._rows)
+
+        if pending >= self.max_rows:
+            if self.running:
+                self._wake.set()
+            else:
+                # No flusher thread to hand the batch to
+                self.flush()
+
+    def pending(self) -> int:
+        """Number of rows waiting to be written"""
+        with self._lock:
+            return len(self._rows)
+
+    def flush(self) -> int:
+        """
+        Write all pending rows in one transaction
+
+        Returns:
+            Number of rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._rows:
+                    return 0
+                rows: List[Dict] = list(self._rows)
+                self._rows.clear()
+
+            started = time.perf_counter()
+            session = SessionLocal()
+            try:
+                session.execute(insert(HistoricalPrice), rows)
+                upsert_latest_quotes(session, rows)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                self._requeue(rows)
+                with self._lock:
+                    self._stats['failed_flushes'] += 1
+                LOG.error(f"[TICK BUFFER] Flush of {len(rows)} row(s) failed: {e}")
+                return 0
+            finally:
+                session.close()
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            try:
+                get_rolling_stats().add_ticks(rows)
+            except Exception as e:
+                LOG.error(f"[TICK BUFFER] Rolling stats update failed: {e}")
+
+            with self._lock:
+                stats = self._stats
+                stats['flushes'] += 1
+                stats['rows_written'] += len(rows)
+                stats['last_rows'] = len(rows)
+                stats['max_rows'] = max(stats['max_rows'], len(rows))
+                stats['last_ms'] = elapsed_ms
+                stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+                stats['total_ms'] += elapsed_ms
+
+            LOG.debug(f"[TICK BUFFER] Flushed {len(rows)} row(s) in {elapsed_ms:.1f}ms")
+            return len(rows)
+
+    def _requeue(self, rows: List[Dict]):
+        """Put rows from a failed flush back in front of newer rows"""
+        with self._lock:
+            self._rows.extendleft(reversed(rows))
+            overflow = len(self._rows) - self.max_pending
+            for _ in range(max(0, overflow)):
+                self._rows.popleft()
+            if overflow > 0:
+                self._stats['dropped'] += overflow
+                LOG.warning(f"[TICK BUFFER] Backlog full, dropped {overflow} oldest row(s)")
+
+    def flush_loop(self):
+        """Flush pending rows once per interval, or as soon as add() signals a full batch"""
+        while not self.stop_event.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self.stop_event.is_set():
+                break
+            if not self.flush() and self.pending() >= self.max_rows:
+                # Failed flush: back off for an interval instead of retrying on every add
+                self.stop_event.wait(self.flush_interval)
+
+    def start(self):
+        """Start time-based flushing"""
+        if self.running:
+            return
+        self.running = True
+        self.stop_event.clear()
+        self.thread = threading.Thread(
+            target=self.flush_loop, daemon=True, name="TickFlusher"
+        )
+        self.thread.start()
+
+    def stop(self):
+        """Stop time-based flushing and write whatever is still pending"""
+        if self.running:
+            self.running = False
+            self.stop_event.set()
+            self._wake.set()
+            if self.thread:
+                self.thread.join(timeout=5)
+        self.flush()
+
+    def get_stats(self) -> Dict:
+        """Rows per flush and flush latency"""
+        with self._lock:
+            stats = dict(self._stats)
+            pending = len(self._rows)
+
+        flushes = stats['flushes']
+        return {
+            'pending': pending,
+            'max_rows': self.max_rows,
+            'flush_interval_seconds': self.flush_interval,
+            'flushes': flushes,
+            'rows_written': stats['rows_written'],
+            'failed_flushes': stats['failed_flushes'],
+            'dropped': stats['dropped'],
+            'rows_per_flush': {
+                'last': stats['last_rows'],
+                'avg': round(stats['rows_written'] / flushes, 2) if flushes else 0,
+                'max': stats['max_rows'],
+            },
+            'flush_ms': {
+                'last': round(stats['last_ms'], 2),
+                'avg': round(stats['total_ms'] / flushes, 2) if flushes else 0,
+                'max': round(stats['max_ms'], 2),
+            },
+        }
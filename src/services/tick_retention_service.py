@@ -0,0 +1,508 @@
+"""
+Tick Retention Service
+Tiered retention for historical_prices: raw ticks are kept for a short
+window, older data survives as per-minute and per-hour summaries, and
+expired rows are deleted (optionally archived) in bounded batches
+"""
+import os
+import csv
+import gzip
+import time
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from src.database.session import SessionLocal
+from src.database.upsert import upsert_rows
+from src.models.base import AllowedInstrument, HistoricalPrice, HistoricalPriceSummary
+from src.services.ohlcv_aggregator_service import bucket_start
+
+LOG = logging.getLogger(__name__)
+
+# Tier names, finest first
+RAW_TIER = 'raw'
+MINUTE_TIER = '1m'
+HOUR_TIER = '1h'
+
+# Longest range answered from each tier before moving to a coarser one
+RAW_MAX_SPAN = timedelta(hours=6)
+MINUTE_MAX_SPAN = timedelta(days=7)
+
+
+def summarize_ticks(ticks: Iterable[Tuple[datetime, Decimal, Decimal]], minutes: int) -> List[Dict]:
+    """Build summaries from (timestamp, mid, spread_pct) ticks ordered by timestamp"""
+    summaries: List[Dict] = []
+    current = None
+    for ts, mid, spread_pct in ticks:
+        start = bucket_start(ts, minutes)
+        if current is None or current['timestamp'] != start:
+            current = {
+                'timestamp': start,
+                'open_mid': mid,
+                'high_mid': mid,
+                'low_mid': mid,
+                'close_mid': mid,
+                'sum_mid': mid,
+                'sum_spread_pct': spread_pct,
+                'min_spread_pct': spread_pct,
+                'max_spread_pct': spread_pct,
+                'tick_count': 1,
+            }
+            summaries.append(current)
+        else:
+            current['high_mid'] = max(current['high_mid'], mid)
+            current['low_mid'] = min(current['low_mid'], mid)
+            current['close_mid'] = mid
+            current['sum_mid'] += mid
+            current['sum_spread_pct'] += spread_pct
+            current['min_spread_pct'] = min(current['min_spread_pct'], spread_pct)
+            current['max_spread_pct'] = max(current['max_spread_pct'], spread_pct)
+            current['tick_count'] += 1
+    return [_finish(summary) for summary in summaries]
+
+
+def merge_summaries(summaries: Iterable[Dict], minutes: int) -> List[Dict]:
+    """Merge finer summaries (ordered by timestamp) into larger buckets"""
+    merged: List[Dict] = []
+    current = None
+    for summary in summaries:
+        start = bucket_start(summary['timestamp'], minutes)
+        count = summary['tick_count']
+        if current is None or current['timestamp'] != start:
+            current = {
+                'timestamp': start,
+                'open_mid': summary['open_mid'],
+                'high_mid': summary['high_mid'],
+                'low_mid': summary['low_mid'],
+                'close_mid': summary['close_mid'],
+                'sum_mid': summary['avg_mid'] * count,
+                'sum_spread_pct': summary['avg_spread_pct'] * count,
+                'min_spread_pct': summary['min_spread_pct'],
+                'max_spread_pct': summary['max_spread_pct'],
+                'tick_count': count,
+            }
+            merged.append(current)
+        else:
+            current['high_mid'] = max(current['high_mid'], summary['high_mid'])
+            current['low_mid'] = min(current['low_mid'], summary['low_mid'])
+            current['close_mid'] = summary['close_mid']
+            current['sum_mid'] += summary['avg_mid'] * count
+            current['sum_spread_pct'] += summary['avg_spread_pct'] * count
+            current['min_spread_pct'] = min(current['min_spread_pct'], summary['min_spread_pct'])
+            current['max_spread_pct'] = max(current['max_spread_pct'], summary['max_spread_pct'])
+            current['tick_count'] += count
+    return [_finish(summary) for summary in merged]
+
+
+def _finish(summary: Dict) -> Dict:
+    """Turn running sums into averages"""
+    count = summary['tick_count']
+    summary['avg_mid'] = summary.pop('sum_mid') / count
+    summary['avg_spread_pct'] = summary.pop('sum_spread_pct') / count
+    return summary
+
+
+def _utc_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class TickRetention:
+    """Downsamples and expires tick data per symbol.
+
+    Summaries are only written for complete buckets, and raw ticks (or
+    minute summaries) are only deleted once the bucket holding them has
+    been summarized, so no range is ever left without a tier covering it.
+    """
+
+    def __init__(
+        self,
+        raw_retention_hours: int = 48,
+        minute_retention_days: int = 30,
+        batch_size: int = 5000,
+        interval_seconds: int = 60,
+        archive_dir: Optional[str] = None,
+        settle_seconds: float = 12
+    ):
+        """
+        Initialize tick retention
+
+        Args:
+            raw_retention_hours: Hours raw ticks are kept
+            minute_retention_days: Days per-minute summaries are kept
+                (per-hour summaries are kept indefinitely)
+            batch_size: Rows deleted per transaction
+            interval_seconds: Seconds between retention runs
+            archive_dir: If set, raw ticks are appended to gzipped daily
+                CSV files here before they are deleted
+            settle_seconds: How long after a bucket ends its ticks may
+                still be arriving (tick buffer flush interval plus grace);
+                a bucket is only summarized once this has passed
+        """
+        self.raw_retention = timedelta(hours=raw_retention_hours)
+        self.minute_retention = timedelta(days=minute_retention_days)
+        self.batch_size = max(1, batch_size)
+        self.interval_seconds = interval_seconds
+        self.archive_dir = archive_dir
+        self.settle = timedelta(seconds=settle_seconds)
+        self.running = False
+        self.thread = None
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {
+            'runs': 0,
+            'failed_runs': 0,
+            'minute_summaries': 0,
+            'hour_summaries': 0,
+            'raw_deleted': 0,
+            'raw_archived': 0,
+            'minute_deleted': 0,
+            'last_run_ms': 0.0,
+            'last_run_at': None,
+        }
+
+    def select_tier(
+        self,
+        start: Optional[datetime],
+        end: Optional[datetime] = None,
+        now: Optional[datetime] = None
+    ) -> str:
+        """
+        Pick the finest tier that still holds the whole range and keeps
+        the row count reasonable
+
+        Args:
+            start: Range start (None means "latest rows", always raw)
+            end: Range end (defaults to now)
+        """
+        if start is None:
+            return RAW_TIER
+
+        now = now or datetime.utcnow()
+        start = _utc_naive(start)
+        end = _utc_naive(end or now)
+        span = end - start
+
+        if start >= now - self.raw_retention and span <= RAW_MAX_SPAN:
+            return RAW_TIER
+        if start >= now - self.minute_retention and span <= MINUTE_MAX_SPAN:
+            return MINUTE_TIER
+        return HOUR_TIER
+
+    def _watermark(self, session, symbol: str, resolution: str) -> Optional[datetime]:
+        """Start of the newest summary bucket for a resolution"""
+        return session.query(func.max(HistoricalPriceSummary.timestamp)).filter(
+            HistoricalPriceSummary.symbol == symbol,
+            HistoricalPriceSummary.resolution == resolution
+        ).scalar()
+
+    def _upsert(self, session, symbol: str, resolution: str, summaries: List[Dict]):
+        """Insert-or-update summaries (re-running a bucket is harmless)"""
+        if not summaries:
+            return
+
+        rows = [dict(summary, symbol=symbol, resolution=resolution) for summary in summaries]
+        upsert_rows(
+            session, HistoricalPriceSummary, rows, ['symbol', 'resolution', 'timestamp'],
+            set_=lambda excluded: {
+                column: excluded[column]
+                for column in rows[0]
+                if column not in ('symbol', 'resolution', 'timestamp')
+            }
+        )
+        session.commit()
+
+    def downsample_symbol(self, symbol: str, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Summarize complete minutes from raw ticks and complete hours from
+        minute summaries
+
+        A bucket counts as complete once `settle` has passed since it
+        ended, so ticks still held by the write-behind buffer land before
+        it is summarized (the next run starts after the last summary).
+
+        Returns:
+            Number of summaries written per resolution
+        """
+        now = now or datetime.utcnow()
+        settled = now - self.settle
+        session = SessionLocal()
+        try:
+            # Minute summaries from raw ticks newer than the last summarized minute
+            minute_end = bucket_start(settled, 1)
+            last_minute = self._watermark(session, symbol, MINUTE_TIER)
+            query = session.query(
+                HistoricalPrice.timestamp,
+                HistoricalPrice.mid_price,
+                HistoricalPrice.spread_pct
+            ).filter(
+                HistoricalPrice.symbol == symbol,
+                HistoricalPrice.timestamp < minute_end
+            )
+            if last_minute is not None:
+                query = query.filter(
+                    HistoricalPrice.timestamp >= last_minute.replace(tzinfo=None) + timedelta(minutes=1)
+                )
+            minutes = summarize_ticks(
+                (tuple(row) for row in query.order_by(HistoricalPrice.timestamp).yield_per(5000)),
+                1
+            )
+            self._upsert(session, symbol, MINUTE_TIER, minutes)
+
+            # Hour summaries from minute summaries newer than the last summarized hour
+            hour_end = bucket_start(settled, 60)
+            last_hour = self._watermark(session, symbol, HOUR_TIER)
+            query = session.query(HistoricalPriceSummary).filter(
+                HistoricalPriceSummary.symbol == symbol,
+                HistoricalPriceSummary.resolution == MINUTE_TIER,
+                HistoricalPriceSummary.timestamp < hour_end
+            )
+            if last_hour is not None:
+                query = query.filter(
+                    HistoricalPriceSummary.timestamp >= last_hour.replace(tzinfo=None) + timedelta(hours=1)
+                )
+            hours = merge_summaries(
+                (
+                    {
+                        'timestamp': row.timestamp,
+                        'open_mid': row.open_mid,
+                        'high_mid': row.high_mid,
+                        'low_mid': row.low_mid,
+                        'close_mid': row.close_mid,
+                        'avg_mid': row.avg_mid,
+                        'avg_spread_pct': row.avg_spread_pct,
+                        'min_spread_pct': row.min_spread_pct,
+                        'max_spread_pct': row.max_spread_pct,
+                        'tick_count': row.tick_count,
+                    }
+                    for row in query.order_by(HistoricalPriceSummary.timestamp).yield_per(5000)
+                ),
+                60
+            )
+            self._upsert(session, symbol, HOUR_TIER, hours)
+
+            return {MINUTE_TIER: len(minutes), HOUR_TIER: len(hours)}
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _archive(self, rows: List[HistoricalPrice]):
+        """Append raw ticks to gzipped daily CSV files"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        by_day = defaultdict(list)
+        for row in rows:
+            by_day[row.timestamp.strftime('%Y%m%d')].append(row)
+
+        for day, day_rows in by_day.items():
+            path = os.path.join(self.archive_dir, f"historical_prices_{day}.csv.gz")
+            with gzip.open(path, 'at', newline='') as fh:
+                writer = csv.writer(fh)
+                for row in day_rows:
+                    writer.writerow([
+                        row.symbol, row.timestamp.isoformat(), row.bid_price,
+                        row.ask_price, row.mid_price, row.spread, row.spread_pct,
+                        row.volume_bid, row.volume_ask
+                    ])
+
+    def _expire_raw(self, session, symbol: str, cutoff: datetime) -> int:
+        """Delete (and optionally archive) raw ticks older than cutoff in batches"""
+        total = 0
+        while True:
+            if self.archive_dir:
+                rows = session.query(HistoricalPrice).filter(
+                    HistoricalPrice.symbol == symbol,
+                    HistoricalPrice.timestamp < cutoff
+                ).order_by(HistoricalPrice.timestamp).limit(self.batch_size).all()
+                ids = [row.id for row in rows]
+                if rows:
+                    self._archive(rows)
+                    with self._lock:
+                        self._stats['raw_archived'] += len(rows)
+            else:
+                ids = [
+                    row[0] for row in session.query(HistoricalPrice.id).filter(
+                        HistoricalPrice.symbol == symbol,
+                        HistoricalPrice.timestamp < cutoff
+                    ).limit(self.batch_size).all()
+                ]
+            if not ids:
+                break
+
+            session.query(HistoricalPrice).filter(
+                HistoricalPrice.id.in_(ids)
+            ).delete(synchronize_session=False)
+            session.commit()
+            total += len(ids)
+
+            if len(ids) < self.batch_size:
+                break
+        return total
+
+    def _expire_minutes(self, session, symbol: str, cutoff: datetime) -> int:
+        """Delete minute summaries older than cutoff in batches"""
+        total = 0
+        while True:
+            ids = [
+                row[0] for row in session.query(HistoricalPriceSummary.id).filter(
+                    HistoricalPriceSummary.symbol == symbol,
+                    HistoricalPriceSummary.resolution == MINUTE_TIER,
+                    HistoricalPriceSummary.timestamp < cutoff
+                ).limit(self.batch_size).all()
+            ]
+            if not ids:
+                break
+
+            session.query(HistoricalPriceSummary).filter(
+                HistoricalPriceSummary.id.in_(ids)
+            ).delete(synchronize_session=False)
+            session.commit()
+            total += len(ids)
+
+            if len(ids) < self.batch_size:
+                break
+        return total
+
+    def expire_symbol(self, symbol: str, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Delete raw ticks and minute summaries past their retention window,
+        never past what the next tier already covers
+
+        Returns:
+            Number of rows deleted per tier
+        """
+        now = now or datetime.utcnow()
+        session = SessionLocal()
+        try:
+            deleted = {RAW_TIER: 0, MINUTE_TIER: 0}
+
+            last_minute = self._watermark(session, symbol, MINUTE_TIER)
+            if last_minute is not None:
+                covered = last_minute.replace(tzinfo=None) + timedelta(minutes=1)
+                cutoff = min(now - self.raw_retention, covered)
+                deleted[RAW_TIER] = self._expire_raw(session, symbol, cutoff)
+
+            last_hour = self._watermark(session, symbol, HOUR_TIER)
+            if last_hour is not None:
+                covered = last_hour.replace(tzinfo=None) + timedelta(hours=1)
+                cutoff = min(now - self.minute_retention, covered)
+                deleted[MINUTE_TIER] = self._expire_minutes(session, symbol, cutoff)
+
+            return deleted
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def get_symbols(self) -> List[str]:
+        """Symbols that have (or had) tick data collected"""
+        session = SessionLocal()
+        try:
+            return [
+                row.symbol for row in session.query(AllowedInstrument.symbol).all()
+            ]
+        finally:
+            session.close()
+
+    def run_once(self, symbols: Optional[List[str]] = None, now: Optional[datetime] = None) -> Dict:
+        """Downsample then expire every symbol once"""
+        started = time.perf_counter()
+        results = {}
+        failed = False
+        for symbol in symbols if symbols is not None else self.get_symbols():
+            try:
+                written = self.downsample_symbol(symbol, now)
+                deleted = self.expire_symbol(symbol, now)
+                results[symbol] = {'summarized': written, 'deleted': deleted}
+            except Exception as e:
+                failed = True
+                LOG.error(f"[TICK RETENTION] Failed for {symbol}: {e}")
+                continue
+
+            with self._lock:
+                self._stats['minute_summaries'] += written[MINUTE_TIER]
+                self._stats['hour_summaries'] += written[HOUR_TIER]
+                self._stats['raw_deleted'] += deleted[RAW_TIER]
+                self._stats['minute_deleted'] += deleted[MINUTE_TIER]
+
+            if deleted[RAW_TIER] or deleted[MINUTE_TIER]:
+                LOG.info(
+                    f"[TICK RETENTION] {symbol}: deleted {deleted[RAW_TIER]} raw tick(s), "
+                    f"{deleted[MINUTE_TIER]} minute summary row(s)"
+                )
+
+        with self._lock:
+            self._stats['runs'] += 1
+            self._stats['failed_runs'] += int(failed)
+            self._stats['last_run_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            self._stats['last_run_at'] = datetime.utcnow().isoformat()
+        return results
+
+    def retention_loop(self):
+        """Run once per interval until stopped"""
+        LOG.info("[TICK RETENTION] Started")
+        while not self.stop_event.is_set():
+            self.run_once()
+            self.stop_event.wait(self.interval_seconds)
+        LOG.info("[TICK RETENTION] Stopped")
+
+    def start(self):
+        """Start retention thread"""
+        if self.running:
+            LOG.warning("[TICK RETENTION] Already running")
+            return
+        self.running = True
+        self.stop_event.clear()
+        self.thread = threading.Thread(
+            target=self.retention_loop, daemon=True, name="TickRetention"
+        )
+        self.thread.start()
+
+    def stop(self):
+        """Stop retention thread"""
+        if not self.running:
+            return
+        self.running = False
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def get_stats(self) -> Dict:
+        """Retention windows and downsample/delete counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['running'] = self.running
+        stats['raw_retention_hours'] = self.raw_retention.total_seconds() / 3600
+        stats['minute_retention_days'] = self.minute_retention.days
+        stats['archive_dir'] = self.archive_dir
+        return stats
+
+
+# Global instance
+_tick_retention: Optional[TickRetention] = None
+
+
+def get_tick_retention() -> TickRetention:
+    """Get or create the tick retention job"""
+    global _tick_retention
+    if _tick_retention is None:
+        _tick_retention = TickRetention(
+            raw_retention_hours=int(os.getenv('TICK_RAW_RETENTION_HOURS', '48')),
+            minute_retention_days=int(os.getenv('TICK_MINUTE_RETENTION_DAYS', '30')),
+            batch_size=int(os.getenv('TICK_RETENTION_BATCH_SIZE', '5000')),
+            interval_seconds=int(os.getenv('TICK_RETENTION_INTERVAL', '60')),
+            archive_dir=os.getenv('TICK_ARCHIVE_DIR') or None,
+            settle_seconds=(
+                float(os.getenv('TICK_FLUSH_INTERVAL', '2'))
+                + float(os.getenv('TICK_SUMMARY_GRACE_SECONDS', '10'))
+            )
+        )
+    return _tick_retention
@@ -0,0 +1,192 @@
+"""
+Trade Analytics Service
+Columnar trade breakdowns (hour, weekday, side, symbol, hold time,
+streaks) computed with NumPy group-bys over arrays fetched in one query
+"""
+import calendar
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import Float, cast, func, select
+
+from src.models.base import Trade
+
+LOG = logging.getLogger(__name__)
+
+# Hold-time buckets for closed trades: (upper bound in seconds, label)
+HOLD_BUCKETS = (
+    (5 * 60, '<5m'),
+    (15 * 60, '5-15m'),
+    (60 * 60, '15m-1h'),
+    (4 * 3600, '1-4h'),
+    (24 * 3600, '4-24h'),
+    (np.inf, '>1d'),
+)
+
+_WEEKDAYS = list(calendar.day_name)  # Monday first
+
+
+def _epoch_seconds(dialect: str, column):
+    """Timestamp column as float seconds since the epoch, computed in SQL"""
+    if dialect == 'postgresql':
+        return cast(func.extract('epoch', column), Float)
+    # julianday() is a double; rounding to the millisecond removes its
+    # representation error so values on an hour boundary stay on it
+    return cast(func.round((func.julianday(column) - 2440587.5) * 86400.0, 3), Float)
+
+
+class TradeFrame:
+    """Trades as parallel NumPy arrays (one element per trade).
+
+    Timestamps are epoch seconds and missing values are NaN; symbols and
+    actions are integer codes into `symbols` / `actions`.
+    """
+
+    def __init__(
+        self,
+        symbols: Sequence,
+        actions: Sequence,
+        statuses: Sequence,
+        open_ts: Sequence,
+        close_ts: Sequence,
+        pnl: Sequence
+    ):
+        self.symbols, self.symbol_codes = np.unique(
+            np.asarray(symbols, dtype=object).astype(str), return_inverse=True
+        )
+        self.actions, self.action_codes = np.unique(
+            np.asarray(actions, dtype=object).astype(str), return_inverse=True
+        )
+        self.closed = np.asarray(statuses, dtype=object) == 'CLOSED'
+        self.open_ts = np.asarray(open_ts, dtype=np.float64)
+        self.close_ts = np.asarray(close_ts, dtype=np.float64)
+        pnl = np.asarray(pnl, dtype=np.float64)
+        self.has_pnl = ~np.isnan(pnl)
+        self.pnl = np.where(self.has_pnl, pnl, 0.0)
+
+    def __len__(self):
+        return len(self.pnl)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence]) -> 'TradeFrame':
+        """Build from (symbol, action, status, open_ts, close_ts, pnl) rows"""
+        if not rows:
+            return cls([], [], [], [], [], [])
+        return cls(*zip(*rows))
+
+
+def load_trade_frame(session, since: datetime) -> TradeFrame:
+    """Fetch trades opened since `since` as columns (no ORM objects)"""
+    dialect = session.get_bind().dialect.name
+    rows = session.execute(
+        select(
+            Trade.symbol,
+            Trade.action,
+            Trade.status,
+            _epoch_seconds(dialect, Trade.open_time),
+            _epoch_seconds(dialect, Trade.close_time),
+            cast(Trade.profit_loss, Float),
+        ).where(Trade.open_time >= since)
+    ).all()
+    return TradeFrame.from_rows(rows)
+
+
+def group_performance(codes: np.ndarray, pnl: np.ndarray, size: int) -> Dict[str, np.ndarray]:
+    """count / wins / total_pnl / win_rate per group code (0..size-1)"""
+    count = np.bincount(codes, minlength=size)
+    wins = np.bincount(codes, weights=pnl > 0, minlength=size).astype(np.int64)
+    total = np.bincount(codes, weights=pnl, minlength=size)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_rate = np.where(count > 0, wins / count * 100, 0.0)
+    return {'count': count, 'wins': wins, 'total_pnl': total, 'win_rate': win_rate}
+
+
+def _as_dict(groups: Dict[str, np.ndarray], labels: Sequence) -> Dict:
+    """Groups with at least one trade, keyed by label"""
+    return {
+        label: {
+            'count': int(groups['count'][i]),
+            'wins': int(groups['wins'][i]),
+            'total_pnl': float(groups['total_pnl'][i]),
+            'win_rate': float(groups['win_rate'][i]),
+        }
+        for i, label in enumerate(labels)
+        if groups['count'][i]
+    }
+
+
+def by_hour(frame: TradeFrame) -> Dict[int, Dict]:
+    valid = ~np.isnan(frame.open_ts)
+    hours = (np.floor(frame.open_ts[valid] / 3600) % 24).astype(np.int64)
+    return _as_dict(group_performance(hours, frame.pnl[valid], 24), range(24))
+
+
+def by_weekday(frame: TradeFrame) -> Dict[str, Dict]:
+    valid = ~np.isnan(frame.open_ts)
+    # 1970-01-01 was a Thursday (index 3, Monday first)
+    days = ((np.floor(frame.open_ts[valid] / 86400) + 3) % 7).astype(np.int64)
+    return _as_dict(group_performance(days, frame.pnl[valid], 7), _WEEKDAYS)
+
+
+def by_action(frame: TradeFrame) -> Dict[str, Dict]:
+    groups = group_performance(frame.action_codes, frame.pnl, len(frame.actions))
+    return _as_dict(groups, frame.actions.tolist())
+
+
+def by_symbol(frame: TradeFrame) -> Dict[str, Dict]:
+    groups = group_performance(frame.symbol_codes, frame.pnl, len(frame.symbols))
+    return _as_dict(groups, frame.symbols.tolist())
+
+
+def by_hold_time(frame: TradeFrame) -> Dict[str, Dict]:
+    """Closed trades bucketed by how long they were held"""
+    valid = frame.closed & ~np.isnan(frame.open_ts) & ~np.isnan(frame.close_ts)
+    held = frame.close_ts[valid] - frame.open_ts[valid]
+    edges = np.array([upper for upper, _ in HOLD_BUCKETS[:-1]])
+    buckets = np.searchsorted(edges, held, side='right')
+    labels = [label for _, label in HOLD_BUCKETS]
+    return _as_dict(group_performance(buckets, frame.pnl[valid], len(labels)), labels)
+
+
+def streaks(frame: TradeFrame) -> Dict:
+    """
+    Longest and current win/loss streaks over closed trades in close order
+
+    A trade with zero or missing P&L ends any streak.
+    """
+    closed = frame.closed & frame.has_pnl & ~np.isnan(frame.close_ts)
+    order = np.argsort(frame.close_ts[closed], kind='stable')
+    outcome = np.sign(frame.pnl[closed][order]).astype(np.int64)
+    result = {'longest_win': 0, 'longest_loss': 0, 'current': 0, 'current_type': None}
+    if not len(outcome):
+        return result
+
+    # Run-length encode the win (+1) / loss (-1) / flat (0) sequence
+    starts = np.flatnonzero(np.r_[True, outcome[1:] != outcome[:-1]])
+    lengths = np.diff(np.r_[starts, len(outcome)])
+    values = outcome[starts]
+
+    wins, losses = lengths[values > 0], lengths[values < 0]
+    result['longest_win'] = int(wins.max()) if len(wins) else 0
+    result['longest_loss'] = int(losses.max()) if len(losses) else 0
+    if values[-1]:
+        result['current'] = int(lengths[-1])
+        result['current_type'] = 'win' if values[-1] > 0 else 'loss'
+    return result
+
+
+def trading_flows(frame: TradeFrame, days: Optional[int] = None) -> Dict:
+    """Every breakdown served by /api/performance/flows"""
+    return {
+        'period_days': days,
+        'total_trades_analyzed': len(frame),
+        'by_hour': by_hour(frame),
+        'by_day': by_weekday(frame),
+        'by_action': by_action(frame),
+        'by_symbol': by_symbol(frame),
+        'by_hold_time': by_hold_time(frame),
+        'streaks': streaks(frame),
+    }
+
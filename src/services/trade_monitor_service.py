@@ -1,34 +1,71 @@
 """
 Trade Monitor - Continuously monitors open trades for risk management
 Runs in background to check SL, trailing stops, and emergency exits
+
+Two modes:
+- poll: every check_interval, fetch prices for all open trades and check them
+- event: check a symbol's open positions whenever a price update for it is
+  published (collector, cache refresh or streaming feed)
 """
+import os
 import time
 import logging
+from collections import deque
 from decimal import Decimal
-from threading import Thread, Event
-from typing import Dict
+from threading import Thread, Event, Lock
+from typing import Dict, Optional
 from sqlalchemy import select
 from src.services.risk_management_service import get_risk_manager
 from src.services.delta_exchange_service import get_delta_trader
+from src.services.market_data_service import get_market_data_cache
+from src.services.event_bus import PRICE_UPDATED, TRADE_TOPICS, get_event_bus
+from src.services.trigger_book_service import TriggerBook
 from src.database.session import SessionLocal
 from src.models.base import Trade
 
 LOG = logging.getLogger(__name__)
 
+MONITOR_MODES = ('poll', 'event')
+
 
 class TradeMonitor:
     """Background service to monitor trades and enforce risk rules"""
     
-    def __init__(self, check_interval: int = 5):
+    # Event mode: seconds between full reloads of the position index, which
+    # catch trades changed by bulk updates that publish no trade events
+    resync_interval = 60
+    
+    def __init__(self, check_interval: int = 5, mode: str = 'poll', risk_manager=None):
         self.check_interval = check_interval  # seconds
+        self.mode = mode
         self.running = False
         self.thread = None
         self.stop_event = Event()
-        self.risk_manager = get_risk_manager()
+        self.risk_manager = risk_manager if risk_manager is not None else get_risk_manager()
         self.delta_trader = get_delta_trader()
+        self.market_data = get_market_data_cache()
+        
+        # Event mode state: open positions filed by exit level, and the
+        # latest unprocessed price per symbol
+        self.position_index = TriggerBook(self.risk_manager)
+        self._pending: Dict[str, tuple] = {}
+        self._wake = Event()
+        self._lock = Lock()
+        self._close_latencies = deque(maxlen=1000)
+        self._stats = {
+            'ticks_received': 0,
+            'ticks_ignored': 0,
+            'ticks_coalesced': 0,
+            'ticks_evaluated': 0,
+            'positions_checked': 0,
+            'positions_skipped': 0,
+            'trades_closed': 0,
+            'check_errors': 0,
+        }
         
         LOG.info("=" * 80)
         LOG.info("[CHART] Trade Monitor Initialized")
+        LOG.info(f"Mode: {mode}")
         LOG.info(f"Check interval: {check_interval} seconds")
         LOG.info("=" * 80)
     
@@ -56,67 +93,70 @@ class TradeMonitor:
             LOG.info(f"Fetching real-time prices for {len(symbols)} symbol(s)")
             
             for symbol in symbols:
-                try:
-                    LOG.debug(f"Fetching orderbook for {symbol}...")
-                    # Get orderbook for current price
-                    orderbook = self.delta_trader.client.get_orderbook(symbol)
-                    
-                    if orderbook.get('success'):
-                        result = orderbook.get('result', {})
-                        buy_orders = result.get('buy', [])
-                        sell_orders = result.get('sell', [])
-                        
-                        if buy_orders and sell_orders:
-                            best_bid = Decimal(
-                                str(buy_orders[0].get('price', 0))
-                            )
-                            best_ask = Decimal(
-                                str(sell_orders[0].get('price', 0))
-                            )
-                            
-                            # Validate prices are not zero
-                            if best_bid <= 0 or best_ask <= 0:
-                                LOG.error(
-                                    f"[X] {symbol}: Invalid price - "
-                                    f"Bid=${best_bid}, Ask=${best_ask}"
-                                )
-                                continue
-                            
-                            mid_price = (best_bid + best_ask) / 2
-                            
-                            prices[symbol] = mid_price
-                            LOG.info(
-                                f"[OK] {symbol}: ${mid_price:,.2f} "
-                                f"(Bid: ${best_bid:,.2f}, "
-                                f"Ask: ${best_ask:,.2f})"
-                            )
-                        else:
-                            LOG.warning(
-                                f"[WARN] No orderbook data for {symbol}"
-                            )
-                    else:
-                        error = orderbook.get('error', {})
-                        error_code = error.get('code', 'unknown')
-                        
-                        # Log IP whitelist error prominently
-                        if error_code == 'ip_not_whitelisted_for_api_key':
-                            LOG.error(
-                                f"[X] {symbol}: IP NOT WHITELISTED - "
-                                f"Add your IP at Delta Exchange API settings"
-                            )
-                        else:
-                            LOG.error(
-                                f"[X] Failed to get orderbook for "
-                                f"{symbol}: {error}"
-                            )
-                        
-                except Exception as e:
-                    LOG.exception(
-                        f"[X] Exception fetching price for {symbol}: {e}"
+                # Shared cache: reuses a quote the collector or webhook
+                # verification fetched within the staleness budget
+                quote = self.market_data.get_quote(symbol)
+                if quote is None:
+                    LOG.error(
+                        f"[X] Failed to get price for {symbol}: "
+                        f"{self.market_data.last_error(symbol)}"
                     )
+                    continue
+                
+                prices[symbol] = quote['mid']
+                LOG.info(
+                    f"[OK] {symbol}: ${quote['mid']:,.2f} "
+                    f"(Bid: ${quote['bid']:,.2f}, "
+                    f"Ask: ${quote['ask']:,.2f})"
+                )
         
         return prices
     
+    def close_position(self, db, trade_info: Dict, idx: int = 1, total: int = 1):
+        """Close a trade that hit a risk limit and place the closing order"""
+        trade = trade_info['trade']
+        current_price = trade_info['current_price']
+        reason = trade_info['reason']
+        exit_type = trade_info['exit_type']
+        pnl_pct = trade_info['pnl_pct']
+        pnl_value = trade_info['pnl_value']
+        
+        LOG.warning(f"\n[{idx}/{total}] Closing {trade.symbol} {trade.action}")
+        LOG.warning(f"Entry: ${trade.open_price:,.2f}")
+        LOG.warning(f"Exit: ${current_price:,.2f}")
+        LOG.warning(f"P&L: {pnl_pct:.2f}% (${pnl_value:,.2f})")
+        LOG.warning(f"Reason: {exit_type}")
+        
+        # Close in database
+        self.risk_manager.close_trade(trade, current_price, reason, exit_type, db)
+        
+        # Place closing order on Delta Exchange
+        if self.delta_trader.enabled:
+            opposite_side = 'sell' if trade.action.upper() == 'BUY' else 'buy'
+            
+            LOG.info(
+                f"📤 Placing closing order: "
+                f"{opposite_side.upper()} "
+                f"{trade.symbol} @ ${current_price:,.2f}"
+            )
+            
+            order_result = self.delta_trader.place_order(
+                symbol=trade.symbol,
+                side=opposite_side,
+                price=float(current_price),
+                size=1
+            )
+            
+            if order_result.get('success'):
+                LOG.info(f"[OK] Closing order placed successfully")
+                LOG.info(f"   Order ID: {order_result.get('order_id')}")
+                LOG.info(f"   Status: {order_result.get('status')}")
+            else:
+                LOG.error(f"[X] Failed to place closing order")
+                LOG.error(f"   Error: {order_result.get('message')}")
+        else:
+            LOG.info("[INFO]  Delta Exchange trading disabled, trade closed in DB only")
+    
     def monitor_loop(self):
         """Main monitoring loop"""
         LOG.info("=" * 80)
@@ -158,70 +198,9 @@ class TradeMonitor:
                         
                         with SessionLocal() as db:
                             for idx, trade_info in enumerate(trades_to_close, 1):
-                                trade = trade_info['trade']
-                                current_price = trade_info['current_price']
-                                reason = trade_info['reason']
-                                exit_type = trade_info['exit_type']
-                                pnl_pct = trade_info['pnl_pct']
-                                pnl_value = trade_info['pnl_value']
-                                
-                                LOG.warning(f"\n[{idx}/{len(trades_to_close)}] "
-                                          f"Closing {trade.symbol} {trade.action}")
-                                LOG.warning(f"Entry: ${trade.open_price:,.2f}")
-                                LOG.warning(f"Exit: ${current_price:,.2f}")
-                                LOG.warning(f"P&L: {pnl_pct:.2f}% "
-                                          f"(${pnl_value:,.2f})")
-                                LOG.warning(f"Reason: {exit_type}")
-                                
-                                # Close in database
-                                self.risk_manager.close_trade(
-                                    trade, current_price, reason, 
-                                    exit_type, db
+                                self.close_position(
+                                    db, trade_info, idx, len(trades_to_close)
                                 )
-                                
-                                # Place closing order on Delta Exchange
-                                if self.delta_trader.enabled:
-                                    opposite_side = (
-                                        'sell' if trade.action.upper() == 'BUY' 
-                                        else 'buy'
-                                    )
-                                    
-                                    LOG.info(
-                                        f"📤 Placing closing order: "
-                                        f"{opposite_side.upper()} "
-                                        f"{trade.symbol} @ ${current_price:,.2f}"
-                                    )
-                                    
-                                    order_result = self.delta_trader.place_order(
-                                        symbol=trade.symbol,
-                                        side=opposite_side,
-                                        price=float(current_price),
-                                        size=1
-                                    )
-                                    
-                                    if order_result.get('success'):
-                                        order_id = order_result.get('order_id')
-                                        LOG.info(
-                                            f"[OK] Closing order placed successfully"
-                                        )
-                                        LOG.info(f"   Order ID: {order_id}")
-                                        LOG.info(
-                                            f"   Status: "
-                                            f"{order_result.get('status')}"
-                                        )
-                                    else:
-                                        LOG.error(
-                                            f"[X] Failed to place closing order"
-                                        )
-                                        LOG.error(
-                                            f"   Error: "
-                                            f"{order_result.get('message')}"
-                                        )
-                                else:
-                                    LOG.info(
-                                        "[INFO]  Delta Exchange trading disabled, "
-                                        "trade closed in DB only"
-                                    )
                         
                         LOG.info("=" * 80)
                         LOG.info(
@@ -247,16 +226,163 @@ class TradeMonitor:
         LOG.info("[STOPPED] TRADE MONITOR STOPPED")
         LOG.info("=" * 80)
     
+    def on_price_update(self, topic: str, payload: Dict):
+        """Event bus handler: queue the latest price of a symbol for checking"""
+        symbol = payload.get('symbol')
+        price = payload.get('mid')
+        if not symbol or not price:
+            return
+        received_at = payload.get('received_at') or time.perf_counter()
+        
+        with self._lock:
+            self._stats['ticks_received'] += 1
+            if not self.position_index.has_symbol(symbol):
+                self._stats['ticks_ignored'] += 1
+                return
+            if symbol in self._pending:
+                # Only the newest price matters; the older tick is superseded
+                self._stats['ticks_coalesced'] += 1
+            self._pending[symbol] = (price, received_at)
+        self._wake.set()
+    
+    def request_quotes(self):
+        """Refresh quotes of symbols with open positions
+        
+        Used when no price update arrived for a whole check interval (e.g.
+        the collector is not running); refreshed quotes come back through
+        on_price_update.
+        """
+        for symbol in self.position_index.symbols():
+            if self.stop_event.is_set():
+                return
+            self.market_data.get_quote(symbol)
+    
+    def check_symbol(self, symbol: str, price: Decimal, received_at: float) -> int:
+        """
+        Check the positions whose exit levels a price update reached and
+        close those that hit a risk limit
+        
+        Args:
+            symbol: Trading symbol
+            price: Mid price from the update
+            received_at: time.perf_counter() when the update was received
+            
+        Returns:
+            Number of trades closed
+        """
+        candidates = self.position_index.triggered(symbol, price)
+        indexed = self.position_index.count(symbol)
+        with self._lock:
+            self._stats['ticks_evaluated'] += 1
+            self._stats['positions_checked'] += len(candidates)
+            self._stats['positions_skipped'] += indexed - len(candidates)
+        if not candidates:
+            return 0
+        
+        with SessionLocal() as db:
+            trades_to_close = self.risk_manager.check_positions(
+                db, candidates, {symbol: price}
+            )
+            for idx, trade_info in enumerate(trades_to_close, 1):
+                self.close_position(db, trade_info, idx, len(trades_to_close))
+                latency = time.perf_counter() - received_at
+                with self._lock:
+                    self._close_latencies.append(latency)
+                    self._stats['trades_closed'] += 1
+                LOG.info(
+                    f"[MONITOR] {symbol} trade {trade_info['trade'].id} closed "
+                    f"{latency * 1000:.1f}ms after the price update"
+                )
+        
+        # Checking moves trailing marks; closed trades already left the book
+        self.position_index.reprice(candidates)
+        return len(trades_to_close)
+    
+    def event_loop(self):
+        """Event-driven monitoring: check positions as price updates arrive"""
+        LOG.info("=" * 80)
+        LOG.info("[START] TRADE MONITOR STARTED (event-driven)")
+        LOG.info("=" * 80)
+        
+        bus = get_event_bus()
+        for topic in TRADE_TOPICS:
+            bus.subscribe(topic, self.position_index.on_trade_event)
+        bus.subscribe(PRICE_UPDATED, self.on_price_update)
+        
+        last_resync = 0.0
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    if time.monotonic() - last_resync >= self.resync_interval:
+                        count = self.position_index.load()
+                        last_resync = time.monotonic()
+                        LOG.info(f"[MONITOR] Indexed {count} open position(s)")
+                    
+                    if not self._wake.wait(self.check_interval):
+                        self.request_quotes()
+                        continue
+                    self._wake.clear()
+                    
+                    with self._lock:
+                        pending, self._pending = self._pending, {}
+                    for symbol, (price, received_at) in pending.items():
+                        if self.stop_event.is_set():
+                            break
+                        try:
+                            self.check_symbol(symbol, price, received_at)
+                        except Exception as e:
+                            with self._lock:
+                                self._stats['check_errors'] += 1
+                            LOG.exception(f"[MONITOR] Error checking {symbol}: {e}")
+                
+                except Exception as e:
+                    LOG.exception(f"Error in monitor loop: {e}")
+                    LOG.info(f"Continuing after error...")
+                    self.stop_event.wait(self.check_interval)
+        finally:
+            bus.unsubscribe(PRICE_UPDATED, self.on_price_update)
+            for topic in TRADE_TOPICS:
+                bus.unsubscribe(topic, self.position_index.on_trade_event)
+        
+        LOG.info("=" * 80)
+        LOG.info("[STOPPED] TRADE MONITOR STOPPED")
+        LOG.info("=" * 80)
+    
+    def get_stats(self) -> Dict:
+        """Mode, tick counters and tick-to-close latency (event mode)"""
+        with self._lock:
+            stats = dict(self._stats)
+            latencies = sorted(self._close_latencies)
+        
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+        
+        stats['mode'] = self.mode
+        stats['running'] = bool(self.is_running())
+        stats['check_interval_seconds'] = self.check_interval
+        stats['index'] = self.position_index.get_stats()
+        stats['tick_to_close_ms'] = {
+            'samples': len(latencies),
+            'p50': percentile(0.50) if latencies else None,
+            'p95': percentile(0.95) if latencies else None,
+            'max': round(latencies[-1] * 1000, 3) if latencies else None,
+        }
+        return stats
+    
     def start(self):
         """Start the monitoring thread"""
         if self.running:
             LOG.warning("Monitor already running")
             return
         
-        LOG.info("Starting trade monitor...")
+        LOG.info(f"Starting trade monitor ({self.mode} mode)...")
         self.running = True
         self.stop_event.clear()
-        self.thread = Thread(target=self.monitor_loop, daemon=True, name="TradeMonitor")
+        self.thread = Thread(
+            target=self.event_loop if self.mode == 'event' else self.monitor_loop,
+            daemon=True,
+            name="TradeMonitor"
+        )
         self.thread.start()
         LOG.info("[OK] Trade monitor started in background thread")
     
@@ -269,6 +395,7 @@ class TradeMonitor:
         LOG.info("Stopping trade monitor...")
         self.running = False
         self.stop_event.set()
+        self._wake.set()
         
         if self.thread:
             self.thread.join(timeout=10)
@@ -283,10 +410,17 @@ class TradeMonitor:
 # Global instance
 _trade_monitor = None
 
-def get_trade_monitor(check_interval: int = 5) -> TradeMonitor:
-    """Get or create TradeMonitor instance"""
+def get_trade_monitor(check_interval: int = 5, mode: Optional[str] = None) -> TradeMonitor:
+    """Get or create TradeMonitor instance (mode defaults to TRADE_MONITOR_MODE)"""
     global _trade_monitor
     if _trade_monitor is None:
-        LOG.info(f"Creating new TradeMonitor instance (check_interval={check_interval}s)...")
-        _trade_monitor = TradeMonitor(check_interval)
+        mode = (mode or os.getenv('TRADE_MONITOR_MODE', 'poll')).lower()
+        if mode not in MONITOR_MODES:
+            LOG.warning(f"Unknown TRADE_MONITOR_MODE '{mode}', using poll")
+            mode = 'poll'
+        LOG.info(
+            f"Creating new TradeMonitor instance "
+            f"(mode={mode}, check_interval={check_interval}s)..."
+        )
+        _trade_monitor = TradeMonitor(check_interval, mode)
     return _trade_monitor
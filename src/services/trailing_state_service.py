@@ -0,0 +1,267 @@
+"""
+Trailing State Service
+Trailing-stop water marks kept in memory for the per-tick risk check and
+written through to trailing_stop_states in batches, so a restarted or
+second monitor resumes trailing stops where the last one left off
+"""
+import os
+import logging
+import threading
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import and_, case, delete, func, select
+
+from src.database.session import SessionLocal
+from src.database.upsert import upsert_rows
+from src.models.base import Trade, TrailingStopState
+from src.services.event_bus import TRADE_CLOSED, TRADE_DELETED, get_event_bus
+
+LOG = logging.getLogger(__name__)
+
+
+class TrailingStateStore:
+    """Per-trade trailing water marks with batched write-through.
+
+    Reads come from memory; a trade's persisted mark is loaded the first
+    time it is asked for (load() warms many trades with one query). Moved
+    marks are queued and flushed in one upsert per interval. The upsert
+    keeps the higher mark for BUY and the lower for SELL, so monitors in
+    several processes can share the table. Closing or deleting a trade
+    evicts its mark from memory and, on the next flush, from the table.
+    """
+
+    def __init__(self, flush_interval: float = 1.0, session_factory=None):
+        """
+        Initialize trailing state store
+
+        Args:
+            flush_interval: Seconds between write-through flushes
+            session_factory: Session factory (a fresh, non-scoped session
+                by default, since eviction runs inside after_commit)
+        """
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory or SessionLocal.session_factory
+        self.running = False
+        self.thread = None
+        self.stop_event = threading.Event()
+        self._marks: Dict[int, Decimal] = {}
+        self._sides: Dict[int, str] = {}
+        self._known = set()  # Trade ids already looked up in the table
+        self._dirty = set()
+        self._evicted = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stats = {
+            'loads': 0,
+            'updates': 0,
+            'evictions': 0,
+            'flushes': 0,
+            'rows_written': 0,
+            'rows_deleted': 0,
+            'failed_flushes': 0,
+        }
+
+    def load(self, trade_ids: Iterable[int]):
+        """Read persisted marks for trades not seen yet (one query)"""
+        with self._lock:
+            missing = [
+                tid for tid in trade_ids
+                if tid not in self._known and tid not in self._evicted
+            ]
+        if not missing:
+            return
+
+        session = self.session_factory()
+        try:
+            rows = session.execute(
+                select(TrailingStopState.trade_id, TrailingStopState.side, TrailingStopState.mark)
+                .where(TrailingStopState.trade_id.in_(missing))
+            ).all()
+        except Exception as e:
+            LOG.error(f"[TRAILING] Failed to load trailing marks: {e}")
+            return
+        finally:
+            session.close()
+
+        with self._lock:
+            for trade_id, side, mark in rows:
+                # A mark moved in memory meanwhile is newer than the table
+                if trade_id not in self._marks and trade_id not in self._evicted:
+                    self._marks[trade_id] = mark
+                    self._sides[trade_id] = side
+            self._known.update(missing)
+            self._stats['loads'] += 1
+
+    def get(self, trade_id: int) -> Optional[Decimal]:
+        """Current water mark of a trade, or None"""
+        self.load((trade_id,))
+        with self._lock:
+            return self._marks.get(trade_id)
+
+    def set(self, trade_id: int, side: str, mark: Decimal):
+        """Move a trade's water mark (persisted on the next flush)"""
+        with self._lock:
+            self._marks[trade_id] = mark
+            self._sides[trade_id] = side.upper()
+            self._known.add(trade_id)
+            self._dirty.add(trade_id)
+            self._evicted.discard(trade_id)
+            self._stats['updates'] += 1
+
+    def evict(self, trade_id: int):
+        """Forget a trade's mark (deleted from the table on the next flush)"""
+        with self._lock:
+            self._marks.pop(trade_id, None)
+            self._sides.pop(trade_id, None)
+            self._known.discard(trade_id)
+            self._dirty.discard(trade_id)
+            self._evicted.add(trade_id)
+            self._stats['evictions'] += 1
+
+    def on_trade_event(self, topic: str, payload: Dict):
+        """Event bus handler: closed or deleted trades stop trailing"""
+        if payload.get('id') is not None:
+            self.evict(payload['id'])
+
+    def __len__(self):
+        with self._lock:
+            return len(self._marks)
+
+    def _upsert(self, session, rows):
+        """Write marks, never moving a stored mark backwards"""
+        def set_(excluded):
+            current, new = TrailingStopState.mark, excluded.mark
+            return {
+                'side': excluded.side,
+                'mark': case(
+                    (and_(excluded.side == 'BUY', new > current), new),
+                    (and_(excluded.side != 'BUY', new < current), new),
+                    else_=current
+                ),
+                'updated_at': func.now(),
+            }
+
+        upsert_rows(session, TrailingStopState, rows, ['trade_id'], set_=set_)
+
+    def flush(self) -> int:
+        """
+        Write moved marks and delete evicted ones in one transaction
+
+        Returns:
+            Number of marks written
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty and not self._evicted:
+                    return 0
+                rows = [
+                    {'trade_id': tid, 'side': self._sides[tid], 'mark': self._marks[tid]}
+                    for tid in self._dirty
+                ]
+                evicted = list(self._evicted)
+                self._dirty.clear()
+                self._evicted.clear()
+
+            session = self.session_factory()
+            try:
+                if rows:
+                    self._upsert(session, rows)
+                if evicted:
+                    session.execute(delete(TrailingStopState).where(
+                        TrailingStopState.trade_id.in_(evicted)
+                    ))
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                with self._lock:
+                    # Retry next time unless the trade was evicted meanwhile
+                    self._dirty.update(
+                        row['trade_id'] for row in rows if row['trade_id'] in self._marks
+                    )
+                    self._evicted.update(evicted)
+                    self._stats['failed_flushes'] += 1
+                LOG.error(f"[TRAILING] Flush of {len(rows)} mark(s) failed: {e}")
+                return 0
+            finally:
+                session.close()
+
+            with self._lock:
+                self._stats['flushes'] += 1
+                self._stats['rows_written'] += len(rows)
+                self._stats['rows_deleted'] += len(evicted)
+            return len(rows)
+
+    def purge_closed(self) -> int:
+        """Delete persisted marks of trades that are no longer open"""
+        session = self.session_factory()
+        try:
+            open_ids = select(Trade.id).where(Trade.status == 'OPEN')
+            deleted = session.execute(
+                delete(TrailingStopState).where(TrailingStopState.trade_id.not_in(open_ids))
+            ).rowcount
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            LOG.error(f"[TRAILING] Failed to purge closed trades: {e}")
+            return 0
+        finally:
+            session.close()
+
+        if deleted:
+            LOG.info(f"[TRAILING] Purged {deleted} mark(s) of closed trades")
+        return deleted
+
+    def flush_loop(self):
+        """Flush moved marks once per interval"""
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def start(self):
+        """Purge stale marks and start write-through flushing"""
+        if self.running:
+            return
+        self.purge_closed()
+        self.running = True
+        self.stop_event.clear()
+        self.thread = threading.Thread(
+            target=self.flush_loop, daemon=True, name="TrailingStateFlusher"
+        )
+        self.thread.start()
+
+    def stop(self):
+        """Stop flushing and write whatever is still pending"""
+        if self.running:
+            self.running = False
+            self.stop_event.set()
+            if self.thread:
+                self.thread.join(timeout=5)
+        self.flush()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['tracked'] = len(self._marks)
+            stats['pending_writes'] = len(self._dirty)
+            stats['pending_deletes'] = len(self._evicted)
+        stats['flush_interval_seconds'] = self.flush_interval
+        return stats
+
+
+# Global instance
+_trailing_state: Optional[TrailingStateStore] = None
+_trailing_state_lock = threading.Lock()
+
+
+def get_trailing_state_store() -> TrailingStateStore:
+    """Get or create the trailing state store (evicts on trade close/delete)"""
+    global _trailing_state
+    with _trailing_state_lock:
+        if _trailing_state is None:
+            _trailing_state = TrailingStateStore(
+                flush_interval=float(os.getenv('TRAILING_STATE_FLUSH_INTERVAL', '1'))
+            )
+            bus = get_event_bus()
+            for topic in (TRADE_CLOSED, TRADE_DELETED):
+                bus.subscribe(topic, _trailing_state.on_trade_event)
+    return _trailing_state
@@ -0,0 +1,227 @@
+"""
+Trigger Book Service
+Open positions filed per symbol under sorted exit levels, so a price
+update finds the positions whose stop loss, take profit, trailing stop or
+emergency level it crossed with two binary searches instead of a scan
+"""
+import bisect
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from src.services.batch_risk_service import TOLERANCE
+from src.services.position_index_service import OpenPosition, OpenPositionIndex
+
+LOG = logging.getLogger(__name__)
+
+
+class _SortedLevels:
+    """Trade ids ordered by price level (parallel lists for bisect)"""
+
+    __slots__ = ('levels', 'ids')
+
+    def __init__(self, pairs=()):
+        pairs = sorted(pairs)
+        self.levels = [level for level, _ in pairs]
+        self.ids = [trade_id for _, trade_id in pairs]
+
+    def insert(self, level: float, trade_id: int):
+        i = bisect.bisect_right(self.levels, level)
+        self.levels.insert(i, level)
+        self.ids.insert(i, trade_id)
+
+    def remove(self, level: float, trade_id: int) -> bool:
+        start = bisect.bisect_left(self.levels, level)
+        end = bisect.bisect_right(self.levels, level)
+        for i in range(start, end):
+            if self.ids[i] == trade_id:
+                del self.levels[i]
+                del self.ids[i]
+                return True
+        return False
+
+    def at_or_above(self, price: float) -> List[int]:
+        return self.ids[bisect.bisect_left(self.levels, price):]
+
+    def at_or_below(self, price: float) -> List[int]:
+        return self.ids[:bisect.bisect_right(self.levels, price)]
+
+    def __len__(self):
+        return len(self.levels)
+
+
+class TriggerBook(OpenPositionIndex):
+    """Open positions per symbol, filed under their exit levels.
+
+    Each position gets a band: it can only exit with the price at or below
+    its lower level or at or above its upper one. Lower levels are a long's
+    stop loss and a short's take profit (upper: a long's take profit and a
+    short's stop loss), tightened by the emergency spike levels and, with
+    trailing stops on, by the trailing level and the water mark the
+    trailing stop has to follow. Per symbol the lower and upper levels are
+    kept sorted, so triggered() costs two bisections plus the size of the
+    answer.
+
+    triggered() returns candidates, widened by the float tolerance; confirm
+    them with RiskManager.check_positions and then reprice() them, since
+    checking can move their water marks.
+    """
+
+    def __init__(self, risk_manager, session_factory=None):
+        """
+        Initialize trigger book
+
+        Args:
+            risk_manager: RiskManager whose settings and trailing marks set
+                the exit levels
+            session_factory: Session factory for load()
+        """
+        super().__init__(session_factory)
+        self.risk_manager = risk_manager
+        self._lower: Dict[str, _SortedLevels] = {}
+        self._upper: Dict[str, _SortedLevels] = {}
+        self._bands: Dict[int, Tuple[float, float]] = {}
+        self._settings = None
+        self._stats.update({'queries': 0, 'candidates': 0, 'rebuilds': 0})
+
+    def _settings_key(self) -> tuple:
+        rm = self.risk_manager
+        return (
+            rm.stop_loss_pct, rm.take_profit_pct, rm.emergency_spike_pct,
+            rm.trailing_stop_enabled, rm.trailing_stop_type,
+            rm.trailing_stop_percent, rm.trailing_stop_amount,
+        )
+
+    def exit_band(self, position: OpenPosition) -> Tuple[float, float]:
+        """(lower, upper) prices outside of which the position may exit"""
+        rm = self.risk_manager
+        entry = float(position.open_price)
+        is_buy = position.action.upper() == 'BUY'
+        direction = 1.0 if is_buy else -1.0
+
+        stop = (float(position.stop_loss) if position.stop_loss
+                else entry * (1 - direction * float(rm.stop_loss_pct)))
+        target = (float(position.take_profit) if position.take_profit
+                  else entry * (1 + direction * float(rm.take_profit_pct)))
+        spike = float(rm.emergency_spike_pct)
+        lower = max(stop if is_buy else target, entry * (1 - spike))
+        upper = min(target if is_buy else stop, entry * (1 + spike))
+
+        if rm.trailing_stop_enabled:
+            mark = rm.trailing_state.get(position.id)
+            if mark is None:
+                # The first price seen in profit seeds the mark
+                follow = entry
+                trail = None
+            else:
+                follow = float(mark)
+                if rm.trailing_stop_type == 'percent':
+                    trail = follow * (1 - direction * float(rm.trailing_stop_percent))
+                else:
+                    trail = follow - direction * float(rm.trailing_stop_amount)
+            if is_buy:
+                upper = min(upper, follow)
+                if trail is not None and trail > entry:
+                    lower = max(lower, trail)
+            else:
+                lower = max(lower, follow)
+                if trail is not None and trail < entry:
+                    upper = min(upper, trail)
+
+        return lower, upper
+
+    def _file(self, position: OpenPosition, band: Tuple[float, float]):
+        self._unfile(position.id, position.symbol)
+        lower, upper = band
+        self._lower.setdefault(position.symbol, _SortedLevels()).insert(lower, position.id)
+        self._upper.setdefault(position.symbol, _SortedLevels()).insert(upper, position.id)
+        self._bands[position.id] = band
+
+    def _unfile(self, trade_id: int, symbol: str):
+        band = self._bands.pop(trade_id, None)
+        if band is None:
+            return
+        for book, level in ((self._lower, band[0]), (self._upper, band[1])):
+            levels = book.get(symbol)
+            if levels is not None and levels.remove(level, trade_id) and not levels:
+                del book[symbol]
+
+    def add(self, position: OpenPosition):
+        """Index a position under its current exit levels"""
+        band = self.exit_band(position)
+        with self._lock:
+            self._store(position)
+            self._file(position, band)
+
+    def _discard(self, trade_id: int) -> Optional[str]:
+        symbol = super()._discard(trade_id)
+        if symbol is not None:
+            self._unfile(trade_id, symbol)
+        return symbol
+
+    def load(self) -> int:
+        """Reload open trades from the database and refile every position"""
+        count = super().load()
+        self.rebuild()
+        return count
+
+    def rebuild(self):
+        """Recompute every exit level (after a load or a settings change)"""
+        if self.risk_manager.trailing_stop_enabled:
+            # One query for the marks, so exit_band() below reads memory
+            with self._lock:
+                ids = list(self._symbol_of)
+            self.risk_manager.trailing_state.load(ids)
+
+        with self._lock:
+            self._settings = self._settings_key()
+            self._lower, self._upper, self._bands = {}, {}, {}
+            for symbol, positions in self._by_symbol.items():
+                bands = {p.id: self.exit_band(p) for p in positions.values()}
+                self._lower[symbol] = _SortedLevels((b[0], i) for i, b in bands.items())
+                self._upper[symbol] = _SortedLevels((b[1], i) for i, b in bands.items())
+                self._bands.update(bands)
+            self._stats['rebuilds'] += 1
+
+    def triggered(self, symbol: str, price) -> List[OpenPosition]:
+        """
+        Positions of a symbol whose exit levels the price reached
+
+        Args:
+            symbol: Trading symbol
+            price: Current price
+
+        Returns:
+            Candidate positions (confirm with RiskManager.check_positions)
+        """
+        if self._settings != self._settings_key():
+            self.rebuild()
+
+        price = float(price)
+        slack = abs(price) * TOLERANCE
+        with self._lock:
+            lower = self._lower.get(symbol)
+            upper = self._upper.get(symbol)
+            if lower is None or upper is None:
+                return []
+            ids = set(lower.at_or_above(price - slack))
+            ids.update(upper.at_or_below(price + slack))
+            positions = self._by_symbol.get(symbol, {})
+            candidates = [positions[i] for i in ids if i in positions]
+            self._stats['queries'] += 1
+            self._stats['candidates'] += len(candidates)
+        return candidates
+
+    def reprice(self, positions: List[OpenPosition]):
+        """Refile still-open positions under their current exit levels"""
+        for position in positions:
+            band = self.exit_band(position)
+            with self._lock:
+                # A position replaced meanwhile was filed by add()
+                if self._by_symbol.get(position.symbol, {}).get(position.id) is position:
+                    self._file(position, band)
+
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        queries = stats['queries']
+        stats['avg_candidates'] = round(stats['candidates'] / queries, 2) if queries else 0
+        return stats
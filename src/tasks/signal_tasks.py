@@ -7,6 +7,8 @@ configured.
 from decimal import Decimal
 import logging
 
+from sqlalchemy import func
+
 from src.database.session import SessionLocal
 from src.services.trading_service import TradingManager
 from src.models.base import Signal, IdempotencyKey
@@ -14,24 +16,62 @@ from src.models.base import Signal, IdempotencyKey
 LOG = logging.getLogger("rag_project.tasks")
 
 
-def process_signal_task(event_key: str, text: str, pre_action, pre_symbol, pre_price, summary):
+def _record_outcome(sig, result):
+    """Advance a Signal row to the outcome of its processing.
+
+    An opened trade marks it EXECUTED and links the trade; a blocked
+    signal is REJECTED with the reason. Anything else (ignored, skipped
+    or failed) stays PENDING, as on the inline webhook path.
+    """
+    opened = (result or {}).get('opened')
+    if opened is not None and getattr(opened, 'id', None) is not None:
+        sig.status = "EXECUTED"
+        sig.trade_id = opened.id
+        sig.executed_at = func.now()
+    elif (result or {}).get('action') == 'blocked':
+        sig.status = "REJECTED"
+        sig.validation_notes = result.get('message')
+    else:
+        sig.status = "PENDING"
+
+
+def process_signal_task(event_key: str, text: str, pre_action, pre_symbol, pre_price, summary,
+                        signal_id: int | None = None, execute_on_exchange: bool = False):
     """Process a raw signal: persist Signal, handle trades, persist
     idempotency key.
 
     This is safe to run in a worker process or synchronously.
+
+    When `signal_id` is given the already persisted (QUEUED) Signal row is
+    reused instead of inserting a new one, and is advanced to its final
+    status; its idempotency key was already claimed when it was accepted.
+    With `execute_on_exchange` the
+    task mirrors the inline webhook path: the signal price is verified
+    against the Delta Exchange orderbook before trading and the resulting
+    position is placed on the exchange.
+
+    Returns the trade processing result dict (or None if no trade was
+    attempted).
     """
     session = SessionLocal()
+    result = None
+    sig = None
     try:
         # Persist Signal (best-effort)
         try:
-            sig = Signal(
-                source="webhook",
-                symbol=pre_symbol or None,
-                action=pre_action or None,
-                price=pre_price,
-                raw=text,
-            )
-            session.add(sig)
+            if signal_id is not None:
+                sig = session.get(Signal, signal_id)
+            if sig is None:
+                sig = Signal(
+                    source="webhook",
+                    symbol=pre_symbol or None,
+                    action=pre_action or None,
+                    price=pre_price,
+                    raw=text,
+                )
+                session.add(sig)
+            else:
+                sig.status = "PENDING"
             session.commit()
         except Exception:
             session.rollback()
@@ -42,6 +82,22 @@ def process_signal_task(event_key: str, text: str, pre_action, pre_symbol, pre_p
         price = pre_price
         symbol = pre_symbol
 
+        if action and symbol and price and execute_on_exchange:
+            from src.services.delta_exchange_service import get_delta_trader
+
+            delta_trader = get_delta_trader()
+            is_valid, current_price, msg = delta_trader.verify_price(symbol, float(price))
+            if not is_valid:
+                LOG.error(f"[X] Price verification failed for {symbol}: {msg} - trade blocked")
+                result = {
+                    'action': 'blocked',
+                    'message': f'Price verification failed: {msg}',
+                    'signal_price': price,
+                    'market_price': current_price,
+                    'error': 'Price mismatch - trade blocked for safety'
+                }
+                action = None
+
         if action and symbol and price:
             try:
                 # Quick check: warn if there's already an open trade for this symbol
@@ -67,7 +123,16 @@ def process_signal_task(event_key: str, text: str, pre_action, pre_symbol, pre_p
                 
                 tm = TradingManager(session=session)
                 res = tm.handle_signal(None, symbol, action, Decimal(str(price)))
+                result = res
                 LOG.info("Task persisted trading action: %s", res)
+
+                if execute_on_exchange and res.get('opened'):
+                    res['delta_order'] = delta_trader.place_order(
+                        symbol=symbol,
+                        side=action.lower(),
+                        price=float(price),
+                        size=1
+                    )
                 
                 # Enhanced logging for immediate closure behavior
                 if res.get('closed'):
@@ -81,18 +146,31 @@ def process_signal_task(event_key: str, text: str, pre_action, pre_symbol, pre_p
                 session.rollback()
                 LOG.exception("Failed to persist trade in task")
 
-        # Persist idempotency key (transactional - if duplicate insertion
-        # occurs treat as already processed)
-        try:
-            k = IdempotencyKey(key=event_key)
-            session.add(k)
+        if sig is not None and signal_id is not None:
             try:
+                _record_outcome(sig, result)
                 session.commit()
             except Exception:
                 session.rollback()
-                LOG.info("Idempotency key already present: %s", event_key)
-        except Exception:
-            LOG.exception("Failed to persist idempotency key in task")
+                LOG.exception("Failed to update status of signal %s", signal_id)
+
+        # Persist idempotency key (transactional - if duplicate insertion
+        # occurs treat as already processed). Queued signals skip this:
+        # their key was claimed when they were accepted.
+        if event_key and signal_id is None:
+            try:
+                k = IdempotencyKey(key=event_key)
+                session.add(k)
+                try:
+                    session.commit()
+                except Exception:
+                    session.rollback()
+                    LOG.info("Idempotency key already present: %s", event_key)
+            except Exception:
+                LOG.exception("Failed to persist idempotency key in task")
+        else:
+            session.commit()
+        return result
     finally:
         try:
             session.close()
@@ -0,0 +1,22 @@
+"""
+Shared test configuration
+Points the application at a throwaway SQLite database before any
+src module creates its engine
+"""
+import os
+import tempfile
+
+import pytest
+
+_DB_DIR = tempfile.mkdtemp(prefix='trading-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+
+
+@pytest.fixture(scope='session', autouse=True)
+def create_tables():
+    """Create all tables once for the test session"""
+    from src.database.session import engine
+    from src.models.base import Base
+
+    Base.metadata.create_all(bind=engine)
+    yield
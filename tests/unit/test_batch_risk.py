@@ -0,0 +1,130 @@
+"""
+Test that the vectorized risk pass makes the per-trade decisions
+"""
+import random
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.database.session import SessionLocal
+from src.models.base import Trade
+from src.services.batch_risk_service import EXIT_TYPES, evaluate_positions
+from src.services.risk_management_service import RiskManager
+from src.services.trailing_state_service import TrailingStateStore
+
+
+def make_positions(rng, n):
+    positions = []
+    for i in range(n):
+        entry = Decimal(rng.choice(['100', '2500.5', '0.3125', '64000']))
+        is_buy = rng.random() < 0.5
+        sign = 1 if is_buy else -1
+        # Exact boundary prices alongside random ones
+        current = rng.choice([
+            entry * (1 + Decimal(rng.randint(-150, 150)) / 1000),
+            entry * Decimal('0.99'), entry * Decimal('1.02'),
+            entry * Decimal('1.10'), entry * Decimal('0.90'),
+        ])
+        positions.append((SimpleNamespace(
+            id=i, symbol='RISKUSD', action='BUY' if is_buy else 'SELL',
+            open_price=entry, quantity=Decimal('1'),
+            stop_loss=rng.choice([None, entry * (1 - sign * Decimal('0.015'))]),
+            take_profit=rng.choice([None, entry * (1 + sign * Decimal('0.03')), current]),
+        ), current))
+    return positions
+
+
+def batch_decisions(manager, positions):
+    manager.trailing_state.load(t.id for t, _ in positions)
+    result = evaluate_positions(
+        entry=[float(t.open_price) for t, _ in positions],
+        is_buy=[t.action == 'BUY' for t, _ in positions],
+        current=[float(c) for _, c in positions],
+        stop_loss=[float(t.stop_loss) if t.stop_loss else np.nan for t, _ in positions],
+        take_profit=[float(t.take_profit) if t.take_profit else np.nan for t, _ in positions],
+        marks=[float(manager.trailing_state.get(t.id) or np.nan) for t, _ in positions],
+        stop_loss_pct=float(manager.stop_loss_pct),
+        take_profit_pct=float(manager.take_profit_pct),
+        trailing_enabled=manager.trailing_stop_enabled,
+        trailing_type=manager.trailing_stop_type,
+        trailing_percent=float(manager.trailing_stop_percent),
+        trailing_amount=float(manager.trailing_stop_amount),
+        emergency_spike_pct=float(manager.emergency_spike_pct),
+    )
+    decided = {i: EXIT_TYPES[c] for i, c in zip(result['indices'], result['exit_codes'])}
+    return decided, set(result['uncertain'].tolist())
+
+
+@pytest.mark.parametrize('trailing', [None, 'percent', 'amount'])
+def test_batch_matches_per_trade_rules(trailing):
+    rng = random.Random(11)
+    positions = make_positions(rng, 3000)
+    manager = RiskManager(trailing_state=TrailingStateStore())
+    if trailing:
+        manager.trailing_stop_enabled = True
+        manager.trailing_stop_type = trailing
+        manager.trailing_stop_amount = Decimal('0.5')
+        for trade, current in positions[::3]:
+            manager.trailing_state.set(trade.id, trade.action, current * Decimal(
+                rng.choice(['1.004', '0.996', '1.02', '0.98', '1.005', '0.995'])
+            ))
+
+    decided, uncertain = batch_decisions(manager, positions)
+
+    for i, (trade, current) in enumerate(positions):
+        if i in uncertain:
+            continue
+        should_close, _, exit_type = manager.should_close_trade(trade, current)
+        assert decided.get(i) == (exit_type if should_close else None), (trade, current)
+
+
+def test_only_threshold_ties_need_exact_recheck():
+    rng = random.Random(3)
+    positions = [
+        (SimpleNamespace(id=i, action=rng.choice(['BUY', 'SELL']), open_price=Decimal('100'),
+                         stop_loss=None, take_profit=None),
+         Decimal(str(round(rng.uniform(85, 115), 4))))
+        for i in range(5000)
+    ]
+    positions.append((SimpleNamespace(id=5000, action='BUY', open_price=Decimal('100'),
+                                      stop_loss=None, take_profit=None), Decimal('99')))
+    decided, uncertain = batch_decisions(RiskManager(trailing_state=TrailingStateStore()), positions)
+    # Exactly -1% is a tie in float; random prices essentially never are
+    assert 5000 in uncertain
+    assert len(uncertain) < 10
+
+
+def test_check_all_open_trades_matches_per_trade_path():
+    rng = random.Random(5)
+    session = SessionLocal()
+    try:
+        session.query(Trade).filter(Trade.status == 'OPEN').update({'status': 'CLOSED'})
+        for trade, _ in make_positions(rng, 200):
+            session.add(Trade(
+                action=trade.action, symbol=f"RISK{trade.id % 4}", quantity=Decimal('1'),
+                open_price=trade.open_price, stop_loss=trade.stop_loss,
+                take_profit=trade.take_profit, status='OPEN'
+            ))
+        session.commit()
+        prices = {f"RISK{i}": Decimal(rng.choice(['99', '100.5', '2450', '0.31', '64000']))
+                  for i in range(3)}
+
+        expected = {}
+        reference = RiskManager(trailing_state=TrailingStateStore())
+        for trade in session.query(Trade).filter(Trade.status == 'OPEN'):
+            price = prices.get(trade.symbol)
+            if price:
+                should_close, reason, exit_type = reference.should_close_trade(trade, price)
+                if should_close:
+                    expected[trade.id] = (exit_type, reason)
+    finally:
+        session.close()
+
+    actual = {
+        item['trade'].id: (item['exit_type'], item['reason'])
+        for item in RiskManager(trailing_state=TrailingStateStore()).check_all_open_trades(prices)
+    }
+    assert expected
+    assert actual == expected
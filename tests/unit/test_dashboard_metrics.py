@@ -0,0 +1,128 @@
+"""
+Test aggregated dashboard metrics and their event-driven cache
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from src.database.session import SessionLocal
+from src.models.base import Signal, Trade
+from src.services.dashboard_metrics_service import (
+    DashboardMetricsCache,
+    compute_dashboard_metrics,
+)
+from src.services.event_bus import TRADE_CLOSED, TRADE_OPENED, get_event_bus
+
+
+def legacy_metrics(session, now):
+    """The previous per-row implementation, used as the reference"""
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def pnl(trades):
+        return float(sum((t.close_price or t.open_price) - t.open_price
+                         for t in trades if t.open_price))
+
+    trades = session.query(Trade).all()
+    today = [t for t in trades if t.open_time and t.open_time >= today_start]
+    hour_counts = [0] * 24
+    for t in today:
+        hour_counts[t.open_time.hour] += 1
+
+    week = []
+    for i in range(6, -1, -1):
+        day_start = today_start - timedelta(days=i)
+        week.append(pnl(t for t in trades
+                        if t.open_time and day_start <= t.open_time < day_start + timedelta(days=1)))
+
+    month = []
+    for i in range(3, -1, -1):
+        start = today_start - timedelta(days=i * 7 + 30)
+        month.append(pnl(t for t in trades
+                         if t.open_time and start <= t.open_time < start + timedelta(days=7)))
+
+    return {
+        'today_count': len(today),
+        'today_pnl': pnl(today),
+        'hour_counts': hour_counts,
+        'week': week,
+        'month': month,
+        'total_trades': len(trades),
+        'open_trades': sum(1 for t in trades if t.status == 'OPEN'),
+        'total_pnl': pnl(trades),
+        'signals': session.query(Signal).count(),
+    }
+
+
+def test_aggregates_match_legacy_computation():
+    now = datetime(2024, 8, 20, 15, 30)
+    session = SessionLocal()
+    try:
+        for i in range(300):
+            open_time = now - timedelta(hours=i * 2.3)
+            closed = i % 3 != 0
+            session.add(Trade(
+                action='BUY', symbol='DASHUSD', quantity=Decimal('1'),
+                open_price=Decimal(100 + i % 11), open_time=open_time,
+                close_price=Decimal(100 + i % 7) if closed else None,
+                status='CLOSED' if closed else 'OPEN'
+            ))
+        session.commit()
+
+        metrics = compute_dashboard_metrics(session, now=now)
+        expected = legacy_metrics(session, now)
+    finally:
+        session.close()
+
+    assert metrics['today']['count'] == expected['today_count']
+    assert metrics['today']['pnl'] == pytest.approx(expected['today_pnl'])
+    assert metrics['today']['hour_counts'] == expected['hour_counts']
+    assert metrics['week']['values'] == pytest.approx(expected['week'])
+    assert metrics['month']['values'] == pytest.approx(expected['month'])
+    assert metrics['summary']['total_trades'] == expected['total_trades']
+    assert metrics['summary']['open_trades'] == expected['open_trades']
+    assert metrics['summary']['total_pnl'] == pytest.approx(expected['total_pnl'])
+    assert metrics['signals']['total'] == expected['signals']
+
+
+def test_cache_invalidated_by_trade_events():
+    cache = DashboardMetricsCache(ttl_seconds=60)
+    bus = get_event_bus()
+    for topic in (TRADE_OPENED, TRADE_CLOSED):
+        bus.subscribe(topic, cache.invalidate)
+
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'n': len(calls)}
+
+    try:
+        assert cache.get(compute) == {'n': 1}
+        assert cache.get(compute) == {'n': 1}
+
+        session = SessionLocal()
+        try:
+            trade = Trade(action='SELL', symbol='CACHEUSD', quantity=Decimal('1'),
+                          open_price=Decimal('10'), status='OPEN')
+            session.add(trade)
+            session.commit()
+            assert cache.get(compute) == {'n': 2}
+
+            trade.stop_loss = Decimal('11')
+            session.commit()
+            assert cache.get(compute) == {'n': 2}
+
+            trade.status = 'CLOSED'
+            trade.close_price = Decimal('9')
+            session.commit()
+            assert cache.get(compute) == {'n': 3}
+        finally:
+            session.close()
+    finally:
+        for topic in (TRADE_OPENED, TRADE_CLOSED):
+            bus.unsubscribe(topic, cache.invalidate)
+
+    stats = cache.get_stats()
+    assert stats['hits'] == 2
+    assert stats['invalidations'] == 2
@@ -0,0 +1,103 @@
+"""
+Test the event-driven trade monitor: positions are checked when a price
+update for their symbol is published
+"""
+import time
+from decimal import Decimal
+
+from src.database.session import SessionLocal
+from src.models.base import Trade
+from src.services.market_data_service import MarketDataCache
+from src.services.event_bus import TRADE_TOPICS, get_event_bus
+from src.services.position_index_service import OpenPositionIndex
+from src.services.risk_management_service import RiskManager
+from src.services.trade_monitor_service import TradeMonitor
+from src.services.trailing_state_service import TrailingStateStore
+
+
+def open_trade(symbol, action='BUY', price='100', stop_loss=None, take_profit=None):
+    session = SessionLocal()
+    try:
+        trade = Trade(action=action, symbol=symbol, quantity=Decimal('1'),
+                      open_price=Decimal(price), status='OPEN',
+                      stop_loss=stop_loss and Decimal(stop_loss),
+                      take_profit=take_profit and Decimal(take_profit))
+        session.add(trade)
+        session.commit()
+        return trade.id
+    finally:
+        session.close()
+
+
+def trade_status(trade_id):
+    session = SessionLocal()
+    try:
+        return session.get(Trade, trade_id).status
+    finally:
+        session.close()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_index_follows_trade_events():
+    index = OpenPositionIndex()
+    bus = get_event_bus()
+    for topic in TRADE_TOPICS:
+        bus.subscribe(topic, index.on_trade_event)
+    try:
+        index.load()
+        trade_id = open_trade('IDXUSD', stop_loss='95')
+        assert [p.id for p in index.positions('IDXUSD')] == [trade_id]
+
+        session = SessionLocal()
+        try:
+            trade = session.get(Trade, trade_id)
+            trade.stop_loss = Decimal('97')
+            session.commit()
+            assert index.positions('IDXUSD')[0].stop_loss == Decimal('97')
+
+            trade.status = 'CLOSED'
+            session.commit()
+        finally:
+            session.close()
+        assert not index.has_symbol('IDXUSD')
+    finally:
+        for topic in TRADE_TOPICS:
+            bus.unsubscribe(topic, index.on_trade_event)
+
+
+def test_price_update_closes_crossed_positions_only():
+    hit = open_trade('EVTUSD', 'BUY', stop_loss='98')
+    safe = open_trade('EVTUSD', 'BUY', stop_loss='90')
+    cache = MarketDataCache(max_age_seconds=60, fetcher=lambda symbol: {'success': False})
+
+    monitor = TradeMonitor(check_interval=1, mode='event',
+                           risk_manager=RiskManager(trailing_state=TrailingStateStore()))
+    monitor.start()
+    try:
+        assert wait_for(lambda: monitor.position_index.has_symbol('EVTUSD'))
+        cache.update('EVTUSD', '99.5', '100.5')
+        cache.update('OTHERUSD', '10', '11')
+        assert wait_for(lambda: monitor.get_stats()['ticks_evaluated'] >= 1)
+        assert trade_status(hit) == 'OPEN'
+
+        cache.update('EVTUSD', '97', '97.5')
+        assert wait_for(lambda: trade_status(hit) == 'CLOSED')
+    finally:
+        monitor.stop()
+
+    assert trade_status(safe) == 'OPEN'
+    assert [p.id for p in monitor.position_index.positions('EVTUSD')] == [safe]
+
+    stats = monitor.get_stats()
+    assert stats['trades_closed'] == 1
+    assert stats['ticks_ignored'] >= 1
+    assert stats['tick_to_close_ms']['samples'] == 1
+    assert stats['tick_to_close_ms']['max'] > 0
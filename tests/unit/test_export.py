@@ -0,0 +1,105 @@
+"""
+Test the streaming NDJSON/CSV exports
+"""
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+from src.api.export import export_bp
+from src.database.session import SessionLocal, engine
+from src.models.base import HistoricalPrice, Signal, Trade
+from src.services.export_service import DATASETS, chunked, encode_csv, iter_rows
+
+T0 = datetime(2022, 2, 1)
+
+
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(export_bp)
+    return app.test_client()
+
+
+@pytest.fixture(scope='module', autouse=True)
+def seeded():
+    session = SessionLocal()
+    try:
+        for i in range(30):
+            ts = T0 + timedelta(minutes=i)
+            session.add(Trade(
+                action='BUY', symbol='EXPA' if i % 2 else 'EXPB', quantity=Decimal('0.5'),
+                open_price=Decimal('100.12345678'), open_time=ts,
+                status='OPEN' if i % 3 == 0 else 'CLOSED'
+            ))
+            session.add(Signal(symbol='EXPA', action='SELL', source='tv', status='EXECUTED',
+                               raw='sell "EXPA", now', created_at=ts))
+            session.add(HistoricalPrice(
+                symbol='EXPA', timestamp=ts, bid_price=Decimal('99'), ask_price=Decimal('101'),
+                mid_price=Decimal('100') + i, spread=Decimal('2'), spread_pct=Decimal('2')
+            ))
+        session.commit()
+    finally:
+        session.close()
+
+
+def test_exports_stream_filtered_rows():
+    api = client()
+
+    response = api.get('/api/export/trades?symbol=expa&status=closed')
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    assert 'attachment' in response.headers['Content-Disposition']
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(rows) == 10
+    assert all(r['symbol'] == 'EXPA' and r['status'] == 'CLOSED' for r in rows)
+    assert [r['open_time'] for r in rows] == sorted(r['open_time'] for r in rows)
+    assert rows[0]['open_price'] == 100.12345678
+    assert list(rows[0]) == list(DATASETS['trades'].columns)
+
+    # CSV keeps exact decimals and quotes awkward text
+    body = api.get('/api/export/signals?format=csv&symbol=EXPA').get_data(as_text=True)
+    table = list(csv.DictReader(io.StringIO(body)))
+    assert len(table) == 30 and table[0]['raw'] == 'sell "EXPA", now'
+
+    # Gzipped ticks within a time range
+    response = api.get(
+        '/api/export/historical-prices?symbol=EXPA&gzip=1&format=csv'
+        f'&from={(T0 + timedelta(minutes=10)).isoformat()}&to={(T0 + timedelta(minutes=19)).isoformat()}'
+    )
+    assert response.mimetype == 'application/gzip'
+    assert response.headers['Content-Disposition'].endswith('.csv.gz"')
+    table = list(csv.DictReader(io.StringIO(gzip.decompress(response.get_data()).decode())))
+    assert [Decimal(r['mid_price']) for r in table] == [Decimal(100 + i) for i in range(10, 20)]
+
+
+def test_bad_requests_are_rejected():
+    api = client()
+    assert api.get('/api/export/trades?format=xml').status_code == 400
+    assert api.get('/api/export/trades?from=yesterday').status_code == 400
+    assert api.get('/api/export/trades?hours=abc').status_code == 400
+    assert api.get('/api/export/historical-prices?status=OPEN').status_code == 400
+
+
+def test_empty_csv_export_still_has_a_header():
+    body = b''.join(chunked(encode_csv(('a', 'b'), iter([]))))
+    assert body == b'a,b\r\n'
+
+
+def test_output_is_chunked_and_the_session_closes_early():
+    spec = DATASETS['historical_prices']
+    chunks = list(chunked(encode_csv(spec.columns, iter_rows(spec.query(symbol='EXPA'), 7)), 256))
+    assert len(chunks) > 5
+    assert all(len(chunk) < 512 for chunk in chunks)
+
+    # Abandoning the stream (client disconnect) releases its session
+    checked_out = engine.pool.checkedout()
+    rows = iter_rows(spec.query(symbol='EXPA'), 7)
+    next(rows)
+    assert engine.pool.checkedout() == checked_out + 1
+    rows.close()
+    assert engine.pool.checkedout() == checked_out
@@ -0,0 +1,155 @@
+"""
+Test the shared HTTP client against a local stub server
+"""
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.services.http_client import HttpClient, _parse_pool_sizes
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self, status, body=b'{}', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits.append(self.path)
+            server.clients.add(self.client_address)
+            failures = server.failures.get(self.path, 0)
+            if failures:
+                server.failures[self.path] = failures - 1
+        if failures:
+            self._reply(503, headers=server.failure_headers)
+        else:
+            self._reply(200, json.dumps({'path': self.path}).encode())
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        with self.server.lock:
+            self.server.hits.append(self.path)
+        self._reply(503 if self.path == '/fail' else 200, body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.lock = threading.Lock()
+    server.hits = []
+    server.clients = set()
+    server.failures = {}
+    server.failure_headers = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_reuse_kept_alive_connections(stub):
+    server, base = stub
+    client = HttpClient(pool_maxsize=2)
+    for i in range(20):
+        assert client.get(f"{base}/products?page={i}").json() == {'path': f"/products?page={i}"}
+
+    # Sequential calls ride one connection
+    assert len(server.hits) == 20
+    assert len(server.clients) == 1
+
+    # Concurrent calls never open more than the pool keeps
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda i: client.get(f"{base}/products"), range(40)))
+    assert len(server.clients) <= 2
+
+    stats = client.get_stats()
+    assert stats['pools'] == {f"127.0.0.1:{server.server_address[1]}": 2}
+    endpoint = stats['endpoints'][f"GET 127.0.0.1:{server.server_address[1]}/products"]
+    assert endpoint['count'] == 60
+    assert sum(endpoint['buckets_ms'].values()) == 60
+    assert endpoint['p50_ms'] is not None and endpoint['errors'] == 0
+
+
+def test_transient_failures_retry_with_jittered_backoff(stub):
+    server, base = stub
+    server.failures['/klines'] = 2
+    delays = []
+    client = HttpClient(retries=3, backoff_base=0.1, backoff_max=1.0, sleep=delays.append)
+
+    response = client.get(f"{base}/klines", endpoint='binance.klines')
+    assert response.status_code == 200
+    assert server.hits == ['/klines'] * 3
+    assert len(delays) == 2
+    assert 0 <= delays[0] <= 0.1 and 0 <= delays[1] <= 0.2
+
+    endpoint = client.get_stats()['endpoints']['binance.klines']
+    assert (endpoint['count'], endpoint['errors'], endpoint['retries']) == (3, 2, 2)
+
+    # Retry-After is honoured up to the backoff cap
+    server.failures['/klines'] = 1
+    server.failure_headers = {'Retry-After': '30'}
+    client.get(f"{base}/klines", endpoint='binance.klines')
+    assert delays[-1] == 1.0
+
+    # Exhausted retries hand back the last response
+    server.failures['/klines'] = 10
+    assert client.get(f"{base}/klines", retries=1).status_code == 503
+
+
+def test_posts_are_not_retried_unless_asked(stub):
+    server, base = stub
+    client = HttpClient(retries=3, sleep=lambda s: None)
+
+    assert client.post(f"{base}/fail", json={'text': 'hi'}).status_code == 503
+    assert server.hits == ['/fail']
+    assert client.post(f"{base}/fail", json={'text': 'hi'}, retries=2).status_code == 503
+    assert server.hits == ['/fail'] * 4
+
+    response = client.post(f"{base}/sendMessage", json={'text': 'hi'}, endpoint='telegram.sendMessage')
+    assert response.json() == {'text': 'hi'}
+    assert 'telegram.sendMessage' in client.get_stats()['endpoints']
+
+
+def test_connection_errors_raise_after_retries():
+    delays = []
+    client = HttpClient(retries=2, backoff_base=0.01, sleep=delays.append)
+    # Nothing listens on port 9 of localhost
+    with pytest.raises(requests.ConnectionError):
+        client.get('http://127.0.0.1:9/down', timeout=1)
+    assert len(delays) == 2
+    assert client.get_stats()['errors'] == 3
+
+
+def test_parse_pool_sizes():
+    assert _parse_pool_sizes('api.telegram.org=2, API.delta.exchange=16,bad,x=') == {
+        'api.telegram.org': 2, 'api.delta.exchange': 16
+    }
+
+
+def test_signed_exchange_calls_are_not_retried(stub):
+    """A retry would reuse the request's timestamped signature after it expires"""
+    from src.services.delta_exchange_service import DeltaExchangeClient
+
+    server, base = stub
+    server.failures['/v2/wallet/balances'] = 1
+    client = DeltaExchangeClient('key', 'secret', base_url=base,
+                                 session=HttpClient(retries=3, sleep=lambda s: None))
+
+    assert client._make_request('GET', '/v2/wallet/balances').status_code == 503
+    assert server.hits == ['/v2/wallet/balances']
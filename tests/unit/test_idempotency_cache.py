@@ -0,0 +1,70 @@
+"""
+Test the idempotency key cache in front of the idempotency_keys table
+"""
+from datetime import datetime, timedelta
+
+from src.database.session import SessionLocal
+from src.models.base import IdempotencyKey
+from src.services.idempotency_service import (
+    IdempotencyCache,
+    purge_idempotency_keys,
+)
+
+
+def test_repeat_keys_answered_from_memory():
+    """First claim goes to the database, repeats are cache hits"""
+    cache = IdempotencyCache(max_size=10, ttl_seconds=60)
+
+    assert cache.claim('evt-cache-1') is False
+    assert cache.claim('evt-cache-1') is True
+    assert cache.claim('evt-cache-1') is True
+
+    stats = cache.get_stats()
+    assert stats['claimed'] == 1
+    assert stats['misses'] == 1
+    assert stats['hits'] == 2
+
+
+def test_database_is_authority_for_unknown_keys():
+    """A key claimed by another process is still detected as duplicate"""
+    other_process = IdempotencyCache()
+    this_process = IdempotencyCache()
+
+    assert other_process.claim('evt-cache-2') is False
+    assert this_process.claim('evt-cache-2') is True
+    assert this_process.get_stats()['db_duplicates'] == 1
+
+
+def test_lru_bound_and_release():
+    """The cache stays bounded and released keys can be claimed again"""
+    cache = IdempotencyCache(max_size=2, ttl_seconds=60)
+    for key in ('evt-lru-1', 'evt-lru-2', 'evt-lru-3'):
+        cache.claim(key)
+    assert cache.get_stats()['size'] == 2
+    assert not cache.contains('evt-lru-1')
+
+    cache.release('evt-lru-3')
+    assert cache.claim('evt-lru-3') is False
+
+
+def test_purge_removes_old_rows_only():
+    """Purge deletes rows older than the retention window in batches"""
+    session = SessionLocal()
+    try:
+        old = datetime.utcnow() - timedelta(hours=200)
+        for i in range(5):
+            session.add(IdempotencyKey(key=f'evt-old-{i}', created_at=old))
+        session.add(IdempotencyKey(key='evt-fresh'))
+        session.commit()
+    finally:
+        session.close()
+
+    assert purge_idempotency_keys(retention_hours=168, batch_size=2) == 5
+
+    session = SessionLocal()
+    try:
+        remaining = {k for (k,) in session.query(IdempotencyKey.key).all()}
+    finally:
+        session.close()
+    assert 'evt-fresh' in remaining
+    assert not any(k.startswith('evt-old-') for k in remaining)
@@ -0,0 +1,175 @@
+"""
+Test cursor (keyset) pagination of the trade and signal lists
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+from sqlalchemy import select, text
+
+from src.api.trading import trading_bp
+from src.api.trading_enhanced import trading_enhanced_bp
+from src.database.session import SessionLocal, engine
+from src.models.base import Signal, Trade
+from src.services.pagination_service import (
+    InvalidCursor, _after, decode_cursor, encode_cursor, keyset_page
+)
+
+T0 = datetime(2023, 6, 1)
+
+
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(trading_bp)
+    app.register_blueprint(trading_enhanced_bp)
+    return app.test_client()
+
+
+def seed_trades(symbol, count):
+    """Closed trades opened in pairs sharing an open_time, to exercise the id tie-break"""
+    session = SessionLocal()
+    try:
+        for i in range(count):
+            ts = T0 + timedelta(minutes=i // 2 * 2)
+            session.add(Trade(
+                action='BUY', symbol=symbol, quantity=Decimal('1'),
+                open_price=Decimal('100'), open_time=ts, status='CLOSED',
+                close_time=ts + timedelta(minutes=1), profit_loss=Decimal('1')
+            ))
+        session.commit()
+    finally:
+        session.close()
+
+
+def walk(api, url):
+    """Follow next_cursor to the end, returning the ids seen"""
+    ids, cursor = [], None
+    while True:
+        body = api.get(url + (f'&cursor={cursor}' if cursor else '')).get_json()
+        page = body.get('trades', body.get('signals'))
+        ids.extend(row['id'] for row in page)
+        cursor = body['pagination']['next_cursor'] if 'pagination' in body else body['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def test_cursor_walk_matches_offset_order_and_ignores_new_rows():
+    seed_trades('PAGEA', 25)
+    api = client()
+
+    expected = [t['id'] for t in api.get(
+        '/api/trading/trades?symbol=PAGEA&limit=100&offset=0'
+    ).get_json()['trades']]
+    assert len(expected) == 25
+
+    # Without a cursor the response keeps its page totals
+    first = api.get('/api/trading/trades?symbol=PAGEA&limit=10').get_json()
+    assert [t['id'] for t in first['trades']] == expected[:10]
+    assert first['pagination']['has_next'] is True
+    assert {'page', 'total', 'total_pages'} <= set(first['pagination'])
+
+    # A newer trade arriving between pages does not shift the next page
+    session = SessionLocal()
+    try:
+        session.add(Trade(action='SELL', symbol='PAGEA', quantity=Decimal('1'),
+                          open_price=Decimal('1'), open_time=T0 + timedelta(days=1),
+                          status='OPEN'))
+        session.commit()
+    finally:
+        session.close()
+    cursor = first['pagination']['next_cursor']
+    second = api.get(f'/api/trading/trades?symbol=PAGEA&limit=10&cursor={cursor}').get_json()
+    assert [t['id'] for t in second['trades']] == expected[10:20]
+
+    # Offset pages hand over a cursor for the rest of the walk
+    legacy = api.get('/api/trading/trades?symbol=PAGEA&status=CLOSED&page=2&limit=10').get_json()
+    assert legacy['pagination']['page'] == 2 and 'total_pages' in legacy['pagination']
+    cursor = legacy['pagination']['next_cursor']
+    rest = api.get(f'/api/trading/trades?symbol=PAGEA&status=CLOSED&limit=10&cursor={cursor}').get_json()
+    assert [t['id'] for t in rest['trades']] == expected[20:]
+    assert rest['pagination']['next_cursor'] is None
+
+
+def test_history_and_signals_walk_every_row_once():
+    seed_trades('PAGEH', 13)
+    session = SessionLocal()
+    try:
+        for i in range(9):
+            session.add(Signal(symbol='PAGES', action='BUY', source='test',
+                               created_at=T0 + timedelta(seconds=i // 3)))
+        session.commit()
+    finally:
+        session.close()
+    api = client()
+
+    history = walk(api, '/api/trading/history?symbol=PAGEH&limit=4')
+    assert len(history) == len(set(history)) == 13
+
+    signals = walk(api, '/api/trading/signals?symbol=PAGES&limit=2')
+    assert len(signals) == len(set(signals)) == 9
+    assert signals == sorted(signals, reverse=True)
+
+    first = api.get('/api/trading/signals?symbol=PAGES&limit=2').get_json()
+    assert 'total' in first and first['pagination']['offset'] == 0
+    cursor = first['pagination']['next_cursor']
+    counted = api.get(f'/api/trading/signals?symbol=PAGES&limit=2&count=exact&cursor={cursor}').get_json()
+    assert counted['total'] == 9 and counted['pagination']['total_estimated'] is False
+    approx = api.get('/api/trading/history?symbol=PAGEH&limit=2&count=approx').get_json()
+    assert approx['total'] == 13
+
+    assert api.get('/api/trading/signals?cursor=bogus').status_code == 400
+    for url in ('/api/trading/trades', '/api/trading/signals', '/api/trading/history'):
+        assert api.get(f'{url}?limit=0').status_code == 400
+    history_cursor = api.get('/api/trading/history?symbol=PAGEH&limit=2').get_json()['next_cursor']
+    assert api.get(f'/api/trading/trades?cursor={history_cursor}').status_code == 400
+
+
+def test_null_sort_values_are_paged_too():
+    session = SessionLocal()
+    try:
+        for i in range(5):
+            session.add(Trade(action='BUY', symbol='PAGEN', quantity=Decimal('1'),
+                              open_price=Decimal('1'), status='CLOSED',
+                              close_time=None if i % 2 else T0 + timedelta(minutes=i)))
+        session.commit()
+
+        stmt = select(Trade).where(Trade.symbol == 'PAGEN')
+        seen, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(session, stmt, Trade.close_time, Trade.id,
+                                       'close_time', 2, cursor)
+            seen.extend(row.id for row in rows)
+            if cursor is None:
+                break
+    finally:
+        session.close()
+    assert len(seen) == len(set(seen)) == 5
+
+
+def test_cursor_round_trip_and_rejection():
+    token = encode_cursor('open_time', T0, 42)
+    assert decode_cursor(token, 'open_time') == (T0, 42)
+    for bad, key in ((token, 'created_at'), ('!!', 'open_time'), ('e30', 'open_time')):
+        try:
+            decode_cursor(bad, key)
+        except InvalidCursor:
+            continue
+        raise AssertionError(f'{bad!r} accepted')
+
+
+def test_unfiltered_keyset_page_uses_an_index():
+    if engine.dialect.name != 'sqlite':
+        pytest.skip('EXPLAIN QUERY PLAN assertions are SQLite specific')
+    session = SessionLocal()
+    try:
+        stmt = select(Trade)
+        after = T0 + timedelta(minutes=5)
+        query = stmt.where(_after(Trade.open_time, Trade.id, after, 3, False)) \
+            .order_by(Trade.open_time.desc(), Trade.id.desc()).limit(11)
+        sql = str(query.compile(engine, compile_kwargs={'literal_binds': True}))
+        plan = '\n'.join(row[-1] for row in session.execute(text(f'EXPLAIN QUERY PLAN {sql}')))
+    finally:
+        session.close()
+    assert 'ix_trades_open_time_id' in plan, plan
+    assert 'USE TEMP B-TREE' not in plan, plan
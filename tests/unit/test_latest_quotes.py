@@ -0,0 +1,149 @@
+"""
+Test the latest_quotes table maintained by the tick buffer and the
+endpoints that read it
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask import Flask
+
+from src.api.chart import chart_bp
+from src.api.historical import historical_bp
+from src.database import upsert
+from src.database.session import SessionLocal
+from src.models.base import AllowedInstrument, HistoricalPrice, LatestQuote, PriceHistory
+from src.services.latest_quote_service import rebuild_latest_quotes, upsert_latest_quotes
+from src.services.tick_buffer_service import TickWriteBuffer
+
+T0 = datetime(2024, 3, 1, 12, 0)
+
+
+def make_tick(symbol, seconds, mid):
+    mid = Decimal(str(mid))
+    return {
+        'symbol': symbol,
+        'timestamp': T0 + timedelta(seconds=seconds),
+        'bid_price': mid - 1,
+        'ask_price': mid + 1,
+        'mid_price': mid,
+        'spread': Decimal('2'),
+        'spread_pct': Decimal('2') / mid * 100,
+        'volume_bid': Decimal('1'),
+        'volume_ask': Decimal('1'),
+    }
+
+
+def quote(symbol):
+    session = SessionLocal()
+    try:
+        return session.get(LatestQuote, symbol)
+    finally:
+        session.close()
+
+
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(historical_bp)
+    app.register_blueprint(chart_bp)
+    return app.test_client()
+
+
+def test_flush_moves_latest_quote_forward_only():
+    buffer = TickWriteBuffer(max_rows=100, flush_interval=60)
+    for second, mid in enumerate([100, 101, 102]):
+        buffer.add(make_tick('LQA', second, mid))
+    buffer.add(make_tick('LQB', 0, 50))
+    buffer.flush()
+
+    assert quote('LQA').mid_price == Decimal('102')
+    assert quote('LQA').timestamp == T0 + timedelta(seconds=2)
+    assert quote('LQB').mid_price == Decimal('50')
+
+    # A late, older tick is stored but does not rewind the quote
+    buffer.add(make_tick('LQA', 1, 90))
+    buffer.add(make_tick('LQB', 5, 55))
+    buffer.flush()
+    assert quote('LQA').mid_price == Decimal('102')
+    assert quote('LQB').mid_price == Decimal('55')
+
+
+def test_rebuild_from_stored_ticks():
+    session = SessionLocal()
+    try:
+        session.add_all([
+            # Stored out of order: the newest tick has the lower id
+            HistoricalPrice(**make_tick('LQR', 1, 11)),
+            HistoricalPrice(**make_tick('LQR', 0, 10)),
+        ])
+        session.commit()
+        rebuild_latest_quotes(session)
+    finally:
+        session.close()
+    assert quote('LQR').mid_price == Decimal('11')
+    assert client().post('/api/historical/latest/rebuild').get_json()['success'] is True
+
+
+def test_endpoints_read_latest_quotes():
+    session = SessionLocal()
+    try:
+        session.add_all([
+            AllowedInstrument(symbol='LQEUSD', name='Enabled', enabled=True),
+            AllowedInstrument(symbol='LQDUSD', name='Disabled', enabled=False),
+            # Candles: 24h reference for both, latest close only for the candle-only symbol
+            PriceHistory(symbol='LQEUSD', timeframe='1m', timestamp=T0 - timedelta(hours=23),
+                         open_price=100, high_price=100, low_price=100, close_price=100, volume=1),
+            PriceHistory(symbol='LQCUSD', timeframe='1m', timestamp=T0 - timedelta(hours=30),
+                         open_price=40, high_price=40, low_price=40, close_price=40, volume=1),
+            PriceHistory(symbol='LQCUSD', timeframe='1m', timestamp=T0 - timedelta(hours=2),
+                         open_price=50, high_price=50, low_price=50, close_price=50, volume=1),
+            PriceHistory(symbol='LQCUSD', timeframe='1m', timestamp=T0,
+                         open_price=55, high_price=55, low_price=55, close_price=55, volume=1),
+            # Collector stalled 5h ago; candles kept coming
+            PriceHistory(symbol='LQSUSD', timeframe='1m', timestamp=T0 - timedelta(hours=23),
+                         open_price=40, high_price=40, low_price=40, close_price=40, volume=1),
+            PriceHistory(symbol='LQSUSD', timeframe='1m', timestamp=T0,
+                         open_price=80, high_price=80, low_price=80, close_price=80, volume=1),
+            # Tick 24h reference for the live symbol
+            HistoricalPrice(**make_tick('LQEUSD', -23 * 3600, 100)),
+        ])
+        session.commit()
+    finally:
+        session.close()
+
+    buffer = TickWriteBuffer(max_rows=100, flush_interval=60)
+    buffer.add(make_tick('LQEUSD', 0, 110))
+    buffer.add(make_tick('LQDUSD', 0, 20))
+    buffer.add(make_tick('LQSUSD', -5 * 3600, 70))
+    buffer.flush()
+
+    api = client()
+    latest = api.get('/api/historical/latest').get_json()
+    by_symbol = {p['symbol']: p for p in latest['prices']}
+    assert 'LQDUSD' not in by_symbol
+    assert by_symbol['LQEUSD']['name'] == 'Enabled'
+    assert by_symbol['LQEUSD']['mid'] == 110.0
+    assert by_symbol['LQEUSD']['bid'] == 109.0
+
+    prices = api.post('/api/chart/multi-symbol-prices', json={
+        'symbols': ['lqeusd', 'LQCUSD', 'LQSUSD', 'LQNONE'], 'timeframe': '1m'
+    }).get_json()['prices']
+    assert set(prices) == {'LQEUSD', 'LQCUSD', 'LQSUSD'}
+    assert prices['LQEUSD']['price'] == 110.0
+    assert prices['LQEUSD']['change_24h'] == 10.0
+    assert prices['LQCUSD']['price'] == 55.0
+    assert prices['LQCUSD']['change_24h'] == 10.0
+    # The newer candle wins over the stale tick, measured against candles
+    assert prices['LQSUSD']['price'] == 80.0
+    assert prices['LQSUSD']['change_24h'] == 100.0
+
+
+def test_quotes_move_forward_without_on_conflict(monkeypatch):
+    monkeypatch.setattr(upsert, 'ON_CONFLICT_INSERTS', {})
+    session = SessionLocal()
+    try:
+        for second, mid in ((5, 30), (9, 31), (7, 29)):
+            upsert_latest_quotes(session, [make_tick('LQP', second, mid)])
+            session.commit()
+    finally:
+        session.close()
+    assert quote('LQP').mid_price == Decimal('31')
@@ -0,0 +1,171 @@
+"""
+Test the live position/price push stream
+"""
+import json
+from decimal import Decimal
+
+from flask import Flask
+
+from src.api.stream import stream_bp
+from src.database.session import SessionLocal
+from src.models.base import Trade
+from src.services.event_bus import EventBus, PRICE_UPDATED, TRADE_CLOSED, get_event_bus
+from src.services.live_stream_service import LiveStream, get_live_stream
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def quote(symbol, mid):
+    mid = Decimal(str(mid))
+    return {'symbol': symbol, 'bid': mid - 1, 'ask': mid + 1, 'mid': mid, 'received_at': 0.0}
+
+
+def test_prices_are_throttled_to_the_newest_quote_per_interval():
+    clock = FakeClock()
+    bus = EventBus()
+    hub = LiveStream(buffer_size=100, price_interval=1.0, clock=clock)
+    hub.subscribe(bus)
+
+    for mid in (100, 101, 102):
+        bus.publish(PRICE_UPDATED, quote('BTCUSD', mid))
+    bus.publish(PRICE_UPDATED, quote('ETHUSD', 10))
+    last, events = hub.wait(0, 0)
+    assert [(kind, data['symbol'], data['mid']) for _, kind, data in events] == [
+        ('price', 'BTCUSD', 100.0), ('price', 'ETHUSD', 10.0)
+    ]
+    assert hub.get_stats()['prices_throttled'] == 2
+
+    # The held-back quote goes out once its interval has passed, newest only
+    clock.now = 1.0
+    last, events = hub.wait(last, 0)
+    assert [data['mid'] for _, _, data in events] == [102.0]
+
+    last, events = hub.wait(last, 0, symbols=['ETHUSD'])
+    assert events == []
+    hub.unsubscribe()
+    assert not bus.has_subscribers(PRICE_UPDATED)
+
+
+def test_resume_tokens():
+    hub = LiveStream(buffer_size=3)
+    assert hub.resume(None) is None
+    for i in range(5):
+        hub.on_trade_event('trade.opened', {
+            'id': i, 'symbol': 'BTCUSD', 'status': 'OPEN', 'action': 'BUY',
+            'quantity': Decimal('1'), 'open_price': Decimal('100')
+        })
+    # Seq 3-5 are buffered: resuming after 2 or later works, earlier resets
+    assert hub.resume(hub.event_id(2)) == 2
+    assert hub.resume(hub.event_id(5)) == 5
+    assert hub.resume(hub.event_id(1)) is None
+    assert hub.resume('otherepoch-4') is None
+    assert hub.resume(hub.event_id(9)) is None
+    assert hub.get_stats()['resets'] == 3
+
+
+def read_events(body, count):
+    """Parse SSE events from a streamed response until `count` have arrived"""
+    events, buffer = [], ''
+    for chunk in body:
+        buffer += chunk.decode() if isinstance(chunk, bytes) else chunk
+        while '\n\n' in buffer:
+            block, buffer = buffer.split('\n\n', 1)
+            fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line and not line.startswith(':'))
+            if 'event' in fields:
+                events.append((fields.get('id'), fields['event'], json.loads(fields['data'])))
+        if len(events) >= count:
+            return events
+    return events
+
+
+def test_sse_snapshot_then_trade_deltas_then_resume():
+    api = Flask(__name__)
+    api.register_blueprint(stream_bp)
+    client = api.test_client()
+
+    session = SessionLocal()
+    try:
+        trade = Trade(action='BUY', symbol='LIVEUSD', quantity=Decimal('2'),
+                      open_price=Decimal('50'), status='OPEN')
+        session.add(trade)
+        session.commit()
+        trade_id = trade.id
+    finally:
+        session.close()
+
+    hub = get_live_stream()
+    response = client.get('/api/stream/live?channels=positions&symbols=liveusd')
+    assert response.mimetype == 'text/event-stream'
+    body = iter(response.response)
+    (snapshot_id, kind, snapshot), = read_events(body, 1)
+    assert kind == 'snapshot'
+    assert [p['id'] for p in snapshot['positions']] == [trade_id]
+    assert 'prices' not in snapshot
+
+    # Closing the trade publishes through the session hooks onto the stream
+    session = SessionLocal()
+    try:
+        trade = session.get(Trade, trade_id)
+        trade.status = 'CLOSED'
+        trade.close_price = Decimal('55')
+        session.commit()
+    finally:
+        session.close()
+    get_event_bus().publish(PRICE_UPDATED, quote('LIVEUSD', 55))
+
+    (close_id, kind, delta), = read_events(body, 1)
+    assert kind == 'position'
+    assert delta == {'op': 'remove', 'id': trade_id, 'symbol': 'LIVEUSD',
+                     'status': 'CLOSED', 'topic': TRADE_CLOSED}
+    response.close()
+    assert hub.get_stats()['clients'] == 0
+
+    # Reconnecting with the snapshot's id replays the missed delta, no snapshot
+    resumed = client.get('/api/stream/live?channels=positions', headers={'Last-Event-ID': snapshot_id})
+    body = iter(resumed.response)
+    (event_id, kind, data), = read_events(body, 1)
+    assert (event_id, kind, data['id']) == (close_id, 'position', trade_id)
+    resumed.close()
+
+    assert client.get('/api/stream/live?channels=orders').status_code == 400
+
+
+def test_lagging_client_is_told_to_resync():
+    """A reader whose next delta already left the buffer gets a reset, not a gap"""
+    hub = LiveStream(buffer_size=3)
+    for i in range(10):
+        hub.on_trade_event('trade.closed', {'id': i, 'symbol': 'BTCUSD', 'status': 'CLOSED'})
+
+    assert hub.wait(1, 0) == (10, None)
+    assert hub.get_stats()['resets'] == 1
+
+    # Right at the buffer's edge nothing was lost
+    last, events = hub.wait(7, 0)
+    assert last == 10 and [seq for seq, _, _ in events] == [8, 9, 10]
+
+
+def test_sse_sends_a_fresh_snapshot_after_lagging(monkeypatch):
+    from src.api import stream
+
+    hub = LiveStream(buffer_size=2)
+    monkeypatch.setattr(stream, 'get_live_stream', lambda: hub)
+    api = Flask(__name__)
+    api.register_blueprint(stream_bp)
+
+    response = api.test_client().get('/api/stream/live?channels=positions&symbols=LAGUSD')
+    body = iter(response.response)
+    (_, kind, _), = read_events(body, 1)
+    assert kind == 'snapshot'
+
+    for i in range(5):
+        hub.on_trade_event('trade.closed', {'id': i, 'symbol': 'LAGUSD', 'status': 'CLOSED'})
+    (event_id, kind, data), = read_events(body, 1)
+    assert (kind, data['positions']) == ('snapshot', [])
+    assert event_id == hub.event_id(5)
+    response.close()
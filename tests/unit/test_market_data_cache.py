@@ -0,0 +1,123 @@
+"""
+Test the shared market data cache: staleness budget and single-flight fetches
+"""
+import threading
+import time
+from decimal import Decimal
+
+from src.services.market_data_service import MarketDataCache
+
+
+def make_orderbook(bid, ask):
+    return {
+        'success': True,
+        'result': {
+            'buy': [{'price': str(bid), 'size': 10}],
+            'sell': [{'price': str(ask), 'size': 12}],
+        }
+    }
+
+
+def test_fresh_quotes_served_from_memory():
+    """Reads within the staleness budget do not refetch"""
+    calls = []
+
+    def fetcher(symbol):
+        calls.append(symbol)
+        return make_orderbook(100, 102)
+
+    cache = MarketDataCache(max_age_seconds=60, fetcher=fetcher)
+    quote = cache.get_quote('BTCUSD')
+    assert quote['mid'] == Decimal('101')
+    assert cache.get_quote('BTCUSD') is quote
+    assert calls == ['BTCUSD']
+
+    stats = cache.get_stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['exchange_calls_saved'] == 1
+
+
+def test_stale_quotes_are_refetched():
+    """A zero budget forces a refetch on every read"""
+    calls = []
+
+    def fetcher(symbol):
+        calls.append(symbol)
+        return make_orderbook(100, 102)
+
+    cache = MarketDataCache(max_age_seconds=0, fetcher=fetcher)
+    cache.get_quote('BTCUSD')
+    time.sleep(0.01)
+    cache.get_quote('BTCUSD')
+    assert len(calls) == 2
+    assert cache.get_stats()['stale'] == 1
+
+
+def test_concurrent_reads_coalesce_into_one_fetch():
+    """Concurrent readers of a stale symbol share one in-flight fetch"""
+    calls = []
+    release = threading.Event()
+
+    def fetcher(symbol):
+        calls.append(symbol)
+        release.wait(timeout=5)
+        return make_orderbook(200, 202)
+
+    cache = MarketDataCache(max_age_seconds=60, fetcher=fetcher)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_quote('ETHUSD')))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(r['mid'] == Decimal('201') for r in results)
+    assert cache.get_stats()['coalesced'] == 4
+
+
+def test_failed_fetch_records_error():
+    """Exchange errors return None and are exposed via last_error"""
+    cache = MarketDataCache(
+        fetcher=lambda symbol: {'success': False, 'error': {'code': 'bad_symbol'}}
+    )
+    assert cache.get_quote('NOPE') is None
+    assert cache.last_error('NOPE') == {'code': 'bad_symbol'}
+    assert cache.get_stats()['fetch_errors'] == 1
+
+
+def test_followers_do_not_get_a_stale_quote_when_the_refresh_fails():
+    """A failed leader fetch leaves waiting readers with None, not the old quote"""
+    release = threading.Event()
+    responses = [make_orderbook(100, 102)]
+
+    def fetcher(symbol):
+        if responses:
+            return responses.pop()
+        release.wait(timeout=5)
+        return {'success': False, 'error': 'timeout'}
+
+    cache = MarketDataCache(max_age_seconds=0.05, fetcher=fetcher)
+    assert cache.get_quote('BTCUSD')['mid'] == Decimal('101')
+    time.sleep(0.1)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_quote('BTCUSD')))
+        for _ in range(3)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert results == [None, None, None]
+    assert cache.get_stats()['coalesced'] == 2
@@ -0,0 +1,110 @@
+"""
+Test the streaming market feed against the offline replay feed
+"""
+import json
+import time
+from decimal import Decimal
+
+from src.services.event_bus import PRICE_UPDATED, get_event_bus
+from src.services.feed_replay_service import ReplayFeed
+from src.services.market_data_service import MarketDataCache
+from src.services.market_feed_service import L1_CHANNEL, MarketFeedClient
+
+
+def offline_cache():
+    return MarketDataCache(max_age_seconds=60, fetcher=lambda symbol: {'success': False})
+
+
+def drive(client, connection, messages):
+    """Apply messages on the test thread until the feed's outbox is empty"""
+    for _ in range(messages):
+        client.handle_message(json.loads(connection.recv()), time.perf_counter(), connection)
+    while connection._outbox:
+        client.handle_message(json.loads(connection.recv()), time.perf_counter(), connection)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_books_track_the_feed_and_quotes_reach_the_bus():
+    feed = ReplayFeed(symbols=['AFEEDUSD', 'BFEEDUSD'], rate=0)
+    cache = offline_cache()
+    client = MarketFeedClient(['AFEEDUSD', 'BFEEDUSD'], connect=feed.connect, market_data=cache)
+    published = []
+
+    def on_price(topic, payload):
+        if payload['symbol'].endswith('FEEDUSD'):
+            published.append(payload)
+
+    bus = get_event_bus()
+    bus.subscribe(PRICE_UPDATED, on_price)
+    try:
+        connection = feed.connect(client.url, 1)
+        client.subscribe(connection)
+        drive(client, connection, 400)
+    finally:
+        bus.unsubscribe(PRICE_UPDATED, on_price)
+
+    for symbol in ('AFEEDUSD', 'BFEEDUSD'):
+        book, server = client._books[symbol], feed._books[symbol]
+        assert (book.bids, book.asks, book.sequence) == (server['bids'], server['asks'], server['sequence'])
+        bid, ask = max(server['bids']), min(server['asks'])
+        assert cache.get_quote(symbol)['mid'] == (bid + ask) / 2
+    # One quote per L2 message; ticker messages do not duplicate them
+    assert len(published) == client.get_stats()['quotes_published'] >= 190
+    assert all(p['received_at'] > 0 for p in published)
+
+
+def test_sequence_gap_resyncs_from_a_fresh_snapshot():
+    feed = ReplayFeed(symbols=['GAPUSD'], rate=0, drop_every=10)
+    client = MarketFeedClient(['GAPUSD'], connect=feed.connect, market_data=offline_cache())
+    connection = feed.connect(client.url, 1)
+    client.subscribe(connection)
+    drive(client, connection, 200)
+    # Let an in-flight resync finish
+    while not client._books['GAPUSD'].synced:
+        drive(client, connection, 1)
+
+    stats = client.get_stats()
+    assert stats['gaps'] == feed.get_stats()['withheld'] >= 5
+    assert stats['resyncs'] == stats['gaps']
+    book, server = client._books['GAPUSD'], feed._books['GAPUSD']
+    assert (book.bids, book.asks) == (server['bids'], server['asks'])
+
+
+def test_reconnects_with_backoff_and_replays_a_recording(tmp_path):
+    recording = tmp_path / 'feed.jsonl'
+    feed = ReplayFeed(symbols=['RECUSD'], rate=2000, refuse_connects=2, disconnect_after=40)
+    client = MarketFeedClient(
+        ['RECUSD'], channels=[L1_CHANNEL], connect=feed.connect, market_data=offline_cache(),
+        backoff_base=0.01, backoff_max=0.05, record_to=str(recording)
+    )
+    client.start()
+    try:
+        assert wait_for(lambda: client.get_stats()['connects'] >= 3)
+    finally:
+        client.stop()
+
+    stats = client.get_stats()
+    assert stats['connect_failures'] == 2
+    assert stats['disconnects'] >= 2
+    assert stats['quotes_published'] > 0
+    assert not stats['connected']
+
+    # The recording replays into the same quotes
+    cache = offline_cache()
+    replayed = MarketFeedClient(['RECUSD'], channels=[L1_CHANNEL],
+                                connect=ReplayFeed.from_file(str(recording), rate=0).connect,
+                                market_data=cache)
+    recorded = [json.loads(line) for line in recording.read_text().splitlines()]
+    quotes = [m for m in recorded if m.get('type') == L1_CHANNEL]
+    connection = replayed.connect(replayed.url, 1)
+    replayed.subscribe(connection)
+    drive(replayed, connection, len(quotes) + 1)  # + subscription ack
+    assert cache.get_quote('RECUSD')['bid'] == Decimal(quotes[-1]['best_bid'])
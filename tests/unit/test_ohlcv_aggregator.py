@@ -0,0 +1,97 @@
+"""
+Test tick-to-candle aggregation and timeframe rollups
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from src.database.session import SessionLocal
+from src.models.base import HistoricalPrice, PriceHistory
+from src.services.ohlcv_aggregator_service import (
+    OHLCVAggregator,
+    aggregate_ticks,
+    bucket_start,
+    rollup_candles,
+    tick_timeframe,
+)
+
+
+def test_bucket_start_aligns_to_timeframe():
+    ts = datetime(2024, 1, 1, 13, 47, 31)
+    assert bucket_start(ts, 1) == datetime(2024, 1, 1, 13, 47)
+    assert bucket_start(ts, 15) == datetime(2024, 1, 1, 13, 45)
+    assert bucket_start(ts, 240) == datetime(2024, 1, 1, 12, 0)
+    assert bucket_start(ts, 1440) == datetime(2024, 1, 1)
+
+
+def test_ticks_and_rollups_produce_ohlc():
+    """1m candles from ticks merge into the same 5m candle as a direct build"""
+    start = datetime(2024, 1, 1, 10, 0)
+    prices = [100, 104, 98, 101, 107, 95, 103, 99, 102, 100]
+    ticks = [
+        (start + timedelta(seconds=45 * i), Decimal(p))
+        for i, p in enumerate(prices)
+    ]
+
+    minute = aggregate_ticks(ticks, 1)
+    assert [c['timestamp'].minute for c in minute] == [0, 1, 2, 3, 4, 5, 6]
+    assert minute[0]['open'] == 100 and minute[0]['close'] == 104
+
+    five = rollup_candles(minute, 5)
+    assert five == aggregate_ticks(ticks, 5)
+    assert five[0]['high'] == 107
+    assert five[0]['low'] == 95
+
+
+def test_incremental_aggregation_only_reads_new_ticks():
+    """A second run resumes at the last materialized bucket"""
+    symbol = 'AGGUSD'
+    start = datetime(2024, 2, 1, 0, 0)
+    session = SessionLocal()
+    try:
+        for i in range(600):
+            session.add(HistoricalPrice(
+                symbol=symbol, timestamp=start + timedelta(seconds=i),
+                bid_price=Decimal('99'), ask_price=Decimal('101'),
+                mid_price=Decimal(100 + i % 7), spread=Decimal('2'),
+                spread_pct=Decimal('2')
+            ))
+        session.commit()
+        # An imported candle for the same bucket, and a later backfill
+        for ts, close in ((start, Decimal('500')), (start + timedelta(days=1), Decimal('600'))):
+            session.add(PriceHistory(
+                symbol=symbol, timeframe='1m', timestamp=ts, open_price=close,
+                high_price=close, low_price=close, close_price=close, volume=Decimal('3')
+            ))
+        session.commit()
+    finally:
+        session.close()
+
+    aggregator = OHLCVAggregator()
+    first = aggregator.run_once([symbol])[symbol]
+    assert first['1m'] == 10
+    assert first['5m'] == 2
+    assert first['1d'] == 1
+    assert aggregator.get_stats()['ticks_read'] == 600
+
+    aggregator.run_once([symbol])
+    # Only the ticks of the last (possibly partial) minute are read again
+    assert aggregator.get_stats()['ticks_read'] == 660
+
+    session = SessionLocal()
+    try:
+        candles = session.query(PriceHistory).filter(
+            PriceHistory.symbol == symbol, PriceHistory.timeframe == tick_timeframe('5m')
+        ).order_by(PriceHistory.timestamp).all()
+        assert len(candles) == 2
+        assert candles[0].high_price == Decimal('106')
+        assert candles[0].low_price == Decimal('100')
+
+        # Imported candles are left alone
+        imported = session.query(PriceHistory).filter(
+            PriceHistory.symbol == symbol, PriceHistory.timeframe == '1m'
+        ).order_by(PriceHistory.timestamp).all()
+        assert [(c.close_price, c.volume) for c in imported] == [
+            (Decimal('500'), Decimal('3')), (Decimal('600'), Decimal('3'))
+        ]
+    finally:
+        session.close()
@@ -0,0 +1,152 @@
+"""
+Test the incrementally maintained per-symbol performance ledger
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from src.database import upsert
+from src.database.session import SessionLocal
+from src.models.base import PerformanceLedger, Trade
+from src.services.event_bus import get_event_bus
+from src.services.performance_ledger_service import (
+    LEDGER_COLUMNS,
+    PerformanceLedgerUpdater,
+    apply_increments,
+    ledger_performance,
+    rebuild_ledger,
+)
+
+SYMBOLS = ('LEDGERA', 'LEDGERB')
+
+
+def ledger_rows(session):
+    rows = session.execute(
+        select(PerformanceLedger).where(PerformanceLedger.symbol.in_(SYMBOLS))
+    ).scalars()
+    return {
+        (r.symbol, r.day): tuple(float(getattr(r, c)) for c in LEDGER_COLUMNS)
+        for r in rows
+        if r.closed_trades
+    }
+
+
+@pytest.fixture
+def updater():
+    updater = PerformanceLedgerUpdater()
+    bus = get_event_bus()
+    updater.subscribe(bus)
+    yield updater
+    for topic in ('trade.closed', 'trade.modified', 'trade.deleted'):
+        bus.unsubscribe(topic, updater.handle)
+
+
+def close(trade, price, when):
+    trade.status = 'CLOSED'
+    trade.close_price = Decimal(price)
+    trade.close_time = when
+    trade.profit_loss = (trade.close_price - trade.open_price) * trade.quantity
+
+
+def test_incremental_updates_match_rebuild(updater):
+    now = datetime.utcnow().replace(microsecond=0)
+    session = SessionLocal()
+    try:
+        trades = []
+        for i in range(12):
+            trade = Trade(
+                action='BUY', symbol=SYMBOLS[i % 2], quantity=Decimal('2'),
+                open_price=Decimal('100'), open_time=now - timedelta(days=i % 4, hours=3),
+                status='OPEN'
+            )
+            session.add(trade)
+            trades.append(trade)
+        session.commit()
+
+        for i, trade in enumerate(trades[:10]):
+            close(trade, 100 + (i % 5) - 2, now - timedelta(days=i % 4, hours=1))
+            session.commit()
+        incremental = ledger_rows(session)
+
+        # Re-closing a closed trade must not count it twice
+        trades[0].status = 'CLOSED'
+        session.commit()
+        assert ledger_rows(session) == incremental
+
+        # Edits and deletes of closed trades are reflected
+        trades[1].profit_loss = Decimal('-50')
+        trades[2].close_time = trades[2].close_time - timedelta(days=2)
+        session.commit()
+        session.delete(trades[3])
+        session.commit()
+        incremental = ledger_rows(session)
+
+        rebuild_ledger(session)
+        session.commit()
+        assert ledger_rows(session) == incremental
+        assert updater.get_stats()['closes_applied'] == 10
+        assert 'errors' not in updater.get_stats()
+    finally:
+        session.close()
+
+
+def test_ledger_performance_metrics():
+    now = datetime(2024, 5, 10, 12, 0)
+    session = SessionLocal()
+    try:
+        for pnl, hold_hours in ((30, 1), (10, 3), (-20, 2)):
+            session.add(Trade(
+                action='SELL', symbol='LEDGERC', quantity=Decimal('1'),
+                open_price=Decimal('100'), open_time=now - timedelta(days=1, hours=hold_hours),
+                close_time=now - timedelta(days=1), profit_loss=Decimal(pnl),
+                status='CLOSED'
+            ))
+        # Outside the 7-day window
+        session.add(Trade(
+            action='SELL', symbol='LEDGERC', quantity=Decimal('1'),
+            open_price=Decimal('100'), open_time=now - timedelta(days=20),
+            close_time=now - timedelta(days=19), profit_loss=Decimal('500'),
+            status='CLOSED'
+        ))
+        session.add(Trade(
+            action='BUY', symbol='LEDGERC', quantity=Decimal('1'),
+            open_price=Decimal('100'), open_time=now - timedelta(hours=1), status='OPEN'
+        ))
+        session.commit()
+        rebuild_ledger(session)
+        session.commit()
+
+        [perf] = ledger_performance(session, days=7, symbol='LEDGERC', now=now)
+    finally:
+        session.close()
+
+    assert perf['total_trades'] == 4
+    assert perf['open_trades'] == 1
+    assert perf['closed_trades'] == 3
+    assert perf['winning_trades'] == 2
+    assert perf['losing_trades'] == 1
+    assert perf['win_rate'] == pytest.approx(66.67)
+    assert perf['total_pnl'] == pytest.approx(20)
+    assert perf['average_win'] == pytest.approx(20)
+    assert perf['average_loss'] == pytest.approx(-20)
+    assert perf['risk_reward_ratio'] == 1.0
+    assert perf['avg_hold_time_hours'] == 2.0
+
+
+def test_increments_add_up_without_on_conflict(monkeypatch):
+    """The portable upsert path adds to existing ledger rows too"""
+    monkeypatch.setattr(upsert, 'ON_CONFLICT_INSERTS', {})
+    key = ('LEDGERP', datetime(2024, 6, 1).date())
+    session = SessionLocal()
+    try:
+        for _ in range(2):
+            apply_increments(session, {key: {column: 1 for column in LEDGER_COLUMNS}})
+            session.commit()
+        row = session.execute(
+            select(PerformanceLedger).where(PerformanceLedger.symbol == key[0])
+        ).scalar_one()
+        assert all(float(getattr(row, column)) == 2 for column in LEDGER_COLUMNS)
+    finally:
+        session.close()
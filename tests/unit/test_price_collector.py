@@ -0,0 +1,59 @@
+"""
+Test concurrent price collection cycles and collector stats
+"""
+import time
+
+from src.services.price_collector_service import PriceCollector
+
+
+def make_collector(delay: float, symbols):
+    collector = PriceCollector(collection_interval=1, max_concurrency=len(symbols))
+    collector.enabled_symbols = list(symbols)
+    saved = []
+
+    def collect(symbol):
+        time.sleep(delay)
+        return {
+            'symbol': symbol,
+            'mid_price': 100,
+            'bid_price': 99,
+            'ask_price': 101,
+            'spread_pct': 2,
+        }
+
+    collector.collect_price_data = collect
+    collector.save_price_data = lambda data: saved.append(data['symbol']) or True
+    return collector, saved
+
+
+def test_cycle_fetches_symbols_concurrently():
+    """One cycle takes about one fetch, not the sum of all fetches"""
+    symbols = ['BTCUSD', 'ETHUSD', 'SOLUSD', 'XRPUSD']
+    collector, saved = make_collector(0.2, symbols)
+
+    started = time.monotonic()
+    try:
+        counts = collector.run_cycle()
+    finally:
+        collector.executor.shutdown()
+    elapsed = time.monotonic() - started
+
+    assert counts == {'collected': 4, 'saved': 4}
+    assert saved == symbols
+    assert elapsed < 0.6
+
+
+def test_stats_report_fetch_latency_per_symbol():
+    """Per-symbol fetch latency is recorded for every collected symbol"""
+    collector, _ = make_collector(0.01, ['BTCUSD', 'ETHUSD'])
+    try:
+        collector.run_cycle()
+    finally:
+        collector.executor.shutdown()
+    collector._record_cycle(0.05)
+
+    stats = collector.get_stats()
+    assert set(stats['fetch_latency_ms']) == {'BTCUSD', 'ETHUSD'}
+    assert stats['fetch_latency_ms']['BTCUSD'] >= 10
+    assert stats['cycles'] == 1
+    assert stats['cycle_seconds']['last'] == 0.05
@@ -0,0 +1,77 @@
+"""
+Test the bulk upsert path for PriceHistory candles
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from src.database import upsert
+from src.database.session import SessionLocal
+from src.models.base import PriceHistory
+from src.services.price_service import PriceHistoryService
+
+
+def make_candles(count, close='100'):
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            'timestamp': start + timedelta(hours=i),
+            'open': Decimal('100'),
+            'high': Decimal('110'),
+            'low': Decimal('90'),
+            'close': Decimal(close),
+            'volume': Decimal('5'),
+        }
+        for i in range(count)
+    ]
+
+
+def test_upsert_inserts_then_updates():
+    """Re-saving overlapping candles updates them instead of duplicating"""
+    session = SessionLocal()
+    try:
+        service = PriceHistoryService(session)
+
+        first = service.upsert_price_data('UPSERTUSDT', '1h', make_candles(3))
+        assert first == {'inserted': 3, 'updated': 0}
+
+        second = service.upsert_price_data('UPSERTUSDT', '1h', make_candles(5, close='105'))
+        assert second == {'inserted': 2, 'updated': 3}
+
+        rows = session.query(PriceHistory).filter(
+            PriceHistory.symbol == 'UPSERTUSDT'
+        ).all()
+        assert len(rows) == 5
+        assert all(row.close_price == Decimal('105') for row in rows)
+    finally:
+        session.close()
+
+
+def test_save_price_data_counts_new_candles_only():
+    """save_price_data keeps returning the number of new candles"""
+    session = SessionLocal()
+    try:
+        service = PriceHistoryService(session)
+
+        assert service.save_price_data('SAVEUSDT', '4h', make_candles(4)) == 4
+        assert service.save_price_data('SAVEUSDT', '4h', make_candles(4)) == 0
+    finally:
+        session.close()
+
+
+def test_portable_upsert_without_on_conflict(monkeypatch):
+    """Backends without ON CONFLICT take the select-then-insert/update path"""
+    monkeypatch.setattr(upsert, 'ON_CONFLICT_INSERTS', {})
+    session = SessionLocal()
+    try:
+        service = PriceHistoryService(session)
+
+        assert service.upsert_price_data('PORTUSDT', '1h', make_candles(2)) == {'inserted': 2, 'updated': 0}
+        assert service.upsert_price_data('PORTUSDT', '1h', make_candles(4, close='99')) == {
+            'inserted': 2, 'updated': 2
+        }
+        closes = [row.close_price for row in session.query(PriceHistory).filter(
+            PriceHistory.symbol == 'PORTUSDT'
+        ).order_by(PriceHistory.timestamp)]
+        assert closes == [Decimal('99')] * 4
+    finally:
+        session.close()
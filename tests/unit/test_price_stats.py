@@ -0,0 +1,83 @@
+"""
+Test SQL-side price statistics against a straightforward Python computation
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from src.database.session import SessionLocal
+from src.models.base import HistoricalPrice
+from src.services.price_stats_service import raw_price_stats, summary_price_stats
+from src.services.tick_retention_service import MINUTE_TIER, TickRetention
+
+SYMBOL = 'STATUSD'
+START = datetime(2024, 4, 1, 0, 0)
+
+
+@pytest.fixture(scope='module')
+def ticks():
+    mids = [Decimal(100 + (i * 7) % 13) for i in range(720)]
+    spreads = [Decimal('0.01') * (1 + i % 5) for i in range(720)]
+    session = SessionLocal()
+    try:
+        for i, (mid, spread) in enumerate(zip(mids, spreads)):
+            session.add(HistoricalPrice(
+                symbol=SYMBOL, timestamp=START + timedelta(seconds=5 * i),
+                bid_price=mid - 1, ask_price=mid + 1, mid_price=mid,
+                spread=Decimal('2'), spread_pct=spread
+            ))
+        session.commit()
+    finally:
+        session.close()
+    return [float(m) for m in mids], [float(s) for s in spreads]
+
+
+def test_raw_stats_match_python(ticks):
+    mids, spreads = ticks
+    session = SessionLocal()
+    try:
+        stats = raw_price_stats(session, SYMBOL, START)
+    finally:
+        session.close()
+
+    assert stats['data_points'] == len(mids)
+    assert stats['first_timestamp'] == START.isoformat()
+    assert stats['price']['current'] == mids[-1]
+    assert stats['price']['high'] == max(mids)
+    assert stats['price']['low'] == min(mids)
+    assert stats['price']['avg'] == pytest.approx(sum(mids) / len(mids))
+    assert stats['price']['change'] == mids[-1] - mids[0]
+    assert stats['spread']['current'] == spreads[-1]
+    assert stats['spread']['avg'] == pytest.approx(sum(spreads) / len(spreads))
+    assert stats['spread']['max'] == max(spreads)
+
+
+def test_summary_stats_match_raw(ticks):
+    """Stats from minute summaries agree with stats over the raw ticks"""
+    TickRetention().downsample_symbol(SYMBOL, now=START + timedelta(hours=2))
+
+    session = SessionLocal()
+    try:
+        raw = raw_price_stats(session, SYMBOL, START)
+        summary = summary_price_stats(session, SYMBOL, MINUTE_TIER, START)
+    finally:
+        session.close()
+
+    assert summary['data_points'] == raw['data_points']
+    assert summary['price']['current'] == raw['price']['current']
+    assert summary['price']['high'] == raw['price']['high']
+    assert summary['price']['low'] == raw['price']['low']
+    assert summary['price']['avg'] == pytest.approx(raw['price']['avg'])
+    assert summary['price']['change'] == raw['price']['change']
+    assert summary['spread']['avg'] == pytest.approx(raw['spread']['avg'])
+    assert summary['spread']['min'] == raw['spread']['min']
+
+
+def test_empty_window_returns_none():
+    session = SessionLocal()
+    try:
+        assert raw_price_stats(session, 'NOPEUSD', START) is None
+        assert summary_price_stats(session, 'NOPEUSD', MINUTE_TIER, START) is None
+    finally:
+        session.close()
@@ -0,0 +1,119 @@
+"""
+Query-plan regression test: the hot API and monitor queries must be
+answered through an index, not a full table scan, on a seeded dataset
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import desc, select, text
+
+from src.database.session import SessionLocal, engine
+from src.models.base import HistoricalPrice, PriceHistory, Signal, Trade
+from src.services.signal_queue_service import QUEUED_STATUS
+
+SYMBOLS = ['BTCUSD', 'ETHUSD', 'SOLUSD', 'XRPUSD']
+
+
+@pytest.fixture(scope='module', autouse=True)
+def seeded():
+    """Seed enough rows per table for the planner to prefer indexes"""
+    if engine.dialect.name != 'sqlite':
+        pytest.skip('EXPLAIN QUERY PLAN assertions are SQLite specific')
+
+    start = datetime(2024, 1, 1)
+    session = SessionLocal()
+    try:
+        for i in range(400):
+            symbol = SYMBOLS[i % len(SYMBOLS)]
+            ts = start + timedelta(minutes=i)
+            session.add(Trade(
+                action='BUY', symbol=symbol, quantity=Decimal('1'),
+                open_price=Decimal('100'), open_time=ts,
+                status='OPEN' if i % 10 == 0 else 'CLOSED',
+                close_time=None if i % 10 == 0 else ts + timedelta(minutes=5)
+            ))
+            session.add(Signal(
+                symbol=symbol, action='BUY', price=Decimal('100'),
+                status='EXECUTED', created_at=ts
+            ))
+            session.add(HistoricalPrice(
+                symbol=symbol, timestamp=ts, bid_price=Decimal('99'),
+                ask_price=Decimal('101'), mid_price=Decimal('100'),
+                spread=Decimal('2'), spread_pct=Decimal('2')
+            ))
+            session.add(PriceHistory(
+                symbol=symbol, timeframe='1m', timestamp=ts,
+                open_price=Decimal('100'), high_price=Decimal('100'),
+                low_price=Decimal('100'), close_price=Decimal('100'),
+                volume=Decimal('1')
+            ))
+        session.commit()
+        session.execute(text('ANALYZE'))
+    finally:
+        session.close()
+
+
+def query_plan(query) -> str:
+    """EXPLAIN QUERY PLAN output for a statement with literal binds"""
+    sql = str(query.compile(engine, compile_kwargs={'literal_binds': True}))
+    with engine.connect() as conn:
+        rows = conn.execute(text(f'EXPLAIN QUERY PLAN {sql}')).fetchall()
+    return '\n'.join(row[-1] for row in rows)
+
+
+HOT_QUERIES = {
+    'monitor open trades': (
+        select(Trade).where(Trade.status == 'OPEN'),
+        'trades',
+    ),
+    'open positions list': (
+        select(Trade).where(Trade.status == 'OPEN').order_by(Trade.open_time.desc()),
+        'trades',
+    ),
+    'trades by status': (
+        select(Trade).where(Trade.status == 'CLOSED')
+        .order_by(Trade.open_time.desc()).limit(100),
+        'trades',
+    ),
+    'trades by symbol and status': (
+        select(Trade).where(Trade.status == 'CLOSED', Trade.symbol == 'ETHUSD')
+        .order_by(Trade.open_time.desc()).limit(100),
+        'trades',
+    ),
+    'trade history': (
+        select(Trade).where(Trade.status == 'CLOSED')
+        .order_by(desc(Trade.close_time)).limit(50),
+        'trades',
+    ),
+    'signals by status': (
+        select(Signal).where(Signal.status == QUEUED_STATUS).order_by(Signal.created_at),
+        'signals',
+    ),
+    'signals by symbol': (
+        select(Signal).where(Signal.symbol == 'BTCUSD')
+        .order_by(Signal.created_at.desc()).limit(100),
+        'signals',
+    ),
+    'tick history': (
+        select(HistoricalPrice).where(HistoricalPrice.symbol == 'BTCUSD')
+        .order_by(desc(HistoricalPrice.timestamp)).limit(1000),
+        'historical_prices',
+    ),
+    'ohlcv candles': (
+        select(PriceHistory).where(
+            PriceHistory.symbol == 'BTCUSD', PriceHistory.timeframe == '1m'
+        ).order_by(desc(PriceHistory.timestamp)).limit(500),
+        'price_history',
+    ),
+}
+
+
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_hot_query_uses_index(name):
+    """Each hot query searches its table through an index"""
+    query, table = HOT_QUERIES[name]
+    plan = query_plan(query)
+
+    assert f'SEARCH {table} USING' in plan and 'INDEX' in plan, plan
+    assert 'USE TEMP B-TREE' not in plan, plan
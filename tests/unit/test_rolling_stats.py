@@ -0,0 +1,263 @@
+"""
+Test the incrementally maintained rolling 24h statistics
+"""
+import random
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+from src.api.chart import chart_bp
+from src.database.session import SessionLocal
+from src.models.base import HistoricalPrice, PriceHistory
+from src.services.price_service import PriceHistoryService
+from src.services.price_stats_service import get_price_stats, raw_price_stats
+from src.services.rolling_stats_service import RollingStats, RollingWindow, get_rolling_stats
+from src.services.tick_buffer_service import TickWriteBuffer
+
+DAY = timedelta(hours=24)
+
+
+def brute_force(ticks, cutoff):
+    """Window over whole minute buckets whose newest tick is at or after cutoff"""
+    newest = {}
+    for ts, _, _ in ticks:
+        minute = ts.replace(second=0, microsecond=0)
+        newest[minute] = max(newest.get(minute, ts), ts)
+    kept = sorted(
+        (t for t in ticks if newest[t[0].replace(second=0, microsecond=0)] >= cutoff),
+        key=lambda t: t[0]
+    )
+    prices = [p for _, p, _ in kept]
+    spreads = [s for _, _, s in kept]
+    return {
+        'count': len(kept), 'open': prices[0], 'close': prices[-1],
+        'high': max(prices), 'low': min(prices), 'avg': sum(prices) / len(prices),
+        'spread_min': min(spreads), 'spread_max': max(spreads),
+        'spread_avg': sum(spreads) / len(spreads), 'spread_current': spreads[-1],
+    }
+
+
+def test_window_matches_a_full_recomputation():
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1)
+    window = RollingWindow(DAY)
+    ticks = []
+    price = Decimal('100')
+    for i in range(6000):
+        # ~30h of ticks, a few arriving out of order
+        ts = start + timedelta(seconds=i * 18 + rng.randint(0, 3))
+        price += Decimal(rng.randint(-50, 50)) / 100
+        spread = Decimal(rng.randint(1, 40)) / 100
+        ticks.append((ts, price, spread))
+        window.add(ts.replace(second=0, microsecond=0), ts, price, spread=spread)
+
+        if i % 500 == 499:
+            cutoff = ts - DAY
+            window.evict(cutoff)
+            expected = brute_force(ticks, cutoff)
+            snapshot = window.snapshot()
+            assert {key: snapshot[key] for key in expected} == expected
+
+    assert len(window) <= 24 * 60 + 1
+
+
+def test_candle_revisions_and_backfill():
+    window = RollingWindow(DAY)
+    t0 = datetime(2024, 1, 1)
+
+    def candle(hour, high, low, close, volume):
+        ts = t0 + timedelta(hours=hour)
+        window.add(ts, ts, Decimal(close), Decimal(high), Decimal(low), Decimal(volume), replace=True)
+
+    for hour in range(3, 10):
+        candle(hour, 110, 90, 100, 5)
+    # Forming candle widens, then a correction shrinks it
+    candle(9, 130, 90, 125, 8)
+    assert window.snapshot()['high'] == 130
+    candle(9, 105, 95, 101, 6)
+    snapshot = window.snapshot()
+    assert (snapshot['high'], snapshot['low'], snapshot['close']) == (110, 90, 101)
+    assert snapshot['volume'] == 6 * 5 + 6
+    assert snapshot['count'] == 7
+
+    # Backfilled older candle becomes the window's first close
+    candle(1, 150, 50, 80, 2)
+    snapshot = window.snapshot()
+    assert (snapshot['open'], snapshot['high'], snapshot['low']) == (80, 150, 50)
+
+    # Sliding past the backfilled candle forgets it
+    candle(26, 100, 99, 100, 1)
+    window.evict(t0 + timedelta(hours=2))
+    snapshot = window.snapshot()
+    assert (snapshot['open'], snapshot['high'], snapshot['low']) == (100, 110, 90)
+
+
+def make_tick(symbol, ts, mid, spread_pct):
+    return {
+        'symbol': symbol, 'timestamp': ts,
+        'bid_price': Decimal(mid) - 1, 'ask_price': Decimal(mid) + 1, 'mid_price': Decimal(mid),
+        'spread': Decimal('2'), 'spread_pct': Decimal(spread_pct),
+        'volume_bid': Decimal('1'), 'volume_ask': Decimal('1'),
+    }
+
+
+def test_cold_start_then_incremental_ticks_match_the_database():
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    session = SessionLocal()
+    try:
+        session.add_all([
+            HistoricalPrice(**make_tick('RSTAT', now - timedelta(hours=30), 500, '0.9')),
+            HistoricalPrice(**make_tick('RSTAT', now - timedelta(hours=20), 90, '0.5')),
+            HistoricalPrice(**make_tick('RSTAT', now - timedelta(hours=2), 120, '0.1')),
+        ])
+        session.commit()
+    finally:
+        session.close()
+
+    rolling = get_rolling_stats()
+    loads = rolling.get_stats()['loads']
+    first = rolling.tick_stats('RSTAT')
+    assert rolling.get_stats()['loads'] == loads + 1
+    assert (first['count'], first['open'], first['high'], first['low']) == (2, 90, 120, 90)
+
+    buffer = TickWriteBuffer(max_rows=100, flush_interval=60)
+    buffer.add(make_tick('RSTAT', now - timedelta(minutes=30), 130, '0.3'))
+    buffer.add(make_tick('RSTAT', now - timedelta(minutes=1), 110, '0.2'))
+    buffer.flush()
+
+    session = SessionLocal()
+    try:
+        stats = get_price_stats(session, 'RSTAT', 24)
+        expected = raw_price_stats(session, 'RSTAT', datetime.utcnow() - DAY)
+    finally:
+        session.close()
+    assert rolling.get_stats()['loads'] == loads + 1
+    assert stats['resolution'] == 'raw' and stats['period_hours'] == 24
+    for key in ('data_points', 'first_timestamp', 'last_timestamp'):
+        assert stats[key] == expected[key], key
+    # SQLite averages in floating point; the rolling sums are exact decimals
+    assert stats['price'] == pytest.approx(expected['price'])
+    assert stats['spread'] == pytest.approx(expected['spread'])
+    assert stats['price']['high'] == 130.0 and stats['price']['current'] == 110.0
+
+
+def test_latest_price_endpoint_reads_the_candle_window():
+    t0 = datetime(2024, 5, 1)
+    session = SessionLocal()
+    try:
+        service = PriceHistoryService(session)
+        service.upsert_price_data('RCANDLE', '1h', [
+            {'timestamp': t0 + timedelta(hours=h), 'open': 100, 'high': 100 + h,
+             'low': 100 - h, 'close': 100 + h, 'volume': 10}
+            for h in range(30)
+        ])
+    finally:
+        session.close()
+
+    api = Flask(__name__)
+    api.register_blueprint(chart_bp)
+    client = api.test_client()
+
+    body = client.get('/api/chart/latest-price?symbol=rcandle&timeframe=1h').get_json()
+    # Window: candles 5..29 (>= newest - 24h)
+    assert body['price'] == 129.0
+    assert body['volume_24h'] == 250.0
+    assert (body['high_24h'], body['low_24h']) == (129.0, 71.0)
+    assert body['change_24h'] == round((129 - 105) / 105 * 100, 2)
+
+    # The forming candle is revised in place and a new one opens
+    session = SessionLocal()
+    try:
+        PriceHistoryService(session).upsert_price_data('RCANDLE', '1h', [
+            {'timestamp': t0 + timedelta(hours=29), 'open': 100, 'high': 140,
+             'low': 71, 'close': 139, 'volume': 12},
+            {'timestamp': t0 + timedelta(hours=30), 'open': 139, 'high': 139,
+             'low': 138, 'close': 138, 'volume': 1},
+        ])
+    finally:
+        session.close()
+    body = client.get('/api/chart/latest-price?symbol=RCANDLE&timeframe=1h').get_json()
+    assert body['price'] == 138.0
+    assert body['high_24h'] == 140.0
+    assert body['volume_24h'] == 250.0 - 10 - 10 + 12 + 1
+    assert body['timestamp'] == (t0 + timedelta(hours=30)).isoformat()
+
+    assert client.get('/api/chart/latest-price?symbol=NOPE&timeframe=1h').status_code == 404
+
+
+def test_cold_loads_run_outside_the_lock_and_empty_results_are_cached():
+    """A slow load doesn't block other series, and unknown symbols aren't reloaded per read"""
+    release = threading.Event()
+    loading = threading.Event()
+
+    class SlowSession:
+        def __init__(self):
+            self.session = SessionLocal()
+
+        def query(self, *args):
+            # Only the first load is slow
+            if not loading.is_set():
+                loading.set()
+                release.wait(timeout=5)
+            return self.session.query(*args)
+
+        def close(self):
+            self.session.close()
+
+    rolling = RollingStats(session_factory=SlowSession, empty_ttl=60)
+    reader = threading.Thread(target=rolling.tick_stats, args=('RSLOW',))
+    reader.start()
+    assert loading.wait(timeout=5)
+    # Another series can be updated while the load is blocked on the database
+    rolling.add_candles('RFAST', '1m', [])
+    assert rolling.get_stats()['candle_series'] == 1
+    assert reader.is_alive()
+    release.set()
+    reader.join()
+
+    assert rolling.tick_stats('RSLOW') is None
+    assert rolling.tick_stats('RSLOW') is None
+    assert rolling.get_stats()['loads'] == 2
+
+    rolling.empty_ttl = 0
+    assert rolling.tick_stats('RSLOW') is None
+    assert rolling.get_stats()['loads'] == 3
+
+
+def test_candle_windows_see_writes_from_elsewhere():
+    """Loads don't close the caller's session; candles written outside add_candles still show up"""
+    t0 = datetime(2024, 6, 1)
+
+    def candle(hour, close):
+        return PriceHistory(symbol='RELSE', timeframe='1h', timestamp=t0 + timedelta(hours=hour),
+                            open_price=close, high_price=close, low_price=close,
+                            close_price=close, volume=1)
+
+    rolling = RollingStats()
+    session = SessionLocal()
+    try:
+        session.add(candle(0, 100))
+        # A cold load inside the caller's transaction leaves it alone
+        rolling.add_candles('RELSE', '1h', [{
+            'timestamp': t0, 'high_price': 100, 'low_price': 100, 'close_price': 100, 'volume': 1
+        }])
+        session.commit()
+        assert session.query(PriceHistory).filter(PriceHistory.symbol == 'RELSE').count() == 1
+    finally:
+        session.close()
+    assert rolling.candle_stats('RELSE', '1h')['close'] == 100
+
+    # Another process revises the newest candle and adds one
+    other = SessionLocal.session_factory()
+    try:
+        other.query(PriceHistory).filter(PriceHistory.symbol == 'RELSE').update({'close_price': 105})
+        other.add(candle(1, 110))
+        other.commit()
+    finally:
+        other.close()
+
+    stats = rolling.candle_stats('RELSE', '1h')
+    assert (stats['open'], stats['close'], stats['count']) == (105, 110, 2)
@@ -0,0 +1,115 @@
+"""
+Test the webhook ingestion queue: per-symbol ordering, backpressure and stats
+"""
+import threading
+import time
+
+from src.services.signal_queue_service import SignalQueue
+
+
+def test_per_symbol_ordering():
+    """Jobs for the same symbol run in the order they were enqueued"""
+    seen = {}
+    lock = threading.Lock()
+
+    def handler(job):
+        time.sleep(0.001)
+        with lock:
+            seen.setdefault(job['symbol'], []).append(job['seq'])
+
+    q = SignalQueue(handler, workers=3, max_depth=300)
+    q.start()
+    try:
+        for seq in range(50):
+            for symbol in ('BTCUSD', 'ETHUSD', 'SOLUSD'):
+                assert q.enqueue({'symbol': symbol, 'seq': seq})
+        q.join()
+    finally:
+        q.stop()
+
+    for symbol in ('BTCUSD', 'ETHUSD', 'SOLUSD'):
+        assert seen[symbol] == list(range(50))
+
+
+def test_backpressure_rejects_when_full():
+    """A full queue rejects new jobs instead of blocking the caller"""
+    q = SignalQueue(lambda job: None, workers=1, max_depth=2)
+
+    assert q.enqueue({'symbol': 'BTCUSD'})
+    assert q.enqueue({'symbol': 'BTCUSD'})
+    assert not q.enqueue({'symbol': 'BTCUSD'})
+
+    stats = q.get_stats()
+    assert stats['depth'] == 2
+    assert stats['enqueued'] == 2
+    assert stats['rejected'] == 1
+
+
+def test_depth_is_shared_across_workers():
+    """One busy symbol can use every free slot, not just its worker's share"""
+    q = SignalQueue(lambda job: None, workers=4, max_depth=8)
+
+    for _ in range(8):
+        assert q.enqueue({'symbol': 'BTCUSD'})
+    assert not q.enqueue({'symbol': 'ETHUSD'})
+
+    stats = q.get_stats()
+    assert stats['depth'] == 8
+    assert sum(stats['worker_depths']) == 8
+    assert stats['rejected'] == 1
+
+
+def test_stats_track_latency_and_failures():
+    """Failed handlers are counted and latency samples are recorded"""
+    def handler(job):
+        if job.get('fail'):
+            raise RuntimeError('boom')
+
+    q = SignalQueue(handler, workers=2, max_depth=10)
+    q.start()
+    try:
+        q.enqueue({'symbol': 'BTCUSD'})
+        q.enqueue({'symbol': 'ETHUSD', 'fail': True})
+        q.join()
+    finally:
+        q.stop()
+
+    stats = q.get_stats()
+    assert stats['processed'] == 1
+    assert stats['failed'] == 1
+    assert stats['latency_ms']['samples'] == 2
+    assert stats['latency_ms']['p50'] is not None
+
+
+def test_queued_signal_is_advanced_without_reclaiming_its_key():
+    """The worker reuses the QUEUED row, records the outcome and skips the key insert"""
+    from src.database.session import SessionLocal
+    from src.models.base import IdempotencyKey, Signal, Trade
+    from src.services.signal_queue_service import QUEUED_STATUS
+    from src.tasks.signal_tasks import process_signal_task
+
+    session = SessionLocal()
+    try:
+        sig = Signal(source='webhook', symbol='QSIGUSD', action='BUY', price=100,
+                     raw='buy QSIGUSD', status=QUEUED_STATUS)
+        session.add(sig)
+        session.commit()
+        signal_id = sig.id
+    finally:
+        session.close()
+
+    result = process_signal_task('queued-key-1', 'buy QSIGUSD', 'BUY', 'QSIGUSD', 100, None,
+                                 signal_id=signal_id)
+    assert result['action'] == 'opened'
+
+    session = SessionLocal()
+    try:
+        sig = session.get(Signal, signal_id)
+        assert sig.status == 'EXECUTED'
+        trade = session.query(Trade).filter(Trade.symbol == 'QSIGUSD').one()
+        assert sig.trade_id == trade.id
+        assert sig.executed_at is not None
+        assert session.query(Signal).filter(Signal.symbol == 'QSIGUSD').count() == 1
+        assert session.query(IdempotencyKey).filter(IdempotencyKey.key == 'queued-key-1').count() == 0
+    finally:
+        session.close()
@@ -0,0 +1,181 @@
+"""
+Test the Telegram notification dispatcher against a local stub Bot API
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.services.http_client import HttpClient
+from src.services.notification_service import TelegramNotifier
+
+
+class StubBotApi(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        message = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        time.sleep(server.delay)
+        with server.lock:
+            limited = server.rate_limit > 0
+            rejected = not limited and server.reject_formatted and 'parse_mode' in message
+            if limited:
+                server.rate_limit -= 1
+            elif rejected:
+                server.rejected.append(message)
+            else:
+                server.messages.append((self.path, message, time.monotonic()))
+        if limited:
+            status, body = 429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 0.2}}
+        elif rejected:
+            status, body = 400, {'ok': False, 'error_code': 400,
+                                 'description': "Bad Request: can't parse entities"}
+        else:
+            status, body = 200, {'ok': True, 'result': {}}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def bot_api():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubBotApi)
+    server.lock = threading.Lock()
+    server.messages = []
+    server.delay = 0.0
+    server.rate_limit = 0
+    server.reject_formatted = False
+    server.rejected = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def make_notifier(url, **kwargs):
+    kwargs.setdefault('coalesce_window', 0.05)
+    return TelegramNotifier('TEST:TOKEN', default_chat='100', api_url=url,
+                            http=HttpClient(), **kwargs)
+
+
+def test_bursts_coalesce_into_one_message_per_chat(bot_api):
+    server, url = bot_api
+    server.delay = 0.3
+    notifier = make_notifier(url)
+    notifier.start()
+    try:
+        started = time.perf_counter()
+        for i in range(10):
+            assert notifier.notify(f"signal {i}", parse_mode='Markdown')
+        for i in range(3):
+            assert notifier.notify(f"other {i}", chat_id='200')
+        # Enqueueing never waits on the (slow) API
+        assert time.perf_counter() - started < 0.1
+        assert notifier.flush(5)
+    finally:
+        notifier.stop()
+
+    assert len(server.messages) == 2
+    by_chat = {m['chat_id']: m for _, m, _ in server.messages}
+    assert by_chat['100']['text'] == '\n\n'.join(f"signal {i}" for i in range(10))
+    assert by_chat['100']['parse_mode'] == 'Markdown'
+    assert by_chat['200']['text'] == 'other 0\n\nother 1\n\nother 2'
+    assert 'parse_mode' not in by_chat['200']
+    assert all(path == '/botTEST:TOKEN/sendMessage' for path, _, _ in server.messages)
+
+    stats = notifier.get_stats()
+    assert (stats['enqueued'], stats['delivered'], stats['messages_sent']) == (13, 13, 2)
+    assert stats['coalesced'] == 11
+    assert stats['latency_ms']['p50'] is not None
+
+
+def test_overload_drops_and_summarizes(bot_api):
+    server, url = bot_api
+    notifier = make_notifier(url, max_queue=5, max_batch=3)
+    # Not started yet: the queue fills up
+    accepted = [notifier.notify(f"alert {i}") for i in range(8)]
+    assert accepted == [True] * 5 + [False] * 3
+
+    notifier.start()
+    try:
+        assert notifier.flush(5)
+    finally:
+        notifier.stop()
+
+    assert len(server.messages) == 1
+    text = server.messages[0][1]['text']
+    assert text.startswith('alert 0\n\nalert 1\n\nalert 2')
+    assert '... and 2 more notification(s)' in text
+    assert '3 notification(s) dropped' in text
+    stats = notifier.get_stats()
+    assert (stats['dropped'], stats['delivered'], stats['summarized']) == (3, 3, 1)
+
+
+def test_token_bucket_paces_sends_and_429_backs_off(bot_api):
+    server, url = bot_api
+    notifier = make_notifier(url, coalesce_window=0.0, chat_rate=10, chat_burst=1)
+    notifier.start()
+    try:
+        for i in range(4):
+            notifier.notify(f"tick {i}")
+            time.sleep(0.02)
+        assert notifier.flush(5)
+
+        # Rate limited by the API: the batch is kept and sent after retry_after
+        server.rate_limit = 1
+        limited_at = time.monotonic()
+        notifier.notify('after limit')
+        assert notifier.flush(5)
+    finally:
+        notifier.stop()
+
+    times = [t for _, _, t in server.messages[:-1]]
+    assert all(b - a >= 0.08 for a, b in zip(times, times[1:]))
+    assert sum(m['text'].count('tick') for _, m, _ in server.messages) == 4
+    assert server.messages[-1][1]['text'] == 'after limit'
+    assert server.messages[-1][2] - limited_at >= 0.2
+
+    stats = notifier.get_stats()
+    assert stats['rate_limited'] == 1
+    # Counted once per held-back message, not per dispatcher pass
+    assert 1 <= stats['throttled'] <= 4
+    assert stats['failed'] == 0
+
+
+def test_rejected_formatting_falls_back_to_plain_text(bot_api):
+    server, url = bot_api
+    server.reject_formatted = True
+    notifier = make_notifier(url, chat_rate=20)
+    notifier.start()
+    try:
+        notifier.notify('*filled* BTCUSD', parse_mode='Markdown')
+        notifier.notify('bad_entity [link', parse_mode='Markdown')
+        assert notifier.flush(5)
+    finally:
+        notifier.stop()
+
+    assert len(server.rejected) == 1
+    assert len(server.messages) == 1
+    message = server.messages[0][1]
+    assert message['text'] == '*filled* BTCUSD\n\nbad_entity [link'
+    assert 'parse_mode' not in message
+    stats = notifier.get_stats()
+    assert (stats['plain_retries'], stats['delivered'], stats['failed']) == (1, 2, 0)
+
+
+def test_skips_without_token_or_chat(bot_api):
+    _, url = bot_api
+    notifier = TelegramNotifier(None, default_chat='100', api_url=url, http=HttpClient())
+    assert not notifier.notify('hello')
+    notifier = TelegramNotifier('TEST:TOKEN', api_url=url, http=HttpClient())
+    assert not notifier.notify('hello')
+    assert notifier.get_stats()['enqueued'] == 0
@@ -0,0 +1,117 @@
+"""
+Test the write-behind buffer for historical_prices ticks
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from src.database.session import SessionLocal
+from src.models.base import HistoricalPrice
+from src.services.tick_buffer_service import TickWriteBuffer
+
+
+def make_tick(symbol, seconds):
+    return {
+        'symbol': symbol,
+        'timestamp': datetime(2024, 1, 1) + timedelta(seconds=seconds),
+        'bid_price': Decimal('99'),
+        'ask_price': Decimal('101'),
+        'mid_price': Decimal('100'),
+        'spread': Decimal('2'),
+        'spread_pct': Decimal('2'),
+        'volume_bid': Decimal('1'),
+        'volume_ask': Decimal('1'),
+    }
+
+
+def count_rows(symbol):
+    session = SessionLocal()
+    try:
+        return session.query(HistoricalPrice).filter(
+            HistoricalPrice.symbol == symbol
+        ).count()
+    finally:
+        session.close()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_flushes_one_batch_at_size_threshold():
+    """Rows stay in memory until the batch is full, then land together"""
+    buffer = TickWriteBuffer(max_rows=3, flush_interval=60)
+    flushed_on = []
+    flush = buffer.flush
+
+    def recording_flush():
+        flushed_on.append(threading.current_thread().name)
+        return flush()
+
+    buffer.flush = recording_flush
+    buffer.start()
+    try:
+        buffer.add(make_tick('BUFA', 0))
+        buffer.add(make_tick('BUFA', 1))
+        assert buffer.pending() == 2
+        assert count_rows('BUFA') == 0
+
+        # The full batch is written by the flusher thread, not the caller
+        buffer.add(make_tick('BUFA', 2))
+        assert wait_for(lambda: count_rows('BUFA') == 3)
+        assert flushed_on == ['TickFlusher']
+    finally:
+        buffer.stop()
+
+    stats = buffer.get_stats()
+    assert stats['flushes'] == 1
+    assert stats['rows_per_flush']['last'] == 3
+
+
+def test_full_backlog_drops_oldest_rows():
+    """A flusher that can't keep up never lets the buffer grow past max_pending"""
+    buffer = TickWriteBuffer(max_rows=2, flush_interval=60, max_pending=4)
+    release = threading.Event()
+    flush = buffer.flush
+
+    def stalled_flush():
+        release.wait(timeout=5)
+        return flush()
+
+    buffer.flush = stalled_flush
+    buffer.start()
+    try:
+        for second in range(10):
+            buffer.add(make_tick('BUFC', second))
+        assert buffer.pending() == 4
+        assert buffer.get_stats()['dropped'] == 6
+    finally:
+        release.set()
+        buffer.stop()
+
+    session = SessionLocal()
+    try:
+        kept = [row.timestamp for row in session.query(HistoricalPrice).filter(
+            HistoricalPrice.symbol == 'BUFC'
+        ).order_by(HistoricalPrice.timestamp)]
+    finally:
+        session.close()
+    assert kept == [make_tick('BUFC', s)['timestamp'] for s in range(6, 10)]
+
+
+def test_stop_flushes_pending_rows():
+    """Stopping the buffer writes out the partial batch"""
+    buffer = TickWriteBuffer(max_rows=100, flush_interval=60)
+    buffer.start()
+    for second in range(5):
+        buffer.add(make_tick('BUFB', second))
+    assert count_rows('BUFB') == 0
+
+    buffer.stop()
+
+    assert count_rows('BUFB') == 5
+    assert buffer.get_stats()['rows_written'] == 5
@@ -0,0 +1,148 @@
+"""
+Test tick downsampling, tiered expiry and tier selection
+"""
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from src.api.historical import _parse_range
+from src.database.session import SessionLocal
+from src.models.base import HistoricalPrice, HistoricalPriceSummary
+from src.services.tick_retention_service import (
+    HOUR_TIER,
+    MINUTE_TIER,
+    RAW_TIER,
+    TickRetention,
+    merge_summaries,
+    summarize_ticks,
+)
+
+
+def test_summaries_merge_to_the_same_hour():
+    """Hour summaries built from minutes match a direct build from ticks"""
+    start = datetime(2024, 1, 1, 10, 0)
+    ticks = [
+        (start + timedelta(seconds=30 * i), Decimal(100 + i % 9), Decimal('0.01') * (i % 4 + 1))
+        for i in range(240)
+    ]
+
+    minutes = summarize_ticks(ticks, 1)
+    assert len(minutes) == 120
+    assert minutes[0]['tick_count'] == 2
+
+    hours = merge_summaries(minutes, 60)
+    assert hours == summarize_ticks(ticks, 60)
+    assert hours[0]['min_spread_pct'] == Decimal('0.01')
+    assert hours[0]['max_spread_pct'] == Decimal('0.04')
+
+
+def test_select_tier_by_range():
+    retention = TickRetention(raw_retention_hours=48, minute_retention_days=30)
+    now = datetime(2024, 6, 1, 12, 0)
+
+    assert retention.select_tier(None, now=now) == RAW_TIER
+    assert retention.select_tier(now - timedelta(hours=1), now=now) == RAW_TIER
+    assert retention.select_tier(now - timedelta(hours=24), now=now) == MINUTE_TIER
+    assert retention.select_tier(now - timedelta(days=3), now=now) == MINUTE_TIER
+    assert retention.select_tier(now - timedelta(days=10), now=now) == HOUR_TIER
+    assert retention.select_tier(now - timedelta(days=60), now=now) == HOUR_TIER
+
+    # An offset is converted to UTC, not dropped
+    plus_five = timezone(timedelta(hours=5))
+    start = (now - timedelta(hours=8)).replace(tzinfo=timezone.utc).astimezone(plus_five)
+    assert retention.select_tier(start, now=now) == MINUTE_TIER
+
+
+def test_hours_and_from_time_both_apply():
+    """The later of the hours cutoff and from_time is the range start"""
+    week_ago = (datetime.utcnow() - timedelta(days=7)).isoformat() + 'Z'
+    start, end = _parse_range('1', week_ago, None)
+    assert datetime.utcnow() - start < timedelta(hours=1, minutes=1)
+    assert end is None
+
+    recent = datetime.utcnow() - timedelta(minutes=10)
+    as_plus_five = recent.replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(hours=5)))
+    start, _ = _parse_range('1', as_plus_five.isoformat(), None)
+    assert start == recent
+
+
+def test_raw_ticks_expire_only_after_downsampling():
+    """Old ticks are deleted in batches once their minutes are summarized"""
+    symbol = 'RETUSD'
+    start = datetime(2024, 3, 1, 0, 0)
+    session = SessionLocal()
+    try:
+        for i in range(3 * 3600 // 10):
+            session.add(HistoricalPrice(
+                symbol=symbol, timestamp=start + timedelta(seconds=10 * i),
+                bid_price=Decimal('99'), ask_price=Decimal('101'),
+                mid_price=Decimal(100 + i % 5), spread=Decimal('2'),
+                spread_pct=Decimal('2')
+            ))
+        session.commit()
+    finally:
+        session.close()
+
+    retention = TickRetention(raw_retention_hours=1, batch_size=100, settle_seconds=0)
+    now = start + timedelta(hours=3)
+
+    # Nothing is summarized yet, so nothing may be deleted
+    assert retention.expire_symbol(symbol, now=now) == {RAW_TIER: 0, MINUTE_TIER: 0}
+
+    result = retention.run_once([symbol], now=now)[symbol]
+    assert result['summarized'] == {MINUTE_TIER: 180, HOUR_TIER: 3}
+    assert result['deleted'][RAW_TIER] == 2 * 3600 // 10
+
+    session = SessionLocal()
+    try:
+        oldest = session.query(HistoricalPrice).filter(
+            HistoricalPrice.symbol == symbol
+        ).order_by(HistoricalPrice.timestamp).first()
+        assert oldest.timestamp == start + timedelta(hours=2)
+
+        hours = session.query(HistoricalPriceSummary).filter(
+            HistoricalPriceSummary.symbol == symbol,
+            HistoricalPriceSummary.resolution == HOUR_TIER
+        ).all()
+        assert sum(h.tick_count for h in hours) == 3 * 3600 // 10
+    finally:
+        session.close()
+
+
+def test_recent_buckets_wait_for_buffered_ticks():
+    """A just-closed minute is summarized only after the settle delay"""
+    symbol = 'SETUSD'
+    start = datetime(2024, 4, 1, 0, 0)
+
+    def add_tick(ts, mid):
+        session = SessionLocal()
+        try:
+            session.add(HistoricalPrice(
+                symbol=symbol, timestamp=ts, bid_price=Decimal(mid - 1),
+                ask_price=Decimal(mid + 1), mid_price=Decimal(mid),
+                spread=Decimal('2'), spread_pct=Decimal('2')
+            ))
+            session.commit()
+        finally:
+            session.close()
+
+    retention = TickRetention(settle_seconds=12)
+    add_tick(start + timedelta(seconds=10), 100)
+    assert retention.downsample_symbol(symbol, now=start + timedelta(minutes=1, seconds=5)) == {
+        MINUTE_TIER: 0, HOUR_TIER: 0
+    }
+
+    # A tick the buffer flushes late still lands in its minute
+    add_tick(start + timedelta(seconds=59), 105)
+    assert retention.downsample_symbol(symbol, now=start + timedelta(minutes=1, seconds=15)) == {
+        MINUTE_TIER: 1, HOUR_TIER: 0
+    }
+
+    session = SessionLocal()
+    try:
+        minute = session.query(HistoricalPriceSummary).filter(
+            HistoricalPriceSummary.symbol == symbol,
+            HistoricalPriceSummary.resolution == MINUTE_TIER
+        ).one()
+        assert (minute.tick_count, minute.close_mid) == (2, Decimal(105))
+    finally:
+        session.close()
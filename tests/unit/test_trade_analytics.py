@@ -0,0 +1,133 @@
+"""
+Test the vectorized trade analytics against a per-trade reference
+"""
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from src.database.session import SessionLocal
+from src.models.base import Trade
+from src.services.trade_analytics_service import (
+    TradeFrame,
+    load_trade_frame,
+    streaks,
+    trading_flows,
+)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def reference_breakdown(trades, key):
+    """The previous per-trade loop"""
+    groups = {}
+    for t in trades:
+        k = key(t)
+        if k is None:
+            continue
+        g = groups.setdefault(k, {'count': 0, 'wins': 0, 'total_pnl': 0})
+        g['count'] += 1
+        if t['pnl']:
+            g['total_pnl'] += t['pnl']
+            if t['pnl'] > 0:
+                g['wins'] += 1
+    for g in groups.values():
+        g['win_rate'] = g['wins'] / g['count'] * 100
+    return groups
+
+
+def assert_groups_equal(actual, expected):
+    assert set(actual) == set(expected)
+    for key, group in expected.items():
+        assert actual[key]['count'] == group['count']
+        assert actual[key]['wins'] == group['wins']
+        assert actual[key]['total_pnl'] == pytest.approx(group['total_pnl'])
+        assert actual[key]['win_rate'] == pytest.approx(group['win_rate'])
+
+
+def test_breakdowns_match_reference():
+    rng = random.Random(7)
+    start = datetime(2024, 3, 1)
+    trades = []
+    for _ in range(2000):
+        opened = start + timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+        closed = rng.random() < 0.8
+        trades.append({
+            'symbol': rng.choice(['BTCUSD', 'ETHUSD', 'SOLUSD']),
+            'action': rng.choice(['BUY', 'SELL']),
+            'status': 'CLOSED' if closed else 'OPEN',
+            'open_time': opened,
+            'close_time': opened + timedelta(minutes=rng.randint(1, 3000)) if closed else None,
+            'pnl': round(rng.uniform(-50, 50), 2) if closed and rng.random() < 0.95 else None,
+        })
+
+    frame = TradeFrame.from_rows([
+        (
+            t['symbol'], t['action'], t['status'],
+            (t['open_time'] - EPOCH).total_seconds(),
+            (t['close_time'] - EPOCH).total_seconds() if t['close_time'] else None,
+            t['pnl'],
+        )
+        for t in trades
+    ])
+    flows = trading_flows(frame, 30)
+
+    assert flows['total_trades_analyzed'] == len(trades)
+    assert_groups_equal(flows['by_hour'], reference_breakdown(trades, lambda t: t['open_time'].hour))
+    assert_groups_equal(flows['by_day'], reference_breakdown(trades, lambda t: t['open_time'].strftime('%A')))
+    assert_groups_equal(flows['by_action'], reference_breakdown(trades, lambda t: t['action']))
+    assert_groups_equal(flows['by_symbol'], reference_breakdown(trades, lambda t: t['symbol']))
+
+    def hold_bucket(t):
+        if t['status'] != 'CLOSED':
+            return None
+        held = (t['close_time'] - t['open_time']).total_seconds()
+        for upper, label in ((300, '<5m'), (900, '5-15m'), (3600, '15m-1h'),
+                             (14400, '1-4h'), (86400, '4-24h')):
+            if held < upper:
+                return label
+        return '>1d'
+    assert_groups_equal(flows['by_hold_time'], reference_breakdown(trades, hold_bucket))
+
+
+def test_streaks():
+    pnls = [5, 3, -1, 2, 4, 6, 1, 0, -2, -3, -4, 7, -1, -1]
+    frame = TradeFrame.from_rows([
+        ('X', 'BUY', 'CLOSED', 0, i, pnl) for i, pnl in enumerate(pnls)
+    ])
+    assert streaks(frame) == {
+        'longest_win': 4, 'longest_loss': 3, 'current': 2, 'current_type': 'loss'
+    }
+    assert streaks(TradeFrame.from_rows([]))['longest_win'] == 0
+
+
+def test_load_trade_frame_from_database():
+    since = datetime(2023, 1, 2)
+    session = SessionLocal()
+    try:
+        session.add_all([
+            Trade(action='BUY', symbol='FRAMEUSD', quantity=Decimal('1'),
+                  open_price=Decimal('10'), open_time=since + timedelta(hours=5),
+                  close_time=since + timedelta(hours=7), profit_loss=Decimal('2.5'),
+                  status='CLOSED'),
+            Trade(action='SELL', symbol='FRAMEUSD', quantity=Decimal('1'),
+                  open_price=Decimal('10'), open_time=since + timedelta(hours=6),
+                  status='OPEN'),
+            Trade(action='SELL', symbol='FRAMEUSD', quantity=Decimal('1'),
+                  open_price=Decimal('10'), open_time=since - timedelta(days=1),
+                  status='OPEN'),
+        ])
+        session.commit()
+        frame = load_trade_frame(session, since)
+    finally:
+        session.close()
+
+    mine = frame.symbols[frame.symbol_codes] == 'FRAMEUSD'
+    assert mine.sum() == 2
+    opened = sorted(frame.open_ts[mine])
+    assert opened[0] == (since + timedelta(hours=5) - EPOCH).total_seconds()
+    assert sorted(frame.pnl[mine].tolist()) == [0.0, 2.5]
+    assert frame.closed[mine].sum() == 1
+    held = frame.close_ts[mine & frame.closed] - frame.open_ts[mine & frame.closed]
+    assert held.tolist() == [7200.0]
@@ -0,0 +1,130 @@
+"""
+Test persisted trailing-stop state
+"""
+from decimal import Decimal
+
+import pytest
+
+from src.database import upsert
+from src.database.session import SessionLocal
+from src.models.base import Trade, TrailingStopState
+from src.services.event_bus import TRADE_CLOSED, get_event_bus
+from src.services.risk_management_service import RiskManager
+from src.services.trailing_state_service import TrailingStateStore
+
+
+def open_trade(action='BUY', price='100'):
+    session = SessionLocal()
+    try:
+        trade = Trade(action=action, symbol='TRAILUSD', quantity=Decimal('1'),
+                      open_price=Decimal(price), status='OPEN')
+        session.add(trade)
+        session.commit()
+        return trade.id
+    finally:
+        session.close()
+
+
+def persisted_mark(trade_id):
+    session = SessionLocal()
+    try:
+        row = session.get(TrailingStopState, trade_id)
+        return row.mark if row else None
+    finally:
+        session.close()
+
+
+def trailing_manager():
+    manager = RiskManager(trailing_state=TrailingStateStore())
+    manager.trailing_stop_enabled = True
+    manager.trailing_stop_type = 'percent'
+    manager.trailing_stop_percent = Decimal('0.005')
+    manager.take_profit_pct = Decimal('0.5')
+    return manager
+
+
+def test_restarted_monitor_resumes_trailing_stop():
+    trade_id = open_trade()
+    session = SessionLocal()
+    try:
+        trade = session.get(Trade, trade_id)
+
+        first = trailing_manager()
+        for price in ('101', '104', '106'):
+            assert first.should_close_trade(trade, Decimal(price))[0] is False
+        assert first.trailing_state.flush() == 1
+        assert persisted_mark(trade_id) == Decimal('106')
+
+        # A fresh process picks the high-water mark up from the table
+        restarted = trailing_manager()
+        should_close, _, exit_type = restarted.should_close_trade(trade, Decimal('105'))
+        assert (should_close, exit_type) == (True, 'trailing_stop')
+    finally:
+        session.close()
+
+
+@pytest.mark.parametrize('on_conflict', [True, False])
+def test_shared_table_keeps_best_mark_per_side(on_conflict, monkeypatch):
+    if not on_conflict:
+        monkeypatch.setattr(upsert, 'ON_CONFLICT_INSERTS', {})
+    buy_id, sell_id = open_trade('BUY'), open_trade('SELL')
+    a, b = TrailingStateStore(), TrailingStateStore()
+
+    a.set(buy_id, 'BUY', Decimal('105'))
+    a.set(sell_id, 'SELL', Decimal('95'))
+    a.flush()
+    b.set(buy_id, 'BUY', Decimal('103'))
+    b.set(sell_id, 'SELL', Decimal('97'))
+    b.flush()
+
+    assert persisted_mark(buy_id) == Decimal('105')
+    assert persisted_mark(sell_id) == Decimal('95')
+    assert b.get_stats()['failed_flushes'] == 0
+
+
+def test_closing_a_trade_evicts_its_mark():
+    trade_id = open_trade()
+    store = TrailingStateStore()
+    bus = get_event_bus()
+    bus.subscribe(TRADE_CLOSED, store.on_trade_event)
+    try:
+        store.set(trade_id, 'BUY', Decimal('104'))
+        store.flush()
+        assert len(store) == 1
+
+        session = SessionLocal()
+        try:
+            trade = session.get(Trade, trade_id)
+            trade.status = 'CLOSED'
+            trade.close_price = Decimal('103')
+            session.commit()
+        finally:
+            session.close()
+
+        assert len(store) == 0
+        assert store.get(trade_id) is None
+        store.flush()
+        assert persisted_mark(trade_id) is None
+    finally:
+        bus.unsubscribe(TRADE_CLOSED, store.on_trade_event)
+
+    stats = store.get_stats()
+    assert stats['evictions'] == 1
+    assert stats['rows_deleted'] == 1
+
+
+def test_purge_removes_marks_of_trades_closed_while_down():
+    trade_id = open_trade()
+    store = TrailingStateStore()
+    store.set(trade_id, 'BUY', Decimal('101'))
+    store.flush()
+
+    session = SessionLocal()
+    try:
+        session.query(Trade).filter(Trade.id == trade_id).update({'status': 'CLOSED'})
+        session.commit()
+    finally:
+        session.close()
+
+    assert TrailingStateStore().purge_closed() >= 1
+    assert persisted_mark(trade_id) is None
@@ -0,0 +1,125 @@
+"""
+Test the trigger book: a range query over exit levels finds every
+position the per-trade rules would act on
+"""
+import random
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from src.api.trading_enhanced import trading_enhanced_bp
+from src.database.session import SessionLocal
+from src.models.base import Trade
+from src.services.event_bus import TRADE_TOPICS, get_event_bus
+from src.services.position_index_service import OpenPosition
+from src.services.risk_management_service import RiskManager
+from src.services.trailing_state_service import TrailingStateStore
+from src.services.trigger_book_service import TriggerBook
+
+
+def random_position(rng, trade_id):
+    entry = Decimal(rng.choice(['100', '2500.5', '0.3125']))
+    is_buy = rng.random() < 0.5
+    sign = 1 if is_buy else -1
+    return OpenPosition(
+        id=trade_id, symbol=f"BOOK{entry}", action='BUY' if is_buy else 'SELL',
+        open_price=entry,
+        stop_loss=rng.choice([None, entry * (1 - sign * Decimal(rng.randint(5, 40)) / 1000)]),
+        take_profit=rng.choice([None, entry * (1 + sign * Decimal(rng.randint(5, 60)) / 1000)]),
+    )
+
+
+@pytest.mark.parametrize('trailing', [None, 'percent', 'amount'])
+def test_triggered_covers_every_exit_and_mark_move(trailing):
+    rng = random.Random(7)
+    manager = RiskManager(trailing_state=TrailingStateStore())
+    if trailing:
+        manager.trailing_stop_enabled = True
+        manager.trailing_stop_type = trailing
+        manager.trailing_stop_amount = Decimal('0.5')
+
+    book = TriggerBook(manager)
+    positions = [random_position(rng, i) for i in range(600)]
+    for position in positions:
+        book.add(position)
+
+    for entry in ('100', '2500.5', '0.3125'):
+        base = Decimal(entry)
+        for _ in range(40):
+            price = base * (1 + Decimal(rng.randint(-120, 120)) / 1000)
+            candidates = {p.id for p in book.triggered(f"BOOK{entry}", price)}
+
+            moved = []
+            for position in positions:
+                if position.open_price != base:
+                    continue
+                mark = manager.trailing_state.get(position.id)
+                trade = SimpleNamespace(quantity=Decimal('1'), **position._asdict())
+                should_close, _, _ = manager.should_close_trade(trade, price)
+                if should_close or manager.trailing_state.get(position.id) != mark:
+                    assert position.id in candidates, (position, price)
+                    moved.append(position)
+            book.reprice(moved)
+
+    if not trailing:
+        # Near the entry price nothing is close to an exit level
+        assert len(book.triggered('BOOK100', Decimal('100.1'))) < len(positions) / 30
+
+
+def test_range_query_hits_levels_exactly():
+    book = TriggerBook(RiskManager(trailing_state=TrailingStateStore()))
+    book.add(OpenPosition(1, 'EXACTUSD', 'BUY', Decimal('100'), Decimal('98'), Decimal('103')))
+    book.add(OpenPosition(2, 'EXACTUSD', 'SELL', Decimal('100'), Decimal('102'), Decimal('97')))
+
+    def hits(price):
+        return sorted(p.id for p in book.triggered('EXACTUSD', Decimal(price)))
+
+    assert hits('100') == []
+    assert hits('98') == [1]
+    assert hits('97') == [1, 2]
+    assert hits('102') == [2]
+    assert hits('103') == [1, 2]
+
+    book.remove(1)
+    assert hits('97') == [2]
+    assert book.triggered('NOPEUSD', Decimal('1')) == []
+
+
+def test_modify_trade_refiles_stop_loss():
+    book = TriggerBook(RiskManager(trailing_state=TrailingStateStore()))
+    bus = get_event_bus()
+    for topic in TRADE_TOPICS:
+        bus.subscribe(topic, book.on_trade_event)
+    app = Flask(__name__)
+    app.register_blueprint(trading_enhanced_bp)
+    try:
+        book.load()
+        session = SessionLocal()
+        try:
+            trade = Trade(action='BUY', symbol='MODUSD', quantity=Decimal('1'),
+                          open_price=Decimal('100'), stop_loss=Decimal('95'), status='OPEN')
+            session.add(trade)
+            session.commit()
+            trade_id = trade.id
+        finally:
+            session.close()
+        assert book.triggered('MODUSD', Decimal('96.5')) == []
+
+        response = app.test_client().patch(
+            f'/api/trading/trades/{trade_id}/modify', json={'stop_loss': 97}
+        )
+        assert response.status_code == 200
+        assert [p.id for p in book.triggered('MODUSD', Decimal('96.5'))] == [trade_id]
+
+        session = SessionLocal()
+        try:
+            session.get(Trade, trade_id).status = 'CLOSED'
+            session.commit()
+        finally:
+            session.close()
+        assert book.triggered('MODUSD', Decimal('96.5')) == []
+    finally:
+        for topic in TRADE_TOPICS:
+            bus.unsubscribe(topic, book.on_trade_event)
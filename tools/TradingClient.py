@@ -14,11 +14,12 @@ from typing import Dict, Optional
 class DeltaExchangeClient:
     """Delta Exchange API Client with signature authentication"""
     
-    def __init__(self, api_key: str, api_secret: str, base_url: str = 'https://api.india.delta.exchange', mock_mode: bool = False):
+    def __init__(self, api_key: str, api_secret: str, base_url: str = 'https://api.india.delta.exchange', mock_mode: bool = False, session=None):
         self.base_url = base_url
         self.api_key = api_key
         self.api_secret = api_secret
-        self.session = requests.Session()
+        # Anything with requests.Session.request's signature, e.g. the app's shared HttpClient
+        self.session = session or requests.Session()
         self.mock_mode = mock_mode
     
     def generate_signature(self, message: str) -> str:
@@ -96,6 +97,10 @@ class DeltaExchangeClient:
             'Content-Type': 'application/json'
         }
         
+        # The signature covers the timestamp, so a retry would resend an
+        # expired one: the shared HttpClient must not retry signed calls
+        extra = {} if isinstance(self.session, requests.Session) else {'retries': 0}
+        
         # Make request
         try:
             response = self.session.request(
@@ -104,7 +109,8 @@ class DeltaExchangeClient:
                 data=payload,
                 params=params or {},
                 headers=headers,
-                timeout=(3, 27)
+                timeout=(3, 27),
+                **extra
             )
             
             # Check for API errors